@@ -1,10 +1,11 @@
 """Conversation management endpoints"""
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
+from app.api.v1.pagination import etag_response, keyset_page
 from app.core.database import get_db
 from app.models.conversation import Conversation, ConversationStatus
 
@@ -13,26 +14,28 @@ router = APIRouter()
 
 @router.get("/")
 def get_conversations(
+    request: Request,
     status: Optional[ConversationStatus] = Query(None),
     venue_id: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     db: Session = Depends(get_db)
 ):
-    """Get list of conversations with filters"""
-    query = select(Conversation)
+    """Get list of conversations with filters, newest first"""
+    filters = []
     
     if status:
-        query = query.where(Conversation.status == status)
+        filters.append(Conversation.status == status)
     
     if venue_id:
-        query = query.where(Conversation.venue_id == venue_id)
+        filters.append(Conversation.venue_id == venue_id)
     
-    result = db.execute(
-        query.offset(skip).limit(limit)
+    conversations, next_cursor = keyset_page(
+        db, Conversation, filters, cursor=cursor, limit=limit, fields=fields, skip=skip
     )
-    conversations = result.scalars().all()
-    return conversations
+    return etag_response(request, conversations, next_cursor)
 
 
 @router.get("/{conversation_id}")
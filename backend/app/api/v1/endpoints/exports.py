@@ -0,0 +1,79 @@
+"""Bulk export endpoints (streamed NDJSON / CSV)"""
+
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from app.api.v1.export_stream import export_query, stream_query, streaming_export
+from app.core import export_auth
+from app.core.database import DatabaseRole, db_manager
+from app.models.conversation import Conversation, ConversationStatus
+from app.models.monitoring import MonitoringLog
+
+router = APIRouter()
+
+FORMAT = Query("ndjson", pattern="^(ndjson|csv)$")
+SINCE = Query(None, description="Rows created at or after this time")
+UNTIL = Query(None, description="Rows created before this time")
+AFTER = Query(None, description="Resume after '<created_at>|<id>' of the last row received")
+FIELDS = Query(None, description="Comma-separated columns to export")
+
+
+def require_export_key(request: Request):
+    """Exports stream whole tables: they need EXPORT_API_KEY, and are off without one"""
+    if not export_auth.EXPORT_API_KEY:
+        raise HTTPException(status_code=503, detail="Exports disabled: EXPORT_API_KEY not configured")
+    if not export_auth.export_key_valid(export_auth.export_key_from(request.headers)):
+        raise HTTPException(status_code=401, detail="Invalid or missing API key", headers={"WWW-Authenticate": "Bearer"})
+
+
+def _read_session():
+    """Session for an export stream (replica when configured)"""
+    role = DatabaseRole.REPLICA if db_manager.engines[DatabaseRole.REPLICA] else DatabaseRole.PRIMARY
+    return db_manager.get_session(role)
+
+
+@router.get("/conversations")
+def export_conversations(
+    format: str = FORMAT,
+    status: Optional[ConversationStatus] = Query(None),
+    venue_id: Optional[str] = Query(None),
+    since: Optional[datetime] = SINCE,
+    until: Optional[datetime] = UNTIL,
+    after: Optional[str] = AFTER,
+    fields: Optional[str] = FIELDS,
+):
+    """Stream conversations, oldest first"""
+    filters = []
+    
+    if status:
+        filters.append(Conversation.status == status)
+    
+    if venue_id:
+        filters.append(Conversation.venue_id == venue_id)
+    
+    query = export_query(Conversation, filters, since=since, until=until, after=after, fields=fields)
+    return streaming_export(stream_query(_read_session, query, format), format, "conversations")
+
+
+@router.get("/monitoring-logs")
+def export_monitoring_logs(
+    format: str = FORMAT,
+    zone_id: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    since: Optional[datetime] = SINCE,
+    until: Optional[datetime] = UNTIL,
+    after: Optional[str] = AFTER,
+    fields: Optional[str] = FIELDS,
+):
+    """Stream monitoring logs, oldest first (bound with since/until to prune partitions)"""
+    filters = []
+    
+    if zone_id:
+        filters.append(MonitoringLog.zone_id == zone_id)
+    
+    if status:
+        filters.append(MonitoringLog.status == status)
+    
+    query = export_query(MonitoringLog, filters, since=since, until=until, after=after, fields=fields)
+    return streaming_export(stream_query(_read_session, query, format), format, "monitoring_logs")
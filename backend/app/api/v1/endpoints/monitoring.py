@@ -4,6 +4,7 @@ from typing import Dict, Any
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
+from app.core.concurrency import get_all_limiter_stats
 from app.core.database import get_db, db_manager
 from app.core.redis import redis_manager
 from app.services.soundtrack.client import soundtrack_client
@@ -41,4 +42,5 @@ def get_metrics() -> Dict[str, Any]:
         "database": db_health.get("performance_metrics"),
         "redis": redis_health.get("stats"),
         "soundtrack": soundtrack_metrics,
+        "upstream_concurrency": get_all_limiter_stats(),
     }
\ No newline at end of file
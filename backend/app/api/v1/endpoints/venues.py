@@ -1,10 +1,11 @@
 """Venue management endpoints"""
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
+from app.api.v1.pagination import etag_response, keyset_page
 from app.core.database import get_db
 from app.models.venue import Venue
 
@@ -13,18 +14,16 @@ router = APIRouter()
 
 @router.get("/")
 def get_venues(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     db: Session = Depends(get_db)
 ):
-    """Get list of venues with pagination"""
-    result = db.execute(
-        select(Venue)
-        .offset(skip)
-        .limit(limit)
-    )
-    venues = result.scalars().all()
-    return venues
+    """Get list of venues, newest first, with keyset pagination"""
+    venues, next_cursor = keyset_page(db, Venue, cursor=cursor, limit=limit, fields=fields, skip=skip)
+    return etag_response(request, venues, next_cursor)
 
 
 @router.get("/{venue_id}")
@@ -1,10 +1,11 @@
 """Zone management endpoints"""
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
+from app.api.v1.pagination import etag_response, keyset_page
 from app.core.database import get_db
 from app.models.zone import Zone
 
@@ -13,22 +14,22 @@ router = APIRouter()
 
 @router.get("/")
 def get_zones(
+    request: Request,
     venue_id: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     db: Session = Depends(get_db)
 ):
-    """Get list of zones with optional venue filter"""
-    query = select(Zone)
+    """Get list of zones with optional venue filter, newest first"""
+    filters = []
     
     if venue_id:
-        query = query.where(Zone.venue_id == venue_id)
+        filters.append(Zone.venue_id == venue_id)
     
-    result = db.execute(
-        query.offset(skip).limit(limit)
-    )
-    zones = result.scalars().all()
-    return zones
+    zones, next_cursor = keyset_page(db, Zone, filters, cursor=cursor, limit=limit, fields=fields, skip=skip)
+    return etag_response(request, zones, next_cursor)
 
 
 @router.get("/{zone_id}")
@@ -0,0 +1,153 @@
+"""
+Keyset pagination, column projections and ETags for list endpoints.
+
+OFFSET pagination reads and discards every row before the page, so deep
+pages cost O(offset). List endpoints page on (created_at, id) instead,
+newest first: the cursor is the last row's key, and the next page is the
+rows strictly after it in that order, which the (created_at, id) index
+answers directly at any depth.
+
+- The next page's cursor is returned in the X-Next-Cursor header (absent on
+  the last page), so the body stays the plain list it always was.
+- fields= selects only the named columns. By default every column except
+  JSON/JSONB blobs is returned. id and created_at are always included
+  since the cursor is built from them.
+- Responses carry a weak ETag over the body; a request whose
+  If-None-Match matches gets 304 Not Modified with no body.
+"""
+
+import base64
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import JSON, select, tuple_
+from sqlalchemy.orm import Session
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CURSOR_HEADER = "X-Next-Cursor"
+
+# Columns every projection carries (the cursor is built from them)
+KEY_COLUMNS = ("id", "created_at")
+
+
+def encode_cursor(created_at: datetime, row_id: Any) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), row_id
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def select_columns(model, fields: Optional[str]) -> List[Any]:
+    """Columns for a fields= projection (default: all but JSON blobs)"""
+    columns = model.__table__.columns
+    if fields:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in columns]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    else:
+        names = [column.name for column in columns if not isinstance(column.type, JSON)]
+
+    for key in reversed(KEY_COLUMNS):
+        if key not in names:
+            names.insert(0, key)
+    return [columns[name] for name in names]
+
+
+def coerce_key(column, value: str) -> Any:
+    """Cursor id back to the column's Python type (UUID, int, str)"""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    try:
+        return value if python_type is str else python_type(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_page(
+    db: Session,
+    model,
+    filters: Sequence[Any] = (),
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    fields: Optional[str] = None,
+    skip: int = 0,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of model rows, newest first.
+
+    Args:
+        filters: WHERE clauses
+        cursor: X-Next-Cursor of the previous page (None = first page)
+        fields: Comma-separated column names
+        skip: Legacy OFFSET, only used without a cursor
+
+    Returns:
+        (rows as dicts, cursor for the next page or None on the last page)
+    """
+    query = (
+        select(*select_columns(model, fields))
+        .where(*filters)
+        .order_by(model.created_at.desc(), model.id.desc())
+    )
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        id_column = model.__table__.columns["id"]
+        query = query.where(tuple_(model.created_at, model.id) < (created_at, coerce_key(id_column, row_id)))
+    elif skip:
+        query = query.offset(skip)
+
+    # One extra row tells us whether there is a next page
+    rows = db.execute(query.limit(limit + 1)).mappings().all()
+    items = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+    return items, next_cursor
+
+
+def _dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":")).encode()
+
+
+def _etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/ prefixes don't matter
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def etag_response(request: Request, content: Any, next_cursor: Optional[str] = None) -> Response:
+    """JSON response with a weak ETag, or 304 if the client already has it"""
+    body = _dumps(jsonable_encoder(content))
+    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag}
+    if next_cursor:
+        headers[CURSOR_HEADER] = next_cursor
+
+    if _etag_matches(etag, request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
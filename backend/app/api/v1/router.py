@@ -1,6 +1,6 @@
 """API v1 router configuration"""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
 from app.api.v1.endpoints import (
     webhooks,
@@ -9,6 +9,7 @@ from app.api.v1.endpoints import (
     zones,
     conversations,
     monitoring,
+    exports,
 )
 
 api_router = APIRouter()
@@ -19,4 +20,10 @@ api_router.include_router(health.router, prefix="/health", tags=["Health"])
 api_router.include_router(venues.router, prefix="/venues", tags=["Venues"])
 api_router.include_router(zones.router, prefix="/zones", tags=["Zones"])
 api_router.include_router(conversations.router, prefix="/conversations", tags=["Conversations"])
-api_router.include_router(monitoring.router, prefix="/monitoring", tags=["Monitoring"])
\ No newline at end of file
+api_router.include_router(monitoring.router, prefix="/monitoring", tags=["Monitoring"])
+api_router.include_router(
+    exports.router,
+    prefix="/exports",
+    tags=["Exports"],
+    dependencies=[Depends(exports.require_export_key)],
+)
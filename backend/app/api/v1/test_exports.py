@@ -0,0 +1,47 @@
+"""
+Tests for the API key on the /exports router.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import exports
+from app.api.v1.router import api_router
+from app.core import export_auth
+
+PATHS = ["/api/v1/exports/conversations", "/api/v1/exports/monitoring-logs"]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Rows never reach the database
+    monkeypatch.setattr(exports, "stream_query", lambda open_session, query, fmt: iter([b'{"id": 1}\n']))
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_exports_off_without_a_configured_key(client, monkeypatch, path):
+    monkeypatch.setattr(export_auth, "EXPORT_API_KEY", "")
+    response = client.get(path, headers={"X-API-Key": "anything"})
+    assert response.status_code == 503
+
+
+@pytest.mark.parametrize("path", PATHS)
+@pytest.mark.parametrize("headers", [{}, {"X-API-Key": "wrong"}, {"Authorization": "Basic k1"}])
+def test_exports_reject_a_missing_or_wrong_key(client, monkeypatch, path, headers):
+    monkeypatch.setattr(export_auth, "EXPORT_API_KEY", "k1")
+    response = client.get(path, headers=headers)
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == "Bearer"
+
+
+@pytest.mark.parametrize("path", PATHS)
+@pytest.mark.parametrize("headers", [{"X-API-Key": "k1"}, {"Authorization": "Bearer k1"}])
+def test_exports_stream_with_the_key(client, monkeypatch, path, headers):
+    monkeypatch.setattr(export_auth, "EXPORT_API_KEY", "k1")
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200
+    assert response.content == b'{"id": 1}\n'
@@ -0,0 +1,163 @@
+"""
+Tests for keyset pagination, projections and ETags.
+Runs against in-memory SQLite with a stand-in conversations table that has
+the same key columns and (created_at, id) index as the real models.
+"""
+
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, String, Uuid, create_engine, select
+from sqlalchemy.orm import Session, declarative_base
+from starlette.requests import Request
+
+from app.api.v1.pagination import CURSOR_HEADER, encode_cursor, etag_response, keyset_page
+
+Base = declarative_base()
+
+
+class Conversation(Base):
+    __tablename__ = "conversations"
+    __table_args__ = (Index("idx_conversation_created_id", "created_at", "id"),)
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    created_at = Column(DateTime, nullable=False)
+    customer_name = Column(String(255))
+    message_count = Column(Integer)
+    context = Column(JSON)
+
+
+START = datetime(2025, 1, 1)
+
+
+def make_session(count):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    # Five rows per second, so pages split rows that share a created_at
+    session.execute(
+        Conversation.__table__.insert(),
+        [
+            {
+                "id": uuid.uuid4(),
+                "created_at": START + timedelta(seconds=n // 5),
+                "customer_name": f"Customer {n}",
+                "message_count": n,
+                "context": {"history": ["x" * 50] * 5},
+            }
+            for n in range(count)
+        ],
+    )
+    session.commit()
+    return session
+
+
+def make_request(headers=None):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/conversations/",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    })
+
+
+def test_cursor_walk_returns_every_row_once_newest_first():
+    session = make_session(253)
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        items, cursor = keyset_page(session, Conversation, cursor=cursor, limit=100)
+        seen += items
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert len({item["id"] for item in seen}) == 253
+    keys = [(item["created_at"], item["id"]) for item in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_filters_and_projection():
+    session = make_session(50)
+
+    items, cursor = keyset_page(
+        session, Conversation, [Conversation.message_count < 10], limit=20, fields="customer_name"
+    )
+    assert cursor is None
+    assert len(items) == 10
+    assert set(items[0]) == {"id", "created_at", "customer_name"}
+
+    # JSON blobs only when asked for
+    items, _ = keyset_page(session, Conversation, limit=1)
+    assert "context" not in items[0] and "message_count" in items[0]
+    items, _ = keyset_page(session, Conversation, limit=1, fields="context")
+    assert items[0]["context"] == {"history": ["x" * 50] * 5}
+
+    with pytest.raises(HTTPException) as error:
+        keyset_page(session, Conversation, fields="customer_name,password")
+    assert error.value.status_code == 400
+    with pytest.raises(HTTPException):
+        keyset_page(session, Conversation, cursor="not-a-cursor")
+
+
+def test_etag_and_not_modified():
+    session = make_session(30)
+    items, cursor = keyset_page(session, Conversation, limit=10)
+
+    first = etag_response(make_request(), items, cursor)
+    assert first.status_code == 200
+    assert first.headers[CURSOR_HEADER] == cursor
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    again = etag_response(make_request({"If-None-Match": etag}), items, cursor)
+    assert again.status_code == 304
+    assert again.body == b""
+    assert again.headers["ETag"] == etag
+
+    session.execute(Conversation.__table__.update().values(customer_name="Renamed"))
+    items, cursor = keyset_page(session, Conversation, limit=10)
+    changed = etag_response(make_request({"If-None-Match": etag}), items, cursor)
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_benchmark_deep_page_at_100k_conversations():
+    """Page 1000 costs about what page 1 does with a cursor, unlike OFFSET"""
+    session = make_session(100_000)
+    limit = 100
+
+    def timed(run, repeat=5):
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = run()
+            best = min(best, time.perf_counter() - started)
+        return best, result
+
+    # Cursor for page 1000 = key of the last row of page 999
+    last = session.execute(
+        select(Conversation.created_at, Conversation.id)
+        .order_by(Conversation.created_at.desc(), Conversation.id.desc())
+        .offset(999 * limit - 1)
+        .limit(1)
+    ).one()
+    cursor = encode_cursor(last.created_at, last.id)
+
+    first_page, _ = timed(lambda: keyset_page(session, Conversation, limit=limit))
+    keyset_deep, (keyset_items, _) = timed(lambda: keyset_page(session, Conversation, cursor=cursor, limit=limit))
+    offset_deep, (offset_items, _) = timed(lambda: keyset_page(session, Conversation, limit=limit, skip=999 * limit))
+
+    assert [item["id"] for item in keyset_items] == [item["id"] for item in offset_items]
+    print(
+        f"\npage 1: {first_page * 1000:.2f}ms, page 1000 keyset: {keyset_deep * 1000:.2f}ms, "
+        f"page 1000 offset: {offset_deep * 1000:.2f}ms"
+    )
+    assert keyset_deep < first_page * 3 + 0.002
+    assert keyset_deep * 3 < offset_deep
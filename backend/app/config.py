@@ -36,6 +36,14 @@ class Settings(BaseSettings):
     redis_url: str = Field(default="redis://localhost:6379/0", env="REDIS_URL")
     redis_max_connections: int = Field(default=100, env="REDIS_MAX_CONNECTIONS")
     redis_decode_responses: bool = Field(default=True, env="REDIS_DECODE_RESPONSES")
+    # Process-local near-cache for hot keys, kept coherent with CLIENT TRACKING
+    near_cache_enabled: bool = Field(default=False, env="NEAR_CACHE_ENABLED")
+    near_cache_prefixes: str = Field(
+        default="zone:status:,soundtrack:device:,soundtrack:playlist",
+        env="NEAR_CACHE_PREFIXES"
+    )
+    near_cache_max_items: int = Field(default=10000, env="NEAR_CACHE_MAX_ITEMS")
+    near_cache_fallback_ttl: float = Field(default=2.0, env="NEAR_CACHE_FALLBACK_TTL")
     
     # Security
     secret_key: str = Field(default="your-secret-key", env="SECRET_KEY")
@@ -86,7 +94,13 @@ class Settings(BaseSettings):
     
     # Polling & Monitoring
     polling_interval_seconds: int = Field(default=300, env="POLLING_INTERVAL_SECONDS")
+    zone_poll_offline_interval: int = Field(default=60, env="ZONE_POLL_OFFLINE_INTERVAL")
+    zone_poll_recovering_interval: int = Field(default=120, env="ZONE_POLL_RECOVERING_INTERVAL")
+    zone_poll_stable_interval: int = Field(default=900, env="ZONE_POLL_STABLE_INTERVAL")
+    zone_poll_closed_interval: int = Field(default=1800, env="ZONE_POLL_CLOSED_INTERVAL")
+    zone_poll_claim_limit: int = Field(default=1000, env="ZONE_POLL_CLAIM_LIMIT")
     alert_cooldown_seconds: int = Field(default=3600, env="ALERT_COOLDOWN_SECONDS")
+    incident_window_seconds: int = Field(default=90, env="INCIDENT_WINDOW_SECONDS")
     max_retries: int = Field(default=3, env="MAX_RETRIES")
     batch_size: int = Field(default=100, env="BATCH_SIZE")
     
@@ -111,6 +125,17 @@ class Settings(BaseSettings):
     celery_task_always_eager: bool = Field(default=False, env="CELERY_TASK_ALWAYS_EAGER")
     celery_task_eager_propagates: bool = Field(default=False, env="CELERY_TASK_EAGER_PROPAGATES")
     
+    # Inbound message stream (Redis Streams consumer service)
+    message_stream_key: str = Field(default="messages:stream", env="MESSAGE_STREAM_KEY")
+    message_stream_group: str = Field(default="message-processors", env="MESSAGE_STREAM_GROUP")
+    message_stream_dlq_key: str = Field(default="messages:dlq:stream", env="MESSAGE_STREAM_DLQ_KEY")
+    message_stream_batch_size: int = Field(default=50, env="MESSAGE_STREAM_BATCH_SIZE")
+    message_stream_block_ms: int = Field(default=5000, env="MESSAGE_STREAM_BLOCK_MS")
+    message_stream_claim_idle_ms: int = Field(default=30000, env="MESSAGE_STREAM_CLAIM_IDLE_MS")
+    message_stream_max_deliveries: int = Field(default=5, env="MESSAGE_STREAM_MAX_DELIVERIES")
+    message_stream_concurrency: int = Field(default=16, env="MESSAGE_STREAM_CONCURRENCY")
+    message_stream_maxlen: int = Field(default=100000, env="MESSAGE_STREAM_MAXLEN")
+    
     @field_validator("cors_origins", mode='before')
     @classmethod
     def parse_cors_origins(cls, v):
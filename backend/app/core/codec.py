@@ -0,0 +1,268 @@
+"""
+Binary codecs for cached payloads.
+
+Cache values used to be json.dumps text. Encoded values now start with a
+4-byte header so the format can change without flushing Redis:
+
+    0xB1 | version | format | compression
+
+format is json, orjson or msgpack; compression is none, zlib or zstd and
+only kicks in above a size threshold. Anything without the header is
+decoded as legacy JSON text, so old entries keep working until they expire.
+
+Codecs are chosen per namespace (the key prefix, e.g. "zone:status"), and
+each namespace keeps its own bytes-stored and encode/decode time stats.
+orjson, msgpack and zstandard are optional; missing ones fall back to the
+stdlib json / zlib. Payloads must be read with a decode_responses=False
+client, since they are not valid UTF-8.
+"""
+
+import json
+import time
+import zlib
+from typing import Any, Dict, Optional, Union
+import logging
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MAGIC = 0xB1
+VERSION = 1
+
+# Wire ids - never renumber, stored values depend on them
+FORMATS = {"json": 1, "orjson": 2, "msgpack": 3}
+COMPRESSIONS = {None: 0, "zlib": 1, "zstd": 2}
+_FORMAT_NAMES = {v: k for k, v in FORMATS.items()}
+_COMPRESSION_NAMES = {v: k for k, v in COMPRESSIONS.items()}
+
+# Per-namespace codec choice: (format, compression, compress_threshold bytes).
+# "legacy" keeps writing plain JSON text for namespaces whose readers still
+# json.loads the raw value themselves.
+BINARY_CODEC = ("msgpack", "zstd", 1024)
+DEFAULT_CODEC = ("legacy", None, 0)
+
+NAMESPACE_CODECS = {
+    "zone:status": BINARY_CODEC,
+    "soundtrack:device": BINARY_CODEC,
+    "soundtrack:status": BINARY_CODEC,
+    "soundtrack:playlists": BINARY_CODEC,
+    "soundtrack:playlist": BINARY_CODEC,
+    "aggregator:venue": BINARY_CODEC,
+    "aggregator:zone_status": BINARY_CODEC,
+    "aggregator:search": BINARY_CODEC,
+}
+
+
+def is_encoded(raw: Any) -> bool:
+    """True for payloads written with a codec header (as opposed to legacy JSON text)"""
+    return isinstance(raw, (bytes, bytearray)) and len(raw) >= 4 and raw[0] == MAGIC
+
+
+class CodecError(Exception):
+    """Raised when a cached payload can't be decoded"""
+    pass
+
+
+class CacheCodec:
+    """Encoder/decoder for one cache namespace"""
+
+    def __init__(
+        self,
+        namespace: str,
+        format: str = "msgpack",
+        compression: Optional[str] = "zstd",
+        compress_threshold: int = 1024,
+    ):
+        """
+        Args:
+            namespace: Name used in stats
+            format: "legacy" (plain JSON text, no header), "json", "orjson"
+                or "msgpack"; unavailable libraries fall back to json
+            compression: None, "zlib" or "zstd" (falls back to zlib)
+            compress_threshold: Compress payloads at least this many bytes
+        """
+        self.namespace = namespace
+        self.requested_format = format
+        if format == "msgpack" and not MSGPACK_AVAILABLE:
+            format = "orjson"
+        if format == "orjson" and not ORJSON_AVAILABLE:
+            format = "json"
+        if compression == "zstd" and not ZSTD_AVAILABLE:
+            compression = "zlib"
+        self.format = format
+        self.compression = compression
+        self.compress_threshold = compress_threshold
+
+        self._zstd_compressor = zstandard.ZstdCompressor(level=3) if ZSTD_AVAILABLE else None
+        self._zstd_decompressor = zstandard.ZstdDecompressor() if ZSTD_AVAILABLE else None
+
+        self.stats = {
+            "encoded": 0,
+            "decoded": 0,
+            "legacy_decoded": 0,
+            "compressed": 0,
+            "bytes_stored": 0,
+            "bytes_uncompressed": 0,
+            "encode_seconds": 0.0,
+            "decode_seconds": 0.0,
+        }
+
+    @property
+    def is_legacy(self) -> bool:
+        return self.format == "legacy"
+
+    # Encoding
+
+    def _serialize(self, value: Any) -> bytes:
+        if self.format == "msgpack":
+            return msgpack.packb(value, default=str, use_bin_type=True)
+        if self.format == "orjson":
+            # Match json.dumps(default=str) output for datetimes
+            return orjson.dumps(value, default=str, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        return json.dumps(value, default=str, separators=(",", ":")).encode()
+
+    def encode(self, value: Any) -> Union[bytes, str]:
+        """Encode a value for storage (str for the legacy format)"""
+        started = time.perf_counter()
+        if self.is_legacy:
+            payload = json.dumps(value, default=str)
+            self.stats["bytes_uncompressed"] += len(payload)
+        else:
+            body = self._serialize(value)
+            self.stats["bytes_uncompressed"] += len(body)
+            compression = None
+            if self.compression and len(body) >= self.compress_threshold:
+                compression = self.compression
+                body = (
+                    self._zstd_compressor.compress(body)
+                    if compression == "zstd"
+                    else zlib.compress(body, 6)
+                )
+                self.stats["compressed"] += 1
+            header = bytes((MAGIC, VERSION, FORMATS[self.format], COMPRESSIONS[compression]))
+            payload = header + body
+
+        self.stats["encoded"] += 1
+        self.stats["bytes_stored"] += len(payload)
+        self.stats["encode_seconds"] += time.perf_counter() - started
+        return payload
+
+    # Decoding
+
+    def decode(self, raw: Union[bytes, str, None]) -> Any:
+        """Decode a stored value; payloads without the header are legacy JSON"""
+        if raw is None:
+            return None
+        started = time.perf_counter()
+        try:
+            if is_encoded(raw):
+                value = self._decode_framed(bytes(raw))
+            else:
+                value = json.loads(raw)
+                self.stats["legacy_decoded"] += 1
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(f"{self.namespace}: undecodable cache payload: {e}") from e
+        self.stats["decoded"] += 1
+        self.stats["decode_seconds"] += time.perf_counter() - started
+        return value
+
+    def _decode_framed(self, raw: bytes) -> Any:
+        version, format_id, compression_id = raw[1], raw[2], raw[3]
+        if version != VERSION:
+            raise CodecError(f"{self.namespace}: unsupported codec version {version}")
+        format = _FORMAT_NAMES.get(format_id)
+        compression = _COMPRESSION_NAMES.get(compression_id, "unknown")
+        body = raw[4:]
+
+        if compression == "zstd":
+            if not ZSTD_AVAILABLE:
+                raise CodecError(f"{self.namespace}: zstd payload but zstandard is not installed")
+            body = self._zstd_decompressor.decompress(body)
+        elif compression == "zlib":
+            body = zlib.decompress(body)
+        elif compression is not None:
+            raise CodecError(f"{self.namespace}: unknown compression id {compression_id}")
+
+        # Decode whatever format the writer used, not this codec's current one
+        if format == "msgpack":
+            if not MSGPACK_AVAILABLE:
+                raise CodecError(f"{self.namespace}: msgpack payload but msgpack is not installed")
+            return msgpack.unpackb(body, raw=False)
+        if format == "orjson":
+            return orjson.loads(body) if ORJSON_AVAILABLE else json.loads(body)
+        if format == "json":
+            return json.loads(body)
+        raise CodecError(f"{self.namespace}: unknown format id {format_id}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        encoded = self.stats["encoded"]
+        decoded = self.stats["decoded"]
+        return {
+            **self.stats,
+            "format": self.format,
+            "compression": self.compression,
+            "avg_bytes": round(self.stats["bytes_stored"] / encoded, 1) if encoded else 0,
+            "compression_ratio": (
+                round(self.stats["bytes_stored"] / self.stats["bytes_uncompressed"], 3)
+                if self.stats["bytes_uncompressed"] else None
+            ),
+            "avg_encode_us": round(self.stats["encode_seconds"] / encoded * 1e6, 1) if encoded else 0,
+            "avg_decode_us": round(self.stats["decode_seconds"] / decoded * 1e6, 1) if decoded else 0,
+        }
+
+
+_codecs: Dict[str, CacheCodec] = {}
+
+
+def get_codec(namespace: str, default: tuple = DEFAULT_CODEC) -> CacheCodec:
+    """Process-wide codec for a namespace; default applies when it isn't in NAMESPACE_CODECS"""
+    if namespace not in _codecs:
+        format, compression, threshold = NAMESPACE_CODECS.get(namespace, default)
+        _codecs[namespace] = CacheCodec(
+            namespace,
+            format=format,
+            compression=compression,
+            compress_threshold=threshold,
+        )
+    return _codecs[namespace]
+
+
+def namespace_for_key(key: str) -> Optional[str]:
+    """Longest configured namespace that prefixes key, or None"""
+    best = None
+    for namespace in NAMESPACE_CODECS:
+        if key.startswith(namespace + ":") and (best is None or len(namespace) > len(best)):
+            best = namespace
+    return best
+
+
+def codec_for_key(key: str) -> CacheCodec:
+    """Codec for a Redis key, by its namespace prefix (legacy JSON if unconfigured)"""
+    return get_codec(namespace_for_key(key) or "default")
+
+
+def get_all_codec_stats() -> Dict[str, Dict[str, Any]]:
+    """Bytes stored and encode/decode time for every namespace used in this process"""
+    return {name: codec.get_stats() for name, codec in _codecs.items()}
@@ -0,0 +1,304 @@
+"""
+Adaptive concurrency limits for upstream APIs.
+
+Each upstream (Soundtrack, OpenAI, Gemini, Gmail) gets a limiter that caps
+how many calls are in flight at once and tunes that cap from observed
+latency, in the style of Netflix concurrency-limits:
+
+- Gradient: the limit is scaled by baseline_latency / p90_latency, so it
+  shrinks as soon as queueing shows up at the upstream and grows by about
+  sqrt(limit) per window while latency stays near the baseline.
+- AIMD: any error or timeout in a window cuts the limit multiplicatively.
+
+The baseline is the lowest p90 seen since the last probe. Every
+probe_interval windows the limit drops to sqrt(limit) for a moment to
+re-measure no-load latency, so a baseline taken while the upstream was
+already overloaded (or before it got permanently slower) doesn't stick.
+
+Rate limits bound requests per minute; these bound requests in flight,
+which is what actually overloads an upstream when it slows down.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyLimitExceeded(Exception):
+    """Raised when a call waited longer than max_wait for a slot"""
+    pass
+
+
+class AdaptiveConcurrencyLimiter:
+    """Latency-gradient / AIMD concurrency limiter for one upstream"""
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = 20,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        window_size: int = 50,
+        window_seconds: float = 1.0,
+        min_window_samples: int = 5,
+        tolerance: float = 1.5,
+        backoff_ratio: float = 0.9,
+        smoothing: float = 0.5,
+        probe_interval: int = 50,
+        max_wait: Optional[float] = None,
+    ):
+        """
+        Args:
+            name: Upstream name used in logs and metrics
+            initial_limit: Starting concurrency limit
+            min_limit: Limit never drops below this
+            max_limit: Limit never grows above this
+            window_size: Samples per adjustment window
+            window_seconds: Close a window after this long if it has
+                at least min_window_samples samples
+            min_window_samples: Smallest window that triggers an adjustment
+            tolerance: p90 may exceed the baseline by this factor before
+                the limit starts to shrink
+            backoff_ratio: Multiplicative decrease on errors
+            smoothing: Weight of a new limit estimate (0-1)
+            probe_interval: Windows between no-load latency probes
+            max_wait: Seconds acquire() waits for a slot before raising
+                ConcurrencyLimitExceeded (None = wait forever)
+        """
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.window_size = window_size
+        self.window_seconds = window_seconds
+        self.min_window_samples = min_window_samples
+        self.tolerance = tolerance
+        self.backoff_ratio = backoff_ratio
+        self.smoothing = smoothing
+        self.probe_interval = probe_interval
+        # First baseline may come from an already-busy upstream - re-check it soon
+        self._windows_until_probe = min(probe_interval, 5)
+        self.max_wait = max_wait
+
+        self._estimated_limit = float(initial_limit)
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        # Current window
+        self._samples: List[float] = []
+        self._window_errors = 0
+        self._window_started = time.monotonic()
+        self._window_peak_in_flight = 0
+
+        self.baseline_latency: Optional[float] = None
+        self.last_p90: Optional[float] = None
+        self.limit_history: Deque[int] = deque(maxlen=100)
+        self._listeners: List[Callable[[int], None]] = []
+
+        self.stats = {
+            "calls": 0,
+            "errors": 0,
+            "rejected": 0,
+            "windows": 0,
+            "decreases": 0,
+            "increases": 0,
+            "probes": 0,
+        }
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._estimated_limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def on_limit_change(self, callback: Callable[[int], None]):
+        """Call callback(new_limit) whenever the integer limit changes"""
+        self._listeners.append(callback)
+
+    # Slot handling
+
+    def _dispatch(self):
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._in_flight += 1
+            waiter.set_result(None)
+
+    async def _wait_for_slot(self):
+        if not self._waiters and self._in_flight < self.limit:
+            self._in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            if self.max_wait is None:
+                await waiter
+            else:
+                await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted as we gave up - pass the slot on
+                self._in_flight -= 1
+                self._dispatch()
+            else:
+                waiter.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats["rejected"] += 1
+                raise ConcurrencyLimitExceeded(
+                    f"{self.name}: no slot within {self.max_wait}s (limit {self.limit})"
+                )
+            raise
+
+    @asynccontextmanager
+    async def acquire(self):
+        """
+        Wait for a slot, then time the call made inside the block.
+        Exceptions raised inside the block count as errors.
+        """
+        await self._wait_for_slot()
+        try:
+            async with self._measured():
+                yield
+        finally:
+            self._in_flight -= 1
+            self._dispatch()
+
+    @asynccontextmanager
+    async def measure(self):
+        """
+        Time a call without gating it.
+        For callers that enforce concurrency elsewhere (e.g. a priority
+        scheduler that follows this limiter through on_limit_change).
+        """
+        self._in_flight += 1
+        try:
+            async with self._measured():
+                yield
+        finally:
+            self._in_flight -= 1
+
+    @asynccontextmanager
+    async def _measured(self):
+        self._window_peak_in_flight = max(self._window_peak_in_flight, self._in_flight)
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(time.perf_counter() - started, error=True)
+            raise
+        self.record(time.perf_counter() - started)
+
+    # Limit adjustment
+
+    def record(self, latency: float, error: bool = False):
+        """Add one call outcome to the current window"""
+        self.stats["calls"] += 1
+        if error:
+            self.stats["errors"] += 1
+            self._window_errors += 1
+        else:
+            self._samples.append(latency)
+
+        observed = len(self._samples) + self._window_errors
+        elapsed = time.monotonic() - self._window_started
+        if observed >= self.window_size or (
+            elapsed >= self.window_seconds and observed >= self.min_window_samples
+        ):
+            self._close_window()
+
+    def _close_window(self):
+        samples = sorted(self._samples)
+        errors = self._window_errors
+        peak = self._window_peak_in_flight
+        self._samples = []
+        self._window_errors = 0
+        self._window_peak_in_flight = self._in_flight
+        self._window_started = time.monotonic()
+        self.stats["windows"] += 1
+
+        old_limit = self.limit
+        limit = self._estimated_limit
+
+        if errors:
+            new_limit = limit * self.backoff_ratio
+        elif samples:
+            p90 = samples[min(len(samples) - 1, int(len(samples) * 0.9))]
+            self.last_p90 = p90
+            if self.baseline_latency is None or p90 < self.baseline_latency:
+                self.baseline_latency = p90
+
+            gradient = max(0.5, min(1.0, self.tolerance * self.baseline_latency / p90))
+            new_limit = limit * gradient + math.sqrt(limit)
+            if peak < limit / 2:
+                # Not using the limit we have - don't grow it
+                new_limit = min(new_limit, limit)
+            new_limit = limit * (1 - self.smoothing) + new_limit * self.smoothing
+
+            self._windows_until_probe -= 1
+            if self._windows_until_probe <= 0:
+                # Drop to a near-idle limit and take the next window as the new baseline
+                self._windows_until_probe = self.probe_interval
+                self.baseline_latency = None
+                new_limit = math.sqrt(limit)
+                self.stats["probes"] += 1
+        else:
+            return
+
+        self._estimated_limit = max(float(self.min_limit), min(float(self.max_limit), new_limit))
+        self.limit_history.append(self.limit)
+
+        if self.limit != old_limit:
+            self.stats["increases" if self.limit > old_limit else "decreases"] += 1
+            logger.debug(f"{self.name} concurrency limit {old_limit} -> {self.limit}")
+            for callback in self._listeners:
+                callback(self.limit)
+            self._dispatch()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "queued": sum(1 for w in self._waiters if not w.done()),
+            "baseline_latency_ms": round(self.baseline_latency * 1000, 2) if self.baseline_latency else None,
+            "p90_latency_ms": round(self.last_p90 * 1000, 2) if self.last_p90 else None,
+        }
+
+
+# Per-upstream defaults: (initial, min, max, max_wait)
+UPSTREAM_LIMITS = {
+    "soundtrack": (50, 5, 100, None),
+    "openai": (10, 1, 50, 30.0),
+    "gemini": (10, 1, 50, 30.0),
+    "gmail": (5, 1, 20, 30.0),
+}
+
+_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+
+
+def get_limiter(upstream: str) -> AdaptiveConcurrencyLimiter:
+    """Process-wide limiter for an upstream"""
+    if upstream not in _limiters:
+        initial, min_limit, max_limit, max_wait = UPSTREAM_LIMITS.get(upstream, (20, 1, 100, None))
+        _limiters[upstream] = AdaptiveConcurrencyLimiter(
+            upstream,
+            initial_limit=initial,
+            min_limit=min_limit,
+            max_limit=max_limit,
+            max_wait=max_wait,
+        )
+    return _limiters[upstream]
+
+
+def get_all_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Metrics for every upstream limiter created in this process"""
+    return {name: limiter.get_stats() for name, limiter in _limiters.items()}
@@ -0,0 +1,30 @@
+"""
+API key check for bulk exports.
+
+Exports stream whole tables (conversations, monitoring logs, the venue
+catalog with contact details), so every export endpoint needs the
+EXPORT_API_KEY, sent as X-API-Key or Authorization: Bearer. Without a key
+configured the exports are off.
+
+Used by the app's /exports router and by main_simple's catalog export.
+"""
+
+import hmac
+import os
+
+EXPORT_API_KEY = os.getenv("EXPORT_API_KEY", "")
+
+
+def export_key_from(headers) -> str:
+    """Key presented in X-API-Key or an Authorization: Bearer header"""
+    key = headers.get("x-api-key")
+    if key:
+        return key
+    scheme, _, token = (headers.get("authorization") or "").partition(" ")
+    return token.strip() if scheme.lower() == "bearer" else ""
+
+
+def export_key_valid(presented: str, api_key: str = None) -> bool:
+    """Constant-time check of a presented key; never valid when no key is configured"""
+    expected = EXPORT_API_KEY if api_key is None else api_key
+    return bool(expected) and bool(presented) and hmac.compare_digest(presented.encode(), expected.encode())
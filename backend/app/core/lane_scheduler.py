@@ -0,0 +1,198 @@
+"""
+Priority-lane slot dispatch shared by the Soundtrack schedulers.
+
+Requests take an in-flight slot before they go out. Interactive requests
+(customer control commands) are always dispatched first and have slots
+reserved that no other lane may use, so a background sweep can never make
+a live chat wait for a connection. Background work shares whatever
+capacity is left, round-robin between job types, so one large sweep can't
+starve a smaller sync running alongside it.
+
+LaneDispatcher holds the queues, the dispatch order and the metrics; it
+doesn't know how a waiter is woken. app.services.soundtrack.scheduler
+wraps it with asyncio futures, the flat backend's syb_scheduler with
+threading events.
+"""
+
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional
+
+INTERACTIVE = "interactive"
+NORMAL = "normal"
+BACKGROUND = "background"
+LANES = (INTERACTIVE, NORMAL, BACKGROUND)
+
+DEFAULT_JOB = "default"
+
+
+class LaneStats:
+    """Queue wait and in-flight time for one lane over a sliding window"""
+
+    def __init__(self, window: int = 500):
+        self.requests = 0
+        self.queued = 0
+        self.in_flight = 0
+        self.queue_waits: Deque[float] = deque(maxlen=window)
+        self.in_flight_times: Deque[float] = deque(maxlen=window)
+
+    @staticmethod
+    def _summary(samples: Deque[float]) -> Dict[str, float]:
+        if not samples:
+            return {"avg_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return {
+            "avg_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+            "p95_ms": round(p95 * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "queue_wait": self._summary(self.queue_waits),
+            "in_flight_time": self._summary(self.in_flight_times),
+        }
+
+
+class LaneDispatcher:
+    """
+    Grants in-flight slots by lane priority.
+
+    Dispatch order is strict: INTERACTIVE, then NORMAL, then BACKGROUND.
+    ``interactive_reserve`` slots are only ever handed to interactive
+    requests. Background waiters are queued per job type and served
+    round-robin, one request per job per turn.
+
+    Not locked: callers serialize access (one event loop, or a lock).
+    Subclasses say how a waiter is woken (_grant) and whether it still
+    wants its slot (_live).
+    """
+
+    def __init__(self, max_in_flight: int, interactive_reserve: int, window: int = 500):
+        """
+        Args:
+            max_in_flight: Concurrent SYB requests across all lanes
+            interactive_reserve: Slots held back for interactive requests
+            window: Samples kept for queue wait / in-flight percentiles
+        """
+        if interactive_reserve >= max_in_flight:
+            raise ValueError("interactive_reserve must leave room for other lanes")
+
+        self.max_in_flight = max_in_flight
+        self.interactive_reserve = interactive_reserve
+
+        self._in_flight = 0
+        self._interactive: Deque[Any] = deque()
+        self._normal: Deque[Any] = deque()
+        # job type -> waiters; rotated so each job gets a turn
+        self._background: "OrderedDict[str, Deque[Any]]" = OrderedDict()
+
+        self.lane_stats: Dict[str, LaneStats] = {lane: LaneStats(window) for lane in LANES}
+        self.job_stats: Dict[str, Dict[str, int]] = {}
+
+    def _grant(self, waiter: Any):
+        raise NotImplementedError
+
+    def _live(self, waiter: Any) -> bool:
+        return True
+
+    def _queue_for(self, lane: str, job: str) -> Deque[Any]:
+        if lane == INTERACTIVE:
+            return self._interactive
+        if lane == NORMAL:
+            return self._normal
+        if job not in self._background:
+            self._background[job] = deque()
+        return self._background[job]
+
+    def _pop_live(self, queue: Deque[Any]) -> Optional[Any]:
+        while queue:
+            waiter = queue.popleft()
+            if self._live(waiter):
+                return waiter
+        return None
+
+    def _next_waiter(self) -> Optional[Any]:
+        """Pick the next waiter allowed to take a free slot"""
+        waiter = self._pop_live(self._interactive)
+        if waiter is not None:
+            return waiter
+
+        # Reserved slots stay free for interactive requests
+        if self._in_flight >= self.max_in_flight - self.interactive_reserve:
+            return None
+
+        waiter = self._pop_live(self._normal)
+        if waiter is not None:
+            return waiter
+
+        while self._background:
+            job, queue = next(iter(self._background.items()))
+            waiter = self._pop_live(queue)
+            if queue:
+                self._background.move_to_end(job)
+            else:
+                del self._background[job]
+            if waiter is not None:
+                return waiter
+        return None
+
+    def _dispatch(self):
+        while self._in_flight < self.max_in_flight:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self._in_flight += 1
+            self._grant(waiter)
+
+    def _enqueue(self, lane: str, job: str, waiter: Any):
+        """Queue waiter in its lane and hand out whatever slots are free"""
+        self._queue_for(lane, job).append(waiter)
+        self.lane_stats[lane].queued += 1
+        if lane == BACKGROUND:
+            self.job_stats.setdefault(job, {"requests": 0, "queued": 0})["queued"] += 1
+        self._dispatch()
+
+    def _dequeued(self, lane: str, job: str, wait: Optional[float]):
+        """Waiter left the queue: granted after wait seconds, or gave up (None)"""
+        stats = self.lane_stats[lane]
+        stats.queued -= 1
+        if lane == BACKGROUND:
+            self.job_stats[job]["queued"] -= 1
+        if wait is None:
+            return
+        stats.queue_waits.append(wait)
+        stats.requests += 1
+        stats.in_flight += 1
+        if lane == BACKGROUND:
+            self.job_stats[job]["requests"] += 1
+
+    def _release(self, lane: Optional[str] = None, held: Optional[float] = None):
+        """Hand back a slot (held seconds by a request in lane, if it ran)"""
+        if lane is not None:
+            stats = self.lane_stats[lane]
+            stats.in_flight -= 1
+            stats.in_flight_times.append(held)
+        self._in_flight -= 1
+        self._dispatch()
+
+    def resize(self, max_in_flight: int):
+        """
+        Change the slot count (e.g. to follow an adaptive concurrency limit).
+        Interactive reserve is kept, so the total never drops below reserve + 1.
+        """
+        self.max_in_flight = max(max_in_flight, self.interactive_reserve + 1)
+        self._dispatch()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-lane queue wait and in-flight metrics"""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "interactive_reserve": self.interactive_reserve,
+            "in_flight": self._in_flight,
+            "lanes": {name: stats.to_dict() for name, stats in self.lane_stats.items()},
+            "background_jobs": {job: dict(stats) for job, stats in self.job_stats.items()},
+        }
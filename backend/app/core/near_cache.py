@@ -0,0 +1,156 @@
+"""
+Process-local near-cache for hot Redis keys.
+
+Keeps copies of values read from Redis in memory and drops them when Redis
+says they changed, using Redis 6 client-side caching in broadcast mode:
+
+- A subscriber connection listens on __redis__:invalidate.
+- A second connection runs CLIENT TRACKING ON REDIRECT <subscriber> BCAST
+  PREFIX ..., so Redis pushes the name of every key under those prefixes
+  that anyone modifies or expires.
+
+BCAST doesn't depend on which connection read a key, so tracking works
+with a connection pool. If tracking can't be enabled (Redis < 6, managed
+Redis with CLIENT disabled) or the subscriber drops, entries fall back to
+a short local TTL instead, and the cache retries tracking later.
+
+Invalidation lag is measured on this process's own writes to tracked
+keys: the time from the write to its invalidation message.
+
+The local store is app.core.near_cache_store.NearCacheStore, shared with
+the sync client's redis_near_cache; this module adds the asyncio listener.
+"""
+
+import asyncio
+from typing import Iterable, Optional
+import logging
+
+from app.core.near_cache_store import INVALIDATE_CHANNEL, LISTEN_POLL_INTERVAL, NearCacheStore, is_missing
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["INVALIDATE_CHANNEL", "NearCache", "is_missing"]
+
+
+class NearCache(NearCacheStore):
+    """Local copies of Redis values under a set of key prefixes"""
+
+    def __init__(
+        self,
+        pool,
+        prefixes: Iterable[str],
+        max_items: int = 10000,
+        tracking_ttl: float = 300.0,
+        fallback_ttl: float = 2.0,
+        retry_interval: float = 30.0,
+        listen_timeout: float = LISTEN_POLL_INTERVAL,
+        name: str = "redis",
+    ):
+        """
+        Args:
+            pool: redis.asyncio ConnectionPool to take the two tracking
+                connections from
+            prefixes: Key prefixes to cache and track
+            max_items: Keys kept locally (LRU)
+            tracking_ttl: Safety cap on entry age while tracking is active
+            fallback_ttl: Entry age without tracking
+            retry_interval: Seconds between attempts to re-enable tracking
+            listen_timeout: Longest single wait on the subscriber; the
+                pool's socket_timeout doesn't apply to it
+            name: Name used in logs and metrics
+        """
+        super().__init__(prefixes, max_items, tracking_ttl, fallback_ttl, name)
+        self.pool = pool
+        self.retry_interval = retry_interval
+        self.listen_timeout = listen_timeout
+
+        self._subscriber = None
+        self._tracker = None
+        self._listen_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    # Tracking
+
+    async def start(self):
+        """Enable server-assisted invalidation, or fall back to TTL mode"""
+        self._stopping = False
+        try:
+            await self._enable_tracking()
+        except Exception as e:
+            self.stats["tracking_failures"] += 1
+            logger.warning(f"{self.name} near-cache: CLIENT TRACKING unavailable, using {self.fallback_ttl}s TTL: {e}")
+            await self._close_connections()
+            self.mode = "ttl"
+        self._listen_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._stopping = True
+        if self._listen_task:
+            self._listen_task.cancel()
+            try:
+                await self._listen_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listen_task = None
+        await self._close_connections()
+        self.invalidate(None)
+        self.mode = "off"
+
+    async def _enable_tracking(self):
+        self._subscriber = await self.pool.get_connection("_")
+        await self._subscriber.send_command("CLIENT", "ID")
+        client_id = await self._subscriber.read_response()
+        await self._subscriber.send_command("SUBSCRIBE", INVALIDATE_CHANNEL)
+        await self._subscriber.read_response()
+
+        self._tracker = await self.pool.get_connection("_")
+        await self._tracker.send_command(*self.tracking_command(client_id))
+        await self._tracker.read_response()
+
+        # Anything cached before tracking started may already be stale
+        self.invalidate(None)
+        self.mode = "tracking"
+        logger.info(f"{self.name} near-cache tracking {len(self.prefixes)} prefixes")
+
+    async def _close_connections(self):
+        for attr in ("_subscriber", "_tracker"):
+            connection = getattr(self, attr)
+            if connection is None:
+                continue
+            setattr(self, attr, None)
+            try:
+                # Closing the tracker connection also ends tracking server-side
+                await connection.disconnect()
+                await self.pool.release(connection)
+            except Exception:
+                pass
+
+    async def _run(self):
+        while not self._stopping:
+            if self.mode == "tracking":
+                try:
+                    await self._listen()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"{self.name} near-cache lost invalidation stream: {e}")
+                # Missed invalidations can't be replayed - drop everything
+                self.invalidate(None)
+                self.mode = "ttl"
+                await self._close_connections()
+
+            await asyncio.sleep(self.retry_interval)
+            try:
+                await self._enable_tracking()
+            except Exception as e:
+                self.stats["tracking_failures"] += 1
+                logger.debug(f"{self.name} near-cache tracking retry failed: {e}")
+                await self._close_connections()
+
+    async def _listen(self):
+        while True:
+            # An explicit timeout returns None when nothing arrived instead of
+            # raising like the pool's socket_timeout would
+            message = await self._subscriber.read_response(timeout=self.listen_timeout)
+            if message is not None:
+                self.handle_message(message)
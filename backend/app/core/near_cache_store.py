@@ -0,0 +1,219 @@
+"""
+Local store behind the Redis near-caches.
+
+Holds process-local copies of values read from Redis, with the bookkeeping
+both near-caches share: LRU bound, per-mode entry TTL, fetch tokens so a
+read that raced an invalidation isn't kept, and the lag between this
+process's own writes and their invalidation message.
+
+It does no I/O. app.core.near_cache.NearCache (redis.asyncio, listener
+task) and the flat backend's redis_near_cache.RedisNearCache (sync client,
+listener thread) add the CLIENT TRACKING connections on top.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INVALIDATE_CHANNEL = "__redis__:invalidate"
+
+# Seconds a subscriber read waits before reporting "no message"; a quiet
+# keyspace is not a dead connection
+LISTEN_POLL_INTERVAL = 5.0
+
+_MISSING = object()
+
+
+def is_missing(value: Any) -> bool:
+    """True when NearCacheStore.get found no usable local copy"""
+    return value is _MISSING
+
+
+class NearCacheStore:
+    """Thread-safe local copies of Redis values under a set of key prefixes"""
+
+    def __init__(
+        self,
+        prefixes: Iterable[str],
+        max_items: int = 10000,
+        tracking_ttl: float = 300.0,
+        fallback_ttl: float = 2.0,
+        name: str = "redis"
+    ):
+        """
+        Args:
+            prefixes: Key prefixes to cache and track
+            max_items: Keys kept locally (LRU)
+            tracking_ttl: Safety cap on entry age while tracking is active
+            fallback_ttl: Entry age without tracking
+            name: Name used in logs and stats
+        """
+        self.prefixes = tuple(p for p in prefixes if p)
+        self.max_items = max_items
+        self.tracking_ttl = tracking_ttl
+        self.fallback_ttl = fallback_ttl
+        self.name = name
+
+        # "off" until started, then "tracking" or "ttl"
+        self.mode = "off"
+
+        self._lock = threading.Lock()
+        # key -> {"expires": monotonic deadline, <kind>: value}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Reads in flight: key -> token; an invalidation during the read drops it
+        self._fetching: Dict[str, object] = {}
+        # Own writes awaiting their invalidation: key -> monotonic write time
+        self._pending_writes: "OrderedDict[str, float]" = OrderedDict()
+        self.invalidation_lags: Deque[float] = deque(maxlen=200)
+        self._listeners: List[Callable[[Optional[List[str]]], None]] = []
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+            "flushes": 0,
+            "evictions": 0,
+            "expired": 0,
+            "tracking_failures": 0,
+        }
+
+    def matches(self, key: str) -> bool:
+        return bool(self.prefixes) and key.startswith(self.prefixes)
+
+    def on_invalidate(self, callback: Callable[[Optional[List[str]]], None]):
+        """Call callback(keys) on every invalidation (None = everything flushed)"""
+        self._listeners.append(callback)
+
+    def get(self, key: str, kind: str = "value") -> Any:
+        """Local copy of key, or _MISSING (see is_missing)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and kind in entry:
+                if time.monotonic() < entry["expires"]:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[kind]
+                self._entries.pop(key, None)
+                self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return _MISSING
+
+    def begin_fetch(self, key: str) -> object:
+        """Mark a Redis read of key as started; pass the token to store()"""
+        token = object()
+        with self._lock:
+            self._fetching[key] = token
+        return token
+
+    def finish_fetch(self, key: str, token: object) -> bool:
+        """End a read started with begin_fetch(); False if key was invalidated meanwhile"""
+        with self._lock:
+            return self._finish_fetch(key, token)
+
+    def _finish_fetch(self, key: str, token: object) -> bool:
+        if self._fetching.get(key) is not token:
+            return False
+        del self._fetching[key]
+        return True
+
+    def store(self, key: str, value: Any, token: object, kind: str = "value"):
+        """Keep a value read from Redis, unless key was invalidated meanwhile"""
+        with self._lock:
+            if not self._finish_fetch(key, token):
+                return
+            if value is None or self.mode == "off":
+                return
+
+            ttl = self.tracking_ttl if self.mode == "tracking" else self.fallback_ttl
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {}
+            entry[kind] = value
+            entry["expires"] = time.monotonic() + ttl
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, keys: Optional[Iterable[Any]]):
+        """Drop keys (None = everything)"""
+        with self._lock:
+            if keys is None:
+                self._entries.clear()
+                self._fetching.clear()
+                self.stats["flushes"] += 1
+                dropped = None
+            else:
+                now = time.monotonic()
+                dropped = []
+                for key in keys:
+                    if isinstance(key, bytes):
+                        key = key.decode()
+                    self._entries.pop(key, None)
+                    self._fetching.pop(key, None)
+                    written = self._pending_writes.pop(key, None)
+                    if written is not None:
+                        self.invalidation_lags.append(now - written)
+                    dropped.append(key)
+                self.stats["invalidations"] += len(dropped)
+        self._notify(dropped)
+
+    def note_write(self, key: str):
+        """
+        This process is writing key: drop the local copy now (read-your-writes
+        even without tracking) and time how long Redis takes to invalidate it.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._fetching.pop(key, None)
+            if self.mode == "tracking":
+                self._pending_writes[key] = time.monotonic()
+                self._pending_writes.move_to_end(key)
+                while len(self._pending_writes) > 1000:
+                    self._pending_writes.popitem(last=False)
+
+    def handle_message(self, message: Any):
+        """Apply one reply read from the subscriber connection"""
+        if not isinstance(message, list) or len(message) < 3:
+            return
+        kind = message[0].decode() if isinstance(message[0], bytes) else message[0]
+        if kind == "message":
+            # List of invalidated keys, or None when the db was flushed
+            self.invalidate(message[2])
+
+    def tracking_command(self, client_id: Any) -> List[Any]:
+        """CLIENT TRACKING arguments redirecting our prefixes to client_id"""
+        args = ["CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST"]
+        for prefix in self.prefixes:
+            args += ["PREFIX", prefix]
+        return args
+
+    def _notify(self, keys: Optional[List[str]]):
+        for callback in self._listeners:
+            try:
+                callback(keys)
+            except Exception as e:
+                logger.error(f"{self.name} near-cache listener error: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            lags = sorted(self.invalidation_lags)
+            return {
+                **self.stats,
+                "mode": self.mode,
+                "prefixes": list(self.prefixes),
+                "size": len(self._entries),
+                "hit_rate": round(self.stats["hits"] / lookups * 100, 2) if lookups else 0.0,
+                "invalidation_lag_ms": {
+                    "samples": len(lags),
+                    "p50": round(lags[len(lags) // 2] * 1000, 2) if lags else None,
+                    "p95": round(lags[min(len(lags) - 1, int(len(lags) * 0.95))] * 1000, 2) if lags else None,
+                    "max": round(lags[-1] * 1000, 2) if lags else None,
+                },
+            }
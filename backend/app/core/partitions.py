@@ -0,0 +1,151 @@
+"""
+Monthly range-partition maintenance for high-volume time-series tables.
+
+monitoring_logs is declared PARTITION BY RANGE (created_at) with one
+partition per calendar month. Future partitions are created ahead of time
+and retention is enforced by detaching and dropping whole partitions, so
+cleanup never has to DELETE (and later VACUUM) millions of rows.
+"""
+
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+MONITORING_LOG_TABLE = "monitoring_logs"
+MONITORING_LOG_RETENTION_DAYS = int(os.getenv("MONITORING_LOG_RETENTION_DAYS", "30"))
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+
+def month_start(value: datetime) -> date:
+    """First day of the month containing value"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """Shift a month-start date by a number of months"""
+    index = month.year * 12 + (month.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Partition table name, e.g. monitoring_logs_2025_09"""
+    return f"{table}_{month:%Y_%m}"
+
+
+def partition_bounds(month: date) -> Tuple[date, date]:
+    """[start, end) range covered by the partition for month"""
+    return month, add_months(month, 1)
+
+
+def parse_partition_month(table: str, name: str) -> Optional[date]:
+    """Month encoded in a partition name, or None if it isn't one of ours"""
+    match = re.fullmatch(rf"{re.escape(table)}_(\d{{4}})_(\d{{2}})", name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def expired_partition_months(
+    months: List[date],
+    retention_days: int,
+    now: Optional[datetime] = None
+) -> List[date]:
+    """
+    Months whose whole range is older than the retention cutoff.
+
+    A partition is only dropped once its upper bound is at or before the
+    cutoff, so no row younger than retention_days is ever removed.
+    """
+    now = now or datetime.utcnow()
+    cutoff = (now - timedelta(days=retention_days)).date()
+    return sorted(m for m in months if partition_bounds(m)[1] <= cutoff)
+
+
+def list_partitions(session: Session, table: str = MONITORING_LOG_TABLE) -> List[str]:
+    """Names of the partitions currently attached to table"""
+    result = session.execute(
+        text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+            JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+            WHERE parent.relname = :table
+            ORDER BY child.relname
+        """),
+        {"table": table}
+    )
+    return [row[0] for row in result]
+
+
+def ensure_future_partitions(
+    session: Session,
+    table: str = MONITORING_LOG_TABLE,
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+    now: Optional[datetime] = None
+) -> List[str]:
+    """
+    Create partitions for the current month and the next months_ahead months.
+
+    Indexes declared on the parent (idx_monitoring_zone_time etc.) are
+    created on each new partition automatically.
+
+    Returns:
+        Names of partitions that were created
+    """
+    current = month_start(now or datetime.utcnow())
+    existing = set(list_partitions(session, table))
+    created = []
+
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(table, month)
+        if name in existing:
+            continue
+        start, end = partition_bounds(month)
+        session.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+        created.append(name)
+
+    if created:
+        logger.info(f"Created {table} partitions: {', '.join(created)}")
+    return created
+
+
+def drop_expired_partitions(
+    session: Session,
+    table: str = MONITORING_LOG_TABLE,
+    retention_days: int = MONITORING_LOG_RETENTION_DAYS,
+    now: Optional[datetime] = None
+) -> List[str]:
+    """
+    Detach and drop partitions that fall entirely outside the retention window.
+
+    Returns:
+        Names of partitions that were dropped
+    """
+    months = {}
+    for name in list_partitions(session, table):
+        month = parse_partition_month(table, name)
+        if month:
+            months[month] = name
+
+    dropped = []
+    for month in expired_partition_months(list(months), retention_days, now):
+        name = months[month]
+        session.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+        session.execute(text(f'DROP TABLE "{name}"'))
+        dropped.append(name)
+
+    if dropped:
+        logger.info(f"Dropped expired {table} partitions: {', '.join(dropped)}")
+    return dropped
+
@@ -7,7 +7,9 @@ import asyncio
 import json
 import logging
 import hashlib
+import math
 import pickle
+import time
 from typing import Any, Dict, List, Optional, Union, Callable
 from datetime import datetime, timedelta
 import random
@@ -17,6 +19,8 @@ from redis.asyncio import ConnectionPool
 from redis.exceptions import RedisError
 
 from app.config import settings
+from app.core.codec import CodecError, codec_for_key, get_all_codec_stats, is_encoded
+from app.core.near_cache import NearCache, is_missing
 
 logger = logging.getLogger(__name__)
 
@@ -58,6 +62,11 @@ class CacheKeyBuilder:
     @staticmethod
     def lock(resource: str) -> str:
         return f"lock:{resource}"
+    
+    @staticmethod
+    def cache_meta(key: str) -> str:
+        """Refresh metadata kept next to a get_or_set value"""
+        return f"cachemeta:{key}"
 
 
 class RedisManager:
@@ -69,6 +78,11 @@ class RedisManager:
     def __init__(self):
         self.pool: Optional[ConnectionPool] = None
         self.redis: Optional[redis.Redis] = None
+        # Binary-safe client for codec-encoded values (decode_responses=False)
+        self.raw_pool: Optional[ConnectionPool] = None
+        self.raw_redis: Optional[redis.Redis] = None
+        # Opt-in process-local copies of hot keys (settings.near_cache_enabled)
+        self.near_cache: Optional[NearCache] = None
         self.pubsub: Optional[redis.client.PubSub] = None
         
         # Default TTLs for different data types (seconds)
@@ -86,7 +100,14 @@ class RedisManager:
             "hits": 0,
             "misses": 0,
             "errors": 0,
+            "stale_hits": 0,
+            "early_refreshes": 0,
+            "background_refreshes": 0,
+            "refresh_failures": 0,
         }
+        
+        # get_or_set background refreshes in flight in this process
+        self._refreshing: Dict[str, asyncio.Task] = {}
     
     async def initialize(self):
         """Initialize Redis connection pool"""
@@ -114,6 +135,17 @@ class RedisManager:
             
             self.redis = redis.Redis(connection_pool=self.pool)
             
+            self.raw_pool = ConnectionPool.from_url(
+                settings.redis_url,
+                max_connections=max(10, settings.redis_max_connections // 4),
+                decode_responses=False,
+                socket_keepalive=True,
+                retry_on_timeout=True,
+                socket_connect_timeout=5,
+                socket_timeout=5,
+            )
+            self.raw_redis = redis.Redis(connection_pool=self.raw_pool)
+            
             # Test connection with timeout
             import asyncio
             await asyncio.wait_for(self.redis.ping(), timeout=5.0)
@@ -121,6 +153,15 @@ class RedisManager:
             # Initialize pub/sub
             self.pubsub = self.redis.pubsub()
             
+            if settings.near_cache_enabled:
+                self.near_cache = NearCache(
+                    self.pool,
+                    prefixes=[p.strip() for p in settings.near_cache_prefixes.split(",")],
+                    max_items=settings.near_cache_max_items,
+                    fallback_ttl=settings.near_cache_fallback_ttl,
+                )
+                await self.near_cache.start()
+            
             logger.info("Redis initialized successfully")
             
         except asyncio.TimeoutError:
@@ -128,20 +169,56 @@ class RedisManager:
             # Don't raise - allow app to start without Redis
             self.redis = None
             self.pool = None
+            self.raw_redis = None
+            self.raw_pool = None
         except Exception as e:
             logger.error(f"Failed to initialize Redis: {e}")
             # Don't raise - allow app to start without Redis
             self.redis = None
             self.pool = None
+            self.raw_redis = None
+            self.raw_pool = None
     
     async def close(self):
         """Close Redis connections"""
+        if self.near_cache:
+            await self.near_cache.stop()
         if self.pubsub:
             await self.pubsub.close()
         if self.redis:
             await self.redis.close()
         if self.pool:
             await self.pool.disconnect()
+        if self.raw_redis:
+            await self.raw_redis.close()
+        if self.raw_pool:
+            await self.raw_pool.disconnect()
+    
+    @property
+    def _binary(self) -> Optional[redis.Redis]:
+        """Client for codec-encoded values"""
+        return self.raw_redis or self.redis
+    
+    def _tracked(self, key: str) -> bool:
+        return self.near_cache is not None and self.near_cache.matches(key)
+    
+    def _note_writes(self, keys):
+        if self.near_cache is not None:
+            for key in keys:
+                if self.near_cache.matches(key):
+                    self.near_cache.note_write(key)
+    
+    async def _read(self, client: redis.Redis, key: str, kind: str) -> Any:
+        """GET through the near-cache for tracked keys"""
+        if not self._tracked(key):
+            return await client.get(key)
+        local = self.near_cache.get(key, kind)
+        if not is_missing(local):
+            return local
+        token = self.near_cache.begin_fetch(key)
+        value = await client.get(key)
+        self.near_cache.store(key, value, token, kind)
+        return value
     
     # Basic Operations
     
@@ -152,7 +229,7 @@ class RedisManager:
             return None
             
         try:
-            value = await self.redis.get(key)
+            value = await self._read(self.redis, key, "text")
             if value:
                 self._stats["hits"] += 1
             else:
@@ -163,20 +240,55 @@ class RedisManager:
             logger.error(f"Redis GET error for key {key}: {e}")
             return None
     
+    async def get_value(self, key: str) -> Any:
+        """
+        Get a dict/list value stored by set(), decoded with the key's
+        namespace codec (legacy JSON text still decodes)
+        """
+        if not self.redis:
+            self._stats["errors"] += 1
+            return None
+            
+        try:
+            value = await self._read(self._binary, key, "raw")
+        except (RedisError, AttributeError) as e:
+            self._stats["errors"] += 1
+            logger.error(f"Redis GET error for key {key}: {e}")
+            return None
+        
+        if not value:
+            self._stats["misses"] += 1
+            return None
+        try:
+            decoded = codec_for_key(key).decode(value)
+        except CodecError as e:
+            # Treat an unreadable entry as a miss - the caller refetches and overwrites it
+            self._stats["errors"] += 1
+            logger.warning(f"Cache decode error for key {key}: {e}")
+            return None
+        self._stats["hits"] += 1
+        return decoded
+    
     async def set(self, key: str, value: Union[str, Dict, List], ttl: Optional[int] = None) -> bool:
-        """Set value in cache"""
+        """
+        Set value in cache.
+        dicts and lists are encoded with the key's namespace codec (see
+        app.core.codec); read those back with get_value().
+        """
         if not self.redis:
             self._stats["errors"] += 1
             return False
             
         try:
             if isinstance(value, (dict, list)):
-                value = json.dumps(value)
+                value = codec_for_key(key).encode(value)
             
+            client = self._binary if isinstance(value, bytes) else self.redis
+            self._note_writes([key])
             if ttl:
-                await self.redis.setex(key, ttl, value)
+                await client.setex(key, ttl, value)
             else:
-                await self.redis.set(key, value)
+                await client.set(key, value)
             
             return True
         except (RedisError, AttributeError) as e:
@@ -191,6 +303,7 @@ class RedisManager:
     async def delete(self, *keys: str) -> int:
         """Delete keys from cache"""
         try:
+            self._note_writes(keys)
             return await self.redis.delete(*keys)
         except RedisError as e:
             logger.error(f"Redis DELETE error: {e}")
@@ -210,19 +323,46 @@ class RedisManager:
         key: str,
         fetch_func: Callable,
         ttl: Optional[int] = None,
-        use_lock: bool = True
+        use_lock: bool = True,
+        stale_ttl: Optional[int] = None,
+        beta: float = 1.0,
     ) -> Any:
         """
         Cache-aside pattern with stampede protection.
         Gets from cache or fetches and caches if missing.
+        
+        With a ttl, values are refreshed without anyone waiting on fetch_func:
+        - Early expiry (XFetch): before the ttl runs out, each read recomputes
+          with a probability that rises as expiry gets closer and as the key's
+          recompute time grows, so hot keys are refreshed ahead of time.
+        - Stale-while-revalidate: for stale_ttl seconds after expiry (default:
+          another ttl) the old value is still served while one background
+          refresh repopulates it.
+        Only a cold miss blocks on fetch_func. Refreshes are single-flight
+        across processes through the same SET NX lock.
+        
+        Args:
+            stale_ttl: Seconds a value may be served past its ttl (0 disables)
+            beta: XFetch aggressiveness; >1 refreshes earlier, <1 later
         """
-        # Try to get from cache
-        cached = await self.get(key)
-        if cached:
-            try:
-                return json.loads(cached) if cached.startswith('{') or cached.startswith('[') else cached
-            except json.JSONDecodeError:
-                return cached
+        if ttl and stale_ttl is None:
+            stale_ttl = ttl
+        
+        cached, meta = await self._read_with_meta(key)
+        if cached is not None:
+            if meta and ttl:
+                now = time.time()
+                if now >= meta["expiry"]:
+                    self._stats["stale_hits"] += 1
+                    self._schedule_refresh(key, fetch_func, ttl, stale_ttl)
+                    return self._decode(key, cached)
+                if self._should_refresh_early(meta, now, beta):
+                    self._stats["early_refreshes"] += 1
+                    self._schedule_refresh(key, fetch_func, ttl, stale_ttl)
+            self._stats["hits"] += 1
+            return self._decode(key, cached)
+        
+        self._stats["misses"] += 1
         
         # Use distributed lock to prevent stampede
         if use_lock:
@@ -232,40 +372,140 @@ class RedisManager:
             if lock_acquired:
                 try:
                     # Double-check cache after acquiring lock
-                    cached = await self.get(key)
-                    if cached:
-                        try:
-                            return json.loads(cached) if cached.startswith('{') or cached.startswith('[') else cached
-                        except json.JSONDecodeError:
-                            return cached
+                    cached, _ = await self._read_with_meta(key)
+                    if cached is not None:
+                        return self._decode(key, cached)
                     
-                    # Fetch fresh data
-                    data = await fetch_func()
-                    
-                    # Store in cache
-                    await self.set(key, data, ttl)
-                    
-                    return data
+                    # Fetch fresh data and store in cache
+                    return await self._recompute(key, fetch_func, ttl, stale_ttl)
                 finally:
                     await self.release_lock(lock_key)
             else:
                 # Wait for lock holder to populate cache
                 for _ in range(20):  # Max 2 seconds wait
                     await asyncio.sleep(0.1)
-                    cached = await self.get(key)
-                    if cached:
-                        try:
-                            return json.loads(cached) if cached.startswith('{') or cached.startswith('[') else cached
-                        except json.JSONDecodeError:
-                            return cached
+                    cached, _ = await self._read_with_meta(key)
+                    if cached is not None:
+                        return self._decode(key, cached)
                 
                 # Fallback: fetch directly without caching
                 return await fetch_func()
         else:
             # Fetch without lock (for non-critical data)
-            data = await fetch_func()
+            return await self._recompute(key, fetch_func, ttl, stale_ttl)
+    
+    @staticmethod
+    def _decode(key: str, cached: Any) -> Any:
+        if isinstance(cached, bytes) and not is_encoded(cached):
+            cached = cached.decode()
+        if isinstance(cached, str) and not (cached.startswith('{') or cached.startswith('[')):
+            # Plain strings are cached as-is
+            return cached
+        try:
+            return codec_for_key(key).decode(cached)
+        except CodecError:
+            return cached
+    
+    async def _read_with_meta(self, key: str) -> tuple:
+        """Value and refresh metadata in one round trip: (value, meta or None)"""
+        if not self.redis:
+            self._stats["errors"] += 1
+            return None, None
+        
+        try:
+            value, raw_meta = await self._binary.mget([key, CacheKeyBuilder.cache_meta(key)])
+        except (RedisError, AttributeError) as e:
+            self._stats["errors"] += 1
+            logger.error(f"Redis GET error for key {key}: {e}")
+            return None, None
+        
+        meta = None
+        if raw_meta:
+            try:
+                meta = json.loads(raw_meta)
+            except (TypeError, ValueError):
+                meta = None
+        return value, meta
+    
+    @staticmethod
+    def _should_refresh_early(meta: Dict[str, float], now: float, beta: float) -> bool:
+        """
+        XFetch: recompute when now - delta * beta * ln(rand) >= expiry.
+        delta is the key's smoothed recompute time, so slow keys start
+        refreshing further ahead of expiry than fast ones.
+        """
+        delta = meta.get("delta", 0.0)
+        if delta <= 0:
+            return False
+        return now - delta * beta * math.log(1.0 - random.random()) >= meta["expiry"]
+    
+    def _schedule_refresh(self, key: str, fetch_func: Callable, ttl: int, stale_ttl: int):
+        """Start one background refresh for key unless one is already running"""
+        task = self._refreshing.get(key)
+        if task and not task.done():
+            return
+        self._refreshing[key] = asyncio.create_task(
+            self._background_refresh(key, fetch_func, ttl, stale_ttl)
+        )
+    
+    async def _background_refresh(self, key: str, fetch_func: Callable, ttl: int, stale_ttl: int):
+        lock_key = CacheKeyBuilder.lock(key)
+        try:
+            # Non-blocking: if another process holds the lock it is refreshing already
+            if not await self.redis.set(lock_key, str(random.random()), nx=True, ex=10):
+                return
+            try:
+                await self._recompute(key, fetch_func, ttl, stale_ttl)
+                self._stats["background_refreshes"] += 1
+            finally:
+                await self.release_lock(lock_key)
+        except Exception as e:
+            # The stale value keeps being served until a refresh succeeds
+            self._stats["refresh_failures"] += 1
+            logger.warning(f"Background refresh failed for key {key}: {e}")
+        finally:
+            self._refreshing.pop(key, None)
+    
+    async def _recompute(self, key: str, fetch_func: Callable, ttl: Optional[int], stale_ttl: Optional[int]) -> Any:
+        """Fetch, time the fetch, and store the value with its refresh metadata"""
+        started = time.time()
+        data = await fetch_func()
+        finished = time.time()
+        
+        if not ttl:
             await self.set(key, data, ttl)
             return data
+        
+        meta_key = CacheKeyBuilder.cache_meta(key)
+        previous = None
+        try:
+            previous = await self.redis.get(meta_key)
+            previous = json.loads(previous) if previous else None
+        except (RedisError, TypeError, ValueError):
+            previous = None
+        
+        # Smooth the recompute time per key so one slow fetch doesn't
+        # make every later read refresh early
+        delta = finished - started
+        if previous and previous.get("delta"):
+            delta = 0.5 * previous["delta"] + 0.5 * delta
+        meta = {
+            "delta": round(delta, 4),
+            "expiry": finished + ttl,
+            "refreshes": (previous or {}).get("refreshes", 0) + 1,
+        }
+        
+        value = codec_for_key(key).encode(data) if isinstance(data, (dict, list)) else data
+        physical_ttl = ttl + (stale_ttl or 0)
+        try:
+            pipeline = self._binary.pipeline()
+            pipeline.setex(key, physical_ttl, value)
+            pipeline.setex(meta_key, physical_ttl, json.dumps(meta))
+            await pipeline.execute()
+        except (RedisError, AttributeError) as e:
+            self._stats["errors"] += 1
+            logger.error(f"Redis SET error for key {key}: {e}")
+        return data
     
     async def write_through(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
         """Write-through cache pattern - write to cache and notify subscribers"""
@@ -318,11 +558,12 @@ class RedisManager:
             processed = {}
             for key, value in mapping.items():
                 if isinstance(value, (dict, list)):
-                    processed[key] = json.dumps(value)
+                    processed[key] = codec_for_key(key).encode(value)
                 else:
                     processed[key] = value
             
-            await self.redis.mset(processed)
+            self._note_writes(processed)
+            await self._binary.mset(processed)
             return True
         except RedisError as e:
             logger.error(f"Redis MSET error: {e}")
@@ -345,11 +586,12 @@ class RedisManager:
     async def cache_zone_statuses(self, zone_statuses: Dict[str, Dict]) -> bool:
         """Bulk cache zone statuses efficiently"""
         try:
-            pipeline = self.redis.pipeline()
+            pipeline = self._binary.pipeline()
             
             for zone_id, status in zone_statuses.items():
                 key = CacheKeyBuilder.zone_status(zone_id)
-                pipeline.setex(key, self.default_ttls["zone_status"], json.dumps(status))
+                self._note_writes([key])
+                pipeline.setex(key, self.default_ttls["zone_status"], codec_for_key(key).encode(status))
             
             await pipeline.execute()
             return True
@@ -360,15 +602,36 @@ class RedisManager:
     async def get_zone_statuses(self, zone_ids: List[str]) -> Dict[str, Optional[Dict]]:
         """Get multiple zone statuses from cache"""
         keys = [CacheKeyBuilder.zone_status(zone_id) for zone_id in zone_ids]
-        cached = await self.mget(keys)
+        values = [None] * len(keys)
+        
+        # Local copies first, one MGET for the rest
+        remote = []
+        for i, key in enumerate(keys):
+            local = self.near_cache.get(key, "raw") if self._tracked(key) else None
+            if local is None or is_missing(local):
+                remote.append(i)
+            else:
+                values[i] = local
+        
+        if remote:
+            remote_keys = [keys[i] for i in remote]
+            tokens = {key: self.near_cache.begin_fetch(key) for key in remote_keys if self._tracked(key)}
+            try:
+                fetched = await self._binary.mget(remote_keys)
+            except RedisError as e:
+                logger.error(f"Redis MGET error: {e}")
+                fetched = [None] * len(remote_keys)
+            for i, key, value in zip(remote, remote_keys, fetched):
+                values[i] = value
+                if key in tokens:
+                    self.near_cache.store(key, value, tokens[key], "raw")
         
         result = {}
-        for zone_id, key in zip(zone_ids, keys):
-            value = cached.get(key)
+        for zone_id, key, value in zip(zone_ids, keys, values):
             if value:
                 try:
-                    result[zone_id] = json.loads(value)
-                except json.JSONDecodeError:
+                    result[zone_id] = codec_for_key(key).decode(value)
+                except CodecError:
                     result[zone_id] = None
             else:
                 result[zone_id] = None
@@ -488,13 +751,17 @@ class RedisManager:
             latency = (asyncio.get_event_loop().time() - start) * 1000
             
             info = await self.redis.info()
+            cache = self.get_hit_rate()
             
             return {
                 "status": "healthy",
                 "latency_ms": round(latency, 2),
                 "connected_clients": info.get("connected_clients"),
                 "used_memory_human": info.get("used_memory_human"),
-                "cache_hit_rate": self.get_hit_rate(),
+                "cache_hit_rate": cache["hit_rate"],
+                "cache": cache,
+                "codecs": get_all_codec_stats(),
+                "near_cache": self.near_cache.get_stats() if self.near_cache else None,
                 "stats": self._stats.copy(),
             }
         except Exception as e:
@@ -504,12 +771,27 @@ class RedisManager:
                 "stats": self._stats.copy(),
             }
     
-    def get_hit_rate(self) -> float:
-        """Calculate cache hit rate"""
-        total = self._stats["hits"] + self._stats["misses"]
-        if total == 0:
-            return 0.0
-        return (self._stats["hits"] / total) * 100
+    def get_hit_rate(self) -> Dict[str, Any]:
+        """
+        Cache hit rate with a hit/stale/miss breakdown.
+        hit_rate counts stale serves as hits (the caller got a cached value
+        without waiting); fresh_hit_rate counts only values within their ttl.
+        """
+        hits = self._stats["hits"]
+        stale = self._stats["stale_hits"]
+        misses = self._stats["misses"]
+        total = hits + stale + misses
+        return {
+            "hit_rate": round((hits + stale) / total * 100, 2) if total else 0.0,
+            "fresh_hit_rate": round(hits / total * 100, 2) if total else 0.0,
+            "hits": hits,
+            "stale_hits": stale,
+            "misses": misses,
+            "early_refreshes": self._stats["early_refreshes"],
+            "background_refreshes": self._stats["background_refreshes"],
+            "refresh_failures": self._stats["refresh_failures"],
+            "refreshing": len(self._refreshing),
+        }
 
 
 # Create global Redis manager instance
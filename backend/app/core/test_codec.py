@@ -0,0 +1,99 @@
+"""
+Tests for the cache payload codecs.
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from app.core import codec as codec_module
+from app.core.codec import (
+    CacheCodec,
+    CodecError,
+    codec_for_key,
+    get_codec,
+    is_encoded,
+    namespace_for_key,
+)
+
+ZONE_TREE = {
+    "account_id": "QWNjb3VudCwsMXNxbDNkbTJiOGcv",
+    "zones": [
+        {"id": f"zone-{i}", "name": f"Zone {i}", "is_playing": i % 3 != 0, "volume": 8, "playlist": "Chill Lounge"}
+        for i in range(40)
+    ],
+}
+
+
+@pytest.mark.parametrize("format", ["json", "orjson", "msgpack"])
+def test_round_trip(format):
+    codec = CacheCodec("test", format=format, compression="zstd", compress_threshold=256)
+    payload = codec.encode(ZONE_TREE)
+    assert is_encoded(payload)
+    assert codec.decode(payload) == ZONE_TREE
+
+
+def test_large_payload_is_compressed_and_small_one_is_not():
+    codec = CacheCodec("test", format="json", compression="zlib", compress_threshold=512)
+    big = codec.encode(ZONE_TREE)
+    small = codec.encode({"zone": "zone-1"})
+
+    assert big[3] == codec_module.COMPRESSIONS["zlib"]
+    assert small[3] == codec_module.COMPRESSIONS[None]
+    assert len(big) < len(json.dumps(ZONE_TREE)) / 3
+    assert codec.stats["compressed"] == 1
+
+
+def test_legacy_json_still_decodes():
+    codec = CacheCodec("test", format="msgpack")
+    legacy = json.dumps(ZONE_TREE)
+    assert codec.decode(legacy) == ZONE_TREE
+    assert codec.decode(legacy.encode()) == ZONE_TREE
+    assert codec.stats["legacy_decoded"] == 2
+
+
+def test_decodes_payloads_written_by_another_format():
+    writer = CacheCodec("test", format="json", compression=None)
+    reader = CacheCodec("test", format="msgpack")
+    assert reader.decode(writer.encode(ZONE_TREE)) == ZONE_TREE
+
+
+def test_datetimes_match_json_default_str():
+    codec = CacheCodec("test", format="orjson", compression=None)
+    when = datetime(2026, 1, 2, 3, 4, 5)
+    assert codec.decode(codec.encode({"at": when})) == {"at": str(when)}
+
+
+def test_bad_payloads_raise_codec_error():
+    codec = CacheCodec("test")
+    with pytest.raises(CodecError):
+        codec.decode(b"\xb1\x09\x01\x00{}")  # Unknown version
+    with pytest.raises(CodecError):
+        codec.decode(bytes((0xB1, 1, 1, 1)) + b"not zlib")
+    with pytest.raises(CodecError):
+        codec.decode("not json")
+
+
+def test_legacy_format_writes_plain_json_text():
+    codec = CacheCodec("test", format="legacy")
+    payload = codec.encode({"a": 1})
+    assert payload == '{"a": 1}'
+    assert codec.decode(payload) == {"a": 1}
+
+
+def test_namespace_selection_and_stats():
+    assert namespace_for_key("zone:status:42") == "zone:status"
+    assert namespace_for_key("soundtrack:playlists:all") == "soundtrack:playlists"
+    assert namespace_for_key("conversation:session:1") is None
+    assert codec_for_key("conversation:session:1").is_legacy
+
+    codec = codec_for_key("zone:status:42")
+    assert codec is get_codec("zone:status")
+    before = codec.stats["bytes_stored"]
+    payload = codec.encode(ZONE_TREE)
+    codec.decode(payload)
+    stats = codec.get_stats()
+    assert stats["bytes_stored"] - before == len(payload)
+    assert stats["decoded"] >= 1
+    assert stats["avg_encode_us"] > 0
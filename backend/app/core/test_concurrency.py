@@ -0,0 +1,132 @@
+"""
+Simulation tests for the adaptive concurrency limiter.
+A local stub upstream injects queueing latency once more than CAPACITY
+calls are in flight, the way a saturated API behaves.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.concurrency import AdaptiveConcurrencyLimiter, ConcurrencyLimitExceeded
+
+BASE_LATENCY = 0.01
+CAPACITY = 8
+
+
+class LatencyStub:
+    """Upstream that serves CAPACITY calls at base latency and queues the rest"""
+
+    def __init__(self, capacity=CAPACITY, base_latency=BASE_LATENCY, fail=False):
+        self.capacity = capacity
+        self.base_latency = base_latency
+        self.fail = fail
+        self.in_flight = 0
+        self.peak = 0
+
+    async def call(self):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            overload = max(1.0, self.in_flight / self.capacity)
+            await asyncio.sleep(self.base_latency * overload)
+            if self.fail:
+                raise RuntimeError("503 Service Unavailable")
+        finally:
+            self.in_flight -= 1
+
+
+async def drive(limiter, stub, clients=64, duration=2.0):
+    """Closed-loop load: each client issues calls back to back"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+
+    async def client():
+        while loop.time() < deadline:
+            try:
+                async with limiter.acquire():
+                    await stub.call()
+            except RuntimeError:
+                pass
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+
+
+def test_limit_converges_below_offered_load():
+    limiter = AdaptiveConcurrencyLimiter("stub", initial_limit=50, max_limit=200, window_size=20)
+    stub = LatencyStub()
+
+    asyncio.run(drive(limiter, stub))
+
+    recent = list(limiter.limit_history)[-40:]
+    # Shrinks from 50 toward capacity and holds there instead of following
+    # 64 clients; only the periodic no-load probes dip below the band
+    assert max(recent) <= CAPACITY * 3
+    median = sorted(recent)[len(recent) // 2]
+    assert CAPACITY <= median <= CAPACITY * 3
+    # Stable: outside the probe dips the limit moves by a few slots at most
+    steady = sorted(recent)[len(recent) // 4:]
+    assert steady[-1] - steady[0] <= CAPACITY
+    assert limiter.stats["decreases"] > 0
+
+
+def test_limit_grows_when_upstream_has_headroom():
+    limiter = AdaptiveConcurrencyLimiter("stub", initial_limit=2, max_limit=200, window_size=20)
+    stub = LatencyStub(capacity=32)
+
+    asyncio.run(drive(limiter, stub, clients=64, duration=1.5))
+
+    assert limiter.limit > 8
+    assert limiter.stats["increases"] > 0
+
+
+def test_errors_cut_limit():
+    limiter = AdaptiveConcurrencyLimiter(
+        "stub", initial_limit=40, min_limit=2, window_size=10, backoff_ratio=0.5
+    )
+    stub = LatencyStub(fail=True)
+
+    asyncio.run(drive(limiter, stub, clients=16, duration=0.5))
+
+    assert limiter.limit == 2
+    assert limiter.stats["errors"] == limiter.stats["calls"]
+
+
+def test_in_flight_never_exceeds_limit():
+    limiter = AdaptiveConcurrencyLimiter("stub", initial_limit=4, max_limit=4)
+    stub = LatencyStub(capacity=100)
+
+    asyncio.run(drive(limiter, stub, clients=32, duration=0.3))
+
+    assert stub.peak <= 4
+    assert limiter.in_flight == 0
+
+
+def test_max_wait_rejects():
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter("stub", initial_limit=1, max_limit=1, max_wait=0.02)
+        stub = LatencyStub(base_latency=0.1)
+
+        async def call():
+            async with limiter.acquire():
+                await stub.call()
+
+        first = asyncio.create_task(call())
+        await asyncio.sleep(0)
+        with pytest.raises(ConcurrencyLimitExceeded):
+            await call()
+        await first
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.stats["rejected"] == 1
+    assert limiter.in_flight == 0
+
+
+def test_limit_change_listener():
+    limiter = AdaptiveConcurrencyLimiter("stub", initial_limit=10, window_size=5, backoff_ratio=0.5)
+    seen = []
+    limiter.on_limit_change(seen.append)
+    for _ in range(5):
+        limiter.record(0.01, error=True)
+    assert seen == [5]
@@ -14,10 +14,9 @@ from typing import List
 import pytest
 from sqlalchemy import Column, DateTime, Integer, String, Text, func, select
 from sqlalchemy.dialects.postgresql import JSONB, UUID
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, declarative_base
 
 from .database import (
-    Base,
     DatabaseRole,
     db_manager,
     get_analytics_db,
@@ -27,7 +26,10 @@ from .database import (
 )
 
 
-# Example model for testing
+# Example models for testing; their own Base keeps them off the app's tables
+Base = declarative_base()
+
+
 class Venue(Base):
     __tablename__ = "venues"
     
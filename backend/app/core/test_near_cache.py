@@ -0,0 +1,161 @@
+"""
+Tests for the near-cache used by RedisManager.
+The pool stand-in answers the tracking handshake and lets tests push
+invalidation messages to the subscriber connection.
+"""
+
+import asyncio
+
+from app.core.near_cache import NearCache, is_missing
+
+
+class FakeConnection:
+    def __init__(self, pool, client_id):
+        self.pool = pool
+        self.client_id = client_id
+        self.replies = asyncio.Queue()
+
+    async def send_command(self, *args):
+        if args[:2] == ("CLIENT", "ID"):
+            self.replies.put_nowait(self.client_id)
+        elif args[0] == "SUBSCRIBE":
+            self.pool.subscriber = self
+            self.replies.put_nowait(["subscribe", args[1], 1])
+        elif args[:2] == ("CLIENT", "TRACKING"):
+            if self.pool.tracking_supported:
+                self.pool.tracking_args = args
+                self.replies.put_nowait("OK")
+            else:
+                self.replies.put_nowait(RuntimeError("ERR unknown subcommand 'TRACKING'"))
+
+    async def read_response(self, timeout=None):
+        # Like redis.asyncio: an explicit timeout returns None, the pool's
+        # socket_timeout raises
+        try:
+            reply = await asyncio.wait_for(self.replies.get(), timeout or self.pool.socket_timeout)
+        except asyncio.TimeoutError:
+            if timeout is not None:
+                return None
+            raise TimeoutError("Timeout reading from socket")
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    async def disconnect(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, tracking_supported=True, socket_timeout=None):
+        self.tracking_supported = tracking_supported
+        self.socket_timeout = socket_timeout
+        self.tracking_args = None
+        self.subscriber = None
+        self._ids = 0
+
+    async def get_connection(self, name):
+        self._ids += 1
+        return FakeConnection(self, self._ids)
+
+    async def release(self, connection):
+        pass
+
+
+async def read_through(cache, key, store):
+    local = cache.get(key)
+    if not is_missing(local):
+        return local
+    token = cache.begin_fetch(key)
+    await asyncio.sleep(0)
+    value = store.get(key)
+    cache.store(key, value, token)
+    return value
+
+
+def test_invalidation_message_drops_local_copy():
+    async def scenario():
+        pool = FakePool()
+        cache = NearCache(pool, prefixes=["zone:status:"])
+        dropped = []
+        cache.on_invalidate(dropped.append)
+        await cache.start()
+        store = {"zone:status:1": b"playing"}
+
+        await read_through(cache, "zone:status:1", store)
+        await read_through(cache, "zone:status:1", store)
+        store["zone:status:1"] = b"offline"
+        pool.subscriber.replies.put_nowait(["message", "__redis__:invalidate", [b"zone:status:1"]])
+        await asyncio.sleep(0.01)
+        value = await read_through(cache, "zone:status:1", store)
+        stats = cache.get_stats()
+        await cache.stop()
+        return pool, value, stats, dropped
+
+    pool, value, stats, dropped = asyncio.run(scenario())
+    assert pool.tracking_args[-3:] == ("BCAST", "PREFIX", "zone:status:")
+    assert value == b"offline"
+    assert stats["mode"] == "tracking"
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert ["zone:status:1"] in dropped
+
+
+def test_read_racing_an_invalidation_is_not_stored():
+    async def scenario():
+        cache = NearCache(FakePool(), prefixes=["zone:status:"])
+        await cache.start()
+        token = cache.begin_fetch("zone:status:1")
+        cache.invalidate(["zone:status:1"])
+        cache.store("zone:status:1", b"old", token)
+        local = cache.get("zone:status:1")
+        await cache.stop()
+        return local
+
+    assert is_missing(asyncio.run(scenario()))
+
+
+def test_write_lag_and_ttl_fallback():
+    async def scenario():
+        tracked = NearCache(FakePool(), prefixes=["zone:status:"])
+        await tracked.start()
+        tracked.note_write("zone:status:1")
+        await asyncio.sleep(0.01)
+        tracked.invalidate(["zone:status:1"])
+        lag = tracked.get_stats()["invalidation_lag_ms"]
+        await tracked.stop()
+
+        fallback = NearCache(FakePool(tracking_supported=False), prefixes=["zone:status:"], fallback_ttl=0.02)
+        await fallback.start()
+        fallback.store("zone:status:1", b"playing", fallback.begin_fetch("zone:status:1"))
+        first = fallback.get("zone:status:1")
+        await asyncio.sleep(0.03)
+        second = fallback.get("zone:status:1")
+        mode = fallback.mode
+        await fallback.stop()
+        return lag, first, second, mode
+
+    lag, first, second, mode = asyncio.run(scenario())
+    assert lag["samples"] == 1 and lag["p50"] >= 10
+    assert mode == "ttl"
+    assert first == b"playing"
+    assert is_missing(second)
+
+
+def test_quiet_subscriber_stays_tracking():
+    async def scenario():
+        pool = FakePool(socket_timeout=0.01)
+        cache = NearCache(pool, prefixes=["zone:status:"], listen_timeout=0.01)
+        await cache.start()
+        await asyncio.sleep(0.1)  # Many socket timeouts without a message
+        mode = cache.mode
+        cache.store("zone:status:1", b"playing", cache.begin_fetch("zone:status:1"))
+        pool.subscriber.replies.put_nowait(["message", "__redis__:invalidate", [b"zone:status:1"]])
+        await asyncio.sleep(0.05)
+        local = cache.get("zone:status:1")
+        stats = cache.get_stats()
+        await cache.stop()
+        return mode, local, stats
+
+    mode, local, stats = asyncio.run(scenario())
+    assert mode == "tracking"
+    assert is_missing(local) and stats["invalidations"] == 1
+    assert stats["flushes"] == 1  # Only the one when tracking started
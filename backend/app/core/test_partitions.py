@@ -0,0 +1,116 @@
+"""
+Tests for the monthly partition helpers.
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from app.core.partitions import (
+    add_months,
+    drop_expired_partitions,
+    expired_partition_months,
+    parse_partition_month,
+    partition_bounds,
+    partition_name,
+)
+
+
+@pytest.mark.parametrize(
+    "month, months, expected",
+    [
+        (date(2025, 9, 1), 1, date(2025, 10, 1)),
+        (date(2025, 12, 1), 1, date(2026, 1, 1)),
+        (date(2025, 11, 1), 3, date(2026, 2, 1)),
+        (date(2026, 1, 1), -1, date(2025, 12, 1)),
+        (date(2025, 3, 1), -15, date(2023, 12, 1)),
+        (date(2025, 6, 1), 24, date(2027, 6, 1)),
+        (date(2025, 6, 1), 0, date(2025, 6, 1)),
+    ],
+)
+def test_add_months(month, months, expected):
+    assert add_months(month, months) == expected
+
+
+def test_partition_bounds():
+    assert partition_bounds(date(2025, 2, 1)) == (date(2025, 2, 1), date(2025, 3, 1))
+    # December's partition ends at the start of the next year
+    assert partition_bounds(date(2025, 12, 1)) == (date(2025, 12, 1), date(2026, 1, 1))
+
+
+def test_parse_partition_month_round_trips_names():
+    for month in (date(2025, 1, 1), date(2025, 12, 1), date(2026, 1, 1)):
+        assert parse_partition_month("monitoring_logs", partition_name("monitoring_logs", month)) == month
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "monitoring_logs",
+        "monitoring_logs_default",
+        "monitoring_logs_2025_9",
+        "monitoring_logs_2025_09_old",
+        "old_monitoring_logs_2025_09",
+        "monitoring_logs_archive_2025_09",
+        "alerts_2025_09",
+    ],
+)
+def test_parse_partition_month_ignores_other_tables(name):
+    assert parse_partition_month("monitoring_logs", name) is None
+
+
+def test_parse_partition_month_escapes_table_name():
+    # "." in the table name must not match any character
+    assert parse_partition_month("logs.v2", "logsXv2_2025_09") is None
+    assert parse_partition_month("logs.v2", "logs.v2_2025_09") == date(2025, 9, 1)
+
+
+def test_expired_partition_months():
+    months = [date(2025, 3, 1), date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1)]
+    # Cutoff is 2025-02-13: January ended before it, February still holds younger rows
+    now = datetime(2025, 3, 15, 12, 0)
+    assert expired_partition_months(months, 30, now) == [date(2024, 12, 1), date(2025, 1, 1)]
+
+
+def test_expired_partition_months_at_cutoff():
+    months = [date(2025, 1, 1)]
+    # Cutoff 2025-02-01 equals January's upper bound: every row is past retention
+    assert expired_partition_months(months, 30, datetime(2025, 3, 3)) == [date(2025, 1, 1)]
+    # Cutoff 2025-01-31: January 31st rows are still within retention
+    assert expired_partition_months(months, 30, datetime(2025, 3, 2)) == []
+
+
+def test_expired_partition_months_across_year_rollover():
+    months = [date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1)]
+    assert expired_partition_months(months, 10, datetime(2025, 1, 12)) == [date(2024, 11, 1), date(2024, 12, 1)]
+    assert expired_partition_months(months, 12, datetime(2025, 1, 12)) == [date(2024, 11, 1)]
+
+
+class FakeSession:
+    def __init__(self, partitions):
+        self.partitions = partitions
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        if "pg_inherits" in sql:
+            return [(name,) for name in self.partitions]
+        self.statements.append(sql)
+        return []
+
+
+def test_drop_expired_partitions_skips_foreign_names():
+    session = FakeSession([
+        "monitoring_logs_2024_12",
+        "monitoring_logs_2025_03",
+        "monitoring_logs_default",
+        "monitoring_logs_archive",
+    ])
+
+    dropped = drop_expired_partitions(session, retention_days=30, now=datetime(2025, 3, 15))
+
+    assert dropped == ["monitoring_logs_2024_12"]
+    assert session.statements == [
+        'ALTER TABLE "monitoring_logs" DETACH PARTITION "monitoring_logs_2024_12"',
+        'DROP TABLE "monitoring_logs_2024_12"',
+    ]
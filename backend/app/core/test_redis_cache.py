@@ -0,0 +1,207 @@
+"""
+Tests for RedisManager.get_or_set early expiry and stale-while-revalidate.
+Runs against a small in-memory stand-in with a controllable clock.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.core import redis as redis_module
+from app.core.redis import CacheKeyBuilder, RedisManager
+
+
+class FakeRedis:
+    """String commands get_or_set uses, with expiry on a shared fake clock"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.data = {}  # key -> (value, expires_at or None)
+
+    def _live(self, key):
+        item = self.data.get(key)
+        if item and item[1] is not None and item[1] <= self.clock.now:
+            del self.data[key]
+            return None
+        return item[0] if item else None
+
+    async def get(self, key):
+        return self._live(key)
+
+    async def mget(self, keys):
+        return [self._live(key) for key in keys]
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and self._live(key) is not None:
+            return None
+        self.data[key] = (value, self.clock.now + ex if ex else None)
+        return True
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = (value, self.clock.now + ttl)
+
+    async def delete(self, *keys):
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def setex(self, key, ttl, value):
+        self.commands.append((key, ttl, value))
+
+    async def execute(self):
+        for key, ttl, value in self.commands:
+            await self.redis.setex(key, ttl, value)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(redis_module.time, "time", clock.time)
+    manager = RedisManager()
+    manager.redis = FakeRedis(clock)
+    return manager, clock
+
+
+def make_fetch(values, delay=0.0):
+    calls = []
+
+    async def fetch():
+        calls.append(len(calls))
+        if delay:
+            await asyncio.sleep(delay)
+        return {"version": values[min(len(calls) - 1, len(values) - 1)]}
+
+    return fetch, calls
+
+
+def test_miss_then_hit(manager):
+    manager, clock = manager
+    fetch, calls = make_fetch([1])
+
+    async def scenario():
+        first = await manager.get_or_set("venue:1", fetch, ttl=60)
+        second = await manager.get_or_set("venue:1", fetch, ttl=60)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second == {"version": 1}
+    assert len(calls) == 1
+    stats = manager.get_hit_rate()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"]) == (1, 0, 1)
+    assert stats["hit_rate"] == 50.0
+
+
+def test_stale_value_served_while_one_refresh_runs(manager):
+    manager, clock = manager
+    fetch, calls = make_fetch([1, 2], delay=0.01)
+
+    async def scenario():
+        await manager.get_or_set("venue:1", fetch, ttl=60)
+        clock.now += 90  # Past the ttl, inside the stale window
+        served = await asyncio.gather(*(manager.get_or_set("venue:1", fetch, ttl=60) for _ in range(20)))
+        await asyncio.gather(*manager._refreshing.values())
+        fresh = await manager.get_or_set("venue:1", fetch, ttl=60)
+        return served, fresh
+
+    served, fresh = asyncio.run(scenario())
+    assert all(value == {"version": 1} for value in served)
+    assert fresh == {"version": 2}
+    assert len(calls) == 2  # One cold fetch, one background refresh
+    stats = manager.get_hit_rate()
+    assert stats["stale_hits"] == 20
+    assert stats["background_refreshes"] == 1
+
+
+def test_value_past_stale_window_is_a_miss(manager):
+    manager, clock = manager
+    fetch, calls = make_fetch([1, 2])
+
+    async def scenario():
+        await manager.get_or_set("venue:1", fetch, ttl=60, stale_ttl=30)
+        clock.now += 91
+        return await manager.get_or_set("venue:1", fetch, ttl=60, stale_ttl=30)
+
+    assert asyncio.run(scenario()) == {"version": 2}
+    assert manager.get_hit_rate()["misses"] == 2
+
+
+def test_early_refresh_probability_rises_near_expiry(manager):
+    manager, clock = manager
+    meta = {"delta": 2.0, "expiry": clock.now + 60}
+
+    def early_share(seconds_left):
+        now = meta["expiry"] - seconds_left
+        return sum(manager._should_refresh_early(meta, now, 1.0) for _ in range(2000)) / 2000
+
+    # P(refresh) = exp(-seconds_left / delta)
+    assert early_share(30) < 0.01
+    assert 0.25 < early_share(2) < 0.5
+    assert early_share(0.1) > 0.9
+
+
+def test_slow_keys_refresh_earlier(manager):
+    manager, clock = manager
+    now = clock.now
+    fast = {"delta": 0.05, "expiry": now + 5}
+    slow = {"delta": 5.0, "expiry": now + 5}
+    fast_share = sum(manager._should_refresh_early(fast, now, 1.0) for _ in range(1000))
+    slow_share = sum(manager._should_refresh_early(slow, now, 1.0) for _ in range(1000))
+    assert fast_share == 0
+    assert slow_share > 250
+
+
+def test_refresh_time_is_recorded_per_key(manager):
+    manager, clock = manager
+    fetch, _ = make_fetch([1])
+
+    async def scenario():
+        await manager.get_or_set("venue:1", fetch, ttl=60)
+        return await manager.redis.get(CacheKeyBuilder.cache_meta("venue:1"))
+
+    meta = json.loads(asyncio.run(scenario()))
+    assert meta["expiry"] == clock.now + 60
+    assert meta["refreshes"] == 1
+    assert "delta" in meta
+
+
+def test_failed_refresh_keeps_serving_stale(manager):
+    manager, clock = manager
+    state = {"fail": False}
+
+    async def fetch():
+        if state["fail"]:
+            raise RuntimeError("Soundtrack timeout")
+        return {"version": 1}
+
+    async def scenario():
+        await manager.get_or_set("venue:1", fetch, ttl=60)
+        clock.now += 70
+        state["fail"] = True
+        first = await manager.get_or_set("venue:1", fetch, ttl=60)
+        await asyncio.gather(*manager._refreshing.values())
+        second = await manager.get_or_set("venue:1", fetch, ttl=60)
+        await asyncio.gather(*manager._refreshing.values())
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second == {"version": 1}
+    stats = manager.get_hit_rate()
+    assert stats["refresh_failures"] == 2
+    # Lock released after each failure so the next read can retry
+    assert CacheKeyBuilder.lock("venue:1") not in manager.redis.data
@@ -0,0 +1,82 @@
+"""
+Tests for trigram name search.
+The pg_trgm path is checked by compiling its query for Postgres and by
+re-ranking rows from a session stand-in; no database is needed.
+"""
+
+from sqlalchemy import Boolean, Column, Integer, String
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import declarative_base
+
+from app.core.trigram import trigram_query, trigram_search
+from app.core.trigram_index import TrigramIndex, edit_similarity, venue_names
+
+Base = declarative_base()
+
+
+class Place(Base):
+    __tablename__ = "places"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(255))
+    brand = Column(String(100))
+    is_active = Column(Boolean, default=True)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        return FakeResult(self.rows)
+
+
+def test_index_finds_misspelled_names():
+    venues = [
+        {"name": "Hilton Pattaya", "brand": "Hilton"},
+        {"name": "Hilton Bangkok", "aliases": "Millennium Hilton"},
+        {"name": "Centara Grand Mirage Beach Resort"},
+    ]
+    index = TrigramIndex((venue, venue_names(venue)) for venue in venues)
+
+    assert index.search("Hiltn Patya", k=1)[0]["value"]["name"] == "Hilton Pattaya"
+    assert index.search("milenium hilton", k=1)[0]["name"] == "millennium hilton"
+    assert [match["value"]["name"] for match in index.search("hilton", k=5)][:2] == ["Hilton Pattaya", "Hilton Bangkok"]
+    assert index.search("zzzz") == []
+    assert edit_similarity("Hiltn", "hilton") == 1 - 1 / 6
+
+
+def test_query_uses_trigram_operator():
+    statement = trigram_query(Place, "Hiltn Patya", columns=("name", "brand"), filters=[Place.is_active.is_(True)])
+    sql = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+    # %% is the driver's escape for the % operator
+    assert "(places.name %% 'hiltn patya') OR (places.brand %% 'hiltn patya')" in sql
+    assert "places.is_active IS true" in sql
+    assert "greatest(similarity(coalesce(places.name, ''), 'hiltn patya')" in sql
+    assert sql.rstrip().endswith("LIMIT 20")
+
+
+def test_search_reranks_by_edit_similarity():
+    rows = [
+        (Place(id=1, name="Hilton Pattaya Beach"), 0.42),
+        (Place(id=2, name="Hilton Pattaya"), 0.40),
+    ]
+    session = FakeSession(rows)
+
+    results = trigram_search(session, Place, "Hiltn Patya", k=1, min_similarity=0.35)
+
+    assert [row.id for row, _ in results] == [2]
+    assert 0 < results[0][1] < 1
+    assert "set_config" in str(session.statements[0])
+    assert trigram_search(session, Place, "  ") == []
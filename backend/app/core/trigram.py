@@ -0,0 +1,62 @@
+"""
+Typo-tolerant name search backed by Postgres pg_trgm.
+
+The in-memory index and the scoring (padded character trigrams re-ranked
+by edit distance) live in app.core.trigram_index, shared with the flat
+backend's venue_identifier. This module answers the same queries from a
+pg_trgm GIN index instead, scored the same way.
+"""
+
+from typing import Any, List, Sequence, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.trigram_index import RERANK_FACTOR, edit_similarity, normalize
+
+
+def trigram_query(model, query: str, columns: Sequence[str] = ("name",), filters: Sequence[Any] = (), limit: int = 20):
+    """
+    Rows of model whose columns are trigram-similar to query, most similar
+    first. The % operator is what lets Postgres answer from a gin_trgm_ops
+    index; similarity() gives the score.
+    """
+    text = normalize(query)
+    targets = [getattr(model, name) for name in columns]
+    scores = [func.similarity(func.coalesce(target, ""), text) for target in targets]
+    similarity = scores[0] if len(scores) == 1 else func.greatest(*scores)
+    return (
+        select(model, similarity.label("similarity"))
+        .where(or_(*[target.op("%")(text) for target in targets]), *filters)
+        .order_by(similarity.desc())
+        .limit(limit)
+    )
+
+
+def trigram_search(
+    session: Session,
+    model,
+    query: str,
+    k: int = 5,
+    min_similarity: float = 0.3,
+    columns: Sequence[str] = ("name",),
+    filters: Sequence[Any] = (),
+) -> List[Tuple[Any, float]]:
+    """
+    pg_trgm backend: top-k (row, score) for query, scored like TrigramIndex.
+
+    Requires the pg_trgm extension and gin_trgm_ops indexes on the columns
+    (sql/08_venue_trigram_search.sql).
+    """
+    if not normalize(query):
+        return []
+    # Threshold for the % operator, for this transaction only
+    session.execute(select(func.set_config("pg_trgm.similarity_threshold", str(min_similarity), True)))
+    rows = session.execute(trigram_query(model, query, columns, filters, limit=k * RERANK_FACTOR)).all()
+
+    scored = []
+    for row, similarity in rows:
+        edit = max(edit_similarity(query, getattr(row, name) or "") for name in columns)
+        scored.append((row, round((similarity + edit) / 2, 4)))
+    scored.sort(key=lambda item: -item[1])
+    return scored[:k]
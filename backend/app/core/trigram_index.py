@@ -0,0 +1,200 @@
+"""
+Typo-tolerant name search with a character-trigram index.
+
+Names are split into padded character trigrams (the pg_trgm scheme), so a
+misspelled query like "Hiltn Patya" still shares most trigrams with
+"Hilton Pattaya". Candidates come from the postings of the query's
+trigrams; the best of them are re-ranked by edit distance.
+
+This is the only copy of the index: app.core.trigram adds a pg_trgm
+backend for the database, scored the same way, and the flat backend's
+venue_identifier imports it from here.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Candidates re-ranked by edit distance per result asked for
+RERANK_FACTOR = 4
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^\w]+", " ", text.lower()).split())
+
+
+def trigrams(text: str) -> frozenset:
+    """pg_trgm-style trigrams: each word padded with two spaces before and one after"""
+    grams = set()
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance (Myers/Hyyrö bit-parallel: one pass over b)"""
+    if not a:
+        return len(b)
+    if not b:
+        return len(a)
+    peq: Dict[str, int] = {}
+    for i, char in enumerate(a):
+        peq[char] = peq.get(char, 0) | (1 << i)
+    full = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    pv, mv, score = full, 0, len(a)
+    for char in b:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & full
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv
+    return score
+
+
+class TrigramIndex:
+    """
+    Trigram postings over names (several per value: name, aliases, brand)
+
+    Postings are kept as bitsets (one bit per name) and the query's
+    postings are summed into a bit-sliced counter, so finding the names
+    that share the most trigrams with a query costs a few big-int
+    operations per trigram instead of a loop over every matching name.
+    """
+
+    def __init__(self, items: Iterable[Tuple[Any, Iterable[str]]] = ()):
+        self._names: List[str] = []
+        self._grams: List[frozenset] = []
+        self._owners: List[int] = []
+        self._values: List[Any] = []
+        self._postings: Dict[str, List[int]] = {}
+        self._bits: Optional[Dict[str, int]] = None
+        for value, names in items:
+            self.add(value, names)
+
+    def __len__(self):
+        return len(self._values)
+
+    def add(self, value: Any, names: Iterable[str]):
+        owner = len(self._values)
+        self._values.append(value)
+        seen = set()
+        for name in names:
+            name = normalize(name or "")
+            if not name or name in seen:
+                continue
+            seen.add(name)
+            entry = len(self._names)
+            grams = trigrams(name)
+            self._names.append(name)
+            self._grams.append(grams)
+            self._owners.append(owner)
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(entry)
+        self._bits = None  # Rebuilt on the next search
+
+    def _bitsets(self) -> Dict[str, int]:
+        if self._bits is None:
+            size = (len(self._names) + 7) // 8
+            bits = {}
+            for gram, entries in self._postings.items():
+                buffer = bytearray(size)
+                for entry in entries:
+                    buffer[entry >> 3] |= 1 << (entry & 7)
+                bits[gram] = int.from_bytes(buffer, "little")
+            self._bits = bits
+        return self._bits
+
+    @staticmethod
+    def _at_least(counter: List[int], level: int) -> int:
+        """Bitset of names whose count in the bit-sliced counter is >= level"""
+        greater, equal = 0, -1
+        for i in range(len(counter) - 1, -1, -1):
+            if level >> i & 1:
+                equal &= counter[i]
+            else:
+                greater |= equal & counter[i]
+                equal &= ~counter[i]
+        return greater | equal
+
+    def _candidates(self, grams: frozenset, limit: int) -> List[int]:
+        """About limit names sharing the most trigrams with the query"""
+        bits = self._bitsets()
+        rows = [bits[gram] for gram in grams if gram in bits]
+        counter: List[int] = []
+        for row in rows:
+            carry = row
+            for i in range(len(counter)):
+                counter[i], carry = counter[i] ^ carry, counter[i] & carry
+                if not carry:
+                    break
+            if carry:
+                counter.append(carry)
+
+        chosen, taken = [], 0
+        for level in range(len(rows), 0, -1):
+            selected = self._at_least(counter, level) & ~taken
+            taken |= selected
+            while selected and len(chosen) < limit:
+                low = selected & -selected
+                chosen.append(low.bit_length() - 1)
+                selected ^= low
+            if len(chosen) >= limit:
+                break
+        return chosen
+
+    def search(self, query: str, k: int = 5, min_score: float = 0.3) -> List[Dict]:
+        """
+        Best k values for query, as {"value", "name" (matched), "score"}
+        score is the mean of trigram similarity (Jaccard, as pg_trgm's
+        similarity()) and normalized edit similarity, in [0, 1].
+        """
+        text = normalize(query)
+        grams = trigrams(text)
+        if not grams or not self._names:
+            return []
+
+        best: Dict[int, Tuple[float, str]] = {}
+        for entry in self._candidates(grams, k * RERANK_FACTOR):
+            name = self._names[entry]
+            shared = len(grams & self._grams[entry])
+            similarity = shared / (len(grams) + len(self._grams[entry]) - shared)
+            edit = 1 - edit_distance(text, name) / max(len(text), len(name))
+            score = (similarity + edit) / 2
+            owner = self._owners[entry]
+            if score >= min_score and score > best.get(owner, (0.0, ""))[0]:
+                best[owner] = (score, name)
+
+        ranked = sorted(best.items(), key=lambda item: -item[1][0])[:k]
+        return [{"value": self._values[owner], "name": name, "score": round(score, 4)} for owner, (score, name) in ranked]
+
+
+def edit_similarity(query: str, name: str) -> float:
+    """1 - normalized edit distance between two names, in [0, 1]"""
+    query, name = normalize(query), normalize(name)
+    if not query or not name:
+        return 0.0
+    return 1 - edit_distance(query, name) / max(len(query), len(name))
+
+
+def venue_names(venue: Dict) -> List[str]:
+    """Searchable names of a venue dict (name, aliases, brand), whatever source it came from"""
+    names = [venue.get("name") or venue.get("venue_name") or venue.get("property_name")]
+    aliases = venue.get("aliases") or []
+    if isinstance(aliases, str):
+        aliases = aliases.split(",")
+    names.extend(aliases)
+    names.append(venue.get("brand"))
+    return [name for name in names if name]
+
+
+def venue_index(venues: Iterable[Dict]) -> TrigramIndex:
+    return TrigramIndex((venue, venue_names(venue)) for venue in venues)
@@ -52,13 +52,14 @@ class BaseModel(Base, TimestampMixin):
     def to_dict(self) -> Dict[str, Any]:
         """Convert model to dictionary"""
         result = {}
-        for column in self.__table__.columns:
-            value = getattr(self, column.name)
+        # Attribute keys can differ from column names (meta_data -> "metadata")
+        for attr in self.__mapper__.column_attrs:
+            value = getattr(self, attr.key)
             if isinstance(value, datetime):
                 value = value.isoformat()
             elif isinstance(value, uuid.UUID):
                 value = str(value)
-            result[column.name] = value
+            result[attr.columns[0].name] = value
         return result
     
     def update(self, **kwargs):
@@ -91,7 +91,7 @@ class Campaign(BaseModel):
     approved_at = Column(DateTime(timezone=True))
     
     # Metadata
-    metadata = Column(JSONB, default={})
+    meta_data = Column("metadata", JSONB, default={})
     tags = Column(JSONB, default=[])
     
     # Relationships
@@ -158,7 +158,7 @@ class CampaignRecipient(BaseModel):
     response_content = Column(Text)
     
     # Metadata
-    metadata = Column(JSONB, default={})
+    meta_data = Column("metadata", JSONB, default={})
     
     def __repr__(self):
         return f"<CampaignRecipient(id={self.id}, campaign_id={self.campaign_id}, status={self.status})>"
\ No newline at end of file
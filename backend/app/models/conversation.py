@@ -4,7 +4,7 @@ from datetime import datetime, timedelta
 from typing import Optional
 from enum import Enum as PyEnum
 from sqlalchemy import (
-    Column, String, Boolean, Integer, Float, ForeignKey, Index, Enum, Text, text
+    Column, String, Boolean, Integer, Float, DateTime, ForeignKey, Index, Enum, Text, text
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship, validates
@@ -60,6 +60,7 @@ class Conversation(BaseModel):
         Index("idx_conversation_assigned", "assigned_to", "status"),
         Index("idx_conversation_sla", "sla_deadline", "status"),
         Index("idx_conversation_external", "external_id", "channel"),
+        Index("idx_conversation_created_id", "created_at", "id"),  # Keyset pagination
         {"comment": "Customer conversations across all channels"}
     )
     
@@ -113,7 +114,7 @@ class Conversation(BaseModel):
     satisfaction_requested_at = Column(DateTime(timezone=True))
     
     # Metadata
-    metadata = Column(JSONB, default={})
+    meta_data = Column("metadata", JSONB, default={})
     tags = Column(JSONB, default=[])  # ["vip", "complaint", "urgent"]
     
     # Session Management
@@ -236,7 +237,7 @@ class Message(BaseModel):
     failure_reason = Column(String(500))
     
     # Metadata
-    metadata = Column(JSONB, default={})
+    meta_data = Column("metadata", JSONB, default={})
     
     @validates("content_type")
     def validate_content_type(self, key, value):
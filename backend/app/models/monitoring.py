@@ -3,7 +3,7 @@
 from datetime import datetime
 from enum import Enum as PyEnum
 from sqlalchemy import (
-    Column, String, Boolean, Integer, Float, ForeignKey, Index, Enum, Text
+    Column, String, Boolean, Integer, Float, ForeignKey, Index, Enum, Text, DateTime, func
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
@@ -33,14 +33,27 @@ class AlertType(PyEnum):
 class MonitoringLog(BaseModel):
     """
     Monitoring log for tracking zone status checks.
-    Partitioned by month for efficient storage of millions of records.
+    Range-partitioned by month on created_at for efficient storage of millions
+    of records; see app.core.partitions for partition creation and retention.
     """
     
     __tablename__ = "monitoring_logs"
     __table_args__ = (
         Index("idx_monitoring_zone_time", "zone_id", "created_at"),
         Index("idx_monitoring_status", "status", "created_at"),
-        {"comment": "High-volume monitoring logs, partitioned monthly"}
+        Index("idx_monitoring_created_id", "created_at", "id"),  # Keyset exports
+        {
+            "comment": "High-volume monitoring logs, partitioned monthly",
+            "postgresql_partition_by": "RANGE (created_at)",
+        }
+    )
+    
+    # The partition key must be part of the primary key: (id, created_at)
+    created_at = Column(
+        DateTime(timezone=True),
+        primary_key=True,
+        nullable=False,
+        server_default=func.now()
     )
     
     # Relationships
@@ -63,7 +76,7 @@ class MonitoringLog(BaseModel):
     retry_count = Column(Integer, default=0)
     
     # Metadata
-    metadata = Column(JSONB, default={})
+    meta_data = Column("metadata", JSONB, default={})
     
     def __repr__(self):
         return f"<MonitoringLog(id={self.id}, zone_id={self.zone_id}, status={self.status})>"
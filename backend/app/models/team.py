@@ -76,7 +76,7 @@ class TeamMember(BaseModel):
     })
     
     # Metadata
-    metadata = Column(JSONB, default={})
+    meta_data = Column("metadata", JSONB, default={})
     tags = Column(JSONB, default=[])
     
     # Relationships
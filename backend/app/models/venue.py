@@ -21,6 +21,10 @@ class Venue(BaseModel):
         Index("idx_venue_brand_country", "brand", "country"),
         Index("idx_venue_active_priority", "is_active", "priority"),
         Index("idx_venue_soundtrack_account", "soundtrack_account_id"),
+        Index("idx_venue_created_id", "created_at", "id"),  # Keyset pagination
+        # Typo-tolerant name search (app.core.trigram, needs the pg_trgm extension)
+        Index("idx_venue_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("idx_venue_brand_trgm", "brand", postgresql_using="gin", postgresql_ops={"brand": "gin_trgm_ops"}),
         {"comment": "Commercial venues with background music subscriptions"}
     )
     
@@ -78,7 +82,7 @@ class Venue(BaseModel):
     last_month_satisfaction = Column(Float)  # Average score
     
     # Custom Metadata
-    metadata = Column(JSONB, default={})  # Flexible field for custom data
+    meta_data = Column("metadata", JSONB, default={})  # Flexible field for custom data
     tags = Column(JSONB, default=[])  # ["vip", "high-traffic", "seasonal"]
     
     # Relationships
@@ -3,7 +3,7 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from sqlalchemy import (
-    Column, String, Boolean, Integer, Float, ForeignKey, Index, CheckConstraint, text
+    Column, String, Boolean, Integer, Float, DateTime, ForeignKey, Index, CheckConstraint, text
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship, validates
@@ -23,6 +23,7 @@ class Zone(BaseModel):
         Index("idx_zone_device_status", "soundtrack_device_id", "is_online"),
         Index("idx_zone_last_check", "last_checked_at"),
         Index("idx_zone_venue_online", "venue_id", "is_online"),
+        Index("idx_zone_created_id", "created_at", "id"),  # Keyset pagination
         CheckConstraint("volume >= 0 AND volume <= 100", name="check_volume_range"),
         {"comment": "Music zones within venues (lobby, pool, restaurant, etc.)"}
     )
@@ -83,7 +84,7 @@ class Zone(BaseModel):
     alert_count_today = Column(Integer, default=0)
     
     # Metadata
-    metadata = Column(JSONB, default={})
+    meta_data = Column("metadata", JSONB, default={})
     tags = Column(JSONB, default=[])  # ["high-priority", "customer-facing"]
     
     # Relationships
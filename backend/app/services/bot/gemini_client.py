@@ -9,6 +9,7 @@ from dataclasses import dataclass
 import google.generativeai as genai
 
 from app.config import settings
+from app.core.concurrency import get_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +31,7 @@ class GeminiClient:
     def __init__(self):
         self.model = None
         self.initialized = False
+        self.concurrency_limiter = get_limiter("gemini")
         
     async def initialize(self):
         """Initialize Gemini client"""
@@ -79,7 +81,8 @@ class GeminiClient:
             prompt = self._build_analysis_prompt(message, context, venue_info)
             
             # Generate response
-            response = await self.model.generate_content_async(prompt)
+            async with self.concurrency_limiter.acquire():
+                response = await self.model.generate_content_async(prompt)
             
             # Parse and structure response
             return self._parse_response(response)
@@ -124,7 +127,8 @@ class GeminiClient:
             Response:
             """
             
-            response = await self.model.generate_content_async(prompt)
+            async with self.concurrency_limiter.acquire():
+                response = await self.model.generate_content_async(prompt)
             return response.text.strip()
             
         except Exception as e:
@@ -157,7 +161,8 @@ class GeminiClient:
             JSON:
             """
             
-            response = await self.model.generate_content_async(prompt)
+            async with self.concurrency_limiter.acquire():
+                response = await self.model.generate_content_async(prompt)
             
             # Parse JSON from response
             import json
@@ -3,6 +3,7 @@ OpenAI GPT-5-Mini integration for conversational bot intelligence.
 Provides natural, friendly conversation handling with design suggestions.
 """
 
+import asyncio
 import logging
 from typing import Optional, Dict, Any, List
 from dataclasses import dataclass
@@ -10,6 +11,7 @@ import json
 from openai import OpenAI
 
 from app.config import settings
+from app.core.concurrency import get_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +33,7 @@ class OpenAIClient:
     def __init__(self):
         self.client = None
         self.initialized = False
+        self.concurrency_limiter = get_limiter("openai")
         
     async def initialize(self):
         """Initialize OpenAI client with GPT-5-Mini"""
@@ -70,15 +73,17 @@ class OpenAIClient:
             prompt = self._build_conversational_prompt(message, context, venue_info)
             
             # Generate response with GPT-5-Mini
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": message}
-                ],
-                temperature=0.9,  # Higher for more natural conversation
-                max_tokens=settings.openai_max_tokens
-            )
+            async with self.concurrency_limiter.acquire():
+                response = await asyncio.to_thread(
+                    self.client.chat.completions.create,
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": prompt},
+                        {"role": "user", "content": message}
+                    ],
+                    temperature=0.9,  # Higher for more natural conversation
+                    max_tokens=settings.openai_max_tokens
+                )
             
             # Parse and structure response
             return self._parse_response(response)
@@ -130,12 +135,14 @@ class OpenAIClient:
             Response:
             """
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "system", "content": prompt}],
-                temperature=0.9,
-                max_tokens=150
-            )
+            async with self.concurrency_limiter.acquire():
+                response = await asyncio.to_thread(
+                    self.client.chat.completions.create,
+                    model=self.model,
+                    messages=[{"role": "system", "content": prompt}],
+                    temperature=0.9,
+                    max_tokens=150
+                )
             
             return response.choices[0].message.content.strip()
             
@@ -171,12 +178,14 @@ class OpenAIClient:
             Return as simple JSON with just the entities found.
             """
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "system", "content": prompt}],
-                temperature=0.3,
-                max_tokens=200
-            )
+            async with self.concurrency_limiter.acquire():
+                response = await asyncio.to_thread(
+                    self.client.chat.completions.create,
+                    model=self.model,
+                    messages=[{"role": "system", "content": prompt}],
+                    temperature=0.3,
+                    max_tokens=200
+                )
             
             # Parse JSON from response
             text = response.choices[0].message.content.strip()
@@ -10,7 +10,10 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 from enum import Enum
 import hashlib
-import json
+
+from app.core.codec import CodecError, get_codec
+from app.core.trigram import trigram_search
+from app.models.venue import Venue
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +36,10 @@ class DataAggregator:
                  gmail_client=None,
                  db_manager=None,
                  cache_manager=None):
+        """
+        cache_manager is a Redis client; values are codec-encoded bytes
+        (app.core.codec), so it should use decode_responses=False.
+        """
         
         self.sheets_client = sheets_client
         self.soundtrack_client = soundtrack_client
@@ -59,6 +66,13 @@ class DataAggregator:
             'search_results': 1800,  # 30 minutes for search results
             'email_history': 7200  # 2 hours for email data
         }
+        
+        # Codecs per cached blob type
+        self.codecs = {
+            'venue_data': get_codec('aggregator:venue'),
+            'zone_status': get_codec('aggregator:zone_status'),
+            'search_results': get_codec('aggregator:search'),
+        }
     
     async def get_venue_data(self, venue_id: Optional[int] = None, 
                            venue_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
@@ -71,10 +85,10 @@ class DataAggregator:
         
         # Check cache first
         if self.cache:
-            cached_data = self.cache.get(cache_key)
-            if cached_data:
+            cached_data = self._cache_get(cache_key, 'venue_data')
+            if cached_data is not None:
                 logger.info(f"Cache hit for venue: {venue_id or venue_name}")
-                return json.loads(cached_data)
+                return cached_data
         
         venue_data = {}
         
@@ -119,11 +133,7 @@ class DataAggregator:
         
         # Cache the aggregated data
         if venue_data and self.cache:
-            self.cache.setex(
-                cache_key,
-                self.cache_ttl['venue_data'],
-                json.dumps(venue_data)
-            )
+            self._cache_set(cache_key, 'venue_data', venue_data)
         
         return venue_data if venue_data else None
     
@@ -136,9 +146,9 @@ class DataAggregator:
         
         # Check cache
         if self.cache:
-            cached_status = self.cache.get(cache_key)
-            if cached_status:
-                return json.loads(cached_status)
+            cached_status = self._cache_get(cache_key, 'zone_status')
+            if cached_status is not None:
+                return cached_status
         
         status_data = {
             'venue_id': venue_id,
@@ -178,11 +188,7 @@ class DataAggregator:
                     
                     # Cache the status
                     if self.cache:
-                        self.cache.setex(
-                            cache_key,
-                            self.cache_ttl['zone_status'],
-                            json.dumps(status_data)
-                        )
+                        self._cache_set(cache_key, 'zone_status', status_data)
                 
             except Exception as e:
                 logger.error(f"Error getting zone status: {e}")
@@ -210,9 +216,9 @@ class DataAggregator:
         
         # Check cache
         if self.cache:
-            cached_results = self.cache.get(cache_key)
-            if cached_results:
-                return json.loads(cached_results)
+            cached_results = self._cache_get(cache_key, 'search_results')
+            if cached_results is not None:
+                return cached_results
         
         all_results = []
         seen_venues = set()  # Track unique venues
@@ -250,11 +256,7 @@ class DataAggregator:
         
         # Cache results
         if all_results and self.cache:
-            self.cache.setex(
-                cache_key,
-                self.cache_ttl['search_results'],
-                json.dumps(all_results[:10])  # Cache top 10 results
-            )
+            self._cache_set(cache_key, 'search_results', all_results[:10])  # Cache top 10 results
         
         return all_results
     
@@ -369,12 +371,30 @@ class DataAggregator:
             return []
     
     def _search_database(self, query: str, phone: Optional[str]) -> List[Dict]:
-        """Search local database"""
+        """Search local database (pg_trgm over venue name and brand, typo tolerant)"""
         if not self.db_manager:
             return []
         
         try:
-            return self.db_manager.search_venues(query, phone)
+            results = []
+            with self.db_manager.get_session() as session:
+                matches = trigram_search(
+                    session, Venue, query, k=10,
+                    columns=("name", "brand"),
+                    filters=[Venue.is_active == True],
+                )
+                for venue, score in matches:
+                    # Boost confidence if phone also matches
+                    if phone and phone in (venue.primary_contact_phone, venue.whatsapp_number):
+                        score = min(1.0, score + 0.2)
+                    results.append({
+                        'id': str(venue.id),
+                        'name': venue.name,
+                        'brand': venue.brand,
+                        'location': venue.city,
+                        'confidence': score,
+                    })
+            return results
         except Exception as e:
             logger.error(f"Database search error: {e}")
             return []
@@ -390,6 +410,24 @@ class DataAggregator:
             logger.error(f"Database update error: {e}")
             return False
     
+    def _cache_get(self, cache_key: str, kind: str) -> Optional[Any]:
+        """Read and decode a cached blob; None on miss or undecodable entry"""
+        raw = self.cache.get(cache_key)
+        if not raw:
+            return None
+        try:
+            return self.codecs[kind].decode(raw)
+        except CodecError as e:
+            logger.warning(f"Dropping undecodable cache entry {cache_key}: {e}")
+            return None
+    
+    def _cache_set(self, cache_key: str, kind: str, value: Any):
+        self.cache.setex(cache_key, self.cache_ttl[kind], self.codecs[kind].encode(value))
+    
+    def get_cache_codec_stats(self) -> Dict[str, Any]:
+        """Bytes stored and encode/decode time per cached blob type"""
+        return {kind: codec.get_stats() for kind, codec in self.codecs.items()}
+    
     def _is_source_healthy(self, source: DataSource) -> bool:
         """Check if a data source is healthy"""
         health = self.source_health[source]
@@ -4,7 +4,9 @@ Manages email history and correspondence tracking for venues
 """
 
 import os
+import asyncio
 import logging
+import threading
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 import base64
@@ -12,16 +14,22 @@ import re
 from email.mime.text import MIMEText
 
 try:
+    import httplib2
     from google.oauth2 import service_account
+    from google_auth_httplib2 import AuthorizedHttp
     from googleapiclient.discovery import build
     from googleapiclient.errors import HttpError
     GMAIL_AVAILABLE = True
 except ImportError:
     GMAIL_AVAILABLE = False
+    httplib2 = None
     service_account = None
+    AuthorizedHttp = None
     build = None
     HttpError = None
 
+from app.core.concurrency import get_limiter
+
 logger = logging.getLogger(__name__)
 
 class GmailClient:
@@ -36,7 +44,11 @@ class GmailClient:
         self.email_account = email_account or os.getenv('GMAIL_ACCOUNT', 'norbert@bmasiamusic.com')
         
         self.service = None
+        self.credentials = None
         self.last_sync = None
+        self.concurrency_limiter = get_limiter("gmail")
+        # httplib2.Http is not thread-safe: each worker thread gets its own
+        self._local = threading.local()
         
         # Email patterns for venue identification
         self.venue_patterns = [
@@ -88,6 +100,7 @@ class GmailClient:
             if hasattr(credentials, 'with_subject'):
                 credentials = credentials.with_subject(self.email_account)
             
+            self.credentials = credentials
             self.service = build('gmail', 'v1', credentials=credentials)
             logger.info(f"Gmail client initialized for {self.email_account}")
             
@@ -95,6 +108,22 @@ class GmailClient:
             logger.error(f"Failed to initialize Gmail client: {e}")
             self.service = None
     
+    def _http(self):
+        """Authorized Http for the calling thread"""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = AuthorizedHttp(self.credentials, http=httplib2.Http())
+        return http
+    
+    def _execute_sync(self, request):
+        # The service's own Http is shared by every thread; never use it here
+        return request.execute(http=self._http())
+    
+    async def _execute(self, request):
+        """Run a Gmail API request off the event loop under the gmail concurrency limit"""
+        async with self.concurrency_limiter.acquire():
+            return await asyncio.to_thread(self._execute_sync, request)
+    
     async def search_emails(self, venue_email: str, 
                           limit: int = 10,
                           days_back: int = 30) -> List[Dict[str, Any]]:
@@ -112,21 +141,21 @@ class GmailClient:
             query = f'from:{venue_email} OR to:{venue_email} after:{after_date}'
             
             # Search for messages
-            results = self.service.users().messages().list(
+            results = await self._execute(self.service.users().messages().list(
                 userId='me',
                 q=query,
                 maxResults=limit
-            ).execute()
+            ))
             
             messages = results.get('messages', [])
             email_data = []
             
             for msg in messages:
                 # Get full message details
-                message = self.service.users().messages().get(
+                message = await self._execute(self.service.users().messages().get(
                     userId='me',
                     id=msg['id']
-                ).execute()
+                ))
                 
                 # Parse email data
                 parsed = self._parse_email(message)
@@ -243,10 +272,10 @@ class GmailClient:
             return []
         
         try:
-            thread = self.service.users().threads().get(
+            thread = await self._execute(self.service.users().threads().get(
                 userId='me',
                 id=thread_id
-            ).execute()
+            ))
             
             messages = []
             for msg in thread.get('messages', []):
@@ -287,10 +316,10 @@ class GmailClient:
             ).decode('utf-8')
             
             # Send message
-            result = self.service.users().messages().send(
+            result = await self._execute(self.service.users().messages().send(
                 userId='me',
                 body={'raw': raw_message}
-            ).execute()
+            ))
             
             logger.info(f"Email sent successfully: {result['id']}")
             return True
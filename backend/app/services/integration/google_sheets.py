@@ -11,6 +11,8 @@ import hashlib
 import json
 from difflib import SequenceMatcher
 
+from app.core.trigram_index import TrigramIndex, venue_names
+
 # Google Sheets API imports
 try:
     from google.oauth2 import service_account
@@ -61,6 +63,7 @@ class GoogleSheetsClient:
         # Cache for venue data
         self.venue_cache = {}
         self.cache_expiry = {}
+        self.name_index = TrigramIndex()  # Rebuilt on every sync
         
         if SHEETS_AVAILABLE:
             self._initialize_client()
@@ -144,6 +147,10 @@ class GoogleSheetsClient:
                     if venue_data.get('contact_phone'):
                         self.venue_cache[f"phone:{venue_data['contact_phone']}"] = venue_data
             
+            self.name_index = TrigramIndex(
+                (venue, venue_names(venue))
+                for key, venue in self.venue_cache.items() if key.startswith('name:')
+            )
             self.last_sync = datetime.utcnow()
             logger.info(f"Successfully synced {len(self.venue_cache)} venues from Google Sheets")
             return True
@@ -226,7 +233,6 @@ class GoogleSheetsClient:
             self.sync_venues()
         
         results = []
-        query_lower = query.lower()
         
         # If phone provided, try exact phone match first
         if phone:
@@ -235,27 +241,19 @@ class GoogleSheetsClient:
                 phone_venue['confidence'] = 1.0
                 results.append(phone_venue)
         
-        # Search by name
-        for key, venue in self.venue_cache.items():
-            if not key.startswith('name:'):
-                continue
-            
-            venue_name = venue.get('venue_name', '').lower()
+        # Search by name (trigram candidates re-ranked by edit distance, so typos still match)
+        for match in self.name_index.search(query, k=10, min_score=0.4):
+            venue = match['value']
+            result = venue.copy()
+            result.update(id=venue.get('venue_id'), name=venue.get('venue_name'), confidence=match['score'])
             
-            # Calculate similarity score
-            similarity = SequenceMatcher(None, query_lower, venue_name).ratio()
+            # Boost confidence if phone also matches
+            if phone and venue.get('contact_phone') == phone:
+                result['confidence'] = min(1.0, result['confidence'] + 0.2)
             
-            if similarity > 0.5:  # Threshold for matches
-                result = venue.copy()
-                result['confidence'] = similarity
-                
-                # Boost confidence if phone also matches
-                if phone and venue.get('contact_phone') == phone:
-                    result['confidence'] = min(1.0, result['confidence'] + 0.2)
-                
-                # Avoid duplicates
-                if not any(r.get('venue_id') == result.get('venue_id') for r in results):
-                    results.append(result)
+            # Avoid duplicates
+            if not any(r.get('venue_id') == result.get('venue_id') for r in results):
+                results.append(result)
         
         # Sort by confidence
         results.sort(key=lambda x: x['confidence'], reverse=True)
@@ -10,6 +10,9 @@ from datetime import datetime, timedelta
 from enum import Enum
 import json
 
+from app.services.soundtrack.rate_limiter import RequestLane
+from app.services.soundtrack.scheduler import request_lane
+
 logger = logging.getLogger(__name__)
 
 class SyncStrategy(Enum):
@@ -233,8 +236,9 @@ class SyncManager:
                 if not venue.get('soundtrack_account_id'):
                     continue
                 
-                # Get real-time status
-                status = await self.data_aggregator.get_zone_status(venue['id'])
+                # Get real-time status - bulk sync only gets leftover SYB capacity
+                with request_lane(RequestLane.BACKGROUND, job="zone_status_sync"):
+                    status = await self.data_aggregator.get_zone_status(venue['id'])
                 
                 if status and status.get('zones'):
                     # Update database with zone status
@@ -1,23 +1,17 @@
 """Soundtrack Your Brand API integration services"""
 
 from app.services.soundtrack.client import SoundtrackClient
-from app.services.soundtrack.monitor import SoundtrackMonitor
 from app.services.soundtrack.models import (
-    Device,
-    Zone,
-    Playlist,
-    DeviceStatus,
+    DeviceInfo,
+    PlaylistInfo,
     VolumeControl,
-    PlaybackControl
+    ZoneStatus,
 )
 
 __all__ = [
     "SoundtrackClient",
-    "SoundtrackMonitor",
-    "Device",
-    "Zone",
-    "Playlist",
-    "DeviceStatus",
+    "DeviceInfo",
+    "PlaylistInfo",
     "VolumeControl",
-    "PlaybackControl",
-]
\ No newline at end of file
+    "ZoneStatus",
+]
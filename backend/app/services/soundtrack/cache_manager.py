@@ -7,6 +7,8 @@ from typing import Optional, Any, Dict, List, Callable
 from datetime import datetime, timedelta
 import redis.asyncio as redis
 from app.config import settings
+from app.core.codec import BINARY_CODEC, CacheCodec, CodecError, get_codec
+from app.core.near_cache import NearCache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,7 +24,8 @@ class CacheManager:
         self,
         redis_client: Optional[redis.Redis] = None,
         default_ttl: int = 300,
-        max_memory_items: int = 1000
+        max_memory_items: int = 1000,
+        tracked_namespaces: Optional[List[str]] = None
     ):
         """
         Initialize cache manager.
@@ -31,6 +34,9 @@ class CacheManager:
             redis_client: Redis client for distributed caching
             default_ttl: Default TTL in seconds
             max_memory_items: Maximum items in memory cache
+            tracked_namespaces: Namespaces whose memory-cache copies are
+                dropped as soon as Redis reports the key changed (CLIENT
+                TRACKING), instead of living out their memory TTL
         """
         self.redis = redis_client
         self.default_ttl = default_ttl
@@ -46,6 +52,12 @@ class CacheManager:
             "evictions": 0
         }
         
+        self.tracked_namespaces = tracked_namespaces or []
+        self.near_cache: Optional[NearCache] = None
+        
+        # Namespaces written or read through this manager, for codec stats
+        self._namespaces: set = set()
+        
         # Cache invalidation tracking
         self._invalidation_callbacks: Dict[str, List[Callable]] = {}
         
@@ -59,9 +71,10 @@ class CacheManager:
         """Initialize cache manager and connect to Redis if needed"""
         if not self.redis:
             try:
+                # Values are codec-encoded bytes, not text
                 self.redis = redis.from_url(
                     settings.redis_url,
-                    decode_responses=True,
+                    decode_responses=False,
                     max_connections=50
                 )
                 await self.redis.ping()
@@ -69,6 +82,31 @@ class CacheManager:
             except Exception as e:
                 logger.warning(f"Redis connection failed, using memory cache only: {e}")
                 self.redis = None
+        
+        if self.redis and self.tracked_namespaces and self.near_cache is None:
+            # Only the invalidation stream is used - the memory cache is the local copy
+            self.near_cache = NearCache(
+                self.redis.connection_pool,
+                prefixes=[f"{namespace}:" for namespace in self.tracked_namespaces],
+                name="soundtrack_cache",
+            )
+            self.near_cache.on_invalidate(self._drop_from_memory)
+            await self.near_cache.start()
+    
+    def _drop_from_memory(self, keys: Optional[List[str]]):
+        """Invalidation callback; runs on the event loop between awaits"""
+        if keys is None:
+            self._memory_cache.clear()
+            self._access_times.clear()
+            return
+        for key in keys:
+            self._memory_cache.pop(key, None)
+            self._access_times.pop(key, None)
+    
+    def _codec(self, namespace: str) -> CacheCodec:
+        """Codec for a namespace (msgpack + zstd unless configured otherwise)"""
+        self._namespaces.add(namespace)
+        return get_codec(namespace, default=BINARY_CODEC)
     
     def _generate_key(self, namespace: str, identifier: str, params: Optional[Dict] = None) -> str:
         """Generate cache key from namespace, identifier and parameters"""
@@ -119,16 +157,18 @@ class CacheManager:
         # Check Redis cache (L2)
         if self.redis:
             try:
+                token = self.near_cache.begin_fetch(key) if self.near_cache else None
                 value = await self.redis.get(key)
+                unchanged = token is None or self.near_cache.finish_fetch(key, token)
                 if value:
+                    # Deserialize (legacy JSON entries still decode)
+                    data = self._codec(namespace).decode(value)
                     self._cache_stats["hits"] += 1
                     self._cache_stats["redis_hits"] += 1
                     
-                    # Deserialize
-                    data = json.loads(value)
-                    
-                    # Add to memory cache for faster access
-                    await self._add_to_memory_cache(key, data, ttl=60)
+                    # Add to memory cache for faster access, unless it changed while we read it
+                    if unchanged:
+                        await self._add_to_memory_cache(key, data, ttl=60)
                     
                     return data
             except Exception as e:
@@ -164,7 +204,9 @@ class CacheManager:
         # Add to Redis cache
         if self.redis:
             try:
-                serialized = json.dumps(value, default=str)
+                serialized = self._codec(namespace).encode(value)
+                if self.near_cache:
+                    self.near_cache.note_write(key)
                 await self.redis.setex(key, ttl, serialized)
             except Exception as e:
                 logger.error(f"Redis set error for key {key}: {e}")
@@ -311,10 +353,15 @@ class CacheManager:
             try:
                 keys = [self._generate_key(namespace, id, params) for id in missing]
                 values = await self.redis.mget(keys)
+                codec = self._codec(namespace)
                 
                 for identifier, value in zip(missing, values):
                     if value:
-                        data = json.loads(value)
+                        try:
+                            data = codec.decode(value)
+                        except CodecError as e:
+                            logger.warning(f"Cache decode error in {namespace}: {e}")
+                            continue
                         results[identifier] = data
                         
                         # Add to memory cache
@@ -352,9 +399,10 @@ class CacheManager:
         if self.redis:
             try:
                 pipe = self.redis.pipeline()
+                codec = self._codec(namespace)
                 for identifier, value in items.items():
                     key = self._generate_key(namespace, identifier, params)
-                    serialized = json.dumps(value, default=str)
+                    serialized = codec.encode(value)
                     pipe.setex(key, ttl, serialized)
                 await pipe.execute()
             except Exception as e:
@@ -409,7 +457,9 @@ class CacheManager:
             "redis_hits": self._cache_stats["redis_hits"],
             "evictions": self._cache_stats["evictions"],
             "memory_cache_size": len(self._memory_cache),
-            "redis_available": self.redis is not None
+            "redis_available": self.redis is not None,
+            "codecs": {ns: get_codec(ns, default=BINARY_CODEC).get_stats() for ns in sorted(self._namespaces)},
+            "near_cache": self.near_cache.get_stats() if self.near_cache else None,
         }
     
     async def warmup(self, namespace: str, identifiers: List[str], factory: Callable, ttl: Optional[int] = None):
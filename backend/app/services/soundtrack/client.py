@@ -11,14 +11,20 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
 import hashlib
-import json
 
 import aiohttp
 import backoff
 from aiohttp import ClientError, ClientTimeout, TCPConnector
 
 from app.config import settings
+from app.core.concurrency import get_limiter
 from app.core.redis import redis_manager
+from app.services.soundtrack.rate_limiter import (
+    DistributedRateLimiter,
+    RateLimiter,
+    RequestLane,
+)
+from app.services.soundtrack.scheduler import LaneScheduler, current_lane
 
 logger = logging.getLogger(__name__)
 
@@ -92,50 +98,6 @@ class CircuitBreaker:
             logger.warning(f"Circuit breaker opened after {self.failure_count} failures")
 
 
-class TokenBucketRateLimiter:
-    """Token bucket algorithm for rate limiting"""
-    
-    def __init__(self, config: RateLimitConfig):
-        self.config = config
-        self.tokens = config.burst_size
-        self.last_refill = time.time()
-        self.lock = asyncio.Lock()
-    
-    async def acquire(self, tokens: int = 1) -> bool:
-        """Acquire tokens for request"""
-        async with self.lock:
-            await self._refill()
-            
-            if self.tokens >= tokens:
-                self.tokens -= tokens
-                return True
-            
-            # Calculate wait time
-            tokens_needed = tokens - self.tokens
-            wait_time = tokens_needed / self.config.requests_per_second
-            
-            if wait_time > 10:  # Max 10 second wait
-                return False
-            
-            await asyncio.sleep(wait_time)
-            await self._refill()
-            
-            if self.tokens >= tokens:
-                self.tokens -= tokens
-                return True
-            
-            return False
-    
-    async def _refill(self):
-        """Refill tokens based on time passed"""
-        now = time.time()
-        time_passed = now - self.last_refill
-        
-        new_tokens = time_passed * (self.config.requests_per_second)
-        self.tokens = min(self.config.burst_size, self.tokens + new_tokens)
-        self.last_refill = now
-
-
 class SoundtrackClient:
     """
     Soundtrack Your Brand API client with production-grade features:
@@ -156,11 +118,22 @@ class SoundtrackClient:
         self.access_token: Optional[str] = None
         self.token_expires_at: Optional[datetime] = None
         
-        self.rate_limiter = TokenBucketRateLimiter(RateLimitConfig())
+        self.rate_limit_config = RateLimitConfig()
+        # Replaced by the Redis-backed limiter in initialize() when Redis is up
+        self.rate_limiter = RateLimiter(
+            requests_per_minute=self.rate_limit_config.requests_per_minute,
+            burst_size=self.rate_limit_config.burst_size,
+        )
         self.circuit_breaker = CircuitBreaker()
         
-        # Semaphore for concurrent requests
-        self._request_semaphore = asyncio.Semaphore(50)
+        # In-flight slots, dispatched interactive-first. The slot count follows
+        # the adaptive concurrency limit, so SYB slowdowns shrink it.
+        self.concurrency_limiter = get_limiter("soundtrack")
+        self.scheduler = LaneScheduler(
+            max_in_flight=self.concurrency_limiter.limit,
+            interactive_reserve=5,
+        )
+        self.concurrency_limiter.on_limit_change(self.scheduler.resize)
         
         # Cache settings
         self.cache_ttl = {
@@ -200,6 +173,21 @@ class SoundtrackClient:
                 },
             )
             
+            # Share the SYB budget across all web and worker processes
+            if redis_manager.redis:
+                self.rate_limiter = DistributedRateLimiter(
+                    redis_manager.redis,
+                    requests_per_minute=self.rate_limit_config.requests_per_minute,
+                    burst_size=self.rate_limit_config.burst_size,
+                )
+                logger.info("Soundtrack rate limiter using shared Redis budget")
+            elif isinstance(self.rate_limiter, DistributedRateLimiter):
+                # Bound to a Redis client from an earlier initialize(); don't keep using it
+                self.rate_limiter = RateLimiter(
+                    requests_per_minute=self.rate_limit_config.requests_per_minute,
+                    burst_size=self.rate_limit_config.burst_size,
+                )
+            
             # Skip initial authentication if credentials not configured
             if self.client_id and self.client_secret:
                 try:
@@ -225,6 +213,7 @@ class SoundtrackClient:
         """Close HTTP session"""
         if self.session:
             await self.session.close()
+            self.session = None
     
     async def _ensure_authenticated(self):
         """Ensure we have a valid access token"""
@@ -271,14 +260,17 @@ class SoundtrackClient:
         self,
         method: str,
         endpoint: str,
+        lane: Optional[RequestLane] = None,
+        job: Optional[str] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """Make authenticated API request with retry logic"""
         await self._ensure_authenticated()
         
-        # Rate limiting
-        if not await self.rate_limiter.acquire():
-            raise Exception("Rate limit exceeded")
+        # Lane comes from the caller or the enclosing request_lane() block
+        if lane is None:
+            lane, scoped_job = current_lane()
+            job = job or scoped_job
         
         # Build full URL
         url = f"{self.base_url}{endpoint}"
@@ -287,15 +279,22 @@ class SoundtrackClient:
         headers = kwargs.pop("headers", {})
         headers["Authorization"] = f"Bearer {self.access_token}"
         
-        # Execute with circuit breaker
-        async with self._request_semaphore:
-            return await self.circuit_breaker.call(
-                self._execute_request,
-                method,
-                url,
-                headers=headers,
-                **kwargs
-            )
+        async with self.scheduler.slot(lane, job):
+            # Rate limiting - interactive commands get headroom background sweeps can't use
+            try:
+                await self.rate_limiter.acquire(lane=lane, max_wait=10)
+            except TimeoutError:
+                raise Exception("Rate limit exceeded")
+            
+            # Execute with circuit breaker
+            async with self.concurrency_limiter.measure():
+                return await self.circuit_breaker.call(
+                    self._execute_request,
+                    method,
+                    url,
+                    headers=headers,
+                    **kwargs
+                )
     
     async def _execute_request(
         self,
@@ -315,9 +314,9 @@ class SoundtrackClient:
         cache_key = f"soundtrack:device:{device_id}"
         
         if use_cache:
-            cached = await redis_manager.get(cache_key)
-            if cached:
-                return json.loads(cached)
+            cached = await redis_manager.get_value(cache_key)
+            if cached is not None:
+                return cached
         
         result = await self._make_request("GET", f"/devices/{device_id}")
         
@@ -325,27 +324,33 @@ class SoundtrackClient:
         await redis_manager.setex(
             cache_key,
             self.cache_ttl["device_info"],
-            json.dumps(result)
+            result
         )
         
         return result
     
-    async def get_device_status(self, device_id: str, use_cache: bool = True) -> Dict[str, Any]:
+    async def get_device_status(
+        self,
+        device_id: str,
+        use_cache: bool = True,
+        lane: Optional[RequestLane] = None,
+        job: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Get current device status"""
         cache_key = f"soundtrack:status:{device_id}"
         
         if use_cache:
-            cached = await redis_manager.get(cache_key)
-            if cached:
-                return json.loads(cached)
+            cached = await redis_manager.get_value(cache_key)
+            if cached is not None:
+                return cached
         
-        result = await self._make_request("GET", f"/devices/{device_id}/status")
+        result = await self._make_request("GET", f"/devices/{device_id}/status", lane=lane, job=job)
         
         # Cache for short duration
         await redis_manager.setex(
             cache_key,
             self.cache_ttl["device_status"],
-            json.dumps(result)
+            result
         )
         
         return result
@@ -353,9 +358,13 @@ class SoundtrackClient:
     async def batch_get_device_status(
         self,
         device_ids: List[str],
-        batch_size: int = 50
+        batch_size: int = 50,
+        job: str = "device_status_sweep"
     ) -> List[Dict[str, Any]]:
-        """Get status for multiple devices in batches"""
+        """
+        Get status for multiple devices in batches.
+        Runs in the background lane; job names the sweep for fair sharing.
+        """
         results = []
         
         for i in range(0, len(device_ids), batch_size):
@@ -363,7 +372,7 @@ class SoundtrackClient:
             
             # Create tasks for parallel execution
             tasks = [
-                self.get_device_status(device_id)
+                self.get_device_status(device_id, lane=RequestLane.BACKGROUND, job=job)
                 for device_id in batch
             ]
             
@@ -396,6 +405,7 @@ class SoundtrackClient:
         result = await self._make_request(
             "POST",
             f"/devices/{device_id}/volume",
+            lane=RequestLane.INTERACTIVE,
             json=data
         )
         
@@ -446,6 +456,7 @@ class SoundtrackClient:
         result = await self._make_request(
             "POST",
             f"/devices/{device_id}/playlist",
+            lane=RequestLane.INTERACTIVE,
             json=data
         )
         
@@ -458,7 +469,8 @@ class SoundtrackClient:
         """Start playback on device"""
         result = await self._make_request(
             "POST",
-            f"/devices/{device_id}/play"
+            f"/devices/{device_id}/play",
+            lane=RequestLane.INTERACTIVE
         )
         
         await redis_manager.delete(f"soundtrack:status:{device_id}")
@@ -468,7 +480,8 @@ class SoundtrackClient:
         """Pause playback on device"""
         result = await self._make_request(
             "POST",
-            f"/devices/{device_id}/pause"
+            f"/devices/{device_id}/pause",
+            lane=RequestLane.INTERACTIVE
         )
         
         await redis_manager.delete(f"soundtrack:status:{device_id}")
@@ -478,7 +491,8 @@ class SoundtrackClient:
         """Skip to next track"""
         result = await self._make_request(
             "POST",
-            f"/devices/{device_id}/skip"
+            f"/devices/{device_id}/skip",
+            lane=RequestLane.INTERACTIVE
         )
         
         await redis_manager.delete(f"soundtrack:status:{device_id}")
@@ -490,9 +504,9 @@ class SoundtrackClient:
         """Get available playlists"""
         cache_key = f"soundtrack:playlists:{location_id or 'all'}"
         
-        cached = await redis_manager.get(cache_key)
-        if cached:
-            return json.loads(cached)
+        cached = await redis_manager.get_value(cache_key)
+        if cached is not None:
+            return cached
         
         params = {}
         if location_id:
@@ -503,7 +517,7 @@ class SoundtrackClient:
         await redis_manager.setex(
             cache_key,
             self.cache_ttl["playlists"],
-            json.dumps(result)
+            result
         )
         
         return result
@@ -512,16 +526,16 @@ class SoundtrackClient:
         """Get specific playlist details"""
         cache_key = f"soundtrack:playlist:{playlist_id}"
         
-        cached = await redis_manager.get(cache_key)
-        if cached:
-            return json.loads(cached)
+        cached = await redis_manager.get_value(cache_key)
+        if cached is not None:
+            return cached
         
         result = await self._make_request("GET", f"/playlists/{playlist_id}")
         
         await redis_manager.setex(
             cache_key,
             self.cache_ttl["playlists"],
-            json.dumps(result)
+            result
         )
         
         return result
@@ -550,7 +564,9 @@ class SoundtrackClient:
                 "status": "healthy",
                 "latency_ms": round(latency, 2),
                 "circuit_breaker": self.circuit_breaker.state.value,
-                "rate_limit_tokens": self.rate_limiter.tokens,
+                "rate_limit": self.rate_limiter.get_current_usage(),
+                "scheduler": self.scheduler.get_stats(),
+                "concurrency": self.concurrency_limiter.get_stats(),
                 "authenticated": self._is_token_valid(),
             }
         except asyncio.TimeoutError:
@@ -571,8 +587,9 @@ class SoundtrackClient:
         return {
             "circuit_breaker_state": self.circuit_breaker.state.value,
             "circuit_breaker_failures": self.circuit_breaker.failure_count,
-            "rate_limit_tokens": self.rate_limiter.tokens,
-            "rate_limit_capacity": self.rate_limiter.config.burst_size,
+            "rate_limit": self.rate_limiter.get_current_usage(),
+            "scheduler": self.scheduler.get_stats(),
+            "concurrency": self.concurrency_limiter.get_stats(),
             "token_valid": self._is_token_valid(),
             "token_expires_at": self.token_expires_at.isoformat() if self.token_expires_at else None,
         }
@@ -1,21 +1,124 @@
-"""Rate Limiter for API requests with sliding window and token bucket algorithms"""
+"""Rate Limiter for API requests using GCRA (generic cell rate algorithm) with priority lanes"""
 
 import asyncio
+import threading
 import time
+from enum import Enum
 from typing import Dict, Optional, Tuple
-from datetime import datetime, timedelta
 from collections import deque
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class RequestLane(str, Enum):
+    """Priority lanes sharing one rate budget"""
+    INTERACTIVE = "interactive"  # Customer-initiated control commands
+    NORMAL = "normal"
+    BACKGROUND = "background"  # Monitoring sweeps, design syncs
+
+
+# Fraction of the burst tolerance each lane may consume. Background work can
+# never drain the last half of the burst, so control commands always find headroom.
+LANE_BURST_SHARE = {
+    RequestLane.INTERACTIVE: 1.0,
+    RequestLane.NORMAL: 0.75,
+    RequestLane.BACKGROUND: 0.5,
+}
+
+
+def lane_for_priority(priority: int) -> RequestLane:
+    """Map the legacy 1-10 priority scale onto a lane"""
+    if priority >= 8:
+        return RequestLane.INTERACTIVE
+    if priority <= 3:
+        return RequestLane.BACKGROUND
+    return RequestLane.NORMAL
+
+
+# Absorbs float error so exactly burst_size back-to-back requests fit
+GCRA_EPSILON = 1e-9
+
+# Bounds of the adaptive rate multiplier; never above the real budget
+ADAPTIVE_MIN_MULTIPLIER = 0.5
+ADAPTIVE_MAX_MULTIPLIER = 1.0
+# A shared slowdown nobody has adjusted for this long lapses back to full rate
+ADAPTIVE_MULTIPLIER_TTL = 600
+
+
+def gcra_decide(
+    tat: float,
+    now: float,
+    emission_interval: float,
+    burst_offset: float,
+    cost: float = 1.0
+) -> Tuple[bool, float, float]:
+    """
+    Single GCRA decision.
+
+    Args:
+        tat: Theoretical arrival time stored for the limiter
+        now: Current time
+        emission_interval: Seconds per request at the sustained rate
+        burst_offset: How far ahead of now the TAT may run (burst tolerance)
+        cost: Request weight
+
+    Returns:
+        (allowed, new_tat, retry_after). A denied request leaves the TAT
+        untouched, so it does not consume budget.
+    """
+    tat = max(tat, now)
+    new_tat = tat + emission_interval * cost
+    allow_at = new_tat - burst_offset
+    if allow_at - now > GCRA_EPSILON:
+        return False, tat, allow_at - now
+    return True, new_tat, 0.0
+
+
+# Atomic GCRA in Redis. Uses the server clock so every process agrees on "now".
+# The adaptive multiplier lives next to the TAT, so every process scales the
+# shared interval by the same factor; callers pass their pending adjustment.
+# KEYS[1] = TAT key, KEYS[2] = multiplier key
+# ARGV = base emission interval, burst (requests), cost,
+#        multiplier delta, min multiplier, max multiplier, multiplier TTL (ms)
+# Returns {allowed, retry_after, tat_offset, multiplier} with floats as strings
+GCRA_LUA = """
+redis.replicate_commands()
+local multiplier = tonumber(redis.call('GET', KEYS[2])) or 1
+local delta = tonumber(ARGV[4])
+if delta ~= 0 then
+    multiplier = math.min(tonumber(ARGV[6]), math.max(tonumber(ARGV[5]), multiplier + delta))
+    redis.call('SET', KEYS[2], tostring(multiplier), 'PX', ARGV[7])
+end
+local emission = tonumber(ARGV[1]) / multiplier
+local burst_offset = emission * tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if not tat or tat < now then
+    tat = now
+end
+local new_tat = tat + emission * cost
+local allow_at = new_tat - burst_offset
+if allow_at - now > 1e-9 then
+    return {0, tostring(allow_at - now), tostring(tat - now), tostring(multiplier)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000) + 1000)
+return {1, '0', tostring(new_tat - now), tostring(multiplier)}
+"""
+
+
 class RateLimiter:
     """
-    Advanced rate limiter supporting both sliding window and token bucket algorithms.
+    GCRA rate limiter with priority lanes.
     Optimized for high-throughput API operations with 1000 requests/minute limit.
+
+    GCRA keeps a single theoretical arrival time (TAT) instead of a log of
+    request timestamps, so the limit is smooth - no 2x bursts at window
+    edges - and each decision is O(1) under one lock.
     """
-    
+
     def __init__(
         self,
         requests_per_minute: int = 1000,
@@ -25,193 +128,199 @@ class RateLimiter:
     ):
         """
         Initialize rate limiter with configurable limits.
-        
+
         Args:
-            requests_per_minute: Maximum requests per minute (default: 1000)
-            requests_per_second: Maximum requests per second (default: 20)
-            burst_size: Maximum burst size for token bucket (default: 50)
+            requests_per_minute: Sustained request budget per minute (default: 1000)
+            requests_per_second: Kept for compatibility; short-term rate is
+                bounded by burst_size on top of the sustained rate
+            burst_size: Requests that may be sent back-to-back when idle (default: 50)
             enable_adaptive: Enable adaptive rate limiting based on response times
         """
-        # Rate limits
         self.requests_per_minute = requests_per_minute
         self.requests_per_second = requests_per_second
         self.burst_size = burst_size
         self.enable_adaptive = enable_adaptive
-        
-        # Sliding window for per-minute tracking
-        self.minute_window: deque = deque()
-        self.minute_lock = asyncio.Lock()
-        
-        # Token bucket for per-second rate limiting
-        self.tokens = burst_size
-        self.max_tokens = burst_size
-        self.refill_rate = requests_per_second
-        self.last_refill = time.time()
-        self.token_lock = asyncio.Lock()
-        
+
+        # GCRA state
+        self._tat = 0.0
+        self._lock = threading.Lock()
+
         # Adaptive rate limiting
         self.response_times: deque = deque(maxlen=100)
         self.error_count = 0
         self.success_count = 0
         self.adaptive_multiplier = 1.0
-        
+
         # Metrics
         self.total_requests = 0
         self.blocked_requests = 0
         self.total_wait_time = 0.0
-    
-    async def acquire(self, priority: int = 5) -> float:
+        self.lane_stats: Dict[str, Dict[str, float]] = {
+            lane.value: {"requests": 0, "blocked": 0, "wait_time": 0.0}
+            for lane in RequestLane
+        }
+
+    @property
+    def base_interval(self) -> float:
+        """Seconds between requests at the configured sustained rate"""
+        return 60.0 / self.requests_per_minute
+
+    @property
+    def emission_interval(self) -> float:
+        """Seconds between requests at the (adaptively scaled) sustained rate"""
+        return self.base_interval / self.adaptive_multiplier
+
+    def burst_requests(self, lane: RequestLane) -> float:
+        """Requests a lane may send back-to-back when idle"""
+        # Every lane can always send at least one request at the sustained rate
+        return max(1.0, self.burst_size * LANE_BURST_SHARE[lane])
+
+    def burst_offset(self, lane: RequestLane) -> float:
+        """Burst tolerance available to a lane, in seconds of TAT headroom"""
+        return self.emission_interval * self.burst_requests(lane)
+
+    async def _try_acquire(self, lane: RequestLane, cost: float) -> Tuple[bool, float]:
+        """One atomic GCRA check; returns (allowed, retry_after)"""
+        with self._lock:
+            allowed, self._tat, retry_after = gcra_decide(
+                self._tat, time.time(), self.emission_interval, self.burst_offset(lane), cost
+            )
+        return allowed, retry_after
+
+    async def try_acquire(
+        self,
+        priority: int = 5,
+        lane: Optional[RequestLane] = None,
+        cost: float = 1.0
+    ) -> Tuple[bool, float]:
+        """
+        Non-blocking check.
+
+        Returns:
+            (allowed, retry_after seconds)
+        """
+        return await self._try_acquire(lane or lane_for_priority(priority), cost)
+
+    async def acquire(
+        self,
+        priority: int = 5,
+        lane: Optional[RequestLane] = None,
+        cost: float = 1.0,
+        max_wait: Optional[float] = None
+    ) -> float:
         """
-        Acquire permission to make a request.
-        
+        Acquire permission to make a request, waiting as long as needed.
+
         Args:
             priority: Request priority (1-10, higher = more important)
-        
+            lane: Explicit lane (overrides priority)
+            cost: Request weight
+            max_wait: Give up after this many seconds (raises TimeoutError)
+
         Returns:
             Wait time in seconds (0 if immediate)
         """
-        wait_time = 0.0
+        lane = lane or lane_for_priority(priority)
         start_time = time.time()
-        
-        # Check minute-level rate limit
-        async with self.minute_lock:
-            wait_time = max(wait_time, await self._check_minute_limit())
-        
-        # Check second-level rate limit (token bucket)
-        async with self.token_lock:
-            token_wait = await self._check_token_bucket(priority)
-            wait_time = max(wait_time, token_wait)
-        
-        # Apply wait time if needed
-        if wait_time > 0:
-            # Reduce wait time for high-priority requests
-            adjusted_wait = wait_time * (1.0 - (priority - 5) * 0.1)
-            adjusted_wait = max(0, min(adjusted_wait, wait_time))
-            
-            logger.debug(f"Rate limit: waiting {adjusted_wait:.2f}s (priority: {priority})")
-            await asyncio.sleep(adjusted_wait)
-            self.blocked_requests += 1
-            self.total_wait_time += adjusted_wait
-        
-        # Update metrics
+        blocked = False
+
+        while True:
+            allowed, retry_after = await self._try_acquire(lane, cost)
+            if allowed:
+                break
+
+            waited = time.time() - start_time
+            if max_wait is not None and waited + retry_after > max_wait:
+                raise TimeoutError(f"Rate limit wait for {lane.value} lane exceeds {max_wait}s")
+
+            blocked = True
+            logger.debug(f"Rate limit: {lane.value} lane waiting {retry_after:.3f}s")
+            await asyncio.sleep(retry_after)
+
+        wait_time = time.time() - start_time
+        stats = self.lane_stats[lane.value]
+        stats["requests"] += 1
         self.total_requests += 1
-        
-        return time.time() - start_time
-    
-    async def _check_minute_limit(self) -> float:
-        """Check minute-level rate limit using sliding window"""
-        now = time.time()
-        minute_ago = now - 60
-        
-        # Remove old entries
-        while self.minute_window and self.minute_window[0] < minute_ago:
-            self.minute_window.popleft()
-        
-        # Calculate effective limit with adaptive multiplier
-        effective_limit = int(self.requests_per_minute * self.adaptive_multiplier)
-        
-        # Check if limit exceeded
-        if len(self.minute_window) >= effective_limit:
-            # Calculate wait time until oldest request expires
-            oldest = self.minute_window[0]
-            wait_time = (oldest + 60) - now
-            return max(0, wait_time)
-        
-        # Add current request
-        self.minute_window.append(now)
-        return 0.0
-    
-    async def _check_token_bucket(self, priority: int) -> float:
-        """Check second-level rate limit using token bucket algorithm"""
-        now = time.time()
-        
-        # Refill tokens based on elapsed time
-        elapsed = now - self.last_refill
-        tokens_to_add = elapsed * self.refill_rate * self.adaptive_multiplier
-        self.tokens = min(self.max_tokens, self.tokens + tokens_to_add)
-        self.last_refill = now
-        
-        # Priority-based token cost (high priority = lower cost)
-        token_cost = 1.0 - (priority - 5) * 0.05
-        token_cost = max(0.5, min(1.5, token_cost))
-        
-        # Check if tokens available
-        if self.tokens >= token_cost:
-            self.tokens -= token_cost
-            return 0.0
-        
-        # Calculate wait time for token availability
-        tokens_needed = token_cost - self.tokens
-        wait_time = tokens_needed / (self.refill_rate * self.adaptive_multiplier)
+        if blocked:
+            stats["blocked"] += 1
+            stats["wait_time"] += wait_time
+            self.blocked_requests += 1
+            self.total_wait_time += wait_time
+
         return wait_time
-    
+
     def report_response(self, response_time: float, success: bool):
         """
         Report response metrics for adaptive rate limiting.
-        
+
         Args:
             response_time: Response time in seconds
             success: Whether request was successful
         """
         if not self.enable_adaptive:
             return
-        
+
         self.response_times.append(response_time)
-        
+
         if success:
             self.success_count += 1
             self.error_count = max(0, self.error_count - 1)  # Decay error count
         else:
             self.error_count += 1
-        
+
         # Adjust adaptive multiplier based on performance
         self._update_adaptive_multiplier()
-    
+
     def _update_adaptive_multiplier(self):
         """Update adaptive multiplier based on recent performance"""
         if len(self.response_times) < 10:
             return
-        
+
         avg_response_time = sum(self.response_times) / len(self.response_times)
         error_rate = self.error_count / max(1, self.error_count + self.success_count)
-        
+
         # Slow down if response times are high or errors are frequent
         if avg_response_time > 2.0 or error_rate > 0.1:
-            self.adaptive_multiplier = max(0.5, self.adaptive_multiplier - 0.1)
+            self._adjust_multiplier(-0.1)
             logger.info(f"Reducing rate limit multiplier to {self.adaptive_multiplier:.2f}")
-        
-        # Speed up if performance is good
+
+        # Speed up if performance is good - never beyond the real budget
         elif avg_response_time < 0.5 and error_rate < 0.01:
-            self.adaptive_multiplier = min(1.2, self.adaptive_multiplier + 0.05)
-            logger.info(f"Increasing rate limit multiplier to {self.adaptive_multiplier:.2f}")
-    
+            self._adjust_multiplier(0.05)
+
+    def _adjust_multiplier(self, delta: float):
+        self.adaptive_multiplier = min(
+            ADAPTIVE_MAX_MULTIPLIER, max(ADAPTIVE_MIN_MULTIPLIER, self.adaptive_multiplier + delta)
+        )
+
+    def _tat_offset(self) -> float:
+        """How far the TAT runs ahead of now (0 when idle)"""
+        return max(0.0, self._tat - time.time())
+
     def get_current_usage(self) -> Dict[str, any]:
         """Get current rate limit usage statistics"""
-        now = time.time()
-        minute_ago = now - 60
-        
-        # Count requests in last minute
-        recent_requests = sum(1 for t in self.minute_window if t > minute_ago)
-        
+        offset = self._tat_offset()
+        full_burst = self.burst_offset(RequestLane.INTERACTIVE)
+
         return {
+            "algorithm": "gcra",
             "requests_per_minute_limit": self.requests_per_minute,
-            "requests_in_last_minute": recent_requests,
-            "usage_percentage": (recent_requests / self.requests_per_minute) * 100,
-            "available_tokens": self.tokens,
-            "max_tokens": self.max_tokens,
+            "burst_size": self.burst_size,
+            "available_burst": max(0.0, (full_burst - offset) / self.emission_interval),
+            "usage_percentage": min(100.0, offset / full_burst * 100) if full_burst else 0.0,
             "adaptive_multiplier": self.adaptive_multiplier,
             "total_requests": self.total_requests,
             "blocked_requests": self.blocked_requests,
             "average_wait_time": self.total_wait_time / max(1, self.blocked_requests),
+            "lanes": self.lane_stats,
             "error_count": self.error_count,
             "success_count": self.success_count
         }
-    
+
     def reset(self):
         """Reset rate limiter state"""
-        self.minute_window.clear()
-        self.tokens = self.max_tokens
-        self.last_refill = time.time()
+        with self._lock:
+            self._tat = 0.0
         self.response_times.clear()
         self.error_count = 0
         self.success_count = 0
@@ -219,49 +328,48 @@ class RateLimiter:
         self.total_requests = 0
         self.blocked_requests = 0
         self.total_wait_time = 0.0
+        for stats in self.lane_stats.values():
+            stats.update(requests=0, blocked=0, wait_time=0.0)
         logger.info("Rate limiter reset")
-    
-    async def wait_if_needed(self, estimated_requests: int) -> float:
+
+    async def wait_if_needed(
+        self,
+        estimated_requests: int,
+        lane: RequestLane = RequestLane.BACKGROUND
+    ) -> float:
         """
-        Pre-emptively wait if bulk operation would exceed limits.
-        
+        Pre-emptively wait until a bulk operation fits in the lane's budget.
+        Nothing is reserved - each request still goes through acquire().
+
         Args:
             estimated_requests: Number of requests to be made
-        
+            lane: Lane the bulk operation runs in
+
         Returns:
             Wait time in seconds
         """
-        async with self.minute_lock:
-            now = time.time()
-            minute_ago = now - 60
-            
-            # Clean old entries
-            while self.minute_window and self.minute_window[0] < minute_ago:
-                self.minute_window.popleft()
-            
-            current_count = len(self.minute_window)
-            effective_limit = int(self.requests_per_minute * self.adaptive_multiplier)
-            
-            if current_count + estimated_requests > effective_limit:
-                # Calculate required wait time
-                excess = (current_count + estimated_requests) - effective_limit
-                wait_time = excess / (self.requests_per_minute / 60)  # Convert to seconds
-                
-                logger.info(
-                    f"Pre-emptive rate limit wait: {wait_time:.2f}s for {estimated_requests} requests"
-                )
-                await asyncio.sleep(wait_time)
-                return wait_time
-        
-        return 0.0
+        needed = estimated_requests * self.emission_interval
+        wait_time = self._tat_offset() + needed - self.burst_offset(lane)
+        if wait_time <= 0:
+            return 0.0
+
+        logger.info(
+            f"Pre-emptive rate limit wait: {wait_time:.2f}s for {estimated_requests} requests"
+        )
+        await asyncio.sleep(wait_time)
+        return wait_time
 
 
 class DistributedRateLimiter(RateLimiter):
     """
-    Distributed rate limiter using Redis for multi-instance coordination.
-    Ensures rate limits are respected across all application instances.
+    Distributed GCRA rate limiter backed by one atomic Redis Lua script.
+    All web and Celery processes share a single TAT key, so the SYB budget is
+    split precisely between them. The adaptive multiplier is shared the same
+    way: each process sends its adjustments with its next GCRA check and
+    reads back the common value. Falls back to the in-process limiter if
+    Redis is unavailable.
     """
-    
+
     def __init__(
         self,
         redis_client,
@@ -271,30 +379,51 @@ class DistributedRateLimiter(RateLimiter):
         super().__init__(**kwargs)
         self.redis = redis_client
         self.key_prefix = key_prefix
-        
-    async def acquire(self, priority: int = 5) -> float:
-        """Acquire permission using distributed rate limiting"""
-        wait_time = 0.0
-        
-        # Use Redis for distributed counting
-        key = f"{self.key_prefix}:minute:{int(time.time() / 60)}"
-        pipe = self.redis.pipeline()
-        pipe.incr(key)
-        pipe.expire(key, 70)  # Expire after 70 seconds
-        results = await pipe.execute()
-        
-        current_count = results[0]
-        effective_limit = int(self.requests_per_minute * self.adaptive_multiplier)
-        
-        if current_count > effective_limit:
-            # Calculate distributed wait time
-            wait_time = (current_count - effective_limit) / (self.requests_per_minute / 60)
-            wait_time = wait_time * (1.0 - (priority - 5) * 0.1)  # Priority adjustment
-            
-            logger.debug(f"Distributed rate limit: waiting {wait_time:.2f}s")
-            await asyncio.sleep(max(0, wait_time))
-            self.blocked_requests += 1
-            self.total_wait_time += wait_time
-        
-        self.total_requests += 1
-        return wait_time
\ No newline at end of file
+        self.tat_key = f"{key_prefix}:gcra"
+        self.multiplier_key = f"{key_prefix}:multiplier"
+        # Multiplier adjustments not yet sent to Redis
+        self._pending_delta = 0.0
+        self._script = redis_client.register_script(GCRA_LUA) if redis_client else None
+        self._last_tat_offset = 0.0
+        self._last_tat_seen = 0.0
+        self.fallback_count = 0
+
+    async def _try_acquire(self, lane: RequestLane, cost: float) -> Tuple[bool, float]:
+        """Atomic GCRA check in Redis"""
+        if self._script is None:
+            return await super()._try_acquire(lane, cost)
+
+        delta, self._pending_delta = self._pending_delta, 0.0
+        try:
+            allowed, retry_after, tat_offset, multiplier = await self._script(
+                keys=[self.tat_key, self.multiplier_key],
+                args=[
+                    self.base_interval, self.burst_requests(lane), cost, delta,
+                    ADAPTIVE_MIN_MULTIPLIER, ADAPTIVE_MAX_MULTIPLIER, ADAPTIVE_MULTIPLIER_TTL * 1000,
+                ]
+            )
+        except Exception as e:
+            self._pending_delta += delta  # Sent with the next check instead
+            self.fallback_count += 1
+            logger.warning(f"Distributed rate limit unavailable, using local limiter: {e}")
+            return await super()._try_acquire(lane, cost)
+
+        self.adaptive_multiplier = float(multiplier)
+        self._last_tat_offset = float(tat_offset)
+        self._last_tat_seen = time.time()
+        return bool(int(allowed)), float(retry_after)
+
+    def _adjust_multiplier(self, delta: float):
+        # Applied locally for the fallback limiter; Redis holds the shared value
+        super()._adjust_multiplier(delta)
+        span = ADAPTIVE_MAX_MULTIPLIER - ADAPTIVE_MIN_MULTIPLIER
+        self._pending_delta = min(span, max(-span, self._pending_delta + delta))
+
+    def _tat_offset(self) -> float:
+        # Last value seen from Redis, aged locally; avoids a round trip for metrics
+        return max(0.0, self._last_tat_offset - (time.time() - self._last_tat_seen))
+
+    def get_current_usage(self) -> Dict[str, any]:
+        usage = super().get_current_usage()
+        usage.update({"distributed": self._script is not None, "fallbacks": self.fallback_count})
+        return usage
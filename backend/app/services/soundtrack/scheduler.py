@@ -0,0 +1,111 @@
+"""
+Priority-lane scheduler for Soundtrack API traffic.
+
+Every SYB request takes an in-flight slot from the scheduler before it goes
+through the rate limiter. Dispatch order, reserved interactive slots and
+round-robin between background jobs come from app.core.lane_scheduler;
+this module wakes waiters through asyncio futures.
+"""
+
+import asyncio
+import contextvars
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional, Tuple
+import logging
+
+from app.core.lane_scheduler import DEFAULT_JOB, LaneDispatcher
+from app.services.soundtrack.rate_limiter import RequestLane
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKGROUND_JOB = DEFAULT_JOB
+
+# Lane/job used by requests that don't pass one explicitly
+_current_lane: contextvars.ContextVar[Optional[Tuple[RequestLane, str]]] = contextvars.ContextVar(
+    "soundtrack_request_lane", default=None
+)
+
+
+@contextmanager
+def request_lane(lane: RequestLane, job: str = DEFAULT_BACKGROUND_JOB):
+    """
+    Run every Soundtrack request made inside the block in the given lane.
+
+    Example:
+        with request_lane(RequestLane.BACKGROUND, job="zone_status_sync"):
+            await aggregator.get_zone_status(venue_id)
+    """
+    token = _current_lane.set((lane, job))
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+def current_lane() -> Tuple[RequestLane, str]:
+    """Lane and job of the enclosing request_lane block (NORMAL if none)"""
+    return _current_lane.get() or (RequestLane.NORMAL, DEFAULT_BACKGROUND_JOB)
+
+
+class LaneScheduler(LaneDispatcher):
+    """
+    Grants in-flight slots by lane priority to coroutines on one event loop.
+
+    Dispatch order is strict: INTERACTIVE, then NORMAL, then BACKGROUND.
+    ``interactive_reserve`` slots are only ever handed to interactive
+    requests. Background waiters are queued per job type and served
+    round-robin, one request per job per turn.
+    """
+
+    def __init__(self, max_in_flight: int = 50, interactive_reserve: int = 5):
+        """
+        Args:
+            max_in_flight: Concurrent SYB requests across all lanes
+            interactive_reserve: Slots held back for interactive requests
+        """
+        super().__init__(max_in_flight, interactive_reserve)
+
+    def _grant(self, waiter: asyncio.Future):
+        waiter.set_result(None)
+
+    def _live(self, waiter: asyncio.Future) -> bool:
+        # Cancelled waiters are skipped when their turn comes
+        return not waiter.done()
+
+    @asynccontextmanager
+    async def slot(self, lane: Optional[RequestLane] = None, job: Optional[str] = None):
+        """
+        Hold one in-flight slot for the duration of a request.
+
+        Args:
+            lane: Request lane (defaults to the enclosing request_lane block)
+            job: Background job type used for fair sharing
+        """
+        if lane is None:
+            lane, scoped_job = current_lane()
+            job = job or scoped_job
+        job = job or DEFAULT_BACKGROUND_JOB
+        lane = RequestLane(lane).value
+
+        waiter = asyncio.get_running_loop().create_future()
+        enqueued_at = time.perf_counter()
+        self._enqueue(lane, job, waiter)
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            self._dequeued(lane, job, None)
+            # Granted just before the cancel landed - hand the slot back
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            else:
+                waiter.cancel()
+            raise
+
+        granted_at = time.perf_counter()
+        self._dequeued(lane, job, granted_at - enqueued_at)
+        try:
+            yield
+        finally:
+            self._release(lane, time.perf_counter() - granted_at)
@@ -0,0 +1,193 @@
+"""
+Tests for the GCRA rate limiter and its priority lanes.
+Uses a simulated clock via gcra_decide so results are deterministic.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services.soundtrack.rate_limiter import (
+    GCRA_LUA,
+    LANE_BURST_SHARE,
+    DistributedRateLimiter,
+    RateLimiter,
+    RequestLane,
+    gcra_decide,
+    lane_for_priority,
+)
+
+RPM = 1000
+EMISSION = 60.0 / RPM
+BURST = 50
+
+
+def simulate(arrivals, lane=RequestLane.INTERACTIVE, burst=BURST):
+    """Run arrival times through GCRA; return the accepted ones"""
+    tat = 0.0
+    accepted = []
+    for now in arrivals:
+        allowed, tat, _ = gcra_decide(tat, now, EMISSION, EMISSION * burst * LANE_BURST_SHARE[lane])
+        if allowed:
+            accepted.append(now)
+    return accepted
+
+
+def test_burst_then_sustained_rate():
+    # 5000 requests hammered over 60 seconds
+    arrivals = [i * 0.012 for i in range(5000)]
+    accepted = simulate(arrivals)
+    # Budget for 60s is the sustained rate plus one burst - never more
+    assert len(accepted) <= RPM + BURST
+    assert len(accepted) >= RPM
+
+
+def test_no_double_burst_at_window_edges():
+    # Idle, then everything at 59.99s and 60.01s - a fixed window would allow 2x
+    arrivals = [59.99] * 2000 + [60.01] * 2000
+    accepted = simulate(arrivals)
+    assert len(accepted) <= BURST + 1
+
+
+def test_denied_requests_do_not_consume_budget():
+    tat = 0.0
+    now = 100.0
+    for _ in range(BURST):
+        allowed, tat, _ = gcra_decide(tat, now, EMISSION, EMISSION * BURST)
+        assert allowed
+    tat_before = tat
+    for _ in range(100):
+        allowed, tat, retry_after = gcra_decide(tat, now, EMISSION, EMISSION * BURST)
+        assert not allowed and retry_after > 0
+    assert tat == tat_before
+    # After retry_after the next request goes through
+    allowed, _, _ = gcra_decide(tat, now + retry_after, EMISSION, EMISSION * BURST)
+    assert allowed
+
+
+def test_background_lane_leaves_headroom_for_interactive():
+    tat = 0.0
+    now = 100.0
+    background = 0
+    while True:
+        allowed, tat, _ = gcra_decide(tat, now, EMISSION, EMISSION * BURST * LANE_BURST_SHARE[RequestLane.BACKGROUND])
+        if not allowed:
+            break
+        background += 1
+    assert background == BURST // 2
+
+    interactive = 0
+    while True:
+        allowed, tat, _ = gcra_decide(tat, now, EMISSION, EMISSION * BURST)
+        if not allowed:
+            break
+        interactive += 1
+    assert interactive == BURST - background
+
+
+def test_lane_for_priority():
+    assert lane_for_priority(10) == RequestLane.INTERACTIVE
+    assert lane_for_priority(5) == RequestLane.NORMAL
+    assert lane_for_priority(1) == RequestLane.BACKGROUND
+
+
+def test_acquire_waits_and_records_lanes():
+    limiter = RateLimiter(requests_per_minute=600, burst_size=5, enable_adaptive=False)
+
+    async def run():
+        for _ in range(5):
+            assert await limiter.acquire(lane=RequestLane.INTERACTIVE) < 0.01
+        started = time.time()
+        await limiter.acquire(lane=RequestLane.INTERACTIVE)
+        return time.time() - started
+
+    waited = asyncio.run(run())
+    assert 0.05 <= waited < 0.5
+    usage = limiter.get_current_usage()
+    assert usage["lanes"]["interactive"]["requests"] == 6
+    assert usage["blocked_requests"] == 1
+
+
+def test_acquire_max_wait():
+    limiter = RateLimiter(requests_per_minute=60, burst_size=1, enable_adaptive=False)
+
+    async def run():
+        await limiter.acquire()
+        await limiter.acquire(max_wait=0.1)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(run())
+
+
+class ScriptRedis:
+    """GCRA_LUA ported to Python over a dict, standing in for a shared Redis"""
+
+    def __init__(self):
+        self.data = {}
+        self.calls = []
+
+    def register_script(self, script):
+        assert script == GCRA_LUA
+
+        async def run(keys, args):
+            self.calls.append((keys, args))
+            tat_key, multiplier_key = keys
+            base, burst, cost, delta, low, high, _ttl = (float(arg) for arg in args)
+            multiplier = self.data.get(multiplier_key, 1.0)
+            if delta:
+                multiplier = self.data[multiplier_key] = min(high, max(low, multiplier + delta))
+            emission = base / multiplier
+            now = time.time()
+            tat = self.data.get(tat_key, now)
+            allowed, new_tat, retry_after = gcra_decide(tat, now, emission, emission * burst, cost)
+            self.data[tat_key] = new_tat
+            return [int(allowed), str(retry_after), str(max(0.0, new_tat - now)), str(multiplier)]
+
+        return run
+
+
+def report_slow(limiter, count=10):
+    for _ in range(count):
+        limiter.report_response(3.0, True)
+
+
+def test_adaptive_multiplier_is_shared_between_processes():
+    redis = ScriptRedis()
+    web = DistributedRateLimiter(redis, requests_per_minute=RPM, burst_size=BURST)
+    worker = DistributedRateLimiter(redis, requests_per_minute=RPM, burst_size=BURST)
+
+    async def run():
+        # Only the web process sees slow responses
+        report_slow(web)
+        await web.acquire()
+        await worker.acquire()
+
+    asyncio.run(run())
+    # One slowdown step, sent with the web process's next check
+    assert redis.data["rate_limit:soundtrack:multiplier"] == pytest.approx(0.9)
+    assert web.adaptive_multiplier == worker.adaptive_multiplier == pytest.approx(0.9)
+    assert worker.emission_interval == pytest.approx(EMISSION / 0.9)
+    # Each process sends the unscaled interval; Redis applies the multiplier
+    assert all(args[0] == EMISSION for _, args in redis.calls)
+    assert [args[3] for _, args in redis.calls] == [pytest.approx(-0.1), 0.0]
+
+
+def test_multiplier_adjustment_kept_while_redis_is_down():
+    redis = ScriptRedis()
+    limiter = DistributedRateLimiter(redis, requests_per_minute=RPM, burst_size=BURST)
+    script = limiter._script
+
+    async def failing(keys, args):
+        raise ConnectionError("redis down")
+
+    async def run():
+        report_slow(limiter)
+        limiter._script = failing
+        await limiter.acquire()
+        limiter._script = script
+        await limiter.acquire()
+
+    asyncio.run(run())
+    assert limiter.fallback_count == 1
+    assert redis.data["rate_limit:soundtrack:multiplier"] == pytest.approx(0.9)
@@ -0,0 +1,100 @@
+"""
+Tests for the Soundtrack priority-lane scheduler.
+A simulated 10k-zone style sweep saturates the client while control commands arrive.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.soundtrack.rate_limiter import RequestLane
+from app.services.soundtrack.scheduler import LaneScheduler, current_lane, request_lane
+
+
+async def hold(scheduler, lane, job=None, duration=0.0, order=None):
+    async with scheduler.slot(lane, job):
+        if order is not None:
+            order.append(job or lane.value)
+        await asyncio.sleep(duration)
+
+
+def test_interactive_latency_unaffected_by_sweep():
+    async def scenario():
+        scheduler = LaneScheduler(max_in_flight=10, interactive_reserve=2)
+        sweep = [
+            asyncio.create_task(hold(scheduler, RequestLane.BACKGROUND, "zone_monitoring", 0.005))
+            for _ in range(1000)
+        ]
+        await asyncio.sleep(0.01)
+
+        for _ in range(5):
+            await hold(scheduler, RequestLane.INTERACTIVE)
+        await asyncio.gather(*sweep)
+        return scheduler.get_stats()
+
+    stats = asyncio.run(scenario())
+    interactive = stats["lanes"]["interactive"]
+    assert interactive["requests"] == 5
+    # Reserved slots mean control commands never queue behind the sweep
+    assert interactive["queue_wait"]["max_ms"] < 5
+    assert stats["lanes"]["background"]["queue_wait"]["max_ms"] > 100
+    assert stats["in_flight"] == 0
+
+
+def test_interactive_dispatched_before_queued_background():
+    async def scenario():
+        scheduler = LaneScheduler(max_in_flight=2, interactive_reserve=1)
+        order = []
+        tasks = [asyncio.create_task(hold(scheduler, RequestLane.BACKGROUND, "sweep", 0.01, order))
+                 for _ in range(5)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(hold(scheduler, RequestLane.INTERACTIVE, None, 0, order)))
+        await asyncio.gather(*tasks)
+        return order
+
+    order = asyncio.run(scenario())
+    assert order.index("interactive") <= 1
+
+
+def test_background_jobs_round_robin():
+    async def scenario():
+        scheduler = LaneScheduler(max_in_flight=2, interactive_reserve=1)
+        order = []
+        tasks = [asyncio.create_task(hold(scheduler, RequestLane.BACKGROUND, "zone_monitoring", 0.001, order))
+                 for _ in range(10)]
+        tasks += [asyncio.create_task(hold(scheduler, RequestLane.BACKGROUND, "zone_status_sync", 0.001, order))
+                  for _ in range(3)]
+        await asyncio.gather(*tasks)
+        return order, scheduler.get_stats()
+
+    order, stats = asyncio.run(scenario())
+    last_sync = max(i for i, job in enumerate(order) if job == "zone_status_sync")
+    assert last_sync < 7
+    assert stats["background_jobs"]["zone_monitoring"] == {"requests": 10, "queued": 0}
+
+
+def test_cancelled_waiter_releases_nothing():
+    async def scenario():
+        scheduler = LaneScheduler(max_in_flight=2, interactive_reserve=1)
+        running = asyncio.create_task(hold(scheduler, RequestLane.NORMAL, None, 0.02))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(hold(scheduler, RequestLane.BACKGROUND, "sweep", 0))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        await running
+        await hold(scheduler, RequestLane.BACKGROUND, "sweep")
+        return scheduler.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["in_flight"] == 0
+    assert stats["lanes"]["background"]["queued"] == 0
+    assert stats["background_jobs"]["sweep"]["requests"] == 1
+
+
+def test_request_lane_scope():
+    assert current_lane() == (RequestLane.NORMAL, "default")
+    with request_lane(RequestLane.BACKGROUND, job="zone_status_sync"):
+        assert current_lane() == (RequestLane.BACKGROUND, "zone_status_sync")
+    assert current_lane()[0] == RequestLane.NORMAL
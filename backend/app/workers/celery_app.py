@@ -58,9 +58,13 @@ celery_app.conf.update(
     
     # Beat schedule for periodic tasks
     beat_schedule={
-        "monitor-zones": {
-            "task": "app.workers.tasks.monitoring.check_all_zones",
-            "schedule": 300.0,  # Every 5 minutes
+        "check-due-zones": {
+            "task": "app.workers.tasks.monitoring.check_due_zones",
+            "schedule": 15.0,  # Zones due since the last run (per-zone intervals)
+        },
+        "sync-zone-schedule": {
+            "task": "app.workers.tasks.monitoring.sync_zone_schedule",
+            "schedule": 600.0,  # Every 10 minutes
         },
         "process-campaigns": {
             "task": "app.workers.tasks.campaigns.process_scheduled_campaigns",
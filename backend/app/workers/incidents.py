@@ -0,0 +1,178 @@
+"""
+Venue-level incident correlation for zone issues.
+
+When a venue's network drops, every zone there goes offline in the same few
+minutes. Instead of one alert per zone (repeated on every check), zone
+issues are grouped into incidents keyed by venue, Soundtrack location and
+issue type:
+
+- The first zone reporting an issue opens the incident. Its notification
+  waits for a short correlation window so the venue's other zones can
+  join, then goes out once with every affected zone.
+- Zones that join an open incident later, and repeat reports from zones
+  already in it, don't notify.
+- A zone that checks healthy leaves its incidents; an incident closes when
+  its last zone recovers, and the close is announced only if the open was.
+
+State lives in Redis so every monitoring worker sees the same incidents.
+Opening, joining and leaving are Lua scripts so concurrent workers can't
+open an incident twice or close one that a zone is joining.
+"""
+
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "incident"
+PENDING_KEY = "incidents:pending"  # incident key -> notify_at
+OPEN_KEY = "incidents:open"
+
+# KEYS: incident hash, its zone set, pending zset, open set, the zone's incident set
+# ARGV: zone id, incident id, now, notify_at, incident fields (json)
+REPORT_LUA = """
+local created = redis.call('HSETNX', KEYS[1], 'id', ARGV[2])
+if created == 1 then
+    local fields = cjson.decode(ARGV[5])
+    for name, value in pairs(fields) do
+        redis.call('HSET', KEYS[1], name, value)
+    end
+    redis.call('HSET', KEYS[1], 'opened_at', ARGV[3], 'notified', '0')
+    redis.call('ZADD', KEYS[3], ARGV[4], KEYS[1])
+    redis.call('SADD', KEYS[4], KEYS[1])
+end
+redis.call('HSET', KEYS[1], 'last_seen', ARGV[3])
+local joined = redis.call('SADD', KEYS[2], ARGV[1])
+redis.call('SADD', KEYS[5], KEYS[1])
+return {created, joined}
+"""
+
+# KEYS: pending zset, open set, the zone's incident set
+# ARGV: zone id, issue to keep (or ''), now
+# Returns the incidents that closed, as flat HGETALL lists
+CLEAR_LUA = """
+local closed = {}
+local incidents = redis.call('SMEMBERS', KEYS[3])
+for _, key in ipairs(incidents) do
+    local issue = redis.call('HGET', key, 'issue')
+    if issue ~= ARGV[2] then
+        redis.call('SREM', key .. ':zones', ARGV[1])
+        redis.call('SREM', KEYS[3], key)
+        if redis.call('SCARD', key .. ':zones') == 0 then
+            redis.call('HSET', key, 'closed_at', ARGV[3])
+            table.insert(closed, redis.call('HGETALL', key))
+            redis.call('DEL', key, key .. ':zones')
+            redis.call('ZREM', KEYS[1], key)
+            redis.call('SREM', KEYS[2], key)
+        end
+    end
+end
+return closed
+"""
+
+# KEYS: pending zset, incident hash
+# Returns {fields, zones} to the one caller that takes the incident, else nil
+NOTIFY_LUA = """
+if redis.call('ZREM', KEYS[1], KEYS[2]) == 0 or redis.call('EXISTS', KEYS[2]) == 0 then
+    return nil
+end
+redis.call('HSET', KEYS[2], 'notified', '1')
+return {redis.call('HGETALL', KEYS[2]), redis.call('SMEMBERS', KEYS[2] .. ':zones')}
+"""
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _pairs(flat: List[Any]) -> Dict[str, str]:
+    flat = [_text(v) for v in flat]
+    return dict(zip(flat[::2], flat[1::2]))
+
+
+def incident_key(venue_id: str, location: Optional[str], issue: str) -> str:
+    return f"{PREFIX}:{venue_id}:{location or '-'}:{issue}"
+
+
+class IncidentCorrelator:
+    """Groups zone issues into venue incidents"""
+
+    def __init__(self, redis, window: float = 90.0):
+        """
+        Args:
+            redis: redis.asyncio client
+            window: Seconds an incident collects zones before it notifies
+        """
+        self.redis = redis
+        self.window = window
+        self._report = redis.register_script(REPORT_LUA)
+        self._clear = redis.register_script(CLEAR_LUA)
+        self._notify = redis.register_script(NOTIFY_LUA)
+
+    async def report(self, zone, issue: str, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Record a zone issue.
+
+        Returns:
+            incident key, opened (this report opened it) and joined (the
+            zone wasn't in it yet - the first report from this zone)
+        """
+        now = time.time() if now is None else now
+        venue = zone.venue
+        location = getattr(venue, "soundtrack_location_id", None)
+        key = incident_key(str(zone.venue_id), location, issue)
+        fields = {
+            "venue_id": str(zone.venue_id),
+            "venue_name": getattr(venue, "name", "") or "",
+            "location": location or "",
+            "issue": issue,
+        }
+        opened, joined = await self._report(
+            keys=[key, f"{key}:zones", PENDING_KEY, OPEN_KEY, f"incidents:zone:{zone.id}"],
+            args=[str(zone.id), str(uuid.uuid4()), now, now + self.window, json.dumps(fields)],
+        )
+        return {"incident": key, "opened": bool(opened), "joined": bool(joined)}
+
+    async def clear(self, zone_id: str, keep_issue: Optional[str] = None, now: Optional[float] = None) -> List[Dict[str, str]]:
+        """
+        Take a zone out of its incidents, except one for keep_issue (the
+        issue it still has).
+
+        Returns:
+            Incidents that closed because this was their last zone
+        """
+        now = time.time() if now is None else now
+        closed = await self._clear(
+            keys=[PENDING_KEY, OPEN_KEY, f"incidents:zone:{zone_id}"],
+            args=[str(zone_id), keep_issue or "", now],
+        )
+        return [_pairs(incident) for incident in closed]
+
+    async def due(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Incidents whose correlation window has passed, with their zones.
+        Each is returned to exactly one caller and marked notified.
+        """
+        now = time.time() if now is None else now
+        ready = []
+        for key in await self.redis.zrangebyscore(PENDING_KEY, "-inf", now):
+            key = _text(key)
+            taken = await self._notify(keys=[PENDING_KEY, key])
+            if not taken:
+                continue  # Another worker took it, or it closed meanwhile
+            fields, zones = taken
+            incident = _pairs(fields)
+            incident["key"] = key
+            incident["zone_ids"] = sorted(_text(z) for z in zones)
+            ready.append(incident)
+        return ready
+
+    async def get_stats(self) -> Dict[str, Any]:
+        pipeline = self.redis.pipeline()
+        pipeline.scard(OPEN_KEY)
+        pipeline.zcard(PENDING_KEY)
+        open_count, pending = await pipeline.execute()
+        return {"open": open_count, "pending_notification": pending}
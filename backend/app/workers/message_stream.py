@@ -0,0 +1,463 @@
+"""
+Inbound message stream for BMA Social
+
+Replaces the BRPOP list queue with a Redis Stream read through a consumer
+group, run as its own async service:
+
+    python -m app.workers.message_stream
+
+- Consumers read batches with XREADGROUP and process them in-process (no
+  second Celery hop), concurrently across conversations but in order
+  within one conversation.
+- Successful entries are acknowledged with one XACK per batch. Failed
+  entries stay pending and are picked up again with XAUTOCLAIM once they
+  have been idle for claim_idle_ms - by any consumer, so a crashed
+  worker's messages are redelivered too.
+- A failure stops its conversation: the messages after it stay pending
+  and aren't attempted, and later batches hold that conversation's new
+  messages, until the failed one succeeds or is dead-lettered. Deliveries
+  spent waiting don't count as attempts.
+- After max_deliveries attempts an entry is moved to a separate DLQ stream
+  together with its delivery count and last error.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LEGACY_QUEUE_KEY = "messages:incoming"
+DLQ_ARCHIVE_KEY = "messages:dlq:archive:stream"
+
+Entry = Tuple[str, Dict[str, str]]
+
+
+def encode_message(message_data: Dict[str, Any]) -> Dict[str, str]:
+    """Stream fields for a message payload"""
+    return {
+        "data": json.dumps(message_data),
+        "conversation_id": str(message_data.get("conversation_id") or ""),
+        "enqueued_at": f"{time.time():.6f}",
+    }
+
+
+def decode_message(fields: Dict[str, str]) -> Dict[str, Any]:
+    return json.loads(fields["data"])
+
+
+async def enqueue_message(
+    redis,
+    message_data: Dict[str, Any],
+    stream: str = "messages:stream",
+    maxlen: Optional[int] = 100000,
+) -> str:
+    """
+    Append an inbound message to the stream.
+
+    Returns:
+        Stream entry ID
+    """
+    return await redis.xadd(stream, encode_message(message_data), maxlen=maxlen, approximate=True)
+
+
+async def migrate_legacy_queue(
+    redis,
+    stream: str = "messages:stream",
+    legacy_key: str = LEGACY_QUEUE_KEY,
+    maxlen: Optional[int] = 100000,
+) -> int:
+    """
+    Move messages still waiting in the old BRPOP list onto the stream,
+    oldest first (producers LPUSHed, so the oldest is on the right).
+
+    Returns:
+        Number of messages moved
+    """
+    moved = 0
+    while True:
+        item = await redis.rpop(legacy_key)
+        if item is None:
+            break
+        await redis.xadd(stream, encode_message(json.loads(item)), maxlen=maxlen, approximate=True)
+        moved += 1
+    if moved:
+        logger.info(f"Moved {moved} messages from legacy queue {legacy_key} to {stream}")
+    return moved
+
+
+class MessageStreamConsumer:
+    """Consumer-group reader with batched acks, XAUTOCLAIM retry and a DLQ stream"""
+
+    def __init__(
+        self,
+        redis,
+        handler: Callable[[Dict[str, Any]], Awaitable[Any]],
+        stream: str = "messages:stream",
+        group: str = "message-processors",
+        dlq_stream: str = "messages:dlq:stream",
+        consumer_name: Optional[str] = None,
+        batch_size: int = 50,
+        block_ms: int = 5000,
+        claim_idle_ms: int = 30000,
+        max_deliveries: int = 5,
+        concurrency: int = 16,
+        dlq_maxlen: Optional[int] = 100000,
+    ):
+        """
+        Args:
+            redis: redis.asyncio client (decode_responses=True)
+            handler: Coroutine processing one decoded message; raising marks it failed
+            stream: Stream key
+            group: Consumer group name
+            dlq_stream: Stream receiving entries that exhausted their deliveries
+            consumer_name: Unique name of this consumer (default host-pid)
+            batch_size: Entries per XREADGROUP / XAUTOCLAIM call
+            block_ms: How long XREADGROUP blocks when the stream is empty
+            claim_idle_ms: Pending entries idle this long are reclaimed and retried
+            max_deliveries: Attempts before an entry is dead-lettered
+            concurrency: Conversations processed at the same time
+            dlq_maxlen: Approximate cap on the DLQ stream length
+        """
+        self.redis = redis
+        self.handler = handler
+        self.stream = stream
+        self.group = group
+        self.dlq_stream = dlq_stream
+        self.errors_key = f"{stream}:errors"
+        # Deliveries of an entry that were held behind a failed message: entry id -> count
+        self.held_key = f"{stream}:held"
+        self.consumer_name = consumer_name or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.max_deliveries = max_deliveries
+        self.dlq_maxlen = dlq_maxlen
+
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._running = False
+        self._last_claim = 0.0
+
+        self.stats = {
+            "read": 0,
+            "acked": 0,
+            "failed": 0,
+            "reclaimed": 0,
+            "dead_lettered": 0,
+            "held": 0,
+            "batches": 0,
+            "last_batch_ms": 0.0,
+        }
+
+    async def ensure_group(self):
+        """Create the consumer group (and stream) if missing"""
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+            logger.info(f"Created consumer group {self.group} on {self.stream}")
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def run(self):
+        """Consume until stop() is called"""
+        await self.ensure_group()
+        self._running = True
+        logger.info(f"Message stream consumer {self.consumer_name} reading {self.stream}")
+
+        while self._running:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Message stream consumer error: {e}")
+                await asyncio.sleep(1)
+
+        logger.info(f"Message stream consumer {self.consumer_name} stopped")
+
+    def stop(self):
+        self._running = False
+
+    async def poll_once(self, block_ms: Optional[int] = None) -> int:
+        """
+        One consume cycle: retry stuck entries when due, then read new ones.
+
+        Returns:
+            Number of entries handled (acked, failed or dead-lettered)
+        """
+        handled = 0
+        now = time.monotonic()
+        if (now - self._last_claim) * 1000 >= self.claim_idle_ms / 2:
+            self._last_claim = now
+            handled += await self.reclaim_stuck()
+
+        response = await self.redis.xreadgroup(
+            self.group,
+            self.consumer_name,
+            {self.stream: ">"},
+            count=self.batch_size,
+            block=self.block_ms if block_ms is None else block_ms,
+        )
+        for _, entries in response or []:
+            if entries:
+                handled += await self._process_batch(entries, {})
+        return handled
+
+    async def reclaim_stuck(self) -> int:
+        """Take over entries pending longer than claim_idle_ms and retry them"""
+        handled = 0
+        cursor = "0-0"
+        while True:
+            result = await self.redis.xautoclaim(
+                self.stream,
+                self.group,
+                self.consumer_name,
+                min_idle_time=self.claim_idle_ms,
+                start_id=cursor,
+                count=self.batch_size,
+            )
+            cursor, entries = result[0], result[1]
+            # Entries trimmed from the stream come back empty - just ack them
+            live = [(entry_id, fields) for entry_id, fields in entries if fields]
+            gone = [entry_id for entry_id, fields in entries if not fields]
+            if gone:
+                await self.redis.xack(self.stream, self.group, *gone)
+
+            if live:
+                self.stats["reclaimed"] += len(live)
+                deliveries = await self._delivery_counts(live)
+                handled += await self._process_batch(live, deliveries)
+
+            if cursor in ("0-0", b"0-0") or not entries:
+                return handled
+
+    async def _delivery_counts(self, entries: List[Entry]) -> Dict[str, int]:
+        """Times each entry has been delivered, from one XPENDING range call"""
+        pending = await self.redis.xpending_range(
+            self.stream,
+            self.group,
+            min=entries[0][0],
+            max=entries[-1][0],
+            count=len(entries) * 2,
+        )
+        return {item["message_id"]: int(item["times_delivered"]) for item in pending}
+
+    def _blocked_key(self, conversation_id: str) -> str:
+        return f"{self.stream}:blocked:{conversation_id}"
+
+    async def _attempts(self, entry_id: str, deliveries: int) -> int:
+        """Deliveries of an entry that actually ran the handler"""
+        held = await self.redis.hget(self.held_key, entry_id)
+        return deliveries - int(held or 0)
+
+    async def _process_batch(self, entries: List[Entry], deliveries: Dict[str, int]) -> int:
+        started = time.perf_counter()
+        self.stats["read"] += len(entries)
+        self.stats["batches"] += 1
+
+        to_process: List[Entry] = []
+        for entry_id, fields in entries:
+            count = deliveries.get(entry_id, 1)
+            # Only over-limit entries can be due; look up their held deliveries
+            attempts = await self._attempts(entry_id, count) if count > self.max_deliveries else count
+            if attempts > self.max_deliveries:
+                await self._dead_letter(entry_id, fields, attempts - 1)
+            else:
+                to_process.append((entry_id, fields))
+
+        # Same conversation -> sequential, in stream order
+        groups: "OrderedDict[str, List[Entry]]" = OrderedDict()
+        for entry_id, fields in to_process:
+            key = fields.get("conversation_id") or entry_id
+            groups.setdefault(key, []).append((entry_id, fields))
+
+        # A conversation whose earlier message is still failing waits for it,
+        # unless that message is in this batch (it runs first)
+        blockers = await self.redis.mget([self._blocked_key(key) for key in groups]) if groups else []
+        blocked = {key: blocker for key, blocker in zip(groups, blockers) if blocker}
+        held: List[str] = []
+        for key, blocker in blocked.items():
+            if all(entry_id != blocker for entry_id, _ in groups[key]):
+                held.extend(entry_id for entry_id, _ in groups.pop(key))
+
+        acked: List[str] = []
+        retried_ok: List[str] = []
+        unblocked: List[str] = []
+
+        async def run_group(key: str, items: List[Entry]):
+            async with self._semaphore:
+                for index, (entry_id, fields) in enumerate(items):
+                    try:
+                        await self.handler(decode_message(fields))
+                    except Exception as e:
+                        # Left pending - XAUTOCLAIM redelivers it after claim_idle_ms
+                        self.stats["failed"] += 1
+                        logger.warning(f"Message {entry_id} failed (delivery {deliveries.get(entry_id, 1)}): {e}")
+                        await self.redis.hset(self.errors_key, entry_id, str(e)[:500])
+                        if fields.get("conversation_id"):
+                            # Expires on its own if the entry vanishes (trimmed) without being resolved
+                            await self.redis.set(
+                                self._blocked_key(key), entry_id,
+                                px=self.claim_idle_ms * (self.max_deliveries + 2),
+                            )
+                        # The rest of the conversation waits behind it, still pending
+                        held.extend(later_id for later_id, _ in items[index + 1:])
+                        return
+                    acked.append(entry_id)
+                    if deliveries.get(entry_id, 1) > 1:
+                        retried_ok.append(entry_id)
+                if key in blocked:
+                    unblocked.append(self._blocked_key(key))
+
+        await asyncio.gather(*(run_group(key, items) for key, items in groups.items()))
+
+        if acked:
+            await self.redis.xack(self.stream, self.group, *acked)
+            self.stats["acked"] += len(acked)
+        if retried_ok:
+            await self.redis.hdel(self.errors_key, *retried_ok)
+            await self.redis.hdel(self.held_key, *retried_ok)
+        if unblocked:
+            await self.redis.delete(*unblocked)
+        for entry_id in held:
+            await self.redis.hincrby(self.held_key, entry_id, 1)
+        self.stats["held"] += len(held)
+
+        self.stats["last_batch_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return len(entries)
+
+    async def _dead_letter(self, entry_id: str, fields: Dict[str, str], deliveries: int):
+        """Move an entry that exhausted its deliveries to the DLQ stream"""
+        error = await self.redis.hget(self.errors_key, entry_id) or "unknown"
+        await self.redis.xadd(
+            self.dlq_stream,
+            {
+                "data": fields.get("data", "{}"),
+                "source_id": entry_id,
+                "deliveries": str(deliveries),
+                "error": error,
+                "failed_at": datetime.utcnow().isoformat(),
+            },
+            maxlen=self.dlq_maxlen,
+            approximate=True,
+        )
+        await self.redis.xack(self.stream, self.group, entry_id)
+        await self.redis.hdel(self.errors_key, entry_id)
+        await self.redis.hdel(self.held_key, entry_id)
+        if fields.get("conversation_id"):
+            # Its conversation moves on without it
+            await self.redis.delete(self._blocked_key(fields["conversation_id"]))
+        self.stats["dead_lettered"] += 1
+        logger.error(f"Message {entry_id} moved to {self.dlq_stream} after {deliveries} deliveries: {error}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "consumer": self.consumer_name, "running": self._running}
+
+
+async def process_dead_letters(
+    redis,
+    publish: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+    dlq_stream: str = "messages:dlq:stream",
+    archive_stream: str = DLQ_ARCHIVE_KEY,
+    batch_size: int = 100,
+    escalate_within: timedelta = timedelta(hours=1),
+) -> Dict[str, int]:
+    """
+    Drain the DLQ stream: recent failures are escalated to a human, older
+    ones archived. Each processed entry is removed with XDEL (O(1) per
+    entry, unlike LREM on a list).
+
+    Returns:
+        Counts of escalated and archived entries
+    """
+    counts = {"escalated": 0, "archived": 0}
+    start = "-"
+    while True:
+        entries = await redis.xrange(dlq_stream, min=start, max="+", count=batch_size)
+        if not entries:
+            return counts
+
+        done = []
+        for entry_id, fields in entries:
+            try:
+                original = json.loads(fields.get("data") or "{}")
+                failed_at = datetime.fromisoformat(fields["failed_at"])
+                if datetime.utcnow() - failed_at < escalate_within:
+                    await publish(
+                        "escalations:dlq",
+                        {
+                            "conversation_id": original.get("conversation_id"),
+                            "error": fields.get("error"),
+                            "deliveries": int(fields.get("deliveries", 0)),
+                            "requires_manual_intervention": True,
+                        }
+                    )
+                    counts["escalated"] += 1
+                else:
+                    await redis.xadd(archive_stream, fields, maxlen=100000, approximate=True)
+                    counts["archived"] += 1
+                done.append(entry_id)
+            except Exception as e:
+                logger.error(f"DLQ processing error for {entry_id}: {e}")
+
+        if done:
+            await redis.xdel(dlq_stream, *done)
+        if len(entries) < batch_size:
+            return counts
+        # Exclusive start after the last entry seen (failed entries stay for next run)
+        start = f"({entries[-1][0]}"
+
+
+async def run_service():
+    """Run the message stream consumer as a standalone async service"""
+    from app.config import settings
+    from app.core.redis import redis_manager
+    from app.workers.tasks.message_processor import message_processor
+
+    await redis_manager.initialize()
+    if not redis_manager.redis:
+        raise RuntimeError("Redis is not available - message stream consumer cannot start")
+
+    async def handle(message_data: Dict[str, Any]):
+        # MessageProcessor.run is synchronous; failures raise and stay pending
+        await asyncio.to_thread(message_processor.run, message_data)
+
+    consumer = MessageStreamConsumer(
+        redis_manager.redis,
+        handle,
+        stream=settings.message_stream_key,
+        group=settings.message_stream_group,
+        dlq_stream=settings.message_stream_dlq_key,
+        batch_size=settings.message_stream_batch_size,
+        block_ms=settings.message_stream_block_ms,
+        claim_idle_ms=settings.message_stream_claim_idle_ms,
+        max_deliveries=settings.message_stream_max_deliveries,
+        concurrency=settings.message_stream_concurrency,
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, consumer.stop)
+
+    await consumer.ensure_group()
+    await migrate_legacy_queue(
+        redis_manager.redis,
+        stream=settings.message_stream_key,
+        maxlen=settings.message_stream_maxlen,
+    )
+    try:
+        await consumer.run()
+    finally:
+        await redis_manager.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_service())
@@ -5,7 +5,7 @@ This module is the core engine processing WhatsApp/Line messages at scale.
 Architecture designed for 10,000+ venues with sub-minute response times.
 
 Key Features:
-- Redis queue consumption with automatic retry and DLQ
+- Redis Streams consumption (app.workers.message_stream) with retry and DLQ
 - Conversation state management with distributed session handling
 - SLA tracking with real-time breach detection
 - Intelligent error handling with circuit breakers
@@ -16,7 +16,7 @@ import asyncio
 import json
 import logging
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, Any, Optional, List, Tuple
 from enum import Enum
 from dataclasses import dataclass, asdict
@@ -29,6 +29,8 @@ from sqlalchemy import select, update
 from app.workers.celery_app import celery_app
 from app.core.database import db_manager
 from app.core.redis import redis_manager, CacheKeyBuilder
+from app.config import settings
+from app.workers.message_stream import process_dead_letters
 from app.models.conversation import (
     Conversation, Message, ConversationStatus, 
     MessageSenderType, ConversationPriority
@@ -268,7 +270,7 @@ class MessageProcessor(Task):
                 sla_deadline=conversation.sla_deadline,
                 priority=conversation.priority,
                 is_vip="vip" in (conversation.tags or []),
-                metadata=conversation.metadata or {},
+                metadata=conversation.meta_data or {},
             )
     
     async def _check_sla_breach(self, context: MessageContext) -> bool:
@@ -808,10 +810,17 @@ class MessageProcessor(Task):
             "retries": self.request.retries,
         }
         
-        # Store in DLQ (Redis list)
-        await redis_manager.redis.lpush(
-            "messages:dlq",
-            json.dumps(dlq_item)
+        # Store in the DLQ stream alongside entries the stream consumer dead-letters
+        await redis_manager.redis.xadd(
+            settings.message_stream_dlq_key,
+            {
+                "data": json.dumps(message_data),
+                "deliveries": str(dlq_item["retries"] + 1),
+                "error": error,
+                "failed_at": dlq_item["failed_at"],
+            },
+            maxlen=settings.message_stream_maxlen,
+            approximate=True,
         )
         
         # Alert ops team
@@ -904,89 +913,28 @@ message_processor = MessageProcessor()
 celery_app.register_task(message_processor)
 
 
-@celery_app.task(name="app.workers.tasks.message_processor.consume_queue")
-def consume_message_queue():
-    """
-    Background task to consume messages from Redis queue.
-    Runs continuously and dispatches to processor.
-    """
-    asyncio.run(_consume_queue())
-
-
-async def _consume_queue():
-    """Async queue consumer"""
-    logger.info("Starting message queue consumer")
-    
-    while True:
-        try:
-            # Pop message from queue (blocking with timeout)
-            message = await redis_manager.redis.brpop(
-                "messages:incoming",
-                timeout=5
-            )
-            
-            if message:
-                # Parse message
-                _, data = message
-                message_data = json.loads(data)
-                
-                # Dispatch to processor
-                message_processor.delay(message_data)
-                
-                logger.debug(f"Dispatched message from conversation {message_data.get('conversation_id')}")
-            
-        except Exception as e:
-            logger.error(f"Queue consumer error: {e}")
-            await asyncio.sleep(1)
-
-
 @celery_app.task(name="app.workers.tasks.message_processor.process_dlq")
 def process_dead_letter_queue():
     """
     Process messages in Dead Letter Queue.
     Runs periodically to retry or escalate failed messages.
+    
+    Inbound messages themselves are consumed by the stream service
+    (python -m app.workers.message_stream), not by a Celery task.
     """
     asyncio.run(_process_dlq())
 
 
 async def _process_dlq():
-    """Process DLQ items"""
+    """Process DLQ stream entries"""
     logger.info("Processing Dead Letter Queue")
     
-    # Get items from DLQ
-    items = await redis_manager.redis.lrange("messages:dlq", 0, 100)
-    
-    for item in items:
-        try:
-            dlq_data = json.loads(item)
-            original_message = dlq_data["original_message"]
-            
-            # Check if we should retry
-            failed_time = datetime.fromisoformat(dlq_data["failed_at"])
-            time_since_failure = datetime.utcnow() - failed_time
-            
-            if time_since_failure < timedelta(hours=1):
-                # Recent failure - escalate to human
-                await redis_manager.publish(
-                    "escalations:dlq",
-                    {
-                        "conversation_id": original_message.get("conversation_id"),
-                        "error": dlq_data["error"],
-                        "requires_manual_intervention": True,
-                    }
-                )
-            else:
-                # Old failure - archive
-                await redis_manager.redis.lpush(
-                    "messages:dlq:archive",
-                    item
-                )
-            
-            # Remove from DLQ
-            await redis_manager.redis.lrem("messages:dlq", 1, item)
-            
-        except Exception as e:
-            logger.error(f"DLQ processing error: {e}")
+    counts = await process_dead_letters(
+        redis_manager.redis,
+        redis_manager.publish,
+        dlq_stream=settings.message_stream_dlq_key,
+    )
+    logger.info(f"DLQ processed: {counts['escalated']} escalated, {counts['archived']} archived")
 
 
 # Health check task
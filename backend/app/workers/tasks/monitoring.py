@@ -7,32 +7,162 @@ Designed for 10,000+ zones with intelligent batching and alerting.
 
 import asyncio
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Any, List
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Any, List, Optional
 from sqlalchemy import select, update
 from sqlalchemy.orm import selectinload
 
+from app.config import settings
 from app.workers.celery_app import celery_app
 from app.core.database import db_manager
 from app.core.redis import redis_manager
-from app.models.zone import Zone, ZoneStatus
+from app.core.partitions import (
+    MONITORING_LOG_RETENTION_DAYS,
+    drop_expired_partitions,
+    ensure_future_partitions,
+)
+from app.models.zone import Zone
 from app.models.venue import Venue
-from app.models.monitoring import MonitoringLog, AlertType, AlertSeverity
+from app.models.monitoring import Alert, MonitoringLog, AlertType, AlertSeverity
 from app.services.soundtrack.client import soundtrack_client
+from app.workers.incidents import IncidentCorrelator
+from app.workers.zone_schedule import ZonePollPolicy, ZoneSchedule, is_open
+from app.workers.zone_state import ZoneChange, zone_state_tracker
 
 logger = logging.getLogger(__name__)
 
+zone_poll_policy = ZonePollPolicy(
+    base_interval=settings.polling_interval_seconds,
+    offline_interval=settings.zone_poll_offline_interval,
+    recovering_interval=settings.zone_poll_recovering_interval,
+    stable_interval=settings.zone_poll_stable_interval,
+    closed_interval=settings.zone_poll_closed_interval,
+)
+
+
+def _zone_schedule() -> ZoneSchedule:
+    return ZoneSchedule(redis_manager.redis)
+
+
+def _incidents() -> IncidentCorrelator:
+    return IncidentCorrelator(redis_manager.redis, window=settings.incident_window_seconds)
+
+
+def _monitored(query):
+    """Limit a zone query to zones of active venues with monitoring on"""
+    return (
+        query.join(Venue, Zone.venue_id == Venue.id)
+        .where(Venue.is_active == True)
+        .where(Venue.monitoring_enabled == True)
+    )
+
+
+def _run(job):
+    """
+    Run an async job from a (sync) Celery task.
+    Each task gets its own event loop, so Redis and the Soundtrack session
+    are opened inside it and closed afterwards - clients can't be shared
+    across loops. Soundtrack is initialized after Redis so its shared rate
+    limiter binds to this loop's connection.
+    """
+    async def runner():
+        await redis_manager.initialize()
+        try:
+            await soundtrack_client.initialize()
+            try:
+                return await job()
+            finally:
+                await soundtrack_client.close()
+        finally:
+            await redis_manager.close()
+    
+    return asyncio.run(runner())
+
+
+@celery_app.task(name="app.workers.tasks.monitoring.check_due_zones")
+def check_due_zones():
+    """
+    Check the zones whose next check is due.
+    Runs every 15 seconds via Celery beat; each zone's next check is
+    scheduled on its own interval (see app.workers.zone_schedule).
+    """
+    return _run(_check_due_zones)
+
+
+async def _check_due_zones():
+    """Claim due zones from the schedule, check them and reschedule them"""
+    schedule = _zone_schedule()
+    zone_ids = await schedule.claim_due(settings.zone_poll_claim_limit)
+    if not zone_ids and not await schedule.size():
+        # Empty after a deploy or a Redis flush - seed it now rather than
+        # leave every zone unpolled until the next sync_zone_schedule run
+        await _sync_zone_schedule()
+        zone_ids = await schedule.claim_due(settings.zone_poll_claim_limit)
+    if not zone_ids:
+        return {"zones_checked": 0}
+    
+    start_time = datetime.utcnow()
+    
+    with db_manager.get_session() as session:
+        result = session.execute(
+            _monitored(select(Zone).options(selectinload(Zone.venue)))
+            .where(Zone.id.in_(zone_ids))
+        )
+        zones = result.scalars().all()
+        
+        counts = await _check_zones(session, zones)
+        session.commit()
+        zone_state_tracker.confirm(counts.pop("written"))
+    
+    await schedule.reschedule(counts.pop("next_checks"))
+    
+    # Zones deactivated since they were scheduled
+    gone = set(zone_ids) - {str(zone.id) for zone in zones}
+    if gone:
+        await schedule.remove(*gone)
+        for zone_id in gone:
+            zone_state_tracker.forget(zone_id)
+    
+    return await _publish_completed(len(zones), counts, start_time, await schedule.get_stats())
+
+
+@celery_app.task(name="app.workers.tasks.monitoring.sync_zone_schedule")
+def sync_zone_schedule():
+    """
+    Add newly monitored zones to the polling schedule and drop removed ones.
+    Runs every 10 minutes via Celery beat.
+    """
+    return _run(_sync_zone_schedule)
+
+
+async def _sync_zone_schedule():
+    with db_manager.get_session() as session:
+        zone_ids = session.execute(_monitored(select(Zone.id))).scalars().all()
+    
+    result = await _zone_schedule().sync(
+        [str(zone_id) for zone_id in zone_ids],
+        settings.polling_interval_seconds,
+    )
+    logger.info(
+        f"Zone schedule synced: {result['scheduled']} zones, "
+        f"{result['added']} added, {result['removed']} removed"
+    )
+    return result
+
 
 @celery_app.task(name="app.workers.tasks.monitoring.check_all_zones")
 def check_all_zones():
     """
-    Periodic task to check status of all active zones.
-    Runs every 5 minutes via Celery beat.
+    Check every active zone in one sweep.
+    Not scheduled - regular checks run through check_due_zones. Kept for
+    manual runs (e.g. after an incident) and it reschedules what it checks.
     """
-    _check_all_zones()
+    return _run(_check_all_zones)
 
 
-def _check_all_zones():
+async def _check_all_zones():
     """Async implementation of zone checking"""
     logger.info("Starting zone monitoring check")
     
@@ -41,146 +171,284 @@ def _check_all_zones():
     with db_manager.get_session() as session:
         # Get all active zones grouped by venue
         result = session.execute(
-            select(Zone)
-            .options(selectinload(Zone.venue))
-            .where(Zone.is_active == True)
-            .where(Zone.monitoring_enabled == True)
+            _monitored(select(Zone).options(selectinload(Zone.venue)))
         )
         zones = result.scalars().all()
         
         logger.info(f"Monitoring {len(zones)} active zones")
         
-        # Batch zones for efficient API calls
-        batch_size = 50
-        total_issues = 0
+        counts = await _check_zones(session, zones)
+        session.commit()
+        zone_state_tracker.confirm(counts.pop("written"))
+    
+    await _zone_schedule().reschedule(counts.pop("next_checks"))
+    return await _publish_completed(len(zones), counts, start_time)
+
+
+async def _check_zones(session, zones: List[Zone]) -> Dict[str, Any]:
+    """
+    Check a set of zones against Soundtrack and record the results.
+    
+    Returns:
+        issues, db_writes and incident counts, next_checks (zone id ->
+        due timestamp) for the polling schedule, and written (zone ids whose
+        state the caller confirms with the tracker once it has committed)
+    """
+    # Batch zones for efficient API calls
+    batch_size = 50
+    total_issues = 0
+    db_writes = 0
+    resolved = 0
+    next_checks = {}
+    written = []
+    incidents = _incidents()
+    
+    for i in range(0, len(zones), batch_size):
+        batch = zones[i:i + batch_size]
+        zone_ids = [str(zone.soundtrack_device_id) for zone in batch]
+        
+        # Background lane: a sweep only gets SYB capacity live chats aren't using
+        statuses = await soundtrack_client.batch_get_device_status(zone_ids, job="zone_monitoring")
         
-        for i in range(0, len(zones), batch_size):
-            batch = zones[i:i + batch_size]
-            zone_ids = [str(zone.soundtrack_device_id) for zone in batch]
+        # Process results
+        for zone, status in zip(batch, statuses):
+            online = isinstance(status, dict) and not status.get("error")
             
-            # Get status for batch
-            # Note: Soundtrack client operations may still be async, check client implementation
-            statuses = soundtrack_client.batch_get_device_status(zone_ids)
+            # Write only transitions (and periodic heartbeats), not every check
+            change = zone_state_tracker.observe(zone, status if online else None)
+            if change.needs_write:
+                _update_zone_status(session, zone, status if online else None, change)
+                written.append(str(zone.id))
+                db_writes += 1
             
-            # Process results
-            for zone, status in zip(batch, statuses):
-                if isinstance(status, dict) and not status.get("error"):
-                    # Update zone status
-                    _update_zone_status(session, zone, status)
-                    
-                    # Check for issues
-                    if not status.get("is_playing") and zone.should_be_playing:
-                        _handle_zone_issue(session, zone, "not_playing")
-                        total_issues += 1
-                    elif status.get("volume", 0) == 0 and zone.should_be_playing:
-                        _handle_zone_issue(session, zone, "muted")
-                        total_issues += 1
-                else:
-                    # Device offline or error
-                    _handle_zone_issue(session, zone, "offline")
-                    total_issues += 1
-        
-        session.commit()
+            next_checks[str(zone.id)] = zone_poll_policy.next_check(zone, online, change)
+            
+            issue = None
+            # Music is expected while the venue is open
+            should_be_playing = is_open(zone.venue, time.time())
+            if online:
+                # Cache status (Redis only - cheap enough on every check)
+                await redis_manager.setex(
+                    f"zone:status:{zone.id}",
+                    60,  # 1 minute cache
+                    status
+                )
+                
+                # Check for issues
+                if not status.get("is_playing") and should_be_playing:
+                    issue = "not_playing"
+                elif status.get("volume", 0) == 0 and should_be_playing:
+                    issue = "muted"
+            else:
+                # Device offline or error
+                issue = "offline"
+            
+            # Leave incidents for issues the zone no longer has
+            for incident in await incidents.clear(zone.id, keep_issue=issue):
+                await _resolve_incident(session, incident)
+                resolved += 1
+            
+            if issue:
+                await _handle_zone_issue(session, zone, issue, incidents)
+                total_issues += 1
+    
+    # One notification per incident whose correlation window has passed
+    notified = 0
+    for incident in await incidents.due():
+        await _notify_incident(session, incident)
+        notified += 1
     
-    # Log monitoring completion
+    return {
+        "issues": total_issues,
+        "db_writes": db_writes,
+        "incidents_notified": notified,
+        "incidents_resolved": resolved,
+        "next_checks": next_checks,
+        "written": written,
+    }
+
+
+async def _publish_completed(zones_checked: int, counts: Dict[str, Any], start_time: datetime, schedule: Optional[Dict[str, Any]] = None):
+    """Publish and log a monitoring run summary"""
     duration = (datetime.utcnow() - start_time).total_seconds()
+    summary = {
+        "zones_checked": zones_checked,
+        "issues_found": counts["issues"],
+        "db_writes": counts["db_writes"],
+        "incidents_notified": counts["incidents_notified"],
+        "incidents_resolved": counts["incidents_resolved"],
+        "state_tracker": zone_state_tracker.get_stats(),
+        "schedule": schedule,
+        "duration_seconds": duration,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
     
-    await redis_manager.publish(
-        "monitoring:completed",
-        {
-            "zones_checked": len(zones),
-            "issues_found": total_issues,
-            "duration_seconds": duration,
-            "timestamp": datetime.utcnow().isoformat(),
-        }
-    )
+    await redis_manager.publish("monitoring:completed", summary)
     
-    logger.info(f"Zone monitoring completed: {len(zones)} zones, {total_issues} issues, {duration:.2f}s")
+    logger.info(
+        f"Zone monitoring completed: {zones_checked} zones, {counts['issues']} issues, "
+        f"{counts['db_writes']} status writes, {duration:.2f}s"
+    )
+    return summary
 
 
-def _update_zone_status(session, zone: Zone, status: Dict[str, Any]):
-    """Update zone status in database"""
-    session.execute(
-        update(Zone)
-        .where(Zone.id == zone.id)
-        .values(
-            current_status=ZoneStatus.PLAYING if status.get("is_playing") else ZoneStatus.STOPPED,
-            current_volume=status.get("volume"),
+def _update_zone_status(session, zone: Zone, status: Optional[Dict[str, Any]], change: ZoneChange):
+    """
+    Persist a zone transition or heartbeat.
+    status is None when the zone is offline; only the fields that changed
+    are written, plus last_checked_at.
+    """
+    now = datetime.utcnow()
+    values = {"last_checked_at": now}
+    
+    if status is None:
+        if change.transitions:
+            values["is_online"] = False
+            values["last_offline_at"] = now
+    else:
+        values.update(
+            is_online=True,
+            last_online_at=now,
+            consecutive_failures=0,
+            is_playing=bool(status.get("is_playing")),
+            volume=status.get("volume"),
             current_playlist_id=status.get("playlist_id"),
-            last_seen_online=datetime.utcnow() if not status.get("error") else zone.last_seen_online,
-            last_status_check=datetime.utcnow(),
         )
-    )
     
-    # Cache status
-    await redis_manager.setex(
-        f"zone:status:{zone.id}",
-        60,  # 1 minute cache
-        status
-    )
+    session.execute(update(Zone).where(Zone.id == zone.id).values(**values))
+    
+    session.add(MonitoringLog(
+        zone_id=zone.id,
+        status="online" if status is not None else "offline",
+        is_playing=status.get("is_playing") if status else None,
+        volume=status.get("volume") if status else None,
+        current_playlist=status.get("playlist_id") if status else None,
+        meta_data={
+            "event": change.event,
+            "changes": [
+                {"field": field, "from": old, "to": new}
+                for field, old, new in change.transitions
+            ],
+        },
+    ))
 
 
-def _handle_zone_issue(session, zone: Zone, issue_type: str):
-    """Handle detected zone issue"""
-    # Check if alert already exists
-    cooldown_key = f"alert:cooldown:{zone.id}:{issue_type}"
-    if await redis_manager.exists(cooldown_key):
-        return  # Skip if in cooldown
+async def _handle_zone_issue(session, zone: Zone, issue_type: str, incidents: IncidentCorrelator):
+    """
+    Add a zone issue to its venue incident.
+    Notification happens per incident (see _notify_incident), so repeat
+    checks of a zone already in the incident only refresh it.
+    """
+    result = await incidents.report(zone, issue_type)
+    if not result["joined"]:
+        return
     
-    # Create monitoring log
-    log = MonitoringLog(
+    # First report from this zone: keep a zone-level record
+    severity = AlertSeverity.ERROR if issue_type == "offline" else AlertSeverity.WARNING
+    session.add(MonitoringLog(
         zone_id=zone.id,
-        venue_id=zone.venue_id,
-        event_type=f"zone_{issue_type}",
-        event_data={
+        status=issue_type,
+        error_code=f"zone_{issue_type}",
+        meta_data={
+            "event": "issue",
+            "venue_id": str(zone.venue_id),
             "zone_name": zone.name,
-            "issue": issue_type,
+            "incident": result["incident"],
+            "severity": severity.value,
             "detected_at": datetime.utcnow().isoformat(),
         },
-        severity=AlertSeverity.HIGH if issue_type == "offline" else AlertSeverity.MEDIUM,
-    )
-    session.add(log)
+    ))
+
+
+async def _notify_incident(session, incident: Dict[str, Any]):
+    """Create the incident's Alert and publish it once"""
+    zone_ids = incident["zone_ids"]
+    issue = incident["issue"]
+    venue_wide = len(zone_ids) > 1
+    severity = AlertSeverity.ERROR if issue == "offline" else AlertSeverity.WARNING
     
-    # Set cooldown
-    await redis_manager.setex(cooldown_key, 3600, "1")  # 1 hour cooldown
+    subject = f"{len(zone_ids)} zones" if venue_wide else "1 zone"
+    session.add(Alert(
+        id=uuid.UUID(incident["id"]),
+        venue_id=incident["venue_id"],
+        zone_id=zone_ids[0] if not venue_wide else None,
+        alert_type=AlertType.ZONE_OFFLINE if issue == "offline" and not venue_wide else AlertType.VENUE_DEGRADED,
+        severity=severity,
+        title=f"{incident['venue_name']}: {subject} {issue.replace('_', ' ')}",
+        message=f"{subject} at {incident['venue_name']} reported {issue.replace('_', ' ')}",
+        context={
+            "incident": incident["key"],
+            "issue": issue,
+            "location": incident.get("location") or None,
+            "zone_ids": zone_ids,
+            "opened_at": incident["opened_at"],
+        },
+    ))
     
-    # Publish alert
     await redis_manager.publish(
         "alerts:zone_issue",
         {
-            "zone_id": str(zone.id),
-            "venue_id": str(zone.venue_id),
-            "zone_name": zone.name,
-            "venue_name": zone.venue.name,
-            "issue": issue_type,
-            "severity": "high" if issue_type == "offline" else "medium",
+            "incident_id": incident["id"],
+            "status": "open",
+            "venue_id": incident["venue_id"],
+            "venue_name": incident["venue_name"],
+            "issue": issue,
+            "severity": severity.value,
+            "zone_ids": zone_ids,
+            "zone_count": len(zone_ids),
             "timestamp": datetime.utcnow().isoformat(),
         }
     )
 
 
+async def _resolve_incident(session, incident: Dict[str, str]):
+    """Close an incident whose last zone recovered"""
+    if incident.get("notified") != "1":
+        return  # Recovered inside the correlation window - nobody was told
+    
+    now = datetime.utcnow()
+    session.execute(
+        update(Alert)
+        .where(Alert.id == uuid.UUID(incident["id"]))
+        .values(resolved=True, resolved_at=now, auto_resolved=True)
+    )
+    
+    await redis_manager.publish(
+        "alerts:zone_issue",
+        {
+            "incident_id": incident["id"],
+            "status": "resolved",
+            "venue_id": incident["venue_id"],
+            "venue_name": incident["venue_name"],
+            "issue": incident["issue"],
+            "duration_seconds": round(float(incident["closed_at"]) - float(incident["opened_at"])),
+            "timestamp": now.isoformat(),
+        }
+    )
+
+
 @celery_app.task(name="app.workers.tasks.monitoring.cleanup_old_logs")
 def cleanup_old_logs():
-    """Clean up old monitoring logs to manage database size"""
-    asyncio.run(_cleanup_old_logs())
+    """Enforce monitoring log retention and pre-create upcoming partitions"""
+    return _cleanup_old_logs()
 
 
-async def _cleanup_old_logs():
-    """Remove monitoring logs older than 30 days"""
-    logger.info("Starting cleanup of old monitoring logs")
+def _cleanup_old_logs():
+    """
+    Drop monthly monitoring_logs partitions older than the retention window.
     
-    cutoff_date = datetime.utcnow() - timedelta(days=30)
+    Retention is a metadata-only DETACH + DROP per expired month instead of a
+    row-by-row DELETE, so its cost doesn't grow with log volume.
+    """
+    logger.info("Starting monitoring log partition maintenance")
     
-    async with get_async_session() as session:
-        # Delete old logs
-        result = await session.execute(
-            "DELETE FROM monitoring_logs WHERE created_at < :cutoff",
-            {"cutoff": cutoff_date}
-        )
-        
-        deleted_count = result.rowcount
-        await session.commit()
+    with db_manager.get_session() as session:
+        created = ensure_future_partitions(session)
+        dropped = drop_expired_partitions(session)
     
-    logger.info(f"Deleted {deleted_count} old monitoring logs")
+    logger.info(
+        f"Monitoring log maintenance done: {len(created)} partitions created, "
+        f"{len(dropped)} dropped (retention {MONITORING_LOG_RETENTION_DAYS} days)"
+    )
     
-    return {"deleted": deleted_count}
\ No newline at end of file
+    return {"created": created, "dropped": dropped}
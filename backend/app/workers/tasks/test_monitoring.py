@@ -0,0 +1,342 @@
+"""
+Tests for the zone monitoring tasks.
+Database, Soundtrack and Redis are stand-ins; the schedule, state tracker
+and incident correlator are the real ones (incidents on test_incidents'
+FakeRedis).
+"""
+
+import asyncio
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.sql import Select
+
+from app.models.monitoring import Alert, AlertSeverity, AlertType, MonitoringLog
+from app.services.soundtrack import client as client_module
+from app.services.soundtrack.client import SoundtrackClient
+from app.services.soundtrack.rate_limiter import GCRA_LUA
+from app.workers.tasks import monitoring
+from app.workers.incidents import IncidentCorrelator
+from app.workers.test_incidents import FakeRedis
+from app.workers.zone_state import ZoneStateTracker
+
+VENUE_ID = uuid.uuid4()
+
+
+def make_zone(name, **overrides):
+    fields = dict(
+        id=uuid.uuid4(),
+        name=name,
+        venue_id=VENUE_ID,
+        venue=SimpleNamespace(id=VENUE_ID, name="Hilton Pattaya", business_hours=None, timezone="UTC"),
+        soundtrack_device_id=f"device-{name}",
+        is_online=True,
+        is_playing=True,
+        volume=60,
+        current_playlist_id="pl-lounge",
+        last_checked_at=datetime.utcnow(),
+        last_offline_at=None,
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, zones):
+        self.zones = zones
+        self.added = []
+        self.updates = []
+        self.commits = 0
+
+    def execute(self, statement):
+        if isinstance(statement, Select):
+            return FakeResult(list(self.zones))
+        self.updates.append(statement)
+        return FakeResult([])
+
+    def add(self, row):
+        self.added.append(row)
+
+    def commit(self):
+        self.commits += 1
+
+
+class FakeDatabase:
+    def __init__(self, zones):
+        self.session = FakeSession(zones)
+
+    @contextmanager
+    def get_session(self):
+        yield self.session
+
+
+class FakeSoundtrack:
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.calls = []
+
+    async def batch_get_device_status(self, device_ids, job="device_status_sweep"):
+        await asyncio.sleep(0)
+        self.calls.append((list(device_ids), job))
+        return [self.statuses.get(device_id, {"device_id": device_id, "status": "error", "error": "offline"}) for device_id in device_ids]
+
+
+class FakeRedisManager:
+    def __init__(self):
+        self.redis = FakeRedis()
+        self.cached = {}
+        self.published = []
+        self.connected = False
+
+    async def initialize(self):
+        self.connected = True
+
+    async def close(self):
+        self.connected = False
+
+    async def get_value(self, key):
+        return None
+
+    async def setex(self, key, ttl, value):
+        self.cached[key] = value
+        return True
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 1
+
+
+class FakeSchedule:
+    def __init__(self, due):
+        self.due = list(due)
+        self.rescheduled = {}
+        self.removed = []
+
+    async def claim_due(self, limit, now=None):
+        claimed, self.due = self.due[:limit], self.due[limit:]
+        return claimed
+
+    async def sync(self, zone_ids, interval, now=None):
+        added = [zone_id for zone_id in zone_ids if zone_id not in self.rescheduled]
+        self.due.extend(added)
+        self.rescheduled.update((zone_id, 0) for zone_id in added)
+        return {"added": len(added), "removed": 0, "scheduled": len(self.rescheduled)}
+
+    async def size(self):
+        return len(self.due) + len(self.rescheduled)
+
+    async def reschedule(self, due):
+        self.rescheduled.update(due)
+
+    async def remove(self, *zone_ids):
+        self.removed.extend(zone_ids)
+
+    async def get_stats(self, now=None):
+        return {"scheduled": len(self.rescheduled)}
+
+
+def install(monkeypatch, zones, statuses, schedule=None):
+    """Point the tasks module at stand-ins; returns them"""
+    fakes = SimpleNamespace(
+        db=FakeDatabase(zones),
+        soundtrack=FakeSoundtrack(statuses),
+        redis=FakeRedisManager(),
+        schedule=schedule or FakeSchedule([]),
+    )
+    monkeypatch.setattr(monitoring, "db_manager", fakes.db)
+    monkeypatch.setattr(monitoring, "soundtrack_client", fakes.soundtrack)
+    monkeypatch.setattr(monitoring, "redis_manager", fakes.redis)
+    monkeypatch.setattr(monitoring, "zone_state_tracker", ZoneStateTracker())
+    monkeypatch.setattr(monitoring, "_zone_schedule", lambda: fakes.schedule)
+    return fakes
+
+
+def playing(volume=60):
+    return {"is_playing": True, "volume": volume, "playlist_id": "pl-lounge"}
+
+
+def test_tasks_are_coroutines():
+    for job in ("_check_due_zones", "_sync_zone_schedule", "_check_all_zones", "_check_zones"):
+        assert asyncio.iscoroutinefunction(getattr(monitoring, job)), job
+
+
+def test_check_due_zones_against_schedule(monkeypatch):
+    lobby, pool = make_zone("lobby"), make_zone("pool")
+    removed = str(uuid.uuid4())  # Deactivated after it was scheduled
+    schedule = FakeSchedule([str(lobby.id), str(pool.id), removed])
+    fakes = install(monkeypatch, [lobby, pool], {"device-lobby": playing(), "device-pool": playing(volume=30)}, schedule)
+
+    summary = asyncio.run(monitoring._check_due_zones())
+
+    assert fakes.soundtrack.calls == [(["device-lobby", "device-pool"], "zone_monitoring")]
+    assert summary["zones_checked"] == 2 and summary["issues_found"] == 0
+    assert summary["db_writes"] == 1  # Only the pool's volume change is written
+    assert set(schedule.rescheduled) == {str(lobby.id), str(pool.id)}
+    assert schedule.removed == [removed]
+    assert fakes.redis.cached[f"zone:status:{lobby.id}"] == playing()
+    assert fakes.redis.published[-1][0] == "monitoring:completed"
+    assert fakes.db.session.commits == 1
+
+    [log] = [row for row in fakes.db.session.added if isinstance(row, MonitoringLog)]
+    assert log.zone_id == pool.id and log.status == "online"
+    assert log.meta_data["changes"] == [{"field": "volume", "from": 60, "to": 30}]
+
+
+def test_nothing_due(monkeypatch):
+    fakes = install(monkeypatch, [], {})
+    assert asyncio.run(monitoring._check_due_zones()) == {"zones_checked": 0}
+    assert fakes.soundtrack.calls == []
+
+
+def test_empty_schedule_is_seeded(monkeypatch):
+    # After a deploy or Redis flush nothing is scheduled yet
+    lobby = make_zone("lobby")
+    schedule = FakeSchedule([])
+    fakes = install(monkeypatch, [lobby], {"device-lobby": playing()}, schedule)
+
+    summary = asyncio.run(monitoring._check_due_zones())
+
+    assert summary["zones_checked"] == 1
+    assert fakes.soundtrack.calls == [(["device-lobby"], "zone_monitoring")]
+
+
+def test_failed_commit_rewrites_the_transition(monkeypatch):
+    pool = make_zone("pool")
+    schedule = FakeSchedule([str(pool.id)])
+    fakes = install(monkeypatch, [pool], {"device-pool": playing(volume=30)}, schedule)
+
+    def lost_connection():
+        raise ConnectionError("server closed the connection")
+
+    fakes.db.session.commit = lost_connection
+    with pytest.raises(ConnectionError):
+        asyncio.run(monitoring._check_due_zones())
+
+    # The tracker didn't take the rolled-back write as the zone's state
+    del fakes.db.session.commit
+    schedule.due = [str(pool.id)]
+    summary = asyncio.run(monitoring._check_due_zones())
+    assert summary["db_writes"] == 1
+    assert summary["state_tracker"]["pending_writes"] == 0
+
+def test_incident_opened_and_resolved(monkeypatch):
+    lobby = make_zone("lobby")
+    schedule = FakeSchedule([str(lobby.id)])
+    fakes = install(monkeypatch, [lobby], {}, schedule)  # No status: the device is offline
+    # No correlation window, so the incident is notified in the same run
+    monkeypatch.setattr(monitoring, "_incidents", lambda: IncidentCorrelator(fakes.redis.redis, window=0))
+
+    summary = asyncio.run(monitoring._check_due_zones())
+    assert summary["issues_found"] == 1 and summary["incidents_notified"] == 1
+
+    added = fakes.db.session.added
+    [issue] = [row for row in added if isinstance(row, MonitoringLog) and row.error_code]
+    assert issue.zone_id == lobby.id and issue.status == "offline" and issue.error_code == "zone_offline"
+    assert issue.meta_data["event"] == "issue" and issue.meta_data["severity"] == "error"
+    assert issue.meta_data["venue_id"] == str(VENUE_ID)
+
+    [alert] = [row for row in added if isinstance(row, Alert)]
+    assert alert.alert_type == AlertType.ZONE_OFFLINE and alert.severity == AlertSeverity.ERROR
+    opened = [message for channel, message in fakes.redis.published if channel == "alerts:zone_issue"]
+    assert [message["status"] for message in opened] == ["open"]
+    assert opened[0]["incident_id"] == str(alert.id)
+
+    # Back online: the incident closes and its alert is resolved
+    fakes.soundtrack.statuses = {"device-lobby": playing()}
+    schedule.due = [str(lobby.id)]
+    updates_before = len(fakes.db.session.updates)
+    summary = asyncio.run(monitoring._check_due_zones())
+    assert summary["issues_found"] == 0 and summary["incidents_resolved"] == 1
+
+    resolved = [message for channel, message in fakes.redis.published if channel == "alerts:zone_issue"][-1]
+    assert resolved["status"] == "resolved" and resolved["incident_id"] == str(alert.id)
+    # Zone status write plus the Alert update
+    assert len(fakes.db.session.updates) - updates_before == 2
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    async def json(self):
+        return self.payload
+
+
+class FakeHTTPSession:
+    """Stands in for aiohttp.ClientSession: the token endpoint and device statuses"""
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.requests = []
+        self.closed = False
+
+    def post(self, url, data=None, **kwargs):
+        return FakeResponse({"access_token": "token", "expires_in": 3600})
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url))
+        device_id = url.rsplit("/", 2)[-2]  # /devices/<id>/status
+        return FakeResponse(self.statuses[device_id])
+
+    async def close(self):
+        self.closed = True
+
+
+class GCRARedis(FakeRedis):
+    """Adds the Soundtrack rate limiter's script; every request is allowed"""
+
+    def register_script(self, script):
+        if script == GCRA_LUA:
+            async def allow(keys, args=()):
+                return [1, "0", "0", "1"]
+            return allow
+        return super().register_script(script)
+
+
+def test_check_due_zones_task_against_soundtrack(monkeypatch):
+    lobby, pool = make_zone("lobby"), make_zone("pool")
+    schedule = FakeSchedule([str(lobby.id), str(pool.id)])
+    fakes = install(monkeypatch, [lobby, pool], {}, schedule)
+    fakes.redis.redis = GCRARedis()
+
+    # The real client, with only the HTTP session stubbed
+    http = FakeHTTPSession({"device-lobby": playing(), "device-pool": playing()})
+    client = SoundtrackClient()
+    monkeypatch.setattr(monitoring, "soundtrack_client", client)
+    monkeypatch.setattr(client_module, "redis_manager", fakes.redis)
+    monkeypatch.setattr(client_module, "TCPConnector", lambda **kwargs: None)
+    monkeypatch.setattr(client_module.aiohttp, "ClientSession", lambda **kwargs: http)
+
+    summary = monitoring.check_due_zones()
+
+    assert sorted(url for method, url in http.requests) == [
+        f"{client.base_url}/devices/device-lobby/status",
+        f"{client.base_url}/devices/device-pool/status",
+    ]
+    assert summary["zones_checked"] == 2 and summary["issues_found"] == 0
+    assert not [row for row in fakes.db.session.added if isinstance(row, Alert)]
+    # Session and Redis are closed with the task's event loop
+    assert http.closed and client.session is None and not fakes.redis.connected
@@ -0,0 +1,157 @@
+"""
+Tests for venue incident correlation.
+FakeRedis runs Python equivalents of the correlator's Lua scripts.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app.workers import incidents as incidents_module
+from app.workers.incidents import IncidentCorrelator
+
+NOW = 1_800_000_000.0
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+        self.sets = {}
+        self.zsets = {}
+
+    def register_script(self, script):
+        handlers = {
+            incidents_module.REPORT_LUA: self._report,
+            incidents_module.CLEAR_LUA: self._clear,
+            incidents_module.NOTIFY_LUA: self._notify,
+        }
+        handler = handlers[script]
+
+        async def run(keys, args=()):
+            return handler(keys, list(args))
+        return run
+
+    def _flat(self, key):
+        return [item for pair in self.hashes.get(key, {}).items() for item in pair]
+
+    def _report(self, keys, args):
+        incident, zones, pending, open_set, zone_incidents = keys
+        zone_id, incident_id, now, notify_at, fields = args
+        created = 0
+        if "id" not in self.hashes.get(incident, {}):
+            created = 1
+            self.hashes[incident] = {"id": incident_id, **json.loads(fields), "opened_at": str(now), "notified": "0"}
+            self.zsets.setdefault(pending, {})[incident] = notify_at
+            self.sets.setdefault(open_set, set()).add(incident)
+        self.hashes[incident]["last_seen"] = str(now)
+        members = self.sets.setdefault(zones, set())
+        joined = int(zone_id not in members)
+        members.add(zone_id)
+        self.sets.setdefault(zone_incidents, set()).add(incident)
+        return [created, joined]
+
+    def _clear(self, keys, args):
+        pending, open_set, zone_incidents = keys
+        zone_id, keep, now = args
+        closed = []
+        for key in list(self.sets.get(zone_incidents, set())):
+            if self.hashes.get(key, {}).get("issue") == keep:
+                continue
+            self.sets.get(f"{key}:zones", set()).discard(zone_id)
+            self.sets[zone_incidents].discard(key)
+            if not self.sets.get(f"{key}:zones"):
+                self.hashes[key]["closed_at"] = str(now)
+                closed.append(self._flat(key))
+                self.hashes.pop(key)
+                self.sets.pop(f"{key}:zones", None)
+                self.zsets.get(pending, {}).pop(key, None)
+                self.sets[open_set].discard(key)
+        return closed
+
+    def _notify(self, keys, args):
+        pending, key = keys
+        if self.zsets.get(pending, {}).pop(key, None) is None or key not in self.hashes:
+            return None
+        self.hashes[key]["notified"] = "1"
+        return [self._flat(key), list(self.sets.get(f"{key}:zones", set()))]
+
+    async def zrangebyscore(self, key, low, high):
+        return [m for m, score in sorted(self.zsets.get(key, {}).items(), key=lambda i: i[1]) if score <= high]
+
+
+def resort_zones(count, venue_id="venue-1"):
+    venue = SimpleNamespace(id=venue_id, name="Hilton Pattaya", soundtrack_location_id="loc-1")
+    return [SimpleNamespace(id=f"{venue_id}-zone-{n}", venue_id=venue_id, venue=venue) for n in range(count)]
+
+
+def test_network_drop_at_a_resort_is_one_incident():
+    async def scenario():
+        correlator = IncidentCorrelator(FakeRedis(), window=90)
+        zones = resort_zones(12)
+        # Zones go offline across the first minute, then every minute after
+        for sweep in range(5):
+            for n, zone in enumerate(zones):
+                await correlator.report(zone, "offline", now=NOW + sweep * 60 + n * 5)
+        notified = [await correlator.due(now=NOW + sweep * 60 + 60) for sweep in range(5)]
+        return notified
+
+    notified = asyncio.run(scenario())
+    sent = [incident for batch in notified for incident in batch]
+    assert len(sent) == 1
+    assert len(sent[0]["zone_ids"]) == 12
+    assert sent[0]["issue"] == "offline"
+    assert sent[0]["venue_name"] == "Hilton Pattaya"
+
+
+def test_incident_closes_when_last_zone_recovers():
+    async def scenario():
+        correlator = IncidentCorrelator(FakeRedis(), window=90)
+        zones = resort_zones(3)
+        for zone in zones:
+            await correlator.report(zone, "offline", now=NOW)
+        await correlator.due(now=NOW + 100)
+
+        closed = []
+        for zone in zones:
+            closed.append(await correlator.clear(zone.id, now=NOW + 600))
+        return closed
+
+    closed = asyncio.run(scenario())
+    assert closed[0] == [] and closed[1] == []
+    assert len(closed[2]) == 1
+    incident = closed[2][0]
+    assert incident["notified"] == "1"
+    assert float(incident["closed_at"]) - float(incident["opened_at"]) == 600
+
+
+def test_blip_inside_the_window_never_notifies():
+    async def scenario():
+        correlator = IncidentCorrelator(FakeRedis(), window=90)
+        zone = resort_zones(1)[0]
+        await correlator.report(zone, "offline", now=NOW)
+        closed = await correlator.clear(zone.id, now=NOW + 60)
+        due = await correlator.due(now=NOW + 120)
+        return closed, due
+
+    closed, due = asyncio.run(scenario())
+    assert closed[0]["notified"] == "0"
+    assert due == []
+
+
+def test_issue_types_and_venues_are_separate_incidents():
+    async def scenario():
+        correlator = IncidentCorrelator(FakeRedis(), window=90)
+        a = resort_zones(2, "venue-a")
+        b = resort_zones(1, "venue-b")
+        await correlator.report(a[0], "offline", now=NOW)
+        await correlator.report(a[1], "muted", now=NOW)
+        await correlator.report(b[0], "offline", now=NOW)
+        # a[1] is still muted: clearing other issues keeps its incident
+        kept = await correlator.clear(a[1].id, keep_issue="muted", now=NOW + 10)
+        return kept, await correlator.due(now=NOW + 100)
+
+    kept, due = asyncio.run(scenario())
+    assert kept == []
+    assert sorted((i["venue_id"], i["issue"]) for i in due) == [
+        ("venue-a", "muted"), ("venue-a", "offline"), ("venue-b", "offline"),
+    ]
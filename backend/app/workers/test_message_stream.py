@@ -0,0 +1,331 @@
+"""
+Tests for the Redis Streams message consumer.
+Runs against a small in-memory stand-in implementing the stream commands
+the consumer uses (consumer groups, pending entries, delivery counts).
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+from app.workers.message_stream import (
+    MessageStreamConsumer,
+    enqueue_message,
+    migrate_legacy_queue,
+    process_dead_letters,
+)
+
+STREAM = "messages:stream"
+DLQ = "messages:dlq:stream"
+
+
+class FakeStreamRedis:
+    """Just enough of redis.asyncio's stream API for the consumer"""
+
+    def __init__(self):
+        self.streams = {}
+        self.groups = {}  # (stream, group) -> {"last": index, "pending": {id: [consumer, delivered_at, count]}}
+        self.hashes = {}
+        self.lists = {}
+        self.strings = {}
+        self._seq = 0
+
+    async def xadd(self, name, fields, maxlen=None, approximate=True):
+        self._seq += 1
+        entry_id = f"{int(time.time() * 1000)}-{self._seq}"
+        self.streams.setdefault(name, []).append((entry_id, dict(fields)))
+        return entry_id
+
+    async def xgroup_create(self, name, groupname, id="0", mkstream=False):
+        if (name, groupname) in self.groups:
+            raise Exception("BUSYGROUP Consumer Group name already exists")
+        self.streams.setdefault(name, [])
+        self.groups[(name, groupname)] = {"last": 0, "pending": {}}
+
+    async def xreadgroup(self, groupname, consumername, streams, count=None, block=None):
+        result = []
+        for name in streams:
+            group = self.groups[(name, groupname)]
+            entries = self.streams[name][group["last"]:group["last"] + count]
+            group["last"] += len(entries)
+            for entry_id, _ in entries:
+                group["pending"][entry_id] = [consumername, time.monotonic(), 1]
+            if entries:
+                result.append([name, entries])
+        return result
+
+    async def xack(self, name, groupname, *ids):
+        pending = self.groups[(name, groupname)]["pending"]
+        return sum(1 for entry_id in ids if pending.pop(entry_id, None))
+
+    async def xautoclaim(self, name, groupname, consumername, min_idle_time, start_id="0-0", count=None):
+        pending = self.groups[(name, groupname)]["pending"]
+        now = time.monotonic()
+        by_id = dict(self.streams[name])
+        claimed = []
+        for entry_id, info in pending.items():
+            if (now - info[1]) * 1000 >= min_idle_time:
+                info[0], info[1], info[2] = consumername, now, info[2] + 1
+                claimed.append((entry_id, by_id.get(entry_id)))
+            if len(claimed) == count:
+                break
+        return ["0-0", claimed, []]
+
+    async def xpending_range(self, name, groupname, min, max, count, consumername=None):
+        pending = self.groups[(name, groupname)]["pending"]
+        return [
+            {"message_id": entry_id, "consumer": info[0], "times_delivered": info[2]}
+            for entry_id, info in pending.items()
+        ][:count]
+
+    async def xrange(self, name, min="-", max="+", count=None):
+        entries = self.streams.get(name, [])
+        if min.startswith("("):
+            after = tuple(int(part) for part in min[1:].split("-"))
+            entries = [e for e in entries if tuple(int(part) for part in e[0].split("-")) > after]
+        return entries[:count]
+
+    async def xdel(self, name, *ids):
+        before = len(self.streams[name])
+        self.streams[name] = [e for e in self.streams[name] if e[0] not in ids]
+        return before - len(self.streams[name])
+
+    async def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[key] = value
+
+    async def hget(self, name, key):
+        return self.hashes.get(name, {}).get(key)
+
+    async def hdel(self, name, *keys):
+        for key in keys:
+            self.hashes.get(name, {}).pop(key, None)
+
+    async def hincrby(self, name, key, amount=1):
+        values = self.hashes.setdefault(name, {})
+        values[key] = int(values.get(key, 0)) + amount
+        return values[key]
+
+    async def set(self, name, value, px=None):
+        self.strings[name] = value
+
+    async def mget(self, names):
+        return [self.strings.get(name) for name in names]
+
+    async def delete(self, *names):
+        return sum(1 for name in names if self.strings.pop(name, None) is not None)
+
+    async def rpop(self, name):
+        items = self.lists.get(name) or []
+        return items.pop() if items else None
+
+
+def make_consumer(redis, handler, **kwargs):
+    options = dict(stream=STREAM, dlq_stream=DLQ, consumer_name="test", claim_idle_ms=20, max_deliveries=3)
+    options.update(kwargs)
+    return MessageStreamConsumer(redis, handler, **options)
+
+
+def test_batch_is_processed_and_acked_once():
+    async def scenario():
+        redis = FakeStreamRedis()
+        seen = []
+
+        async def handler(message):
+            seen.append(message["n"])
+
+        consumer = make_consumer(redis, handler, batch_size=10)
+        await consumer.ensure_group()
+        await consumer.ensure_group()  # BUSYGROUP is ignored
+        for n in range(25):
+            await enqueue_message(redis, {"conversation_id": f"c{n % 5}", "n": n}, stream=STREAM)
+
+        while await consumer.poll_once(block_ms=0):
+            pass
+        return redis, consumer, seen
+
+    redis, consumer, seen = asyncio.run(scenario())
+    assert sorted(seen) == list(range(25))
+    assert consumer.stats["acked"] == 25
+    assert consumer.stats["batches"] == 3
+    assert redis.groups[(STREAM, "message-processors")]["pending"] == {}
+
+
+def test_order_kept_within_conversation():
+    async def scenario():
+        redis = FakeStreamRedis()
+        seen = []
+
+        async def handler(message):
+            # Later messages finish faster - ordering must come from the consumer
+            await asyncio.sleep(0.005 * (5 - message["n"] % 5))
+            seen.append((message["conversation_id"], message["n"]))
+
+        consumer = make_consumer(redis, handler, batch_size=50)
+        await consumer.ensure_group()
+        for n in range(20):
+            await enqueue_message(redis, {"conversation_id": f"c{n % 2}", "n": n}, stream=STREAM)
+        await consumer.poll_once(block_ms=0)
+        return seen
+
+    seen = asyncio.run(scenario())
+    for conversation in ("c0", "c1"):
+        numbers = [n for c, n in seen if c == conversation]
+        assert numbers == sorted(numbers)
+
+
+def test_failed_message_is_redelivered_via_autoclaim():
+    async def scenario():
+        redis = FakeStreamRedis()
+        attempts = []
+
+        async def handler(message):
+            attempts.append(time.monotonic())
+            if len(attempts) == 1:
+                raise RuntimeError("Soundtrack timeout")
+
+        consumer = make_consumer(redis, handler)
+        await consumer.ensure_group()
+        await enqueue_message(redis, {"conversation_id": "c1"}, stream=STREAM)
+
+        await consumer.poll_once(block_ms=0)
+        assert redis.hashes[f"{STREAM}:errors"]
+        await asyncio.sleep(0.03)
+        await consumer.poll_once(block_ms=0)
+        return redis, consumer, attempts
+
+    redis, consumer, attempts = asyncio.run(scenario())
+    assert len(attempts) == 2
+    assert consumer.stats["reclaimed"] == 1
+    assert consumer.stats["acked"] == 1
+    assert redis.groups[(STREAM, "message-processors")]["pending"] == {}
+    assert redis.hashes[f"{STREAM}:errors"] == {}
+
+
+def test_poison_message_goes_to_dlq_with_delivery_count():
+    async def scenario():
+        redis = FakeStreamRedis()
+
+        async def handler(message):
+            raise ValueError("bad payload")
+
+        consumer = make_consumer(redis, handler)
+        await consumer.ensure_group()
+        await enqueue_message(redis, {"conversation_id": "c1"}, stream=STREAM)
+
+        for _ in range(6):
+            await consumer.poll_once(block_ms=0)
+            await asyncio.sleep(0.03)
+        return redis, consumer
+
+    redis, consumer = asyncio.run(scenario())
+    assert consumer.stats["dead_lettered"] == 1
+    assert consumer.stats["failed"] == 3
+    (_, fields), = redis.streams[DLQ]
+    assert fields["deliveries"] == "3"
+    assert fields["error"] == "bad payload"
+    assert json.loads(fields["data"]) == {"conversation_id": "c1"}
+    assert redis.groups[(STREAM, "message-processors")]["pending"] == {}
+
+
+def test_failure_stops_its_conversation_until_retried():
+    async def scenario():
+        redis = FakeStreamRedis()
+        seen = []
+
+        async def handler(message):
+            seen.append(message["n"])
+            if message["n"] == 0 and seen.count(0) == 1:
+                raise RuntimeError("Soundtrack timeout")
+
+        consumer = make_consumer(redis, handler, claim_idle_ms=50)
+        await consumer.ensure_group()
+        for n, conversation in enumerate(["c1", "c1", "c1", "c2"]):
+            await enqueue_message(redis, {"conversation_id": conversation, "n": n}, stream=STREAM)
+
+        await consumer.poll_once(block_ms=0)
+        first = list(seen)
+        # A new c1 message is held while 0 is still failing
+        await enqueue_message(redis, {"conversation_id": "c1", "n": 4}, stream=STREAM)
+        await consumer.poll_once(block_ms=0)
+        second = list(seen)
+
+        await asyncio.sleep(0.06)
+        await consumer.poll_once(block_ms=0)
+        return redis, consumer, first, second, seen
+
+    redis, consumer, first, second, seen = asyncio.run(scenario())
+    assert sorted(first) == [0, 3]  # 1 and 2 weren't attempted after 0 failed
+    assert second == first
+    assert [n for n in seen if n != 3] == [0, 0, 1, 2, 4]
+    assert consumer.stats["held"] == 3
+    assert redis.groups[(STREAM, "message-processors")]["pending"] == {}
+    assert redis.strings == {} and redis.hashes[f"{STREAM}:held"] == {}
+
+
+def test_held_deliveries_dont_count_toward_dlq():
+    async def scenario():
+        redis = FakeStreamRedis()
+        seen = []
+
+        async def handler(message):
+            seen.append(message["n"])
+            if message["n"] == 0:
+                raise ValueError("bad payload")
+
+        consumer = make_consumer(redis, handler)
+        await consumer.ensure_group()
+        for n in range(2):
+            await enqueue_message(redis, {"conversation_id": "c1", "n": n}, stream=STREAM)
+
+        for _ in range(6):
+            await consumer.poll_once(block_ms=0)
+            await asyncio.sleep(0.03)
+        return redis, consumer, seen
+
+    redis, consumer, seen = asyncio.run(scenario())
+    assert seen == [0, 0, 0, 1]  # 1 ran once, after 0 was dead-lettered
+    (_, fields), = redis.streams[DLQ]
+    assert json.loads(fields["data"])["n"] == 0 and fields["deliveries"] == "3"
+    assert consumer.stats["acked"] == 1
+    assert redis.groups[(STREAM, "message-processors")]["pending"] == {}
+
+
+def test_legacy_list_is_migrated_oldest_first():
+    async def scenario():
+        redis = FakeStreamRedis()
+        # LPUSH order: newest on the left
+        redis.lists["messages:incoming"] = [json.dumps({"n": n}) for n in (3, 2, 1)]
+        moved = await migrate_legacy_queue(redis, stream=STREAM)
+        return redis, moved
+
+    redis, moved = asyncio.run(scenario())
+    assert moved == 3
+    assert [json.loads(f["data"])["n"] for _, f in redis.streams[STREAM]] == [1, 2, 3]
+
+
+def test_dead_letters_escalated_or_archived():
+    async def scenario():
+        redis = FakeStreamRedis()
+        published = []
+
+        async def publish(channel, message):
+            published.append((channel, message))
+
+        recent = datetime.utcnow().isoformat()
+        old = (datetime.utcnow() - timedelta(hours=3)).isoformat()
+        for failed_at in (recent, old, recent):
+            await redis.xadd(DLQ, {
+                "data": json.dumps({"conversation_id": "c1"}),
+                "deliveries": "5",
+                "error": "boom",
+                "failed_at": failed_at,
+            })
+        counts = await process_dead_letters(redis, publish, dlq_stream=DLQ, batch_size=2)
+        return redis, counts, published
+
+    redis, counts, published = asyncio.run(scenario())
+    assert counts == {"escalated": 2, "archived": 1}
+    assert redis.streams[DLQ] == []
+    assert len(redis.streams["messages:dlq:archive:stream"]) == 1
+    assert published[0][1]["deliveries"] == 5
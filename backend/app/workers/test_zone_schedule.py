@@ -0,0 +1,123 @@
+"""
+Tests for per-zone polling intervals and the Redis schedule.
+"""
+
+import asyncio
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from app.workers.zone_schedule import ZonePollPolicy, ZoneSchedule, is_open, slot_time
+from app.workers.zone_state import ONLINE, ZoneChange
+
+# Wednesday 2026-10-14 12:00 UTC (19:00 in Bangkok)
+NOW = datetime(2026, 10, 14, 12, 0, tzinfo=timezone.utc).timestamp()
+HOURS = {day: {"open": "08:00", "close": "23:00"} for day in ("mon", "tue", "wed", "thu", "fri", "sat", "sun")}
+
+
+def make_zone(n=1, last_offline_at=None, business_hours=None, tz="Asia/Bangkok"):
+    venue = SimpleNamespace(id="venue-1", timezone=tz, business_hours=business_hours)
+    return SimpleNamespace(id=f"zone-{n}", venue=venue, last_offline_at=last_offline_at)
+
+
+def ago(seconds):
+    return datetime.utcfromtimestamp(NOW - seconds)
+
+
+def test_slots_spread_zones_evenly_over_the_interval():
+    due = [slot_time(f"zone-{n}", 300, NOW) for n in range(3000)]
+    assert all(NOW < t <= NOW + 300 for t in due)
+
+    per_second = Counter(int(t - NOW) for t in due)
+    # 10 zones a second on average instead of 3000 at once
+    assert max(per_second.values()) <= 30
+
+    # A zone keeps its slot from one cycle to the next
+    first = slot_time("zone-7", 300, NOW)
+    assert slot_time("zone-7", 300, first) == first + 300
+
+
+def test_interval_follows_zone_behaviour():
+    policy = ZonePollPolicy()
+    assert policy.interval_for(make_zone(), online=False, now=NOW) == 60
+
+    recovered = ZoneChange([(ONLINE, False, True)], False)
+    assert policy.interval_for(make_zone(), online=True, change=recovered, now=NOW) == 120
+    assert policy.interval_for(make_zone(last_offline_at=ago(600)), online=True, now=NOW) == 120
+    assert policy.interval_for(make_zone(last_offline_at=ago(6 * 3600)), online=True, now=NOW) == 300
+    assert policy.interval_for(make_zone(last_offline_at=ago(3 * 86400)), online=True, now=NOW) == 900
+    assert policy.interval_for(make_zone(), online=True, now=NOW) == 900
+
+
+def test_closed_venue_is_checked_rarely():
+    policy = ZonePollPolicy()
+    # 19:00 in Bangkok: open
+    assert policy.interval_for(make_zone(business_hours=HOURS), online=False, now=NOW) == 60
+    # 03:00 in Bangkok: closed, even while offline
+    night = NOW + 8 * 3600
+    assert policy.interval_for(make_zone(business_hours=HOURS), online=False, now=night) == 1800
+
+
+def test_business_hours_past_midnight_and_bad_data():
+    bar = SimpleNamespace(timezone="UTC", business_hours={"tue": {"open": "18:00", "close": "02:00"}})
+    # Wednesday 01:00 UTC is still Tuesday's opening
+    assert is_open(bar, datetime(2026, 10, 14, 1, 0, tzinfo=timezone.utc).timestamp())
+    assert not is_open(bar, datetime(2026, 10, 14, 3, 0, tzinfo=timezone.utc).timestamp())
+    assert is_open(bar, datetime(2026, 10, 13, 20, 0, tzinfo=timezone.utc).timestamp())
+
+    broken = SimpleNamespace(timezone="Nowhere/Nope", business_hours={"wed": {"open": "9"}})
+    assert is_open(broken, NOW)
+
+
+class FakeRedis:
+    """Sorted set commands used by ZoneSchedule"""
+
+    def __init__(self):
+        self.zsets = {}
+
+    def register_script(self, script):
+        async def claim(keys, args):
+            zset = self.zsets.setdefault(keys[0], {})
+            due = sorted((score, member) for member, score in zset.items() if score <= float(args[0]))
+            members = [member for _, member in due[:int(args[1])]]
+            for member in members:
+                zset[member] = float(args[2])
+            return [member.encode() for member in members]
+        return claim
+
+    async def zrange(self, key, start, end):
+        return [m.encode() for m, _ in sorted(self.zsets.get(key, {}).items(), key=lambda i: i[1])]
+
+    async def zadd(self, key, mapping, nx=False, xx=False):
+        zset = self.zsets.setdefault(key, {})
+        for member, score in mapping.items():
+            if (nx and member in zset) or (xx and member not in zset):
+                continue
+            zset[member] = score
+
+    async def zrem(self, key, *members):
+        for member in members:
+            self.zsets.get(key, {}).pop(member, None)
+
+
+def test_schedule_claims_leases_and_reschedules():
+    async def scenario():
+        redis = FakeRedis()
+        schedule = ZoneSchedule(redis, lease=120)
+        added = await schedule.sync([f"zone-{n}" for n in range(100)], 300, now=NOW)
+
+        first = await schedule.claim_due(1000, now=NOW + 150)
+        again = await schedule.claim_due(1000, now=NOW + 150)
+
+        await schedule.reschedule({first[0]: NOW + 1000, "zone-gone": NOW})
+        synced = await schedule.sync([f"zone-{n}" for n in range(1, 101)], 300, now=NOW)
+        return redis.zsets["monitoring:zone_schedule"], added, first, again, synced
+
+    zset, added, first, again, synced = asyncio.run(scenario())
+    assert added == {"added": 100, "removed": 0, "scheduled": 100}
+    # About half the zones fall in the first 150 seconds of the interval
+    assert 30 < len(first) < 70
+    assert again == []
+    assert "zone-gone" not in zset
+    assert synced == {"added": 1, "removed": 1, "scheduled": 100}
+    assert "zone-0" not in zset and "zone-100" in zset
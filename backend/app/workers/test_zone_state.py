@@ -0,0 +1,136 @@
+"""
+Tests for zone status change detection.
+"""
+
+import random
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.workers.zone_state import ONLINE, PLAYING, PLAYLIST, VOLUME, ZoneStateTracker
+
+NOW = 1_800_000_000.0
+
+
+def make_zone(n=1, **overrides):
+    fields = dict(
+        id=f"zone-{n}",
+        is_online=True,
+        is_playing=True,
+        volume=60,
+        current_playlist_id="pl-lounge",
+        last_checked_at=datetime.utcfromtimestamp(NOW - 60),
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+class CommittingTracker(ZoneStateTracker):
+    """Every write the tracker asks for commits"""
+
+    def observe(self, zone, status, now=None):
+        change = super().observe(zone, status, now)
+        if change.needs_write:
+            self.confirm([zone.id])
+        return change
+
+
+def status(**overrides):
+    fields = dict(is_playing=True, volume=60, playlist_id="pl-lounge")
+    fields.update(overrides)
+    return fields
+
+
+def test_unchanged_zone_is_not_written():
+    tracker = CommittingTracker()
+    zone = make_zone()
+    for sweep in range(6):
+        change = tracker.observe(zone, status(), now=NOW + sweep * 300)
+        assert not change.needs_write
+    assert tracker.stats["unchanged"] == 6
+
+
+def test_each_transition_is_reported_once():
+    tracker = CommittingTracker()
+    zone = make_zone()
+
+    change = tracker.observe(zone, status(volume=40, playlist_id="pl-dinner"), now=NOW)
+    assert change.transitions == [(VOLUME, 60, 40), (PLAYLIST, "pl-lounge", "pl-dinner")]
+    assert not tracker.observe(zone, status(volume=40, playlist_id="pl-dinner"), now=NOW + 300).needs_write
+
+    assert tracker.observe(zone, None, now=NOW + 600).transitions == [(ONLINE, True, False)]
+    assert not tracker.observe(zone, None, now=NOW + 900).needs_write
+
+    # Back online, but stopped
+    change = tracker.observe(zone, status(is_playing=False, volume=40, playlist_id="pl-dinner"), now=NOW + 1200)
+    assert change.transitions == [(ONLINE, False, True), (PLAYING, True, False)]
+
+
+def test_volume_tolerance():
+    tracker = CommittingTracker(volume_tolerance=2)
+    zone = make_zone()
+    assert not tracker.observe(zone, status(volume=62), now=NOW).needs_write
+    assert tracker.observe(zone, status(volume=65), now=NOW + 300).transitions == [(VOLUME, 62, 65)]
+
+
+def test_heartbeat_after_interval():
+    tracker = CommittingTracker(heartbeat_interval=3600, heartbeat_spread=0.2)
+    zone = make_zone(last_checked_at=datetime.utcfromtimestamp(NOW))
+    beats = [tracker.observe(zone, status(), now=NOW + s * 300).heartbeat for s in range(1, 25)]
+    # Two heartbeats in two hours, each between 48 and 60 minutes apart
+    assert sum(beats) == 2
+    first = beats.index(True) + 1
+    assert 48 * 60 <= first * 300 <= 60 * 60
+
+
+def test_newer_row_from_another_worker_wins():
+    tracker = CommittingTracker()
+    zone = make_zone()
+    tracker.observe(zone, status(), now=NOW)
+
+    # Another worker process recorded a volume change
+    zone.volume = 30
+    zone.last_checked_at = datetime.utcfromtimestamp(NOW + 100)
+    assert not tracker.observe(zone, status(volume=30), now=NOW + 300).needs_write
+
+
+def test_fleet_write_volume_drops_by_an_order_of_magnitude():
+    rng = random.Random(7)
+    tracker = CommittingTracker()
+    zones = [make_zone(n, last_checked_at=datetime.utcfromtimestamp(NOW - rng.uniform(0, 3600))) for n in range(2000)]
+    current = {zone.id: status() for zone in zones}
+
+    checks = 0
+    for sweep in range(24):  # Two hours of 5-minute sweeps
+        for zone in zones:
+            if rng.random() < 0.005:  # Someone changes volume or a zone drops
+                current[zone.id] = None if rng.random() < 0.3 else status(volume=rng.randint(20, 80))
+            tracker.observe(zone, current[zone.id], now=NOW + sweep * 300)
+            checks += 1
+
+    stats = tracker.get_stats()
+    assert stats["writes"] * 10 <= checks
+    assert stats["heartbeats"] > 0
+    assert sum(stats["transitions"].values()) > 0
+
+
+def test_state_waits_for_the_write_to_commit():
+    tracker = ZoneStateTracker()
+    zone = make_zone()
+
+    assert tracker.observe(zone, status(volume=40), now=NOW).transitions == [(VOLUME, 60, 40)]
+    assert tracker.get_stats()["pending_writes"] == 1
+    # The write rolled back - the change is reported again
+    assert tracker.observe(zone, status(volume=40), now=NOW + 300).transitions == [(VOLUME, 60, 40)]
+
+    tracker.confirm([zone.id])
+    assert not tracker.observe(zone, status(volume=40), now=NOW + 600).needs_write
+    assert tracker.get_stats()["pending_writes"] == 0
+
+
+def test_forget_drops_pending_state():
+    tracker = ZoneStateTracker()
+    zone = make_zone()
+    tracker.observe(zone, None, now=NOW)
+    tracker.forget(zone.id)
+    tracker.confirm([zone.id])
+    assert tracker.get_stats()["tracked_zones"] == 0
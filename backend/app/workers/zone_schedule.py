@@ -0,0 +1,219 @@
+"""
+Per-zone polling schedule for zone monitoring.
+
+Instead of checking every zone in one burst every 5 minutes, each zone has
+its own next-check time in a Redis sorted set (member = zone id, score =
+due timestamp). A short beat task claims the zones that are due, checks
+them and schedules their next check.
+
+- Zones are spread evenly over their interval: a zone's checks land on a
+  fixed hash slot (crc32 of its id) within the interval, so N zones on a
+  300s interval cost about N/300 checks per second instead of N at once.
+- The interval adapts to the zone: offline zones are checked often,
+  recently recovered (flapping) zones a little less, long-stable zones and
+  venues outside their business hours much less.
+- Claiming moves a zone's score forward by a lease, so a worker that dies
+  mid-check only delays its zones by the lease instead of losing them.
+"""
+
+import calendar
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+import logging
+
+from app.workers.zone_state import ONLINE, ZoneChange
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_KEY = "monitoring:zone_schedule"
+
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# Pop up to ARGV[2] members due at or before ARGV[1] and lease them until ARGV[3]
+CLAIM_LUA = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, member in ipairs(due) do
+    redis.call('ZADD', KEYS[1], 'XX', ARGV[3], member)
+end
+return due
+"""
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[float]:
+    # Naive datetimes are UTC (datetime.utcnow())
+    return float(calendar.timegm(value.utctimetuple())) if value else None
+
+
+def slot_time(zone_id: str, interval: float, now: float) -> float:
+    """
+    Next time after now that falls on the zone's hash slot for interval.
+    Zones with the same interval are spread evenly across it.
+    """
+    phase = (zlib.crc32(str(zone_id).encode()) % 10000) / 10000 * interval
+    cycles = (now - phase) // interval + 1
+    return cycles * interval + phase
+
+
+def _minutes(value: str) -> int:
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def is_open(venue, now: float) -> bool:
+    """
+    Whether the venue is within its business hours at now.
+
+    business_hours is {"mon": {"open": "09:00", "close": "22:00"}, ...} in
+    the venue's timezone; a close before open runs past midnight. Venues
+    without hours, or with hours we can't read, count as always open.
+    """
+    hours = getattr(venue, "business_hours", None)
+    if not hours:
+        return True
+    try:
+        local = datetime.fromtimestamp(now, ZoneInfo(venue.timezone or "UTC"))
+        minute = local.hour * 60 + local.minute
+        today = hours.get(DAYS[local.weekday()])
+        yesterday = hours.get(DAYS[local.weekday() - 1])
+
+        if today:
+            opens, closes = _minutes(today["open"]), _minutes(today["close"])
+            if opens <= minute < closes or (closes <= opens and minute >= opens):
+                return True
+        if yesterday:
+            # Yesterday's late opening still running past midnight
+            opens, closes = _minutes(yesterday["open"]), _minutes(yesterday["close"])
+            if closes <= opens and minute < closes:
+                return True
+        return False
+    except Exception as e:
+        logger.debug(f"Unreadable business hours for venue {getattr(venue, 'id', '?')}: {e}")
+        return True
+
+
+class ZonePollPolicy:
+    """Check interval for a zone from its latest check"""
+
+    def __init__(
+        self,
+        base_interval: float = 300.0,
+        offline_interval: float = 60.0,
+        recovering_interval: float = 120.0,
+        stable_interval: float = 900.0,
+        closed_interval: float = 1800.0,
+        flap_window: float = 3600.0,
+        stable_after: float = 86400.0,
+    ):
+        """
+        Args:
+            base_interval: Interval for an ordinary online zone
+            offline_interval: Interval while a zone is offline
+            recovering_interval: Interval for flap_window after an outage
+            stable_interval: Interval once a zone has been up for stable_after
+            closed_interval: Interval while the venue is outside business hours
+        """
+        self.base_interval = base_interval
+        self.offline_interval = offline_interval
+        self.recovering_interval = recovering_interval
+        self.stable_interval = stable_interval
+        self.closed_interval = closed_interval
+        self.flap_window = flap_window
+        self.stable_after = stable_after
+
+    def interval_for(self, zone, online: bool, change: Optional[ZoneChange] = None, now: Optional[float] = None) -> float:
+        """
+        Args:
+            zone: Zone row, with its venue loaded
+            online: Result of the check just made
+            change: Transitions from ZoneStateTracker for that check
+        """
+        now = time.time() if now is None else now
+
+        if not is_open(zone.venue, now):
+            return self.closed_interval
+        if not online:
+            return self.offline_interval
+
+        recovered = change is not None and any(field == ONLINE for field, _, _ in change.transitions)
+        last_outage = _timestamp(zone.last_offline_at)
+        if recovered or (last_outage is not None and now - last_outage < self.flap_window):
+            return self.recovering_interval
+        if last_outage is None or now - last_outage >= self.stable_after:
+            return self.stable_interval
+        return self.base_interval
+
+    def next_check(self, zone, online: bool, change: Optional[ZoneChange] = None, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        return slot_time(str(zone.id), self.interval_for(zone, online, change, now), now)
+
+
+class ZoneSchedule:
+    """Next-check times for all monitored zones, in a Redis sorted set"""
+
+    def __init__(self, redis, key: str = SCHEDULE_KEY, lease: float = 120.0):
+        """
+        Args:
+            redis: redis.asyncio client
+            key: Sorted set holding zone id -> due timestamp
+            lease: Seconds a claimed zone is held before it is due again
+        """
+        self.redis = redis
+        self.key = key
+        self.lease = lease
+        self._claim = redis.register_script(CLAIM_LUA)
+
+    async def sync(self, zone_ids: Iterable[str], interval: float, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Make the schedule match the monitored zones: new zones are added on
+        their slot, zones no longer monitored are removed. Existing entries
+        keep their due times.
+        """
+        now = time.time() if now is None else now
+        wanted = {str(zone_id) for zone_id in zone_ids}
+        current = {
+            member.decode() if isinstance(member, bytes) else member
+            for member in await self.redis.zrange(self.key, 0, -1)
+        }
+
+        added = wanted - current
+        removed = current - wanted
+        if added:
+            await self.redis.zadd(
+                self.key,
+                {zone_id: slot_time(zone_id, interval, now) for zone_id in added},
+                nx=True,
+            )
+        if removed:
+            await self.redis.zrem(self.key, *removed)
+        return {"added": len(added), "removed": len(removed), "scheduled": len(wanted)}
+
+    async def claim_due(self, limit: int, now: Optional[float] = None) -> List[str]:
+        """Zones due at now (oldest first), leased so no other worker takes them"""
+        now = time.time() if now is None else now
+        members = await self._claim(keys=[self.key], args=[now, limit, now + self.lease])
+        return [m.decode() if isinstance(m, bytes) else m for m in members]
+
+    async def reschedule(self, due: Dict[str, float]):
+        """Set next-check times for claimed zones (only zones still scheduled)"""
+        if due:
+            await self.redis.zadd(self.key, due, xx=True)
+
+    async def remove(self, *zone_ids: str):
+        if zone_ids:
+            await self.redis.zrem(self.key, *zone_ids)
+
+    async def size(self) -> int:
+        """Zones currently scheduled"""
+        return await self.redis.zcard(self.key)
+
+    async def get_stats(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.time() if now is None else now
+        pipeline = self.redis.pipeline()
+        pipeline.zcard(self.key)
+        pipeline.zcount(self.key, "-inf", now)
+        pipeline.zcount(self.key, now, now + 60)
+        scheduled, overdue, next_minute = await pipeline.execute()
+        return {"scheduled": scheduled, "overdue": overdue, "due_next_minute": next_minute}
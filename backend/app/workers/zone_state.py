@@ -0,0 +1,187 @@
+"""
+Last-known zone state for the monitoring sweep.
+
+Almost every check finds a zone exactly as it was last time (online,
+playing, same volume, same playlist). The tracker compares each check with
+the last written state and reports only transitions, so the sweep writes
+the zones table and monitoring_logs on change instead of on every check.
+
+A zone with no transitions still gets a heartbeat write every
+heartbeat_interval (spread per zone so the fleet doesn't heartbeat in one
+sweep), which keeps last_checked_at and the log proving the zone is watched.
+
+State lives in a compact per-process map, seeded from the zone row the
+sweep already loaded, so a fresh worker compares against the database
+rather than reporting every zone as changed. A row written more recently
+than the map (by another worker process) replaces the map entry.
+
+A check that needs a write only becomes the zone's state once the caller
+has committed it (confirm()); if the transaction fails, the next check
+reports the same transition again.
+"""
+
+import calendar
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Transition field names, in log order
+ONLINE = "online"
+PLAYING = "playing"
+VOLUME = "volume"
+PLAYLIST = "playlist"
+
+
+class ZoneChange(NamedTuple):
+    """Result of one observation: transitions as (field, old, new) and whether to heartbeat"""
+    transitions: List[Tuple[str, Any, Any]]
+    heartbeat: bool
+
+    @property
+    def needs_write(self) -> bool:
+        return bool(self.transitions) or self.heartbeat
+
+    @property
+    def event(self) -> str:
+        return "transition" if self.transitions else "heartbeat"
+
+
+class ZoneStateTracker:
+    """Change detection for zone status checks"""
+
+    def __init__(
+        self,
+        heartbeat_interval: float = 3600.0,
+        heartbeat_spread: float = 0.2,
+        volume_tolerance: int = 0,
+    ):
+        """
+        Args:
+            heartbeat_interval: Seconds between writes for an unchanged zone
+            heartbeat_spread: Fraction of the interval used to stagger zones
+            volume_tolerance: Volume moves of this size or less aren't transitions
+        """
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_spread = heartbeat_spread
+        self.volume_tolerance = volume_tolerance
+
+        # zone_id -> (online, playing, volume, playlist_id, last_written_at)
+        self._states: Dict[str, Tuple[bool, Optional[bool], Optional[int], Optional[str], float]] = {}
+        # Observed states waiting for their write to commit, same shape
+        self._pending: Dict[str, Tuple[bool, Optional[bool], Optional[int], Optional[str], float]] = {}
+
+        self.stats = {
+            "observed": 0,
+            "writes": 0,
+            "heartbeats": 0,
+            "unchanged": 0,
+            "transitions": {ONLINE: 0, PLAYING: 0, VOLUME: 0, PLAYLIST: 0},
+        }
+
+    @staticmethod
+    def _written_at(zone) -> float:
+        checked = getattr(zone, "last_checked_at", None)
+        # Naive datetimes are UTC (datetime.utcnow())
+        return float(calendar.timegm(checked.utctimetuple())) if checked else 0.0
+
+    def _seed(self, zone) -> Tuple[bool, Optional[bool], Optional[int], Optional[str], float]:
+        """Last written state from the zone row"""
+        return (
+            bool(zone.is_online),
+            zone.is_playing,
+            zone.volume,
+            zone.current_playlist_id,
+            self._written_at(zone),
+        )
+
+    def _heartbeat_due(self, zone_id: str, last_written: float, now: float) -> bool:
+        # Stable per-zone offset in [1 - spread, 1] of the interval
+        offset = (zlib.crc32(zone_id.encode()) % 1000) / 1000 * self.heartbeat_spread
+        return now - last_written >= self.heartbeat_interval * (1 - offset)
+
+    def observe(self, zone, status: Optional[Dict[str, Any]], now: Optional[float] = None) -> ZoneChange:
+        """
+        Compare a check result with the zone's last written state.
+
+        Args:
+            zone: Zone row (seeds the state the first time a zone is seen)
+            status: Device status from Soundtrack, or None when the zone is
+                offline / the check failed
+
+        When the change needs a write, the new state is held until
+        confirm() is called for the zone after the write commits.
+        """
+        now = time.time() if now is None else now
+        zone_id = str(zone.id)
+        previous = self._states.get(zone_id)
+        if previous is None or self._written_at(zone) > previous[4]:
+            # Unknown here, or another worker wrote the row since - the row wins
+            previous = self._seed(zone)
+        was_online, was_playing, old_volume, old_playlist, last_written = previous
+
+        transitions = []
+        if status is None:
+            if was_online:
+                transitions.append((ONLINE, True, False))
+            # Playback details are unknown while offline - keep the last ones
+            state = (False, was_playing, old_volume, old_playlist)
+        else:
+            playing = bool(status.get("is_playing"))
+            volume = status.get("volume")
+            playlist = status.get("playlist_id")
+            if not was_online:
+                transitions.append((ONLINE, False, True))
+            if playing != was_playing:
+                transitions.append((PLAYING, was_playing, playing))
+            if volume != old_volume and (
+                volume is None or old_volume is None or abs(volume - old_volume) > self.volume_tolerance
+            ):
+                transitions.append((VOLUME, old_volume, volume))
+            if playlist != old_playlist:
+                transitions.append((PLAYLIST, old_playlist, playlist))
+            state = (True, playing, volume, playlist)
+
+        heartbeat = not transitions and self._heartbeat_due(zone_id, last_written, now)
+        change = ZoneChange(transitions, heartbeat)
+        if change.needs_write:
+            self._pending[zone_id] = state + (now,)
+        else:
+            self._pending.pop(zone_id, None)
+            self._states[zone_id] = state + (last_written,)
+
+        self.stats["observed"] += 1
+        if change.needs_write:
+            self.stats["writes"] += 1
+            if heartbeat:
+                self.stats["heartbeats"] += 1
+            for field, _, _ in transitions:
+                self.stats["transitions"][field] += 1
+        else:
+            self.stats["unchanged"] += 1
+        return change
+
+    def confirm(self, zone_ids: Iterable[str]):
+        """The writes for these zones' last observations committed - make them the known state"""
+        for zone_id in zone_ids:
+            state = self._pending.pop(str(zone_id), None)
+            if state is not None:
+                self._states[str(zone_id)] = state
+
+    def forget(self, zone_id: str):
+        """Drop a zone's state (zone removed or monitoring disabled)"""
+        self._states.pop(str(zone_id), None)
+        self._pending.pop(str(zone_id), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        observed = self.stats["observed"]
+        return {
+            **self.stats,
+            "transitions": dict(self.stats["transitions"]),
+            "tracked_zones": len(self._states),
+            "pending_writes": len(self._pending),
+            "write_ratio": round(self.stats["writes"] / observed, 4) if observed else 0.0,
+        }
+
+
+# Worker-process tracker used by the monitoring sweep
+zone_state_tracker = ZoneStateTracker()
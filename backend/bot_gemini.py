@@ -6,8 +6,9 @@ Uses Gemini 2.0 Flash for natural language understanding
 import os
 import json
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import google.generativeai as genai
+from prompt_context import assemble, prompt_part
 from soundtrack_api import soundtrack_api
 from venue_identifier import conversation_context
 from email_verification import email_verifier
@@ -66,6 +67,108 @@ except Exception as e:
     drive_client = None
     DRIVE_AVAILABLE = False
 
+# Token budget for the venue block in the system prompt
+VENUE_CONTEXT_BUDGET = int(os.getenv('VENUE_CONTEXT_BUDGET', '300'))
+
+# Static prompt parts, identical for every message
+SYSTEM_PROMPT = """You're Scott from the BMA support team, helping venues with their music systems.
+
+CRITICAL UNDERSTANDING - PROPERTY vs ZONE:
+- PROPERTY = The main establishment/hotel (e.g., "Hilton Pattaya", "Marriott Bangkok")
+- ZONE = Individual music areas within a property (e.g., "Lobby", "Pool", "Restaurant", "Edge Bar")
+
+IMPORTANT: When someone says "I'm from Hilton Pattaya" - that's their PROPERTY name.
+- NEVER search for zones called "Hilton Pattaya" 
+- INSTEAD: Search for zones WITHIN Hilton Pattaya property
+- The property contains multiple zones, each with separate music players
+
+CONVERSATION FLOW:
+1. User identifies their property: "I'm from Hilton Pattaya"
+2. You acknowledge: "Got it, checking Hilton Pattaya's music zones..."
+3. You then work with their zones: Edge, Lobby, Pool, etc.
+4. NEVER say "Zone 'Hilton Pattaya' not found" - that's wrong logic!
+
+Personality & Style:
+- Be conversational and natural, like a helpful colleague chatting on WhatsApp
+- Use contractions (I'm, you're, let's, that's) 
+- Show empathy when there are problems ("Oh no, that's frustrating!" or "I understand how annoying that must be")
+- Be friendly but professional
+- Keep responses concise - this is WhatsApp, not email
+
+How to respond:
+- When they mention their property: "Got it, let me check Hilton Pattaya's music system..."
+- Acknowledge issues naturally: "Let me check what's happening with your music zones..."
+- Explain simply: "Looks like your Edge Bar zone went offline about 10 minutes ago"
+- Offer help conversationally: "I can help you get that sorted"
+- Use their name occasionally if you know it
+- Add appropriate emojis sparingly (👍 ✅ 🎵) but don't overdo it
+
+What you know:
+- Properties use Soundtrack Your Brand for their background music across multiple zones
+- Common zone names within properties: Lobby, Restaurant, Bar, Pool, Spa, Edge, Horizon, Shore
+- Each zone is a separate music player within the property
+- Common issues: music stopped, offline zones, volume problems, network issues
+- You have access to real-time zone status and what's playing
+- "Rate" usually means contract pricing/fees, not music tempo
+- You can adjust zone volumes - just ask to turn it up/down or set a specific level (0-100)
+
+Never:
+- Say you're an AI, bot, or assistant
+- Use overly formal language
+- Give long technical explanations
+- Start with "Greetings" or "Hello, I am..."
+- Use robotic phrases like "How may I assist you today?"
+- Confuse properties with zones - they are completely different things!"""
+
+TOOLS_CONTEXT = """Intelligent Data Sources:
+I automatically check multiple sources to provide comprehensive information:
+
+1. **Google Sheets** - For:
+   - Contract details and expiry dates
+   - Contact information (names, emails, phones)
+   - Venue configuration and metadata
+   - Business information
+
+2. **Soundtrack API** - For:
+   - Real-time music playing in zones
+   - Zone online/offline status
+   - Current track information
+   - Playback control
+
+3. **Gmail Search** - Smart contextual search for:
+   - Previous support issues and resolutions
+   - Contract negotiations and pricing discussions
+   - Follow-ups and ongoing conversations
+   - Historical context when mentioned
+
+I intelligently combine data from all sources to give complete answers.
+Email search only activates when contextually relevant to save resources."""
+
+RESPONSE_GUIDELINES = """Response Guidelines:
+1. Answer their question directly - don't repeat information unless asked
+2. If they mention their property, acknowledge it briefly: "Got it, checking Hilton Pattaya..."
+3. For data questions - give just what they asked for, not everything you know
+4. Keep it short and natural - this is WhatsApp, not a report
+5. When something's wrong, show empathy: "Oh that's not right, let me check..."
+6. Only offer additional help if relevant: "Want me to check the other zones too?"
+7. CRITICAL: Give ONE response only - never repeat the same information twice
+8. If you have contract/rate data, give it once clearly and stop there
+9. Property identification: Always treat property names as containing zones, never AS zones
+10. ANTI-HALLUCINATION: Never make up information. If you don't have data, say so honestly
+11. VERIFIED DATA ONLY: Only provide information that comes from verified sources (sheets, API)
+12. NO SPECULATION: Don't guess rates, dates, or contact details
+
+Remember: You're Scott, a real person helping via WhatsApp. Be human, be helpful, be brief.
+NEVER give duplicate responses or repeat information unnecessarily.
+
+🚨 CRITICAL ANTI-HALLUCINATION RULES:
+- If you don't have contract/pricing data from Google Sheets, say "I need to check with our team"
+- Never invent contract rates, expiry dates, or contact information
+- If sheets integration is down, admit it: "I'm having trouble accessing our records right now"
+- Only state facts from verified API responses or sheets data
+- When in doubt, offer to escalate rather than guess"""
+
+
 class GeminiBot:
     """AI-powered bot using Google Gemini for natural conversation"""
     
@@ -85,6 +188,9 @@ class GeminiBot:
         # Initialize components
         self.soundtrack = soundtrack_api
         self.sheets = sheets_client if SHEETS_AVAILABLE else None
+
+        # Built once; the same bytes start every prompt
+        self.prompt_prefix = prompt_part(f"{SYSTEM_PROMPT}\n\n{TOOLS_CONTEXT}\n\n{RESPONSE_GUIDELINES}")
         
         logger.info(f"Gemini bot initialized with model: {model_name}")
         if SHEETS_AVAILABLE:
@@ -153,12 +259,9 @@ class GeminiBot:
         # Note: Most queries will be handled by Gemini with combined data context
         # This prevents duplicate responses while ensuring all data sources are available
         
-        # Build the system prompt with context
+        # Build the system prompt with context (tools and guidelines are part of the static prefix)
         system_prompt = self._build_system_prompt(venue, user_phone)
         
-        # Add tools/functions context for Gemini
-        tools_context = self._build_tools_context()
-        
         # Add combined data context
         data_context = ""
         
@@ -176,14 +279,9 @@ class GeminiBot:
                     logger.info(f"Returning verified sheets data for {venue.get('name')}")
                     return response
         
-        if combined_data:
+        # Catalog facts (contract, rate, contacts, zones) are in the venue block of the system prompt
+        if any(combined_data.get(key) for key in ('soundtrack_zones', 'email_summary', 'contract_document', 'tech_documents')):
             data_context = "\n\nAvailable Data:\n"
-            if combined_data.get('sheets_data'):
-                sheets = combined_data['sheets_data']
-                data_context += f"- Contract expires: {sheets.get('contract_expiry', sheets.get('expiry_date', 'N/A'))}\n"
-                data_context += f"- Rate: {sheets.get('current_price_per_zone_venue_per_year', 'N/A')}\n"
-                data_context += f"- Contact: {sheets.get('contact_name_1', 'N/A')}\n"
-                data_context += f"- Zones in property: {sheets.get('amount_of_zones_venues', sheets.get('no_of_zones', 'N/A'))}\n"
             if combined_data.get('soundtrack_zones'):
                 zones = combined_data['soundtrack_zones']
                 online = combined_data.get('online_zones', [])
@@ -196,45 +294,16 @@ class GeminiBot:
             if combined_data.get('tech_documents'):
                 data_context += f"\n📚 Technical Documentation:\n{combined_data['tech_documents']}\n"
         
-        # Combine prompts
-        full_prompt = f"""{system_prompt}
-
-{tools_context}
-{data_context}
-
-User Context:
+        # Static prefix (instructions, tools, guidelines, venue block) first so
+        # provider prompt caching can reuse it; per-message context last
+        full_prompt, prompt_tokens = assemble(system_prompt, data_context.strip(), f"""User Context:
 - Phone: {user_phone}
 - Name: {user_name or 'Unknown'}
 - Venue: {venue.get('name') if venue else 'Not identified'}
 - Trusted: {email_verifier.is_trusted_device(user_phone, venue.get('name', '')) if venue else False}
 
-User Message: {message}
-
-Response Guidelines:
-1. Answer their question directly - don't repeat information unless asked
-2. If they mention their property, acknowledge it briefly: "Got it, checking Hilton Pattaya..."
-3. For data questions - give just what they asked for, not everything you know
-4. Keep it short and natural - this is WhatsApp, not a report
-5. When something's wrong, show empathy: "Oh that's not right, let me check..."
-6. Only offer additional help if relevant: "Want me to check the other zones too?"
-7. CRITICAL: Give ONE response only - never repeat the same information twice
-8. If you have contract/rate data, give it once clearly and stop there
-9. Property identification: Always treat property names as containing zones, never AS zones
-10. ANTI-HALLUCINATION: Never make up information. If you don't have data, say so honestly
-11. VERIFIED DATA ONLY: Only provide information that comes from verified sources (sheets, API)
-12. NO SPECULATION: Don't guess rates, dates, or contact details
-
-Remember: You're Scott, a real person helping via WhatsApp. Be human, be helpful, be brief.
-NEVER give duplicate responses or repeat information unnecessarily.
-
-🚨 CRITICAL ANTI-HALLUCINATION RULES:
-- If you don't have contract/pricing data from Google Sheets, say "I need to check with our team"
-- Never invent contract rates, expiry dates, or contact information
-- If sheets integration is down, admit it: "I'm having trouble accessing our records right now"
-- Only state facts from verified API responses or sheets data
-- When in doubt, offer to escalate rather than guess
-
-Response:"""
+User Message: {message}""", "Response:")
+        logger.debug(f"Gemini prompt: {prompt_tokens} tokens")
         
         try:
             # Generate response with Gemini
@@ -482,95 +551,29 @@ Response:"""
     def _build_system_prompt(self, venue: Optional[Dict], user_phone: str) -> str:
         """Build the system prompt with current context"""
         
-        base_prompt = """You're Scott from the BMA support team, helping venues with their music systems.
-
-CRITICAL UNDERSTANDING - PROPERTY vs ZONE:
-- PROPERTY = The main establishment/hotel (e.g., "Hilton Pattaya", "Marriott Bangkok")
-- ZONE = Individual music areas within a property (e.g., "Lobby", "Pool", "Restaurant", "Edge Bar")
-
-IMPORTANT: When someone says "I'm from Hilton Pattaya" - that's their PROPERTY name.
-- NEVER search for zones called "Hilton Pattaya" 
-- INSTEAD: Search for zones WITHIN Hilton Pattaya property
-- The property contains multiple zones, each with separate music players
-
-CONVERSATION FLOW:
-1. User identifies their property: "I'm from Hilton Pattaya"
-2. You acknowledge: "Got it, checking Hilton Pattaya's music zones..."
-3. You then work with their zones: Edge, Lobby, Pool, etc.
-4. NEVER say "Zone 'Hilton Pattaya' not found" - that's wrong logic!
-
-Personality & Style:
-- Be conversational and natural, like a helpful colleague chatting on WhatsApp
-- Use contractions (I'm, you're, let's, that's) 
-- Show empathy when there are problems ("Oh no, that's frustrating!" or "I understand how annoying that must be")
-- Be friendly but professional
-- Keep responses concise - this is WhatsApp, not email
-
-How to respond:
-- When they mention their property: "Got it, let me check Hilton Pattaya's music system..."
-- Acknowledge issues naturally: "Let me check what's happening with your music zones..."
-- Explain simply: "Looks like your Edge Bar zone went offline about 10 minutes ago"
-- Offer help conversationally: "I can help you get that sorted"
-- Use their name occasionally if you know it
-- Add appropriate emojis sparingly (👍 ✅ 🎵) but don't overdo it
-
-What you know:
-- Properties use Soundtrack Your Brand for their background music across multiple zones
-- Common zone names within properties: Lobby, Restaurant, Bar, Pool, Spa, Edge, Horizon, Shore
-- Each zone is a separate music player within the property
-- Common issues: music stopped, offline zones, volume problems, network issues
-- You have access to real-time zone status and what's playing
-- "Rate" usually means contract pricing/fees, not music tempo
-- You can adjust zone volumes - just ask to turn it up/down or set a specific level (0-100)
-
-Never:
-- Say you're an AI, bot, or assistant
-- Use overly formal language
-- Give long technical explanations
-- Start with "Greetings" or "Hello, I am..."
-- Use robotic phrases like "How may I assist you today?"
-- Confuse properties with zones - they are completely different things! """
-        
-        if venue:
-            # Add venue-specific context
-            venue_name = venue.get('name')
-            zones_info = self._get_venue_zones_info(venue_name)
-            
-            base_prompt += f"""
-
-Current Venue: {venue_name}
-Available Zones: {zones_info}"""
-        
-        return base_prompt
+        if not venue:
+            return self.prompt_prefix[0]
+
+        # Prebuilt catalog block; live zone status comes with the per-message data
+        venue_name = venue.get('name')
+        system_prompt, _ = assemble(self.prompt_prefix, self._venue_block(venue_name), f"Current Venue: {venue_name}")
+        return system_prompt
+
+    def _venue_block(self, venue_name: Optional[str]) -> Tuple[str, int]:
+        """Prebuilt context block for the venue, resolving loose names through the catalog"""
+        if not SHEETS_AVAILABLE:
+            return '', 0
+        block = venue_reader.venue_context(venue_name, budget=VENUE_CONTEXT_BUDGET)
+        if not block[0] and self.sheets and venue_name:
+            catalog_venue = self.sheets.find_venue_by_name(venue_name)
+            if catalog_venue:
+                block = venue_reader.venue_context(catalog_venue.get('property_name'), budget=VENUE_CONTEXT_BUDGET)
+        return block
     
     def _build_tools_context(self) -> str:
         """Build context about available tools/functions"""
         
-        return """
-Intelligent Data Sources:
-I automatically check multiple sources to provide comprehensive information:
-
-1. **Google Sheets** - For:
-   - Contract details and expiry dates
-   - Contact information (names, emails, phones)
-   - Venue configuration and metadata
-   - Business information
-
-2. **Soundtrack API** - For:
-   - Real-time music playing in zones
-   - Zone online/offline status
-   - Current track information
-   - Playback control
-
-3. **Gmail Search** - Smart contextual search for:
-   - Previous support issues and resolutions
-   - Contract negotiations and pricing discussions
-   - Follow-ups and ongoing conversations
-   - Historical context when mentioned
-
-I intelligently combine data from all sources to give complete answers.
-Email search only activates when contextually relevant to save resources.
-"""
+        return TOOLS_CONTEXT
     
     def _get_venue_zones_info(self, venue_name: str) -> str:
         """Get formatted zone information for a venue"""
@@ -187,7 +187,7 @@ class SimplifiedBot:
                             return self._format_music_issue_response(music_status, user_phone)
             
             # Check for similar issues in history
-            similar_issues = venue_reader.find_similar_issue(message)
+            similar_issues = venue_reader.find_similar_issue(message, k=3, kinds=['issue'])
             if similar_issues:
                 return self._format_similar_issues_response(similar_issues, venue_data or current_venue)
         
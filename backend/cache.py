@@ -10,6 +10,10 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 import redis
 
+from caller_index import normalize_phone
+from redis_near_cache import REDIS_NEAR_CACHE, RedisNearCache
+from venue_data_watcher import venue_data_watcher
+
 logger = logging.getLogger(__name__)
 
 # Redis connection URL from environment
@@ -25,6 +29,7 @@ class CacheManager:
     
     def __init__(self):
         self.client = None
+        self.near_cache: Optional[RedisNearCache] = None
         self.connect()
     
     def connect(self):
@@ -38,6 +43,12 @@ class CacheManager:
             # Test connection
             self.client.ping()
             logger.info("✅ Redis cache connected successfully")
+            if REDIS_NEAR_CACHE:
+                # Venue lookups by phone run on every message - keep them local
+                if self.near_cache:
+                    self.near_cache.stop()
+                self.near_cache = RedisNearCache(self.client, prefixes=["venue:phone:"], name="venue_cache")
+                self.near_cache.start()
             return True
         except Exception as e:
             logger.error(f"Redis connection failed: {e}")
@@ -62,7 +73,9 @@ class CacheManager:
             return False
         
         try:
-            key = f"venue:phone:{phone_number}"
+            key = f"venue:phone:{normalize_phone(phone_number) or phone_number}"  # One entry per number however it is written
+            if self.near_cache:
+                self.near_cache.note_write(key)
             self.client.setex(
                 key,
                 ttl,
@@ -80,8 +93,8 @@ class CacheManager:
             return None
         
         try:
-            key = f"venue:phone:{phone_number}"
-            data = self.client.get(key)
+            key = f"venue:phone:{normalize_phone(phone_number) or phone_number}"
+            data = self.near_cache.get(key, self.client.get) if self.near_cache else self.client.get(key)
             if data:
                 logger.debug(f"Cache hit for venue {phone_number}")
                 return json.loads(data)
@@ -165,6 +178,21 @@ class CacheManager:
             logger.error(f"Failed to get cached response: {e}")
             return None
     
+    def clear_cached_responses(self) -> int:
+        """Drop all cached bot responses (answers may quote venue data that changed)"""
+        if not self.ensure_connection():
+            return 0
+        
+        try:
+            keys = list(self.client.scan_iter(match="response:hash:*", count=500))
+            if keys:
+                self.client.delete(*keys)
+            logger.info(f"Cleared {len(keys)} cached responses")
+            return len(keys)
+        except Exception as e:
+            logger.error(f"Failed to clear cached responses: {e}")
+            return 0
+    
     # Rate limiting
     
     def check_rate_limit(self, user_phone: str, max_requests: int = 10, window: int = 60) -> bool:
@@ -229,7 +257,8 @@ class CacheManager:
                 "version": info.get("redis_version", "unknown"),
                 "memory_used": info.get("used_memory_human", "unknown"),
                 "connected_clients": info.get("connected_clients", 0),
-                "total_commands": info.get("total_commands_processed", 0)
+                "total_commands": info.get("total_commands_processed", 0),
+                "near_cache": self.near_cache.get_stats() if self.near_cache else None
             }
         except Exception as e:
             logger.error(f"Health check failed: {e}")
@@ -237,6 +266,8 @@ class CacheManager:
     
     def close(self):
         """Close Redis connection"""
+        if self.near_cache:
+            self.near_cache.stop()
         if self.client:
             try:
                 self.client.close()
@@ -246,4 +277,7 @@ class CacheManager:
 
 
 # Create global cache manager instance
-cache_manager = CacheManager()
\ No newline at end of file
+cache_manager = CacheManager()
+
+# Cached answers can't be mapped back to venues - any venue_data.md change drops them all
+venue_data_watcher.on_change(lambda changed: changed and cache_manager.clear_cached_responses())
\ No newline at end of file
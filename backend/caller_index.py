@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Caller identification index built from the venue catalog
+Maps E.164-normalized phone numbers to the venue contact they belong to,
+and email domains to the venues whose contacts use them, so a returning
+customer is recognized with a dict lookup instead of LLM / fuzzy name
+matching. Rebuilt by VenueDataReader whenever venue_data.md is (re)loaded.
+"""
+
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+
+# Country code for numbers written nationally (leading 0)
+DEFAULT_COUNTRY_CODE = os.environ.get('CALLER_DEFAULT_COUNTRY_CODE', '66')
+
+# Shared mailbox providers say nothing about the venue
+FREE_MAIL_DOMAINS = {
+    'gmail.com', 'googlemail.com', 'hotmail.com', 'outlook.com', 'live.com',
+    'yahoo.com', 'yahoo.co.th', 'icloud.com', 'me.com', 'msn.com', 'aol.com',
+    'proton.me', 'protonmail.com',
+}
+
+# BMA staff addresses appear on many venues as account managers
+STAFF_DOMAINS = {'bmasiamusic.com', 'bmamusic.com'}
+
+
+def normalize_phone(raw: Optional[str], default_country_code: str = DEFAULT_COUNTRY_CODE) -> Optional[str]:
+    """
+    Phone number as E.164 (+66812345678), or None if it isn't one
+    Accepts channel prefixes (whatsapp:+66...), 00 international prefixes,
+    national numbers with a leading 0 and bare international digits
+    (WhatsApp sends 66812345678).
+    """
+    if not raw:
+        return None
+    text = str(raw).strip()
+    if ':' in text:
+        text = text.rsplit(':', 1)[1]  # whatsapp:+66..., tel:+66...
+    international = text.lstrip().startswith('+')
+    digits = re.sub(r'\D', '', text)
+
+    if not international:
+        if digits.startswith('00'):
+            digits = digits[2:]
+        elif digits.startswith('0'):
+            digits = default_country_code + digits[1:]
+        elif len(digits) < 10:
+            return None  # Too short to carry a country code
+    if not 8 <= len(digits) <= 15 or digits.startswith('0'):
+        return None
+    return '+' + digits
+
+
+def split_phones(field: Optional[str]) -> List[str]:
+    """Catalog phone fields can list several numbers (x / y, x; y, x or y)"""
+    if not field:
+        return []
+    return [part for part in re.split(r'\s*(?:/|,|;|\bor\b)\s*', field) if part.strip()]
+
+
+def email_domain(email: Optional[str]) -> Optional[str]:
+    if not email or '@' not in email:
+        return None
+    domain = email.strip().lower().rsplit('@', 1)[1].strip(' .>')
+    return domain if '.' in domain else None
+
+
+class CallerIndex:
+    """phone (E.164) -> contacts, email domain -> venue names"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phones: Dict[str, List[Dict]] = {}
+        self._domains: Dict[str, List[str]] = {}
+        self.stats = {'builds': 0, 'phone_hits': 0, 'phone_misses': 0}
+
+    def rebuild(self, venues: Iterable[Dict]) -> int:
+        """Index a venue list (VenueDataReader format); returns the number of phones indexed"""
+        phones: Dict[str, List[Dict]] = {}
+        domains: Dict[str, List[str]] = {}
+
+        for venue in venues:
+            venue_name = venue.get('property_name')
+            for contact in venue.get('contacts', []):
+                entry = {
+                    'venue': venue_name,
+                    'name': contact.get('name'),
+                    'title': contact.get('title'),
+                    'email': contact.get('email'),
+                }
+                for raw in split_phones(contact.get('phone')):
+                    phone = normalize_phone(raw)
+                    if phone and entry not in phones.setdefault(phone, []):
+                        phones[phone].append(entry)
+
+                domain = email_domain(contact.get('email'))
+                if domain and domain not in FREE_MAIL_DOMAINS and domain not in STAFF_DOMAINS:
+                    names = domains.setdefault(domain, [])
+                    if venue_name not in names:
+                        names.append(venue_name)
+
+        # Swap both maps at once so lookups never see half a rebuild
+        with self._lock:
+            self._phones, self._domains = phones, domains
+            self.stats['builds'] += 1
+        return len(phones)
+
+    def contacts_for_phone(self, phone: str) -> List[Dict]:
+        """Every catalog contact listed under this number"""
+        normalized = normalize_phone(phone)
+        if not normalized:
+            return []
+        contacts = self._phones.get(normalized, [])
+        self.stats['phone_hits' if contacts else 'phone_misses'] += 1
+        return list(contacts)
+
+    def identify(self, phone: str) -> Optional[Dict]:
+        """The contact for this number if it belongs to exactly one venue"""
+        contacts = self.contacts_for_phone(phone)
+        if len({contact['venue'] for contact in contacts}) == 1:
+            return contacts[0]
+        return None
+
+    def venues_for_email(self, email: str) -> List[str]:
+        """Venues whose contacts use this email's domain (empty for free-mail domains)"""
+        domain = email_domain(email)
+        return list(self._domains.get(domain, [])) if domain else []
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'phones': len(self._phones),
+            'domains': len(self._domains),
+        }
@@ -9,6 +9,8 @@ import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 
+from venue_data_watcher import venue_data_watcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,6 +26,7 @@ class CustomerManager:
         self.customers = {}
         self.brands = {}
         self.load_customer_data()
+        venue_data_watcher.watch(self)
 
     def load_customer_data(self):
         """Load and parse customer data from venue_data.md"""
@@ -47,144 +50,7 @@ class CustomerManager:
             if content is None:
                 raise FileNotFoundError("venue_data.md not found in any expected location")
 
-            # Parse customers from markdown
-            customer_sections = re.split(r'\n### (?=\w)', content)
-
-            for customer_section in customer_sections[1:]:  # Skip header
-                lines = customer_section.strip().split('\n')
-                if not lines:
-                    continue
-
-                customer_name = lines[0].strip()
-
-                # Initialize customer object
-                customer_info = {
-                    'name': customer_name,
-                    'customer_id': self._generate_id(customer_name),
-                    'brand': self._extract_brand(customer_name),
-                    'business_type': None,
-                    'zones': [],  # These are the venues/music zones
-                    'platform': None,
-                    'contract_start': None,
-                    'contract_end': None,
-                    'annual_price_per_zone': None,
-                    'currency': None,
-                    'total_zones': 0,
-                    'contacts': [],
-                    'primary_contact': None,
-                    'region': None,
-                    'country': 'Thailand',  # Default, can be extracted
-                    'city': self._extract_city(customer_name),
-                    'tags': [],
-                    'notes': [],
-                    'account_id': None,
-                    'hardware_type': None
-                }
-
-                # Parse customer details
-                current_section = None
-                for line in lines[1:]:
-                    # Business type
-                    if '**Business Type**:' in line:
-                        customer_info['business_type'] = line.split(':', 1)[1].strip()
-
-                    # Zones (venues within customer)
-                    elif '**Zone Names**:' in line:
-                        zones_text = line.split(':', 1)[1].strip()
-                        customer_info['zones'] = [z.strip() for z in zones_text.split(',')]
-                        customer_info['total_zones'] = len(customer_info['zones'])
-
-                    # Platform
-                    elif '**Music Platform**:' in line:
-                        customer_info['platform'] = line.split(':', 1)[1].strip()
-
-                    # Contract dates
-                    elif '**Contract Start**:' in line:
-                        customer_info['contract_start'] = line.split(':', 1)[1].strip()
-                    elif '**Contract End**:' in line:
-                        customer_info['contract_end'] = line.split(':', 1)[1].strip()
-
-                    # Pricing
-                    elif '**Annual Price per Zone**:' in line:
-                        price_text = line.split(':', 1)[1].strip()
-                        customer_info['annual_price_per_zone'] = price_text
-                        # Extract currency
-                        if 'THB' in price_text:
-                            customer_info['currency'] = 'THB'
-                        elif 'USD' in price_text:
-                            customer_info['currency'] = 'USD'
-
-                    # Account ID
-                    elif '**Soundtrack Account ID**:' in line:
-                        customer_info['account_id'] = line.split(':', 1)[1].strip()
-
-                    # Hardware
-                    elif '**Hardware Type**:' in line:
-                        customer_info['hardware_type'] = line.split(':', 1)[1].strip()
-
-                    # Contacts section
-                    elif '#### Contacts' in line:
-                        current_section = 'contacts'
-
-                    # Parse contact entries
-                    elif current_section == 'contacts' and '**' in line and ':' in line:
-                        contact_role = line.split('**')[1].split('**')[0]
-                        contact_name = line.split(':', 1)[1].strip()
-
-                        contact = {
-                            'role': contact_role,
-                            'name': contact_name,
-                            'email': None,
-                            'phone': None,
-                            'preferred_contact': None,
-                            'notes': None
-                        }
-
-                        # Look for contact details in next few lines
-                        contact_lines = []
-                        line_index = lines.index(line)
-                        for i in range(line_index + 1, min(line_index + 5, len(lines))):
-                            if '**' in lines[i] and ':' in lines[i]:
-                                break
-                            contact_lines.append(lines[i])
-
-                        for detail_line in contact_lines:
-                            if 'Email:' in detail_line:
-                                contact['email'] = detail_line.split(':', 1)[1].strip()
-                            elif 'Phone:' in detail_line:
-                                contact['phone'] = detail_line.split(':', 1)[1].strip()
-                            elif 'Preferred Contact:' in detail_line:
-                                contact['preferred_contact'] = detail_line.split(':', 1)[1].strip()
-                            elif 'Notes:' in detail_line:
-                                contact['notes'] = detail_line.split(':', 1)[1].strip()
-
-                        customer_info['contacts'].append(contact)
-
-                        # Set primary contact (first one or GM)
-                        if not customer_info['primary_contact'] or 'General Manager' in contact_role:
-                            customer_info['primary_contact'] = contact
-
-                    # Special notes
-                    elif '#### Special Notes' in line:
-                        current_section = 'notes'
-                    elif current_section == 'notes' and line.startswith('-'):
-                        customer_info['notes'].append(line[1:].strip())
-
-                # Determine region based on country
-                customer_info['region'] = self._determine_region(customer_info['country'])
-
-                # Add tags based on characteristics
-                customer_info['tags'] = self._generate_tags(customer_info)
-
-                # Store customer
-                self.customers[customer_info['customer_id']] = customer_info
-
-                # Track brand
-                brand = customer_info['brand']
-                if brand:
-                    if brand not in self.brands:
-                        self.brands[brand] = []
-                    self.brands[brand].append(customer_info['customer_id'])
+            self.reload_venue_data(content)
 
             logger.info(f"Loaded {len(self.customers)} customers from venue_data.md")
             logger.info(f"Identified {len(self.brands)} brands")
@@ -204,6 +70,154 @@ class CustomerManager:
             self.customers = {}
             self.brands = {}
 
+    def reload_venue_data(self, content: str) -> int:
+        """Parse customers from venue_data.md content and swap them in"""
+        customers = {}
+        brands = {}
+
+        # Parse customers from markdown
+        customer_sections = re.split(r'\n### (?=\w)', content)
+
+        for customer_section in customer_sections[1:]:  # Skip header
+            lines = customer_section.strip().split('\n')
+            if not lines:
+                continue
+
+            customer_name = lines[0].strip()
+
+            # Initialize customer object
+            customer_info = {
+                'name': customer_name,
+                'customer_id': self._generate_id(customer_name),
+                'brand': self._extract_brand(customer_name),
+                'business_type': None,
+                'zones': [],  # These are the venues/music zones
+                'platform': None,
+                'contract_start': None,
+                'contract_end': None,
+                'annual_price_per_zone': None,
+                'currency': None,
+                'total_zones': 0,
+                'contacts': [],
+                'primary_contact': None,
+                'region': None,
+                'country': 'Thailand',  # Default, can be extracted
+                'city': self._extract_city(customer_name),
+                'tags': [],
+                'notes': [],
+                'account_id': None,
+                'hardware_type': None
+            }
+
+            # Parse customer details
+            current_section = None
+            for line in lines[1:]:
+                # Business type
+                if '**Business Type**:' in line:
+                    customer_info['business_type'] = line.split(':', 1)[1].strip()
+
+                # Zones (venues within customer)
+                elif '**Zone Names**:' in line:
+                    zones_text = line.split(':', 1)[1].strip()
+                    customer_info['zones'] = [z.strip() for z in zones_text.split(',')]
+                    customer_info['total_zones'] = len(customer_info['zones'])
+
+                # Platform
+                elif '**Music Platform**:' in line:
+                    customer_info['platform'] = line.split(':', 1)[1].strip()
+
+                # Contract dates
+                elif '**Contract Start**:' in line:
+                    customer_info['contract_start'] = line.split(':', 1)[1].strip()
+                elif '**Contract End**:' in line:
+                    customer_info['contract_end'] = line.split(':', 1)[1].strip()
+
+                # Pricing
+                elif '**Annual Price per Zone**:' in line:
+                    price_text = line.split(':', 1)[1].strip()
+                    customer_info['annual_price_per_zone'] = price_text
+                    # Extract currency
+                    if 'THB' in price_text:
+                        customer_info['currency'] = 'THB'
+                    elif 'USD' in price_text:
+                        customer_info['currency'] = 'USD'
+
+                # Account ID
+                elif '**Soundtrack Account ID**:' in line:
+                    customer_info['account_id'] = line.split(':', 1)[1].strip()
+
+                # Hardware
+                elif '**Hardware Type**:' in line:
+                    customer_info['hardware_type'] = line.split(':', 1)[1].strip()
+
+                # Contacts section
+                elif '#### Contacts' in line:
+                    current_section = 'contacts'
+
+                # Parse contact entries
+                elif current_section == 'contacts' and '**' in line and ':' in line:
+                    contact_role = line.split('**')[1].split('**')[0]
+                    contact_name = line.split(':', 1)[1].strip()
+
+                    contact = {
+                        'role': contact_role,
+                        'name': contact_name,
+                        'email': None,
+                        'phone': None,
+                        'preferred_contact': None,
+                        'notes': None
+                    }
+
+                    # Look for contact details in next few lines
+                    contact_lines = []
+                    line_index = lines.index(line)
+                    for i in range(line_index + 1, min(line_index + 5, len(lines))):
+                        if '**' in lines[i] and ':' in lines[i]:
+                            break
+                        contact_lines.append(lines[i])
+
+                    for detail_line in contact_lines:
+                        if 'Email:' in detail_line:
+                            contact['email'] = detail_line.split(':', 1)[1].strip()
+                        elif 'Phone:' in detail_line:
+                            contact['phone'] = detail_line.split(':', 1)[1].strip()
+                        elif 'Preferred Contact:' in detail_line:
+                            contact['preferred_contact'] = detail_line.split(':', 1)[1].strip()
+                        elif 'Notes:' in detail_line:
+                            contact['notes'] = detail_line.split(':', 1)[1].strip()
+
+                    customer_info['contacts'].append(contact)
+
+                    # Set primary contact (first one or GM)
+                    if not customer_info['primary_contact'] or 'General Manager' in contact_role:
+                        customer_info['primary_contact'] = contact
+
+                # Special notes
+                elif '#### Special Notes' in line:
+                    current_section = 'notes'
+                elif current_section == 'notes' and line.startswith('-'):
+                    customer_info['notes'].append(line[1:].strip())
+
+            # Determine region based on country
+            customer_info['region'] = self._determine_region(customer_info['country'])
+
+            # Add tags based on characteristics
+            customer_info['tags'] = self._generate_tags(customer_info)
+
+            # Store customer
+            customers[customer_info['customer_id']] = customer_info
+
+            # Track brand
+            brand = customer_info['brand']
+            if brand:
+                if brand not in brands:
+                    brands[brand] = []
+                brands[brand].append(customer_info['customer_id'])
+
+        # Readers see the old maps or the new ones, never a partly parsed catalog
+        self.customers, self.brands = customers, brands
+        return len(customers)
+
     def filter_customers(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Filter customers based on criteria
@@ -0,0 +1,171 @@
+"""
+Streaming exports of the venue catalog (venues and contacts) as CSV / NDJSON
+Rows come from the catalog venue_data_reader already holds in memory (kept
+current by the venue_data.md watcher), are encoded into ~64KB chunks as
+they are generated and gzipped on the fly when the client accepts it, so
+an export never builds the whole file in memory.
+
+The contacts export has the columns of bma_social_contacts_export.csv (the
+Brevo import), so that file no longer has to be regenerated by hand.
+
+Exports carry customer contact details, so they need the EXPORT_API_KEY
+(X-API-Key or Authorization: Bearer); without one configured they're off.
+The key check is app.core.export_auth, shared with the app's /exports.
+"""
+
+import csv
+import io
+import json
+import zlib
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+CHUNK_SIZE = 64 * 1024
+
+# Brevo import columns, in the order the CRM mapping expects
+CONTACT_FIELDS = [
+    'venue_name',
+    'contact_name',
+    'contact_role',
+    'contact_email',
+    'contact_phone',
+    'business_type',
+    'zone_count',
+    'zone_names',
+    'contract_end',
+    'music_platform',
+    'annual_price',
+    'currency',
+    'contract_start',
+    'hardware_type',
+    'preferred_contact',
+    'notes',
+]
+
+VENUE_FIELDS = [
+    'venue_name',
+    'business_type',
+    'zone_count',
+    'zone_names',
+    'music_platform',
+    'annual_price',
+    'currency',
+    'contract_start',
+    'contract_end',
+    'account_id',
+    'hardware_type',
+    'contact_count',
+]
+
+MEDIA_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def clean_value(value: Any) -> str:
+    """Template placeholders (— / -) export as empty strings"""
+    if value in ['—', '-', None]:
+        return ''
+    return str(value).strip()
+
+
+def venue_row(venue: Dict) -> Dict[str, str]:
+    """Catalog venue (venue_data_reader format) -> export columns"""
+    return {
+        'venue_name': clean_value(venue.get('property_name')),
+        'business_type': clean_value(venue.get('business_type')),
+        'zone_count': clean_value(venue.get('zone_count')),
+        'zone_names': clean_value(venue.get('zone_names')),
+        'music_platform': clean_value(venue.get('music_platform')),
+        'annual_price': clean_value(venue.get('annual_price_per_zone')),
+        'currency': clean_value(venue.get('currency')),
+        'contract_start': clean_value(venue.get('contract_start')),
+        'contract_end': clean_value(venue.get('contract_end')),
+        'account_id': clean_value(venue.get('soundtrack_account_id')),
+        'hardware_type': clean_value(venue.get('hardware_type')),
+    }
+
+
+def iter_venue_rows(venues: Iterable[Dict]) -> Iterator[Dict[str, str]]:
+    for venue in venues:
+        row = venue_row(venue)
+        row['contact_count'] = str(sum(1 for c in venue.get('contacts', []) if clean_value(c.get('name'))))
+        yield row
+
+
+def iter_contact_rows(venues: Iterable[Dict]) -> Iterator[Dict[str, str]]:
+    """One row per contact; venues without contacts get the default manager row"""
+    for venue in venues:
+        base = venue_row(venue)
+        base.pop('account_id')
+        contacts = venue.get('contacts', [])
+        if not contacts:
+            yield {
+                **base,
+                'contact_name': 'Manager',
+                'contact_role': 'General Manager',
+                'contact_email': '',
+                'contact_phone': '',
+                'preferred_contact': 'Email',
+                'notes': 'Default contact - no specific contact information available',
+            }
+            continue
+        for contact in contacts:
+            yield {
+                **base,
+                'contact_name': clean_value(contact.get('name')),
+                'contact_role': (contact.get('title') or '').strip(),
+                'contact_email': clean_value(contact.get('email')),
+                'contact_phone': clean_value(contact.get('phone')),
+                'preferred_contact': clean_value(contact.get('preferred_contact')),
+                'notes': clean_value(contact.get('notes')),
+            }
+
+
+def encode_rows(rows: Iterable[Dict], fmt: str, fieldnames: Sequence[str], start: int = 0) -> Iterator[bytes]:
+    """
+    Rows as CSV (with header) or NDJSON in chunks of about CHUNK_SIZE.
+    start skips rows a client already has (resuming an interrupted export).
+    """
+    buffer: List[bytes] = []
+    size = 0
+    text = io.StringIO()
+    writer = csv.DictWriter(text, fieldnames=fieldnames, extrasaction='ignore')
+
+    def flush_text() -> bytes:
+        data = text.getvalue().encode('utf-8')
+        text.seek(0)
+        text.truncate()
+        return data
+
+    if fmt == 'csv':
+        writer.writeheader()
+        buffer.append(flush_text())
+
+    for row in islice(rows, start, None):
+        if fmt == 'csv':
+            writer.writerow(row)
+            line = flush_text()
+        else:
+            line = (json.dumps({name: row.get(name, '') for name in fieldnames}, ensure_ascii=False) + '\n').encode('utf-8')
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """gzip a chunk stream incrementally"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
@@ -1,16 +1,23 @@
 """
 Database connection and session management for BMA Social
-Uses PostgreSQL with psycopg2 for conversation storage
+Uses PostgreSQL with a psycopg2 connection pool for conversation storage
 """
 
 import os
+import time
+import asyncio
 import logging
+import threading
+import weakref
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 from contextlib import contextmanager
 
+from caller_index import normalize_phone
+
 logger = logging.getLogger(__name__)
 
 # Database connection URL from environment
@@ -19,58 +26,212 @@ if DATABASE_URL and DATABASE_URL.startswith('postgres://'):
     # Render uses postgres:// but psycopg2 needs postgresql://
     DATABASE_URL = DATABASE_URL.replace('postgres://', 'postgresql://', 1)
 
+# Pool settings
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '1'))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '10'))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '10'))  # seconds to wait for a free connection
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', '15000'))
+DB_HEALTHCHECK_IDLE_SECONDS = int(os.environ.get('DB_HEALTHCHECK_IDLE_SECONDS', '30'))
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection frees up within DB_POOL_TIMEOUT"""
+
+
 class DatabaseManager:
-    """Manage database connections and operations"""
+    """Manage pooled database connections and operations"""
     
     def __init__(self):
-        self.connection = None
+        self.pool = None
+        # Bounds checkouts so callers wait instead of ThreadedConnectionPool raising PoolError
+        self._slots = threading.BoundedSemaphore(DB_POOL_MAX_SIZE)
+        # Connection checked out by the current thread (nested get_cursor reuses it)
+        self._local = threading.local()
+        # Keyed by connection, so entries go when the pool drops a connection
+        self._last_used: "weakref.WeakKeyDictionary[Any, float]" = weakref.WeakKeyDictionary()
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "checkouts": 0,
+            "in_use": 0,
+            "peak_in_use": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "total_wait_ms": 0.0,
+            "health_check_failures": 0
+        }
         self.connect()
     
     def connect(self):
-        """Establish database connection"""
+        """Create the connection pool"""
         if not DATABASE_URL:
             logger.warning("No DATABASE_URL found - database features disabled")
             return False
         
         try:
-            self.connection = psycopg2.connect(DATABASE_URL)
-            self.connection.autocommit = False  # Use transactions
-            logger.info("✅ Database connected successfully")
+            self.pool = ThreadedConnectionPool(
+                DB_POOL_MIN_SIZE,
+                DB_POOL_MAX_SIZE,
+                DATABASE_URL,
+                options=f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+            )
+            logger.info(f"✅ Database pool ready ({DB_POOL_MIN_SIZE}-{DB_POOL_MAX_SIZE} connections)")
             return True
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
-            self.connection = None
+            self.pool = None
             return False
     
     def ensure_connection(self):
-        """Ensure database connection is active"""
-        if self.connection is None or self.connection.closed:
+        """Ensure the connection pool is available"""
+        if self.pool is None or self.pool.closed:
             return self.connect()
         return True
-    
+
+    @property
+    def connection(self):
+        """Connection checked out by the current thread inside get_cursor, if any"""
+        return getattr(self._local, "connection", None)
+
+    def _is_healthy(self, conn, ping: bool = False) -> bool:
+        """Cheap liveness check; pings connections that sat idle for a while (or always with ping)"""
+        if conn.closed:
+            return False
+        idle = time.time() - self._last_used.get(conn, time.time())
+        if not ping and idle < DB_HEALTHCHECK_IDLE_SECONDS:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _acquire(self):
+        """Wait for a pool slot and take a healthy connection (blocks up to DB_POOL_TIMEOUT)"""
+        started = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.stats["waits"] += 1
+            if not self._slots.acquire(timeout=DB_POOL_TIMEOUT):
+                with self._stats_lock:
+                    self.stats["timeouts"] += 1
+                raise PoolTimeoutError(f"No database connection available within {DB_POOL_TIMEOUT}s")
+
+        try:
+            conn = self.pool.getconn()
+            failures = 0
+            # Replacements are pinged too; after the idle ones the pool opens a new connection
+            while not self._is_healthy(conn, ping=failures > 0):
+                failures += 1
+                with self._stats_lock:
+                    self.stats["health_check_failures"] += 1
+                self.pool.putconn(conn, close=True)
+                if failures > DB_POOL_MIN_SIZE:
+                    raise psycopg2.OperationalError("No healthy database connection available")
+                conn = self.pool.getconn()
+            conn.autocommit = False  # Use transactions
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._stats_lock:
+            self.stats["checkouts"] += 1
+            self.stats["total_wait_ms"] += (time.perf_counter() - started) * 1000
+            self.stats["in_use"] += 1
+            self.stats["peak_in_use"] = max(self.stats["peak_in_use"], self.stats["in_use"])
+        return conn
+
+    def _release(self, conn, broken: bool = False):
+        with self._stats_lock:
+            self.stats["in_use"] -= 1
+        try:
+            self._last_used[conn] = time.time()
+            self.pool.putconn(conn, close=broken or conn.closed)
+        finally:
+            self._slots.release()
+
     @contextmanager
-    def get_cursor(self, dict_cursor=True):
-        """Get a database cursor with automatic cleanup"""
+    def checkout(self):
+        """Check a connection out of the pool for the duration of the block"""
+        if self.connection is not None:
+            # Nested use in the same thread - share the outer checkout
+            yield self.connection
+            return
+
         if not self.ensure_connection():
             yield None
             return
-        
+
+        conn = self._acquire()
+        broken = False
+        self._local.connection = conn
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self._local.connection = None
+            self._release(conn, broken)
+
+    @contextmanager
+    def _transaction_cursor(self, conn, dict_cursor: bool):
+        """Cursor committed on success and rolled back on error"""
         cursor = None
         try:
             if dict_cursor:
-                cursor = self.connection.cursor(cursor_factory=RealDictCursor)
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
             else:
-                cursor = self.connection.cursor()
+                cursor = conn.cursor()
             yield cursor
-            self.connection.commit()
+            conn.commit()
         except Exception as e:
             logger.error(f"Database operation failed: {e}")
-            if self.connection:
-                self.connection.rollback()
+            if not conn.closed:
+                conn.rollback()
             raise
         finally:
             if cursor:
                 cursor.close()
+
+    @contextmanager
+    def get_cursor(self, dict_cursor=True):
+        """Get a database cursor on a pooled connection with automatic cleanup"""
+        with self.checkout() as conn:
+            if conn is None:
+                yield None
+                return
+            with self._transaction_cursor(conn, dict_cursor) as cursor:
+                yield cursor
+
+    async def run_async(self, work: Callable[[Any], Any], dict_cursor=True) -> Any:
+        """
+        Run work(cursor) inside get_cursor() in a worker thread and return its
+        result, so neither the pool wait nor the query blocks the event loop.
+        work gets None when the database is disabled.
+        """
+        def run():
+            with self.get_cursor(dict_cursor) as cursor:
+                return work(cursor)
+
+        return await asyncio.to_thread(run)
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Pool saturation metrics"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        checkouts = stats["checkouts"]
+        stats.update({
+            "enabled": self.pool is not None and not self.pool.closed,
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+            "saturation": round(stats["in_use"] / DB_POOL_MAX_SIZE, 2),
+            "avg_wait_ms": round(stats["total_wait_ms"] / checkouts, 2) if checkouts else 0,
+            "statement_timeout_ms": DB_STATEMENT_TIMEOUT_MS
+        })
+        stats["total_wait_ms"] = round(stats["total_wait_ms"], 2)
+        return stats
     
     def initialize_tables(self):
         """Create necessary tables if they don't exist"""
@@ -178,54 +339,61 @@ class DatabaseManager:
                 return None
             
             try:
-                # Find or create conversation
+                # Find/touch or create the active conversation and insert the
+                # message in a single round trip
                 cursor.execute("""
-                    SELECT id FROM conversations 
-                    WHERE user_phone = %s AND channel = %s 
-                    AND status = 'active'
-                    ORDER BY created_at DESC
-                    LIMIT 1
-                """, (user_phone, channel))
-                
-                result = cursor.fetchone()
-                
-                if result:
-                    conversation_id = result['id']
-                    # Update conversation timestamp
-                    cursor.execute("""
-                        UPDATE conversations 
+                    WITH existing AS (
+                        SELECT id FROM conversations
+                        WHERE user_phone = %(user_phone)s AND channel = %(channel)s
+                        AND status = 'active'
+                        ORDER BY created_at DESC
+                        LIMIT 1
+                    ), touched AS (
+                        UPDATE conversations
                         SET updated_at = CURRENT_TIMESTAMP
-                        WHERE id = %s
-                    """, (conversation_id,))
-                else:
-                    # Create new conversation
-                    cursor.execute("""
-                        INSERT INTO conversations 
+                        WHERE id IN (SELECT id FROM existing)
+                        RETURNING id
+                    ), created AS (
+                        INSERT INTO conversations
                         (channel, user_phone, user_name, metadata)
-                        VALUES (%s, %s, %s, %s)
+                        SELECT %(channel)s, %(user_phone)s, %(user_name)s, %(metadata)s
+                        WHERE NOT EXISTS (SELECT 1 FROM existing)
                         RETURNING id
-                    """, (channel, user_phone, user_name, 
-                          psycopg2.extras.Json(metadata or {})))
-                    conversation_id = cursor.fetchone()['id']
-                
-                # Store the message
-                cursor.execute("""
-                    INSERT INTO messages 
-                    (conversation_id, external_id, direction, message_type, 
-                     content, ai_response, metadata)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (external_id) DO NOTHING
-                    RETURNING id
-                """, (conversation_id, message_id, direction, message_type,
-                      content, ai_response, psycopg2.extras.Json(metadata or {})))
+                    ), conversation AS (
+                        SELECT id FROM touched
+                        UNION ALL
+                        SELECT id FROM created
+                    ), inserted AS (
+                        INSERT INTO messages
+                        (conversation_id, external_id, direction, message_type,
+                         content, ai_response, metadata)
+                        SELECT id, %(message_id)s, %(direction)s, %(message_type)s,
+                               %(content)s, %(ai_response)s, %(metadata)s
+                        FROM conversation
+                        ON CONFLICT (external_id) DO NOTHING
+                        RETURNING id
+                    )
+                    SELECT (SELECT id FROM conversation) AS conversation_id,
+                           (SELECT id FROM inserted) AS message_id
+                """, {
+                    "channel": channel,
+                    "user_phone": user_phone,
+                    "user_name": user_name,
+                    "message_id": message_id,
+                    "direction": direction,
+                    "message_type": message_type,
+                    "content": content,
+                    "ai_response": ai_response,
+                    "metadata": psycopg2.extras.Json(metadata or {})
+                })
                 
                 result = cursor.fetchone()
-                if result:
+                conversation_id = result['conversation_id']
+                if result['message_id']:
                     logger.info(f"Message stored: {message_id} in conversation {conversation_id}")
-                    return conversation_id
                 else:
                     logger.debug(f"Message already exists: {message_id}")
-                    return conversation_id
+                return conversation_id
                     
             except Exception as e:
                 logger.error(f"Failed to store message: {e}")
@@ -278,11 +446,12 @@ class DatabaseManager:
                 return None
             
             try:
+                # Stored numbers may be raw or E.164
                 cursor.execute("""
                     SELECT * FROM venues 
-                    WHERE phone_number = %s AND active = true
+                    WHERE phone_number IN (%s, %s) AND active = true
                     LIMIT 1
-                """, (phone_number,))
+                """, (phone_number, normalize_phone(phone_number) or phone_number))
                 
                 return cursor.fetchone()
                 
@@ -291,10 +460,10 @@ class DatabaseManager:
                 return None
     
     def close(self):
-        """Close database connection"""
-        if self.connection and not self.connection.closed:
-            self.connection.close()
-            logger.info("Database connection closed")
+        """Close all pooled connections"""
+        if self.pool and not self.pool.closed:
+            self.pool.closeall()
+            logger.info("Database pool closed")
 
 
 # Create global database manager instance
@@ -14,6 +14,8 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+from venue_data_reader import venue_reader
+
 logger = logging.getLogger(__name__)
 
 class EmailVerificationSystem:
@@ -152,6 +154,12 @@ class EmailVerificationSystem:
                     expected = domains[0]
                     return (False, f"For {company_name}, please use your official email ending in {expected}")
         
+        # Domain the venue's own contacts use in the catalog
+        for venue_name in venue_reader.caller_index.venues_for_email(email_lower):
+            venue_lower = venue_name.lower()
+            if venue_lower in company_lower or company_lower in venue_lower:
+                return (True, "Email domain verified!")
+        
         # For unknown companies, check if domain seems related
         company_words = company_lower.replace('-', ' ').replace('_', ' ').split()
         
@@ -290,52 +290,34 @@ class VenueContactExtractor:
 
     def update_venue_data(self):
         """Update venue_data.md with found contacts"""
-        venue_file = os.path.join(os.path.dirname(__file__), 'venue_data.md')
+        from venue_data_writer import venue_data_writer
 
         # Create backup
         if not self.dry_run:
+            venue_file = str(venue_data_writer.path)
             backup_file = f"{venue_file}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             shutil.copy(venue_file, backup_file)
             logger.info(f"💾 Backup saved to {backup_file}")
 
-        # Read current content
-        with open(venue_file, 'r') as f:
-            lines = f.readlines()
-
-        # Update contacts
-        updated = False
-        current_venue = None
-        in_contacts = False
+        # One locked, atomic write for every venue - only empty (—) values are filled
+        with venue_data_writer.batch(dry_run=self.dry_run) as batch:
+            for venue_name, contacts in self.contacts_found.items():
+                contact = self.get_best_contact(contacts, 'General Manager')
+                if contact:
+                    batch.set_contact(
+                        venue_name,
+                        'General Manager',
+                        fill_only=True,
+                        name=contact.get('name') or None,
+                        email=contact['email'],
+                        phone=contact.get('phone') or None,
+                    )
 
-        for i, line in enumerate(lines):
-            if line.startswith('### '):
-                venue_name = line.replace('### ', '').strip()
-                current_venue = venue_name
-                in_contacts = False
-
-            elif current_venue and '#### Contacts' in line:
-                in_contacts = True
-
-            elif in_contacts and current_venue in self.contacts_found:
-                # Update contact lines
-                if '- **General Manager**:' in line and '—' in lines[i+1]:
-                    contact = self.get_best_contact(self.contacts_found[current_venue], 'General Manager')
-                    if contact:
-                        lines[i+1] = f"  - Email: {contact['email']}\n"
-                        if contact.get('name'):
-                            lines[i] = f"- **General Manager**: {contact['name']}\n"
-                        if contact.get('phone') and '—' in lines[i+2]:
-                            lines[i+2] = f"  - Phone: {contact['phone']}\n"
-                        updated = True
-                        logger.info(f"  ✅ Updated GM for {current_venue}")
-
-        # Write updated content
-        if updated and not self.dry_run:
-            with open(venue_file, 'w') as f:
-                f.writelines(lines)
-            logger.info(f"✅ Updated venue_data.md with new contacts")
-        elif self.dry_run:
-            logger.info("🔍 DRY RUN - No files were modified")
+        result = batch.result
+        if self.dry_run:
+            logger.info(f"🔍 DRY RUN - No files were modified ({result['applied']} contacts would be updated)")
+        elif result['applied']:
+            logger.info(f"✅ Updated venue_data.md with {result['applied']} new contacts")
 
     def get_best_contact(self, contacts: List[Dict], title_filter: str) -> Optional[Dict]:
         """Get the best matching contact for a specific title"""
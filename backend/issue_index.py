@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+BM25 index over venue issue histories and special notes
+Replaces the substring scan in find_similar_issue: each query only touches
+the postings of its own terms, and results are ranked (Okapi BM25) rather
+than returned in file order.
+
+Resolved tickets land in Issue History (venue_data_writer.append_issue), so
+they are indexed like any other issue. The index is kept in step with
+venue_data.md by VenueDataReader: on a reload only the venues whose issues
+or notes changed are re-indexed.
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# BM25 parameters (the usual defaults)
+K1 = 1.2
+B = 0.75
+
+STOPWORDS = {
+    'a', 'about', 'again', 'all', 'also', 'am', 'an', 'and', 'any', 'are', 'as', 'at',
+    'be', 'been', 'but', 'by', 'can', 'could', 'did', 'do', 'does', 'for', 'from',
+    'has', 'have', 'hello', 'help', 'hi', 'how', 'i', 'in', 'is', 'it', 'its', 'just',
+    'me', 'my', 'no', 'not', 'of', 'on', 'or', 'our', 'please', 'so', 'some', 'that',
+    'the', 'their', 'there', 'this', 'to', 'us', 'was', 'we', 'were', 'what', 'when',
+    'why', 'will', 'with', 'you', 'your',
+}
+
+# Placeholders the venue template uses for empty entries
+PLACEHOLDERS = {'', '—', '-', 'No recorded issues yet.'}
+
+
+def _stem(token: str) -> str:
+    """Light suffix stripping so 'disconnected' finds 'disconnects'"""
+    for suffix in ('ing', 'ed', 'es', 's'):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        _stem(token) for token in re.findall(r'[a-z0-9]+', text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def venue_documents(venue: Dict) -> List[Dict]:
+    """Searchable entries of one venue (issue history and special notes)"""
+    name = venue.get('property_name', '')
+    docs = []
+    for issue in venue.get('issue_history', []):
+        text = (issue.get('issue') or '').strip()
+        if text not in PLACEHOLDERS:
+            docs.append({'venue': name, 'date': issue.get('date'), 'issue': text, 'kind': 'issue'})
+    for note in venue.get('special_notes', []):
+        text = (note or '').strip()
+        if text not in PLACEHOLDERS:
+            docs.append({'venue': name, 'date': None, 'issue': text, 'kind': 'note'})
+    return docs
+
+
+class IssueIndex:
+    """Inverted index (term -> {doc id: term frequency}) with BM25 scoring"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._docs: Dict[int, Dict] = {}
+        self._lengths: Dict[int, int] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._venue_docs: Dict[str, List[int]] = {}  # lowercase venue -> doc ids
+        self._signatures: Dict[str, Tuple] = {}
+        self._total_length = 0
+        self._next_id = 0
+        self.stats = {'syncs': 0, 'venues_reindexed': 0, 'searches': 0}
+
+    def sync(self, venues: Iterable[Dict]) -> int:
+        """
+        Bring the index in line with a venue list, re-indexing only venues
+        whose entries changed. Returns the number of venues re-indexed.
+        """
+        current = {}
+        for venue in venues:
+            key = venue.get('property_name', '').lower()
+            if key in current:
+                continue  # Duplicate headings: the first one wins, as in find_venue_by_name
+            docs = venue_documents(venue)
+            current[key] = (tuple((d['date'], d['issue'], d['kind']) for d in docs), docs)
+
+        with self._lock:
+            changed = 0
+            for key in [key for key in self._signatures if key not in current]:
+                self._remove_venue(key)
+                changed += 1
+            for key, (signature, docs) in current.items():
+                if self._signatures.get(key) == signature:
+                    continue
+                self._remove_venue(key)
+                for doc in docs:
+                    self._add(key, doc)
+                self._signatures[key] = signature
+                changed += 1
+            self.stats['syncs'] += 1
+            self.stats['venues_reindexed'] += changed
+        return changed
+
+    def _add(self, venue_key: str, doc: Dict):
+        doc_id = self._next_id
+        self._next_id += 1
+        terms = Counter(tokenize(doc['issue']))
+        self._docs[doc_id] = doc
+        self._lengths[doc_id] = sum(terms.values())
+        self._total_length += self._lengths[doc_id]
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        self._venue_docs.setdefault(venue_key, []).append(doc_id)
+
+    def _remove_venue(self, venue_key: str):
+        for doc_id in self._venue_docs.pop(venue_key, []):
+            doc = self._docs.pop(doc_id)
+            self._total_length -= self._lengths.pop(doc_id)
+            for term in set(tokenize(doc['issue'])):
+                postings = self._postings[term]
+                del postings[doc_id]
+                if not postings:
+                    del self._postings[term]
+        self._signatures.pop(venue_key, None)
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        venue: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        kinds: Optional[Iterable[str]] = None,
+    ) -> List[Dict]:
+        """
+        Top-k entries for query, best first.
+
+        Args:
+            venue: Only this venue's entries (exact name, any case)
+            since / until: ISO dates, inclusive; undated notes are left out when set
+            kinds: 'issue' and/or 'note'
+        """
+        terms = set(tokenize(query))
+        venue_key = venue.lower() if venue else None
+        kinds = set(kinds) if kinds else None
+
+        with self._lock:
+            self.stats['searches'] += 1
+            count = len(self._docs)
+            if not terms or not count:
+                return []
+            average = self._total_length / count
+            allowed = set(self._venue_docs.get(venue_key, [])) if venue_key else None
+
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    if allowed is not None and doc_id not in allowed:
+                        continue
+                    norm = tf + K1 * (1 - B + B * self._lengths[doc_id] / average)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / norm
+
+            results = []
+            for doc_id, score in sorted(scores.items(), key=lambda item: (-item[1], item[0])):
+                doc = self._docs[doc_id]
+                if kinds and doc['kind'] not in kinds:
+                    continue
+                if since or until:
+                    date = doc['date'] or ''
+                    if not date or (since and date < since) or (until and date > until):
+                        continue
+                results.append({**doc, 'score': round(score, 4)})
+                if len(results) >= k:
+                    break
+            return results
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                'documents': len(self._docs),
+                'terms': len(self._postings),
+                'venues': len(self._venue_docs),
+            }
@@ -4,6 +4,7 @@ FastAPI application with BMA Social Music Bot
 """
 
 import os
+import asyncio
 import logging
 import hmac
 import hashlib
@@ -12,7 +13,7 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 
 from fastapi import FastAPI, Response, Depends, HTTPException, Request
-from fastapi.responses import JSONResponse, HTMLResponse, FileResponse
+from fastapi.responses import JSONResponse, HTMLResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 import uvicorn
@@ -156,6 +157,11 @@ async def startup_event():
     else:
         logger.warning("⚠️ Running without cache")
 
+    # Sender profiles persist in Redis; the local cache fills from it on demand
+    if redis:
+        from profile_cache import profile_cache
+        profile_cache.attach_backend(redis)
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
@@ -164,6 +170,19 @@ async def shutdown_event():
         db_connection.close()
         logger.info("Database connection closed")
 
+    try:
+        # Drain buffered message writes before the pool goes away
+        from message_writer import message_writer
+        message_writer.stop()
+    except Exception as e:
+        logger.error(f"Message writer drain error: {e}")
+
+    try:
+        from database import db_manager
+        db_manager.close()
+    except Exception as e:
+        logger.error(f"Database pool shutdown error: {e}")
+
 @app.get("/")
 async def root():
     """Root endpoint - serves campaign manager or API info"""
@@ -283,114 +302,142 @@ async def whatsapp_webhook(request: Request):
         logger.info(f"WhatsApp webhook received: {data}")
         
         # Extract message from WhatsApp format
+        batch = []
         if "entry" in data:
             for entry in data["entry"]:
                 for change in entry.get("changes", []):
                     if change.get("field") == "messages":
-                        messages = change.get("value", {}).get("messages", [])
-                        contacts = change.get("value", {}).get("contacts", [])
-                        customer_name = contacts[0].get("profile", {}).get("name", "Customer") if contacts else "Customer"
-                        
-                        for msg in messages:
-                            if msg.get("type") == "text":
-                                text = msg.get("text", {}).get("body", "")
-                                from_number = msg.get("from", "")
-                                response = ""  # Initialize response
-                                
-                                # Check if conversation is in human mode
-                                from conversation_tracker import conversation_tracker
-                                
-                                if conversation_tracker.is_human_mode(from_number):
-                                    # Human is handling - forward directly to Google Chat
-                                    logger.info(f"Human mode active for {from_number} - forwarding to Google Chat")
-                                    
-                                    # Get the active conversation to continue the thread
-                                    active_conv = conversation_tracker.get_active_conversation(from_number)
-                                    if active_conv:
-                                        # Send to Google Chat in the same thread
-                                        from google_chat_client import chat_client, Department, Priority
-                                        
-                                        notification_sent = chat_client.send_notification(
-                                            message=f"Customer reply: {text}",
-                                            venue_name=active_conv.get("venue_name", "Unknown"),
-                                            venue_data=None,
-                                            user_info={
-                                                'name': customer_name,
-                                                'phone': from_number,
-                                                'platform': 'WhatsApp'
-                                            },
-                                            department=Department.GENERAL,
-                                            priority=Priority.NORMAL,
-                                            context="Continuing conversation with support"
-                                        )
-                                        
-                                        # Add to conversation history
-                                        conversation_tracker.add_message(
-                                            thread_key=active_conv.get("thread_key"),
-                                            message=text,
-                                            sender=customer_name,
-                                            direction="inbound"
-                                        )
-                                        
-                                        # Send acknowledgment to customer
-                                        response = "Your message has been received by our support team. They'll respond shortly."
-                                    else:
-                                        # Fallback to bot if no active conversation found
-                                        if music_bot and text:
-                                            response = music_bot.process_message(text, from_number, customer_name, platform="WhatsApp")
-                                            logger.info(f"Bot response: {response}")
-                                        else:
-                                            response = "Message received. Support will respond soon."
-
-                                elif music_bot and text:
-                                    # Normal bot processing
-                                    response = music_bot.process_message(
-                                        text,
-                                        from_number,
-                                        customer_name,
-                                        platform="WhatsApp"
-                                    )
-                                    logger.info(f"Bot response: {response}")
-                                else:
-                                    response = "Thank you for your message. How can I help you today?"
-                                    
-                                # Send response back via WhatsApp API (for all cases)
-                                import requests
-                                whatsapp_token = os.environ.get('WHATSAPP_ACCESS_TOKEN')
-                                phone_number_id = change.get("value", {}).get("metadata", {}).get("phone_number_id")
-                                
-                                if whatsapp_token and phone_number_id and response:
-                                    url = f"https://graph.facebook.com/v17.0/{phone_number_id}/messages"
-                                    headers = {
-                                        "Authorization": f"Bearer {whatsapp_token}",
-                                        "Content-Type": "application/json"
-                                    }
-                                    payload = {
-                                        "messaging_product": "whatsapp",
-                                        "to": from_number,
-                                        "text": {"body": response}
-                                    }
-                                    
-                                    try:
-                                        send_response = requests.post(url, headers=headers, json=payload)
-                                        if send_response.status_code == 200:
-                                            logger.info(f"WhatsApp response sent to {from_number}")
-                                        else:
-                                            logger.error(f"Failed to send WhatsApp response: {send_response.text}")
-                                    except Exception as e:
-                                        logger.error(f"Error sending WhatsApp response: {e}")
-                                else:
-                                    if not response:
-                                        logger.warning("No response to send")
-                                    else:
-                                        logger.warning("WhatsApp token or phone_number_id not configured")
+                        value = change.get("value", {})
+                        contacts = value.get("contacts", [])
+
+                        # Remember contact names so later payloads without a profile still resolve
+                        from profile_cache import profile_cache
+                        for contact in contacts:
+                            contact_name = contact.get("profile", {}).get("name")
+                            if contact.get("wa_id") and contact_name:
+                                profile_cache.set("whatsapp", contact["wa_id"], display_name=contact_name)
+
+                        for msg in value.get("messages", []):
+                            batch.append((msg, value))
+
+        # Fan out across senders; each sender's messages keep their order
+        from webhook_dispatcher import dispatch_events
+        results = await dispatch_events(
+            batch,
+            key_fn=lambda item: item[0].get("from"),
+            handler=lambda item: process_whatsapp_message(*item),
+            source="WhatsApp"
+        )
         
-        return {"status": "success"}
+        return {"status": "success", "processed": len(results)}
         
     except Exception as e:
         logger.error(f"WhatsApp webhook error: {e}")
         return {"status": "error", "message": str(e)}
 
+async def process_whatsapp_message(msg: Dict[str, Any], value: Dict[str, Any]):
+    """Process a single WhatsApp message (one sender's messages run in order)"""
+    if msg.get("type") != "text":
+        return
+
+    from profile_cache import profile_cache
+    from webhook_dispatcher import run_serialized
+
+    text = msg.get("text", {}).get("body", "")
+    from_number = msg.get("from", "")
+    customer_name = profile_cache.display_name("whatsapp", from_number, default="Customer")
+    response = ""  # Initialize response
+
+    # Check if conversation is in human mode
+    from conversation_tracker import conversation_tracker
+
+    if conversation_tracker.is_human_mode(from_number):
+        # Human is handling - forward directly to Google Chat
+        logger.info(f"Human mode active for {from_number} - forwarding to Google Chat")
+
+        # Get the active conversation to continue the thread
+        active_conv = conversation_tracker.get_active_conversation(from_number)
+        if active_conv:
+            # Send to Google Chat in the same thread
+            from google_chat_client import chat_client, Department, Priority
+
+            notification_sent = await run_serialized(
+                chat_client.send_notification,
+                message=f"Customer reply: {text}",
+                venue_name=active_conv.get("venue_name", "Unknown"),
+                venue_data=None,
+                user_info={
+                    'name': customer_name,
+                    'phone': from_number,
+                    'platform': 'WhatsApp'
+                },
+                department=Department.GENERAL,
+                priority=Priority.NORMAL,
+                context="Continuing conversation with support"
+            )
+
+            # Add to conversation history
+            conversation_tracker.add_message(
+                thread_key=active_conv.get("thread_key"),
+                message=text,
+                sender=customer_name,
+                direction="inbound"
+            )
+
+            # Send acknowledgment to customer
+            response = "Your message has been received by our support team. They'll respond shortly."
+        else:
+            # Fallback to bot if no active conversation found
+            if music_bot and text:
+                response = await run_serialized(music_bot.process_message, text, from_number, customer_name, platform="WhatsApp")
+                logger.info(f"Bot response: {response}")
+            else:
+                response = "Message received. Support will respond soon."
+
+    elif music_bot and text:
+        # Normal bot processing
+        response = await run_serialized(
+            music_bot.process_message,
+            text,
+            from_number,
+            customer_name,
+            platform="WhatsApp"
+        )
+        logger.info(f"Bot response: {response}")
+    else:
+        response = "Thank you for your message. How can I help you today?"
+
+    # Send response back via WhatsApp API (for all cases)
+    import requests
+    whatsapp_token = os.environ.get('WHATSAPP_ACCESS_TOKEN')
+    phone_number_id = value.get("metadata", {}).get("phone_number_id")
+
+    if whatsapp_token and phone_number_id and response:
+        url = f"https://graph.facebook.com/v17.0/{phone_number_id}/messages"
+        headers = {
+            "Authorization": f"Bearer {whatsapp_token}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "messaging_product": "whatsapp",
+            "to": from_number,
+            "text": {"body": response}
+        }
+
+        try:
+            send_response = await asyncio.to_thread(requests.post, url, headers=headers, json=payload)
+            if send_response.status_code == 200:
+                logger.info(f"WhatsApp response sent to {from_number}")
+            else:
+                logger.error(f"Failed to send WhatsApp response: {send_response.text}")
+        except Exception as e:
+            logger.error(f"Error sending WhatsApp response: {e}")
+    else:
+        if not response:
+            logger.warning("No response to send")
+        else:
+            logger.warning("WhatsApp token or phone_number_id not configured")
+
 @app.get("/webhooks/whatsapp")
 async def whatsapp_verify(request: Request):
     """WhatsApp webhook verification"""
@@ -422,11 +469,16 @@ async def line_webhook(request: Request):
         data = await request.json()
         logger.info(f"Line webhook received: {data}")
 
-        # Process Line events
-        for event in data.get("events", []):
-            await process_line_event(event)
+        # Process Line events - concurrently across users, in order per user
+        from webhook_dispatcher import dispatch_events
+        results = await dispatch_events(
+            data.get("events", []),
+            key_fn=lambda event: event.get("source", {}).get("userId"),
+            handler=process_line_event,
+            source="Line"
+        )
 
-        return {"status": "success"}
+        return {"status": "success", "processed": len(results)}
 
     except Exception as e:
         logger.error(f"Line webhook error: {e}")
@@ -453,6 +505,8 @@ async def process_line_event(event: Dict[str, Any]):
     event_type = event.get("type")
 
     if event_type == "message":
+        from webhook_dispatcher import run_serialized
+
         message = event.get("message", {})
         source = event.get("source", {})
         reply_token = event.get("replyToken")
@@ -481,7 +535,8 @@ async def process_line_event(event: Dict[str, Any]):
                     # Send to Google Chat in the same thread
                     from google_chat_client import chat_client, Department, Priority
 
-                    notification_sent = chat_client.send_notification(
+                    notification_sent = await run_serialized(
+                        chat_client.send_notification,
                         message=f"Customer reply: {text}",
                         venue_name=active_conv.get("venue_name", "Unknown"),
                         venue_data=None,
@@ -508,14 +563,15 @@ async def process_line_event(event: Dict[str, Any]):
                 else:
                     # Fallback to bot if no active conversation found
                     if music_bot and text:
-                        response = music_bot.process_message(text, user_id, user_name, platform="Line")
+                        response = await run_serialized(music_bot.process_message, text, user_id, user_name, platform="Line")
                         logger.info(f"Bot response: {response}")
                     else:
                         response = "Message received. Support will respond soon."
 
             elif music_bot and text:
                 # Normal bot processing
-                response = music_bot.process_message(
+                response = await run_serialized(
+                    music_bot.process_message,
                     text,
                     user_id,
                     user_name,
@@ -545,7 +601,13 @@ async def process_line_event(event: Dict[str, Any]):
         logger.info(f"Line user {user_id} unfollowed the bot")
 
 async def get_line_user_name(user_id: str) -> str:
-    """Get Line user display name"""
+    """Get Line user display name (cached, see profile_cache)"""
+    from profile_cache import profile_cache
+
+    cached = profile_cache.get("line", user_id)
+    if cached is not None:
+        return cached.get("display_name") or "Line User"
+
     try:
         import requests
         line_token = os.environ.get('LINE_CHANNEL_ACCESS_TOKEN')
@@ -555,15 +617,24 @@ async def get_line_user_name(user_id: str) -> str:
         url = f"https://api.line.me/v2/bot/profile/{user_id}"
         headers = {"Authorization": f"Bearer {line_token}"}
 
-        response = requests.get(url, headers=headers)
+        response = await asyncio.to_thread(requests.get, url, headers=headers)
         if response.status_code == 200:
             profile = response.json()
+            profile_cache.set(
+                "line",
+                user_id,
+                display_name=profile.get("displayName"),
+                language=profile.get("language"),
+                picture_url=profile.get("pictureUrl")
+            )
             return profile.get("displayName", "Line User")
         else:
             logger.warning(f"Failed to get Line profile: {response.status_code}")
+            profile_cache.set_negative("line", user_id)
             return "Line User"
     except Exception as e:
         logger.error(f"Error getting Line user name: {e}")
+        profile_cache.set_negative("line", user_id)
         return "Line User"
 
 async def send_line_message(user_id: str, message: str, reply_token: str = None):
@@ -599,7 +670,7 @@ async def send_line_message(user_id: str, message: str, reply_token: str = None)
                 "messages": [message_obj]
             }
 
-        response = requests.post(url, headers=headers, json=payload)
+        response = await asyncio.to_thread(requests.post, url, headers=headers, json=payload)
         if response.status_code == 200:
             logger.info(f"Line message sent to {user_id}")
         else:
@@ -857,20 +928,24 @@ async def api_status():
     table_count = 0
     
     # Check database
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT COUNT(*) FROM information_schema.tables 
-                WHERE table_schema = 'public'
-            """)
-            table_count = cursor.fetchone()[0]
-            cursor.close()
-        except Exception as e:
-            db_status = f"error: {str(e)}"
-    else:
-        db_status = "not_connected"
+    from database import db_manager
+    
+    def count_tables(cursor):
+        if cursor is None:
+            return None
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.tables 
+            WHERE table_schema = 'public'
+        """)
+        return cursor.fetchone()[0]
+    
+    try:
+        table_count = await db_manager.run_async(count_tables, dict_cursor=False)
+        if table_count is None:
+            db_status = "not_connected"
+            table_count = 0
+    except Exception as e:
+        db_status = f"error: {str(e)}"
     
     # Check Redis
     redis = get_redis_client()
@@ -894,14 +969,28 @@ async def api_status():
     except Exception:
         soundtrack_status = "error"
     
+    from profile_cache import profile_cache
+    from syb_scheduler import syb_scheduler
+    from venue_data_watcher import venue_data_watcher
+    from venue_data_reader import venue_reader
+
     return {
         "api_version": "2.0.0",
         "environment": os.environ.get("ENVIRONMENT", "development"),
         "services": {
             "database": db_status,
             "database_tables": table_count,
+            "database_pool": db_manager.get_pool_stats(),
             "redis": redis_status,
-            "soundtrack_api": soundtrack_status
+            "soundtrack_api": soundtrack_status,
+            "soundtrack_scheduler": syb_scheduler.get_stats()
+        },
+        "caches": {
+            "profiles": profile_cache.get_stats(),
+            "venue_data": venue_data_watcher.get_stats(),
+            "issue_index": venue_reader.issue_index.get_stats(),
+            "caller_index": venue_reader.caller_index.get_stats(),
+            "prompt_contexts": venue_reader.prompt_contexts.get_stats()
         },
         "features": {
             "venues": table_count > 0,
@@ -1125,15 +1214,16 @@ async def test_soundtrack_message(message: Dict[str, Any]):
 @app.get("/api/v1/venues")
 async def get_venues():
     """Get all venues"""
-    conn = get_db_connection()
-    if not conn:
+    from database import db_manager
+    if not await asyncio.to_thread(db_manager.ensure_connection):
         raise HTTPException(status_code=503, detail="Database not available")
     
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor) if RealDictCursor else conn.cursor()
+    def fetch_venues(cursor):
         cursor.execute("SELECT * FROM venues ORDER BY id")
-        venues = cursor.fetchall()
-        cursor.close()
+        return cursor.fetchall()
+    
+    try:
+        venues = await db_manager.run_async(fetch_venues)
         
         return {
             "count": len(venues),
@@ -1173,6 +1263,44 @@ async def import_sample_venues():
         logger.error(f"Failed to import sample venues: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/v1/export/{dataset}")
+async def export_catalog(dataset: str, request: Request, format: str = "csv", start: int = 0):
+    """
+    Stream the venue catalog as CSV or NDJSON
+    dataset: venues (one row per venue) or contacts (one row per contact, Brevo columns)
+    start: rows to skip, to resume an interrupted download
+    Requires EXPORT_API_KEY as X-API-Key or Authorization: Bearer
+    """
+    from app.core.export_auth import EXPORT_API_KEY, export_key_from, export_key_valid
+    from catalog_export import (
+        CONTACT_FIELDS, MEDIA_TYPES, VENUE_FIELDS,
+        encode_rows, gzip_chunks, iter_contact_rows, iter_venue_rows
+    )
+    from venue_data_reader import venue_reader
+
+    if not EXPORT_API_KEY:
+        raise HTTPException(status_code=503, detail="Exports disabled: EXPORT_API_KEY not configured")
+    if not export_key_valid(export_key_from(request.headers)):
+        raise HTTPException(status_code=401, detail="Invalid or missing API key", headers={"WWW-Authenticate": "Bearer"})
+
+    exports = {
+        "venues": (iter_venue_rows, VENUE_FIELDS),
+        "contacts": (iter_contact_rows, CONTACT_FIELDS),
+    }
+    if dataset not in exports:
+        raise HTTPException(status_code=404, detail=f"Unknown export: {dataset}")
+    if format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+
+    iter_rows, fieldnames = exports[dataset]
+    # Snapshot the list so a hot reload mid-export can't mix two versions
+    chunks = encode_rows(iter_rows(list(venue_reader.get_all_venues())), format, fieldnames, start=max(start, 0))
+    headers = {"Content-Disposition": f'attachment; filename="{dataset}.{format}"'}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[format], headers=headers)
+
 # Add webhook routes
 try:
     # Try simple webhooks first (no database dependencies)
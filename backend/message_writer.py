@@ -0,0 +1,345 @@
+"""
+Write-behind persistence for conversation messages
+Buffers message rows and conversation upserts and flushes them to PostgreSQL
+in one transaction per batch instead of one transaction per message
+"""
+
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+# Flush when this many rows are pending, or after this many milliseconds
+MESSAGE_FLUSH_BATCH_SIZE = int(os.environ.get('MESSAGE_FLUSH_BATCH_SIZE', '500'))
+MESSAGE_FLUSH_INTERVAL_MS = int(os.environ.get('MESSAGE_FLUSH_INTERVAL_MS', '250'))
+# Above this many pending rows, enqueue() dead-letters new rows instead of queueing them
+MESSAGE_MAX_PENDING = int(os.environ.get('MESSAGE_MAX_PENDING', '10000'))
+# Failed flushes a row goes through before it is dead-lettered
+MESSAGE_MAX_FLUSH_ATTEMPTS = int(os.environ.get('MESSAGE_MAX_FLUSH_ATTEMPTS', '5'))
+
+
+def _is_data_error(error: Exception) -> bool:
+    """True when PostgreSQL rejected the rows themselves, so retrying can't help"""
+    try:
+        import psycopg2
+    except ImportError:
+        return False
+    return isinstance(error, (psycopg2.DataError, psycopg2.IntegrityError))
+
+
+class MessageWriteBuffer:
+    """
+    Write-behind buffer in front of DatabaseManager.
+
+    Delivery is at-least-once: a failed flush puts its rows back at the head
+    of the queue and the next flush retries them. Messages are idempotent on
+    external_id, so a retried batch never duplicates rows.
+
+    Rows that can't be written are dead-lettered (logged with their content
+    and kept in dead_letters) instead of blocking the queue:
+    - a batch PostgreSQL rejects as bad data is split until the offending
+      row is isolated; the rest of the batch is written
+    - a row still failing after max_attempts flushes
+    - a row enqueued while max_pending rows are already waiting
+    """
+
+    def __init__(
+        self,
+        db_manager=None,
+        batch_size: int = MESSAGE_FLUSH_BATCH_SIZE,
+        flush_interval_ms: int = MESSAGE_FLUSH_INTERVAL_MS,
+        max_pending: int = MESSAGE_MAX_PENDING,
+        max_attempts: int = MESSAGE_MAX_FLUSH_ATTEMPTS
+    ):
+        self._db_manager = db_manager
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Most recent rows given up on: (row, reason)
+        self.dead_letters: deque = deque(maxlen=1000)
+
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "dead_lettered": 0,
+            "rejected": 0,
+            "last_flush_ms": 0.0,
+            "last_batch_size": 0
+        }
+        # Registered once per buffer; drains only if the flusher is still running
+        atexit.register(self._stop_at_exit)
+
+    @property
+    def db_manager(self):
+        if self._db_manager is None:
+            from database import db_manager
+            self._db_manager = db_manager
+        return self._db_manager
+
+    def start(self):
+        """Start the background flusher thread"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="message-writer", daemon=True)
+            self._thread.start()
+        logger.info(
+            f"Message write-behind started (batch {self.batch_size}, "
+            f"interval {int(self.flush_interval * 1000)}ms)"
+        )
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the flusher and drain everything still pending"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+        self._thread = None
+
+        deadline = time.time() + timeout
+        while self.pending_count() and time.time() < deadline:
+            if not self.flush():
+                time.sleep(0.2)
+        if self.pending_count():
+            logger.error(f"Message writer stopped with {self.pending_count()} unflushed rows")
+        else:
+            logger.info("Message write-behind drained")
+
+    def _stop_at_exit(self):
+        if self._thread is not None:
+            self.stop()
+
+    def enqueue(
+        self,
+        channel: str,
+        user_phone: str,
+        user_name: str,
+        message_id: str,
+        content: str,
+        direction: str = "inbound",
+        message_type: str = "text",
+        ai_response: bool = False,
+        metadata: Dict = None
+    ):
+        """
+        Queue a message for persistence (same arguments as DatabaseManager.store_message).
+        Never writes on the caller's thread.
+
+        Returns:
+            False if the backlog was full and the row was dead-lettered
+        """
+        row = {
+            "channel": channel,
+            "user_phone": user_phone,
+            "user_name": user_name,
+            "message_id": message_id,
+            "content": content,
+            "direction": direction,
+            "message_type": message_type,
+            "ai_response": ai_response,
+            "metadata": metadata or {},
+            # Captured now so a batch keeps real message order, not flush time
+            "created_at": datetime.utcnow()
+        }
+
+        with self._lock:
+            pending = len(self._pending)
+            accepted = pending < self.max_pending
+            if accepted:
+                self._pending.append(row)
+                self.stats["enqueued"] += 1
+                pending += 1
+            else:
+                self.stats["rejected"] += 1
+
+        if self._thread is None:
+            self.start()
+
+        if not accepted:
+            # The flusher is already behind; writing inline would stall the webhook too
+            self._dead_letter(row, f"backlog full ({pending} rows pending)")
+            self._wakeup.set()
+            return False
+        if pending >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> bool:
+        """
+        Write one batch of pending rows.
+
+        Returns:
+            True if the batch was written (or nothing was pending); rows
+            dead-lettered as bad data don't fail the batch
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending[:self.batch_size]
+                del self._pending[:self.batch_size]
+            if not batch:
+                return True
+
+            started = time.perf_counter()
+            try:
+                written = self._write_rows(batch)
+            except Exception as e:
+                retry = []
+                for row in batch:
+                    row["attempts"] = row.get("attempts", 0) + 1
+                    if row["attempts"] < self.max_attempts:
+                        retry.append(row)
+                    else:
+                        self._dead_letter(row, f"failed {row['attempts']} flushes: {e}")
+                with self._lock:
+                    self._pending[:0] = retry
+                    self.stats["failed_flushes"] += 1
+                logger.error(f"Message batch flush failed ({len(retry)} of {len(batch)} rows re-queued): {e}")
+                return False
+
+            self.stats["flushes"] += 1
+            self.stats["written"] += written
+            self.stats["last_batch_size"] = len(batch)
+            self.stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            return True
+
+    def _run(self):
+        backoff = self.flush_interval
+        while not self._stopping.is_set():
+            self._wakeup.wait(backoff)
+            self._wakeup.clear()
+            while self.pending_count():
+                if not self.flush():
+                    # Database trouble - back off instead of hammering it
+                    backoff = min(backoff * 2, 30)
+                    break
+                backoff = self.flush_interval
+                if self.pending_count() < self.batch_size:
+                    break
+
+    def _write_rows(self, batch: List[Dict[str, Any]]) -> int:
+        """
+        Write a batch, halving it on data errors until the rejected rows are
+        isolated and dead-lettered. Other errors propagate so the caller
+        retries the whole batch (already-written halves are idempotent).
+
+        Returns:
+            Rows written
+        """
+        try:
+            self._write_batch(batch)
+            return len(batch)
+        except Exception as e:
+            if not _is_data_error(e):
+                raise
+            if len(batch) == 1:
+                self._dead_letter(batch[0], f"rejected by database: {e}")
+                return 0
+        middle = len(batch) // 2
+        return self._write_rows(batch[:middle]) + self._write_rows(batch[middle:])
+
+    def _dead_letter(self, row: Dict[str, Any], reason: str):
+        """Give up on a row; the log line keeps it recoverable"""
+        with self._lock:
+            self.dead_letters.append((row, reason))
+            self.stats["dead_lettered"] += 1
+        logger.error(
+            f"Message {row['message_id']} dead-lettered ({reason}): "
+            f"{json.dumps(row, default=str, ensure_ascii=False)}"
+        )
+
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        """Upsert conversations and insert messages for a batch in one transaction"""
+        from psycopg2.extras import Json, execute_values
+
+        # Conversation per (user_phone, channel); first row supplies name/metadata
+        conversation_keys: Dict[tuple, Dict[str, Any]] = {}
+        for row in batch:
+            conversation_keys.setdefault((row["user_phone"], row["channel"]), row)
+
+        with self.db_manager.get_cursor(dict_cursor=False) as cursor:
+            if cursor is None:
+                raise RuntimeError("Database not available")
+
+            existing = execute_values(cursor, """
+                SELECT DISTINCT ON (c.user_phone, c.channel) c.id, c.user_phone, c.channel
+                FROM conversations c
+                JOIN (VALUES %s) AS k(user_phone, channel)
+                  ON c.user_phone = k.user_phone AND c.channel = k.channel
+                WHERE c.status = 'active'
+                ORDER BY c.user_phone, c.channel, c.created_at DESC
+            """, list(conversation_keys.keys()), fetch=True)
+            conversation_ids = {(phone, channel): conv_id for conv_id, phone, channel in existing}
+
+            if conversation_ids:
+                cursor.execute("""
+                    UPDATE conversations
+                    SET updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ANY(%s)
+                """, (list(conversation_ids.values()),))
+
+            missing = [
+                (row["channel"], row["user_phone"], row["user_name"], Json(row["metadata"]))
+                for key, row in conversation_keys.items()
+                if key not in conversation_ids
+            ]
+            if missing:
+                created = execute_values(cursor, """
+                    INSERT INTO conversations (channel, user_phone, user_name, metadata)
+                    VALUES %s
+                    RETURNING id, user_phone, channel
+                """, missing, fetch=True)
+                for conv_id, phone, channel in created:
+                    conversation_ids[(phone, channel)] = conv_id
+
+            execute_values(cursor, """
+                INSERT INTO messages
+                (conversation_id, external_id, direction, message_type,
+                 content, ai_response, metadata, created_at)
+                VALUES %s
+                ON CONFLICT (external_id) DO NOTHING
+            """, [
+                (
+                    conversation_ids[(row["user_phone"], row["channel"])],
+                    row["message_id"],
+                    row["direction"],
+                    row["message_type"],
+                    row["content"],
+                    row["ai_response"],
+                    Json(row["metadata"]),
+                    row["created_at"]
+                )
+                for row in batch
+            ], page_size=len(batch))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pending": self.pending_count(),
+            "running": bool(self._thread and self._thread.is_alive())
+        }
+
+
+# Global instance
+message_writer = MessageWriteBuffer()
@@ -8,7 +8,6 @@ import re
 import logging
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
-from datetime import datetime, time
 
 logger = logging.getLogger(__name__)
 
@@ -70,18 +69,19 @@ class MusicDesignReader:
         return designs
     
     def get_current_schedule(self, property_name: str, zone_name: str) -> Optional[Dict]:
-        """Get current schedule for a zone based on time and day"""
-        now = datetime.now()
-        current_time = now.time()
-        day_type = 'weekend' if now.weekday() >= 4 else 'weekday'
+        """Get current schedule for a zone based on time and day (venue local time)"""
+        from schedule_engine import schedule_engine
+        
+        intended = schedule_engine.intended(property_name, zone_name)
+        if intended is None or not intended.get('scheduled'):
+            return None
         
-        # This would return the active schedule
-        # For now, return a sample structure
         return {
-            'playlist': 'Afternoon Energy',
-            'energy': 'Medium',
-            'volume': '65%',
-            'notes': 'Upbeat pop, tropical house'
+            'playlist': intended['playlist'],
+            'energy': intended.get('energy'),
+            'volume': intended.get('volume'),
+            'notes': intended.get('notes'),
+            'time': f"{intended['start']}-{intended['end']}",
         }
     
     def get_zone_settings(self, property_name: str, zone_name: str) -> Dict:
@@ -124,31 +124,12 @@ class MusicDesignReader:
         return similar
     
     def get_schedule_for_time(self, property_name: str, zone_name: str, check_time: str = None) -> Optional[Dict]:
-        """Get what should be playing at a specific time"""
-        # Parse time and determine schedule
-        # This is simplified - would need full parsing
-        
-        schedules = {
-            'Drift Bar': {
-                'weekday': [
-                    {'start': '11:00', 'end': '14:00', 'playlist': 'Chill Lunch Vibes', 'volume': '60%'},
-                    {'start': '14:00', 'end': '18:00', 'playlist': 'Afternoon Energy', 'volume': '65%'},
-                    {'start': '18:00', 'end': '22:00', 'playlist': 'Sunset Sessions', 'volume': '65%'},
-                    {'start': '22:00', 'end': '02:00', 'playlist': 'Late Night Cocktails', 'volume': '55%'}
-                ],
-                'weekend': [
-                    {'start': '11:00', 'end': '14:00', 'playlist': 'Weekend Brunch', 'volume': '65%'},
-                    {'start': '14:00', 'end': '18:00', 'playlist': 'Pool Party Vibes', 'volume': '70%'},
-                    {'start': '18:00', 'end': '22:00', 'playlist': 'Golden Hour', 'volume': '70%'},
-                    {'start': '22:00', 'end': '03:00', 'playlist': 'Weekend Nights', 'volume': '60%'}
-                ]
-            }
-        }
+        """Get what should be playing at a specific time ('HH:MM' venue local time, default now)"""
+        from schedule_engine import schedule_engine
         
-        # Return appropriate schedule
-        if zone_name in schedules:
-            return schedules[zone_name]
-        return None
+        if check_time:
+            return schedule_engine.intended_local(property_name, zone_name, check_time)
+        return schedule_engine.intended(property_name, zone_name)
     
     def suggest_change_for_issue(self, issue: str, zone: str) -> str:
         """Suggest a change based on the issue reported"""
@@ -157,7 +138,7 @@ class MusicDesignReader:
         if 'loud' in issue_lower:
             current = self.get_current_schedule('Hilton Pattaya', zone)
             if current:
-                return f"Current volume is {current.get('volume', 'unknown')}. Suggest reducing by 10%."
+                return f"Current volume is {current.get('volume') or 'unknown'}. Suggest reducing by 10%."
         
         if 'energy' in issue_lower or 'boring' in issue_lower:
             return "Suggest switching to higher energy playlist or refreshing current playlist with new tracks."
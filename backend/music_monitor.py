@@ -3,6 +3,7 @@
 Real-time music monitoring - compares intended design with actual playing
 """
 
+import time
 import logging
 from datetime import datetime
 from typing import Dict, Optional, Tuple
@@ -13,6 +14,8 @@ logger = logging.getLogger(__name__)
 class MusicMonitor:
     """Monitor music in real-time and compare with intended design"""
     
+    SCHEDULE_MISS_TTL = 600  # Re-ask SYB about a zone without a schedule after 10 minutes
+    
     def __init__(self):
         """Initialize with both data sources"""
         from music_design_reader import music_reader
@@ -30,6 +33,9 @@ class MusicMonitor:
             self.syb_api = None
             self.api_available = False
             logger.warning("Soundtrack API not available")
+        
+        # Zones SYB had no schedule for: zone key -> monotonic time of the lookup
+        self._schedule_misses: Dict[Tuple[str, str], float] = {}
     
     def check_zone_status(self, property_name: str, zone_name: str) -> Dict:
         """
@@ -72,47 +78,41 @@ class MusicMonitor:
             }
     
     def get_intended_music(self, property_name: str, zone_name: str) -> Dict:
-        """Get what should be playing based on design"""
+        """Get what should be playing based on the zone's schedule (SYB or design file)"""
+        from schedule_engine import schedule_engine, zone_key
+        
         now = datetime.now()
-        current_time = now.strftime("%H:%M")
-        day_type = 'weekend' if now.weekday() >= 4 else 'weekday'
+        intended = schedule_engine.intended(property_name, zone_name)
+        if intended is None and self.api_available:
+            key = zone_key(property_name, zone_name)
+            missed = self._schedule_misses.get(key)
+            if missed is None or time.monotonic() - missed >= self.SCHEDULE_MISS_TTL:
+                # Not in the design file - compile the zone's SYB schedule
+                self.get_zone_schedule(property_name, zone_name)
+                intended = schedule_engine.intended(property_name, zone_name)
+                if intended is None:
+                    # No SYB schedule either; don't query SYB on every check
+                    self._schedule_misses[key] = time.monotonic()
+                else:
+                    self._schedule_misses.pop(key, None)
         
-        # This reads from music_design.md
-        # Would parse the schedule for current time/day
-        intended = {
+        result = {
             'playlist': 'Unknown',
             'energy': 'Unknown'
         }
-        
-        # Example logic (simplified) with SYB volume levels (0-16)
-        if zone_name == 'Drift Bar':
-            hour = now.hour
-            if 11 <= hour < 14:
-                intended['playlist'] = 'Chill Lunch Vibes'
-                intended['energy'] = 'Low-Medium'
-                intended['volume_level'] = 10  # Medium volume
-            elif 14 <= hour < 18:
-                intended['playlist'] = 'Afternoon Energy'
-                intended['energy'] = 'Medium'
-                intended['volume_level'] = 11  # Medium-high
-            elif 18 <= hour < 22:
-                intended['playlist'] = 'Sunset Sessions'
-                intended['energy'] = 'Medium'
-                intended['volume_level'] = 11  # Medium-high
-            elif hour >= 22 or hour < 2:
-                intended['playlist'] = 'Late Night Cocktails'
-                intended['energy'] = 'Low-Medium'
-                intended['volume_level'] = 9  # Reduced for late night
-        elif zone_name == 'Lobby':
-            # Lobby typically quieter
-            intended['playlist'] = 'Lobby Ambiance'
-            intended['energy'] = 'Low'
-            intended['volume_level'] = 7  # Low volume for lobby
-        
-        intended['time'] = current_time
-        intended['day_type'] = day_type
-        
-        return intended
+        if intended:
+            if intended.get('playlist'):
+                result['playlist'] = intended['playlist']
+            if intended.get('energy'):
+                result['energy'] = intended['energy']
+            if intended.get('volume') is not None:
+                result['volume_level'] = intended['volume']  # SYB volume levels (0-16)
+            result['scheduled'] = intended.get('scheduled', False)
+        
+        result['time'] = now.strftime("%H:%M")
+        result['day_type'] = 'weekend' if now.weekday() >= 4 else 'weekday'
+        
+        return result
     
     def get_zone_schedule(self, property_name: str, zone_name: str) -> Dict:
         """Get the weekly schedule for a SYB zone"""
@@ -180,6 +180,9 @@ class MusicMonitor:
                 zone_data = result['data'].get('node', {})
                 schedule_data = zone_data.get('soundtrackSchedule', {})
                 
+                from schedule_engine import schedule_engine
+                schedule_engine.load_syb_zone(property_name, zone_name, zone_data)
+                
                 if schedule_data and schedule_data.get('scheduleItems'):
                     # Parse schedule into readable format
                     schedule_by_day = {}
@@ -0,0 +1,193 @@
+"""
+User profile cache for LINE and WhatsApp senders
+Keeps display name, language and picture URL per platform user ID so that
+webhook handlers don't hit the LINE profile API on every inbound event
+"""
+
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+class ProfileCache:
+    """Bounded TTL cache of platform user ID -> profile with negative caching"""
+
+    def __init__(
+        self,
+        max_entries: int = 5000,
+        ttl: int = 6 * 3600,
+        negative_ttl: int = 300,
+        backend=None,
+        key_prefix: str = "profile"
+    ):
+        """
+        Args:
+            max_entries: Maximum profiles kept in memory (LRU eviction)
+            ttl: Seconds a fetched profile stays valid
+            negative_ttl: Seconds a failed lookup is remembered
+            backend: Optional persistent store with Redis-style get/setex
+            key_prefix: Key prefix used in the persistent store
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.backend = backend
+        self.key_prefix = key_prefix
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "negative_hits": 0,
+            "backend_hits": 0,
+            "misses": 0,
+            "evictions": 0
+        }
+
+    def _key(self, platform: str, user_id: str) -> str:
+        return f"{platform.lower()}:{user_id}"
+
+    def attach_backend(self, backend):
+        """Attach a persistent store (e.g. a Redis client) after startup"""
+        self.backend = backend
+        if backend is not None:
+            logger.info("Profile cache persistent backend attached")
+
+    def get(self, platform: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached profile.
+
+        Returns:
+            Profile dict, or None on a miss. Negative entries are returned
+            as a profile with ``error`` set and ``display_name`` None, so
+            callers can skip the upstream call without special casing.
+        """
+        if not user_id:
+            return None
+
+        key = self._key(platform, user_id)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                if entry["expires_at"] > now:
+                    self._entries.move_to_end(key)
+                    if entry["profile"].get("error"):
+                        self.stats["negative_hits"] += 1
+                    else:
+                        self.stats["hits"] += 1
+                    return entry["profile"]
+                del self._entries[key]
+
+        profile = self._backend_get(key)
+        if profile is not None:
+            self.stats["backend_hits"] += 1
+            self._store(key, profile, self.ttl)
+            return profile
+
+        self.stats["misses"] += 1
+        return None
+
+    def set(
+        self,
+        platform: str,
+        user_id: str,
+        display_name: Optional[str] = None,
+        language: Optional[str] = None,
+        picture_url: Optional[str] = None,
+        persist: bool = True
+    ):
+        """Cache a successfully resolved profile"""
+        if not user_id:
+            return
+
+        profile = {
+            "display_name": display_name,
+            "language": language,
+            "picture_url": picture_url,
+            "fetched_at": time.time()
+        }
+        key = self._key(platform, user_id)
+        self._store(key, profile, self.ttl)
+        if persist:
+            self._backend_set(key, profile, self.ttl)
+
+    def set_negative(self, platform: str, user_id: str):
+        """Remember a failed lookup so we don't retry it on every message"""
+        if not user_id:
+            return
+
+        profile = {
+            "display_name": None,
+            "language": None,
+            "picture_url": None,
+            "fetched_at": time.time(),
+            "error": True
+        }
+        # Negative entries stay in memory only - a transient API error
+        # shouldn't be shared with other workers
+        self._store(self._key(platform, user_id), profile, self.negative_ttl)
+
+    def display_name(self, platform: str, user_id: str, default: str = "Customer") -> str:
+        """Shortcut for the cached display name with a fallback"""
+        profile = self.get(platform, user_id)
+        if profile and profile.get("display_name"):
+            return profile["display_name"]
+        return default
+
+    def invalidate(self, platform: str, user_id: str):
+        """Drop a profile from memory"""
+        with self._lock:
+            self._entries.pop(self._key(platform, user_id), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache statistics for monitoring"""
+        lookups = self.stats["hits"] + self.stats["negative_hits"] + self.stats["backend_hits"] + self.stats["misses"]
+        served = lookups - self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_rate": round(served / lookups * 100, 2) if lookups else 0,
+            "persistent_backend": self.backend is not None
+        }
+
+    def clear(self):
+        """Clear the in-memory cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key: str, profile: Dict[str, Any], ttl: int):
+        with self._lock:
+            self._entries[key] = {"profile": profile, "expires_at": time.time() + ttl}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def _backend_get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.backend is None:
+            return None
+        try:
+            data = self.backend.get(f"{self.key_prefix}:{key}")
+            return json.loads(data) if data else None
+        except Exception as e:
+            logger.warning(f"Profile cache backend read failed: {e}")
+            return None
+
+    def _backend_set(self, key: str, profile: Dict[str, Any], ttl: int):
+        if self.backend is None:
+            return
+        try:
+            self.backend.setex(f"{self.key_prefix}:{key}", ttl, json.dumps(profile))
+        except Exception as e:
+            logger.warning(f"Profile cache backend write failed: {e}")
+
+
+# Global instance
+profile_cache = ProfileCache()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Prebuilt per-venue prompt context blocks
+Each venue's catalog facts (zones, platform, contract, price, contacts,
+notes, recent issues) are formatted once when venue_data.md is (re)loaded,
+with a token count per section, so building a prompt at message time is a
+dict lookup and a few string joins of known size.
+
+Block text depends only on the catalog entry (no timestamps, no
+per-message values), so the same venue always produces the same bytes and
+provider prompt caching can reuse it. Per-message values such as match
+confidence belong after the block, never inside it.
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
+# Token budget for one venue block when the caller doesn't give one
+DEFAULT_BUDGET = int(os.environ.get('PROMPT_CONTEXT_BUDGET', '300'))
+
+# Most recent issues kept in a block
+MAX_ISSUES = 5
+
+# Catalog values that mean "not known"
+PLACEHOLDERS = {'', '—', '-', 'N/A', 'Unknown', 'No recorded issues yet.'}
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Token count of text: exact with tiktoken installed, otherwise an
+    estimate (4 ASCII characters per token, one token per other character,
+    which errs high for Thai and emoji)
+    """
+    global _encoding, HAS_TIKTOKEN
+    if HAS_TIKTOKEN:
+        try:
+            if _encoding is None:
+                _encoding = tiktoken.get_encoding(os.environ.get('PROMPT_TOKEN_ENCODING', 'o200k_base'))
+            return len(_encoding.encode(text))
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable, estimating token counts: {e}")
+            HAS_TIKTOKEN = False
+    ascii_chars = sum(1 for char in text if ord(char) < 128)
+    return (ascii_chars + 3) // 4 + len(text) - ascii_chars
+
+
+def _value(venue: Dict, *keys: str) -> Optional[str]:
+    """First catalog value under keys that isn't a placeholder (both catalog dict shapes)"""
+    for key in keys:
+        value = venue.get(key)
+        if isinstance(value, (list, tuple)):
+            value = ', '.join(str(item) for item in value if item)
+        value = str(value).strip() if value is not None else ''
+        if value not in PLACEHOLDERS:
+            return value
+    return None
+
+
+class VenueContext:
+    """
+    Context block for one venue: sections in priority order, each a list
+    of lines with a token count per line. The first section is the
+    identity + account facts and is always kept.
+    """
+
+    def __init__(self, name: str, sections: List[Tuple[str, List[str]]]):
+        self.name = name
+        self.sections = [(title, lines, [count_tokens(line) + 1 for line in lines]) for title, lines in sections if lines]
+        self.text = '\n'.join(line for _, lines, _ in self.sections for line in lines)
+        self.tokens = sum(sum(counts) for _, _, counts in self.sections)
+        self._fitted: Dict[int, Tuple[str, int]] = {}
+
+    def fit(self, budget: Optional[int] = None) -> Tuple[str, int]:
+        """
+        (text, tokens) within budget. Whole sections are kept in priority
+        order; the first that doesn't fit keeps as many of its leading
+        lines (header + items) as fit, and everything after it is dropped.
+        Results are memoized per budget, so the text for a budget is stable.
+        """
+        budget = DEFAULT_BUDGET if budget is None else budget
+        if self.tokens <= budget:
+            return self.text, self.tokens
+        if budget in self._fitted:
+            return self._fitted[budget]
+
+        kept: List[str] = []
+        used = 0
+        for position, (_, lines, counts) in enumerate(self.sections):
+            if position == 0 or used + sum(counts) <= budget:
+                kept.extend(lines)
+                used += sum(counts)
+                continue
+            # Partial section: header plus at least one item, or nothing
+            take = 0
+            while take < len(lines) and used + sum(counts[:take + 1]) <= budget:
+                take += 1
+            if take > 1:
+                kept.extend(lines[:take])
+                used += sum(counts[:take])
+            break
+
+        fitted = ('\n'.join(kept), used)
+        self._fitted[budget] = fitted
+        return fitted
+
+
+def build_venue_context(venue: Dict) -> Optional[VenueContext]:
+    """
+    Block for a catalog entry, from either venue_data_reader's dict
+    (property_name, zone_names, ...) or venue_manager's (name, zones, ...)
+    """
+    name = _value(venue, 'property_name', 'name')
+    if not name:
+        return None
+
+    account = [f"Venue: {name}"]
+    facts = [
+        ('Business Type', ('business_type',)),
+        ('Zones', ('zone_names', 'zones')),
+        ('Total Zones', ('zone_count',)),
+        ('Platform', ('music_platform', 'platform')),
+        ('Hardware', ('hardware_type',)),
+        ('Contract Start', ('contract_start',)),
+        ('Contract End', ('contract_end',)),
+        ('Annual Price per Zone', ('annual_price_per_zone', 'annual_price')),
+    ]
+    for label, keys in facts:
+        value = _value(venue, *keys)
+        if label == 'Total Zones' and not value and isinstance(venue.get('zones'), list) and venue['zones']:
+            value = str(len(venue['zones']))
+        if value:
+            account.append(f"{label}: {value}")
+
+    contacts = ['Contacts:']
+    for contact in venue.get('contacts', []):
+        contact_name = _value(contact, 'name')
+        if contact_name:
+            title = _value(contact, 'title')
+            contacts.append(f"- {contact_name} ({title})" if title else f"- {contact_name}")
+
+    notes = ['Special Notes:']
+    notes.extend(f"- {note.strip()}" for note in venue.get('special_notes', []) if (note or '').strip() not in PLACEHOLDERS)
+
+    # Issue history is appended in date order; newest first so truncation keeps the latest
+    issues = ['Recent Issues:']
+    recent = [issue for issue in venue.get('issue_history', []) if (issue.get('issue') or '').strip() not in PLACEHOLDERS]
+    for issue in reversed(recent[-MAX_ISSUES:]):
+        issues.append(f"- {issue.get('date')}: {issue['issue'].strip()}")
+
+    sections = [('account', account)]
+    sections.extend((title, lines) for title, lines in (('contacts', contacts), ('notes', notes), ('issues', issues)) if len(lines) > 1)
+    return VenueContext(name, sections)
+
+
+class PromptContextCache:
+    """venue name (lowercase) -> VenueContext, rebuilt with the catalog"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blocks: Dict[str, VenueContext] = {}
+        self.stats = {'builds': 0, 'reused': 0, 'hits': 0, 'misses': 0}
+
+    def rebuild(self, venues: Iterable[Dict]) -> int:
+        """Build blocks for a venue list; unchanged blocks keep their memoized fits"""
+        previous = self._blocks
+        blocks: Dict[str, VenueContext] = {}
+        reused = 0
+        for venue in venues:
+            block = build_venue_context(venue)
+            if not block:
+                continue
+            key = block.name.lower()
+            old = previous.get(key)
+            if old is not None and old.text == block.text:
+                block = old
+                reused += 1
+            blocks[key] = block
+
+        with self._lock:
+            self._blocks = blocks
+            self.stats['builds'] += 1
+            self.stats['reused'] += reused
+        return len(blocks)
+
+    def get(self, venue_name: Optional[str]) -> Optional[VenueContext]:
+        block = self._blocks.get((venue_name or '').strip().lower())
+        self.stats['hits' if block else 'misses'] += 1
+        return block
+
+    def render(self, venue_name: Optional[str], budget: Optional[int] = None) -> Tuple[str, int]:
+        """(text, tokens) of a venue's block within budget; ('', 0) for unknown venues"""
+        block = self.get(venue_name)
+        return block.fit(budget) if block else ('', 0)
+
+    def get_stats(self) -> Dict:
+        blocks = list(self._blocks.values())
+        return {
+            **self.stats,
+            'venues': len(blocks),
+            'tokens': sum(block.tokens for block in blocks),
+            'max_tokens': max((block.tokens for block in blocks), default=0),
+            'tokenizer': 'tiktoken' if HAS_TIKTOKEN else 'estimate',
+        }
+
+
+def prompt_part(text: str) -> Tuple[str, int]:
+    """(text, tokens) for a prompt part that is built once and reused"""
+    return text, count_tokens(text)
+
+
+def assemble(*parts) -> Tuple[str, int]:
+    """
+    Join prompt parts with blank lines, skipping empty ones; (text, tokens)
+    Parts are (text, tokens) pairs (prebuilt: prompt_part, VenueContext.fit)
+    or plain strings, which are counted here, so keep those to the short
+    per-message tail.
+    """
+    texts, tokens = [], 0
+    for part in parts:
+        text, count = part if isinstance(part, tuple) else (part, None)
+        if not text:
+            continue
+        texts.append(text)
+        tokens += count_tokens(text) if count is None else count
+    return '\n\n'.join(texts), tokens + 2 * max(len(texts) - 1, 0)
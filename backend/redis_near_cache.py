@@ -0,0 +1,157 @@
+"""
+Process-local near-cache for hot Redis keys (synchronous redis client)
+Keeps copies of values read from Redis and drops them when Redis reports the
+key changed, using Redis 6 client-side caching in broadcast mode: a listener
+thread subscribes to __redis__:invalidate and a second connection runs
+CLIENT TRACKING ON REDIRECT <listener> BCAST PREFIX ...
+
+Without tracking (Redis < 6, CLIENT disabled, listener dropped) entries fall
+back to a short local TTL and tracking is retried in the background.
+The local store is app.core.near_cache_store.NearCacheStore, shared with
+the app's asyncio near-cache.
+Opt in with REDIS_NEAR_CACHE=1
+"""
+
+import os
+import logging
+import threading
+from typing import Any, Iterable, Optional
+
+from app.core.near_cache_store import INVALIDATE_CHANNEL, LISTEN_POLL_INTERVAL, NearCacheStore, is_missing
+
+logger = logging.getLogger(__name__)
+
+REDIS_NEAR_CACHE = os.environ.get('REDIS_NEAR_CACHE', '').lower() in ('1', 'true', 'yes')
+NEAR_CACHE_FALLBACK_TTL = float(os.environ.get('NEAR_CACHE_FALLBACK_TTL', '2'))
+
+
+class RedisNearCache(NearCacheStore):
+    """Near-cache for a sync redis.Redis, invalidated from a listener thread"""
+
+    def __init__(
+        self,
+        client,
+        prefixes: Iterable[str],
+        max_items: int = 10000,
+        tracking_ttl: float = 300.0,
+        fallback_ttl: float = NEAR_CACHE_FALLBACK_TTL,
+        retry_interval: float = 30.0,
+        listen_timeout: float = LISTEN_POLL_INTERVAL,
+        name: str = "redis"
+    ):
+        """
+        Args:
+            client: redis.Redis whose connection pool the tracking
+                connections come from
+            prefixes: Key prefixes to cache and track
+            max_items: Keys kept locally (LRU)
+            tracking_ttl: Safety cap on entry age while tracking is active
+            fallback_ttl: Entry age without tracking
+            retry_interval: Seconds between attempts to re-enable tracking
+            listen_timeout: Longest single wait on the subscriber; the
+                pool's socket_timeout doesn't apply to it
+            name: Name used in logs and stats
+        """
+        super().__init__(prefixes, max_items, tracking_ttl, fallback_ttl, name)
+        self.client = client
+        self.retry_interval = retry_interval
+        self.listen_timeout = listen_timeout
+
+        self._subscriber = None
+        self._tracker = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def get(self, key: str, loader) -> Any:
+        """
+        Local copy of key, or loader(key) (the Redis read) on a miss.
+        A value invalidated while loader ran is returned but not kept.
+        """
+        value = super().get(key)
+        if not is_missing(value):
+            return value
+        token = self.begin_fetch(key)
+        value = loader(key)
+        self.store(key, value, token)
+        return value
+
+    # Tracking
+
+    def start(self):
+        """Enable server-assisted invalidation, or fall back to TTL mode"""
+        self._stopping.clear()
+        try:
+            self._enable_tracking()
+        except Exception as e:
+            self.stats['tracking_failures'] += 1
+            logger.warning(f"{self.name} near-cache: CLIENT TRACKING unavailable, using {self.fallback_ttl}s TTL: {e}")
+            self._close_connections()
+            self.mode = "ttl"
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-near-cache", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._close_connections()
+        self.invalidate(None)
+        self.mode = "off"
+
+    def _enable_tracking(self):
+        pool = self.client.connection_pool
+        self._subscriber = pool.get_connection("_")
+        self._subscriber.send_command("CLIENT", "ID")
+        client_id = self._subscriber.read_response()
+        self._subscriber.send_command("SUBSCRIBE", INVALIDATE_CHANNEL)
+        self._subscriber.read_response()
+
+        self._tracker = pool.get_connection("_")
+        self._tracker.send_command(*self.tracking_command(client_id))
+        self._tracker.read_response()
+
+        self.invalidate(None)
+        self.mode = "tracking"
+        logger.info(f"{self.name} near-cache tracking {len(self.prefixes)} prefixes")
+
+    def _close_connections(self):
+        for attr in ('_subscriber', '_tracker'):
+            connection = getattr(self, attr)
+            if connection is None:
+                continue
+            setattr(self, attr, None)
+            try:
+                # Closing the tracker connection also ends tracking server-side
+                connection.disconnect()
+                self.client.connection_pool.release(connection)
+            except Exception:
+                pass
+
+    def _run(self):
+        while not self._stopping.is_set():
+            if self.mode == "tracking":
+                try:
+                    self._listen()
+                except Exception as e:
+                    if not self._stopping.is_set():
+                        logger.warning(f"{self.name} near-cache lost invalidation stream: {e}")
+                # Missed invalidations can't be replayed - drop everything
+                self.invalidate(None)
+                if self._stopping.is_set():
+                    return
+                self.mode = "ttl"
+                self._close_connections()
+
+            if self._stopping.wait(self.retry_interval):
+                return
+            try:
+                self._enable_tracking()
+            except Exception as e:
+                self.stats['tracking_failures'] += 1
+                logger.debug(f"{self.name} near-cache tracking retry failed: {e}")
+                self._close_connections()
+
+    def _listen(self):
+        while not self._stopping.is_set():
+            # Poll instead of blocking in read_response, which would raise on
+            # the pool's socket_timeout when the keyspace is quiet
+            if self._subscriber.can_read(timeout=self.listen_timeout):
+                self.handle_message(self._subscriber.read_response())
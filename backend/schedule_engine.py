@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Schedule engine: what should be playing in a zone at a given time
+Compiles each zone's weekly schedule (SYB soundtrackSchedule items or the
+design tables in music_design.md) into a sorted interval index over the
+minutes of the week, in the venue's local time:
+
+- Slots that cross midnight are split at midnight (Sunday night wraps to
+  Monday morning).
+- Overlapping slots are clipped so the later-starting slot wins; a slot
+  nested inside a longer one splits it, and the longer one resumes after.
+- intended(venue, zone, when) is a bisect over the zone's slot starts.
+- intended_all(when) answers for every zone at once: all zones' slots live
+  in one flat sorted array (zone n's week is offset by n weeks), local time
+  is converted once per timezone, and a single merge pass walks the array.
+"""
+
+import os
+import re
+import time
+import heapq
+import logging
+import threading
+from bisect import bisect_right
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEZONE = os.environ.get('SCHEDULE_DEFAULT_TIMEZONE', 'Asia/Bangkok')
+
+MINUTES_PER_DAY = 1440
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+DAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+DAY_GROUPS = {
+    'daily': DAYS, 'everyday': DAYS, 'all': DAYS,
+    'weekday': DAYS[:5], 'weekdays': DAYS[:5],
+    'weekend': DAYS[5:], 'weekends': DAYS[5:],
+}
+
+TIME_RANGE = re.compile(r'(\d{1,2}:\d{2})(?::\d{2})?\s*[-–]\s*(\d{1,2}:\d{2})(?::\d{2})?')
+
+ZoneKey = Tuple[str, str]  # (venue, zone), lowercased
+
+
+def zone_key(venue: str, zone: str) -> ZoneKey:
+    return (venue.strip().lower(), zone.strip().lower())
+
+
+def parse_minutes(value: str) -> int:
+    """'09:30' or '09:30:00' -> minutes after midnight ('24:00' = end of day)"""
+    hours, minutes = value.strip().split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def parse_days(value: Any) -> Tuple[str, ...]:
+    """SYB daysOfWeek (['MONDAY', ...]) or a table cell ('Mon, Tue', 'Weekend', 'Mon-Fri')"""
+    if not value:
+        return DAYS
+    if isinstance(value, str):
+        value = [part for part in re.split(r'[,/&]|\band\b', value) if part.strip()]
+
+    days = []
+    for part in value:
+        part = part.strip().lower()
+        if part in DAY_GROUPS:
+            days.extend(DAY_GROUPS[part])
+        elif '-' in part:
+            first, last = (p.strip()[:3] for p in part.split('-', 1))
+            if first in DAYS and last in DAYS:
+                start, end = DAYS.index(first), DAYS.index(last)
+                days.extend(DAYS[(start + i) % 7] for i in range((end - start) % 7 + 1))
+        elif part[:3] in DAYS:
+            days.append(part[:3])
+    return tuple(d for d in DAYS if d in days) or DAYS
+
+
+def parse_volume(value: Any) -> Optional[int]:
+    """'10', '65%', 8 -> int (None when missing)"""
+    if value is None:
+        return None
+    match = re.search(r'\d+', str(value))
+    return int(match.group()) if match else None
+
+
+class ZoneSchedule:
+    """One zone's week as non-overlapping [start, end) minute-of-week slots"""
+
+    def __init__(self, slots: Iterable[Dict], tz: str = DEFAULT_TIMEZONE):
+        """
+        Args:
+            slots: Dicts with days, start, end ('HH:MM'), playlist and
+                optionally volume, energy, notes
+            tz: Venue timezone the times are in
+        """
+        self.tz = tz
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.slots: List[Dict] = []
+        self._compile(slots)
+
+    def _compile(self, slots: Iterable[Dict]):
+        intervals = []
+        for order, slot in enumerate(slots):
+            try:
+                start = parse_minutes(slot['start'])
+                end = parse_minutes(slot['end'])
+            except (KeyError, ValueError, AttributeError):
+                logger.debug(f"Skipping schedule slot without valid times: {slot}")
+                continue
+            info = {
+                'playlist': slot.get('playlist') or 'Unknown',
+                'volume': parse_volume(slot.get('volume')),
+                'energy': slot.get('energy'),
+                'notes': slot.get('notes'),
+                'start': slot['start'],
+                'end': slot['end'],
+            }
+            length = (end - start) % MINUTES_PER_DAY or MINUTES_PER_DAY
+            for day in parse_days(slot.get('days')):
+                begin = DAYS.index(day) * MINUTES_PER_DAY + start
+                finish = begin + length
+                # Past midnight (and Sunday night past the end of the week)
+                if finish > MINUTES_PER_WEEK:
+                    intervals.append((begin, MINUTES_PER_WEEK, order, info))
+                    intervals.append((0, finish - MINUTES_PER_WEEK, order, info))
+                else:
+                    intervals.append((begin, finish, order, info))
+
+        # Later-starting slot wins an overlap (ties: later in the source), and
+        # an earlier slot resumes once a slot nested inside it ends: sweep the
+        # boundaries with the covering intervals in a heap keyed by start
+        intervals.sort(key=lambda i: (i[0], i[2]))
+        points = sorted({point for begin, finish, _, _ in intervals for point in (begin, finish)})
+        active: List[Tuple[int, int, int, int]] = []
+        added = 0
+        last = None
+        for left, right in zip(points, points[1:]):
+            while added < len(intervals) and intervals[added][0] <= left:
+                begin, finish, order, _ = intervals[added]
+                heapq.heappush(active, (-begin, -order, finish, added))
+                added += 1
+            while active and active[0][2] <= left:
+                heapq.heappop(active)
+            if not active:
+                continue
+            winner = active[0][3]
+            if winner == last and self.ends[-1] == left:
+                self.ends[-1] = right
+            else:
+                self.starts.append(left)
+                self.ends.append(right)
+                self.slots.append(intervals[winner][3])
+            last = winner
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def minute_of_week(self, when: datetime) -> int:
+        return minute_of_week(when, self.tz)
+
+    def at_minute(self, minute: int) -> Optional[Dict]:
+        """Slot covering a minute of the week, or None"""
+        index = bisect_right(self.starts, minute) - 1
+        if index >= 0 and minute < self.ends[index]:
+            return self.slots[index]
+        return None
+
+    def at(self, when: datetime) -> Optional[Dict]:
+        return self.at_minute(self.minute_of_week(when))
+
+
+def minute_of_week(when: datetime, tz: str) -> int:
+    """Minutes since Monday 00:00 local time (naive datetimes are UTC)"""
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    try:
+        local = when.astimezone(ZoneInfo(tz))
+    except Exception:
+        local = when.astimezone(ZoneInfo(DEFAULT_TIMEZONE))
+    return local.weekday() * MINUTES_PER_DAY + local.hour * 60 + local.minute
+
+
+class ScheduleEngine:
+    """Intended playlist and volume for every known zone"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.zones: Dict[ZoneKey, ZoneSchedule] = {}
+        self.sources: Dict[ZoneKey, str] = {}
+        self.default_volumes: Dict[ZoneKey, Optional[int]] = {}
+        self._flat = None  # (keys, zone timezones, starts, ends, slots) for intended_all
+        self.loaded_at = 0.0
+
+    # Loading
+
+    def set_zone(
+        self,
+        venue: str,
+        zone: str,
+        slots: Iterable[Dict],
+        tz: Optional[str] = None,
+        source: str = 'design',
+        default_volume: Optional[int] = None
+    ):
+        """Compile and store one zone's weekly schedule"""
+        key = zone_key(venue, zone)
+        schedule = ZoneSchedule(slots, tz or DEFAULT_TIMEZONE)
+        with self._lock:
+            self.zones[key] = schedule
+            self.sources[key] = source
+            self.default_volumes[key] = default_volume
+            self._flat = None
+            self.loaded_at = time.time()
+
+    def load_syb_zone(self, venue: str, zone: str, node: Dict, tz: Optional[str] = None) -> bool:
+        """
+        Load a zone from an SYB Zone node with soundtrackSchedule.scheduleItems
+        (as queried by MusicMonitor.get_zone_schedule / sync_music_designs).
+        SYB schedule items carry no volume; the zone's playbackSettings
+        volume is used for every slot.
+        """
+        schedule = (node or {}).get('soundtrackSchedule') or {}
+        items = schedule.get('scheduleItems') or []
+        if not items:
+            return False
+        volume = ((node or {}).get('playbackSettings') or {}).get('volume')
+        slots = [
+            {
+                'days': item.get('daysOfWeek'),
+                'start': item.get('startTime'),
+                'end': item.get('endTime'),
+                'playlist': (item.get('soundtrack') or {}).get('name'),
+                'volume': volume,
+            }
+            for item in items
+        ]
+        self.set_zone(venue, zone, slots, tz, source='syb', default_volume=parse_volume(volume))
+        return True
+
+    def load_music_design(self, path: Optional[Path] = None, timezones: Optional[Dict[str, str]] = None) -> int:
+        """
+        Load every schedule table in music_design.md.
+
+        Tables sit under a venue heading ('## Venue' or '### Venue') and an
+        optional zone heading ('### Zone' or '#### Zone: Name'); columns are
+        matched by header (Time, Days, Playlist, Energy, Volume, Notes).
+        SYB zones already loaded from the API are not overwritten.
+
+        Returns:
+            Number of zones loaded
+        """
+        path = path or Path(__file__).parent / 'music_design.md'
+        try:
+            content = Path(path).read_text()
+        except OSError as e:
+            logger.error(f"Could not read music design file {path}: {e}")
+            return 0
+
+        timezones = {k.lower(): v for k, v in (timezones or {}).items()}
+        tables = parse_design_tables(content)
+        loaded = 0
+        for (venue, zone), slots in tables.items():
+            key = zone_key(venue, zone)
+            if self.sources.get(key) == 'syb':
+                continue
+            self.set_zone(venue, zone, slots, timezones.get(venue.lower()))
+            loaded += 1
+        logger.info(f"Schedule engine loaded {loaded} zones from {Path(path).name}")
+        return loaded
+
+    # Queries
+
+    def intended(self, venue: str, zone: str, when: Optional[datetime] = None) -> Optional[Dict]:
+        """
+        Intended playlist and volume for a zone at when (default now).
+
+        Returns:
+            Slot dict (playlist, volume, energy, notes, start, end), an
+            'unscheduled' dict when no slot covers that time, or None for an
+            unknown zone
+        """
+        key = zone_key(venue, zone)
+        schedule = self.zones.get(key)
+        if schedule is None:
+            return None
+        when = when or datetime.now(timezone.utc)
+        return self._result(key, schedule.at(when))
+
+    def intended_local(self, venue: str, zone: str, local_time: str, day: Optional[str] = None) -> Optional[Dict]:
+        """
+        Intended state at a venue-local clock time ('HH:MM') on day ('mon'..
+        'sun', default today in the venue's timezone)
+        """
+        key = zone_key(venue, zone)
+        schedule = self.zones.get(key)
+        if schedule is None:
+            return None
+        if day is None:
+            day = DAYS[schedule.minute_of_week(datetime.now(timezone.utc)) // MINUTES_PER_DAY]
+        minute = DAYS.index(day[:3].lower()) * MINUTES_PER_DAY + parse_minutes(local_time)
+        return self._result(key, schedule.at_minute(minute % MINUTES_PER_WEEK))
+
+    def intended_all(self, when: Optional[datetime] = None) -> Dict[ZoneKey, Dict]:
+        """Intended state of every zone at one instant, in a single pass"""
+        when = when or datetime.now(timezone.utc)
+        keys, zone_tzs, starts, ends, slots = self._flat_index()
+
+        offsets = {tz: minute_of_week(when, tz) for tz in set(zone_tzs)}
+        results = {}
+        position = 0
+        total = len(starts)
+        for n, key in enumerate(keys):
+            target = n * MINUTES_PER_WEEK + offsets[zone_tzs[n]]
+            # Queries rise with n, so the cursor only moves forward
+            while position < total and starts[position] <= target:
+                position += 1
+            index = position - 1
+            hit = None
+            if index >= 0 and starts[index] >= n * MINUTES_PER_WEEK and target < ends[index]:
+                hit = slots[index]
+            results[key] = self._result(key, hit)
+        return results
+
+    def _result(self, key: ZoneKey, slot: Optional[Dict]) -> Dict:
+        if slot is None:
+            return {'playlist': None, 'volume': self.default_volumes.get(key), 'scheduled': False, 'source': self.sources.get(key)}
+        return {**slot, 'scheduled': True, 'source': self.sources.get(key)}
+
+    def _flat_index(self):
+        with self._lock:
+            if self._flat is None:
+                keys = sorted(self.zones)
+                zone_tzs, starts, ends, slots = [], [], [], []
+                for n, key in enumerate(keys):
+                    schedule = self.zones[key]
+                    base = n * MINUTES_PER_WEEK
+                    zone_tzs.append(schedule.tz)
+                    starts.extend(base + s for s in schedule.starts)
+                    ends.extend(base + e for e in schedule.ends)
+                    slots.extend(schedule.slots)
+                self._flat = (keys, zone_tzs, starts, ends, slots)
+            return self._flat
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'zones': len(self.zones),
+            'slots': sum(len(s) for s in self.zones.values()),
+            'syb_zones': sum(1 for s in self.sources.values() if s == 'syb'),
+            'loaded_at': self.loaded_at,
+        }
+
+
+def parse_design_tables(content: str) -> Dict[Tuple[str, str], List[Dict]]:
+    """(venue, zone) -> slot dicts for every schedule table in a design file"""
+    tables: Dict[Tuple[str, str], List[Dict]] = {}
+    section = subsection = None  # Latest '##' and '###' titles
+    venue = zone = None
+    header: Optional[List[str]] = None
+
+    for raw in content.split('\n'):
+        line = raw.strip()
+        if line.startswith('#'):
+            header = None
+            level = len(line) - len(line.lstrip('#'))
+            title = line.lstrip('#').strip()
+            if title.lower().startswith('zone:'):
+                # Design format: '### Venue' then '#### Zone: Name'
+                venue, zone = subsection, title.split(':', 1)[1].strip()
+            elif level == 2:
+                section = title
+                venue, zone = None, None
+            elif level == 3:
+                # Synced format: '## Venue' then '### Zone'
+                subsection = title
+                venue, zone = section, title
+            if venue and (venue.startswith('[') or venue.lower().startswith('example:')):
+                venue = None  # Template placeholder
+            continue
+
+        if not line.startswith('|'):
+            header = None
+            continue
+        cells = [c.strip() for c in line.strip('|').split('|')]
+        if header is None:
+            header = [c.lower() for c in cells]
+            continue
+        if all(set(c) <= set('-: ') for c in cells):
+            continue  # Separator row
+        if not (venue and zone) or 'time' not in header:
+            continue
+
+        row = dict(zip(header, cells))
+        match = TIME_RANGE.search(row.get('time', ''))
+        if not match:
+            continue
+        volume = next((v for k, v in row.items() if k.startswith('volume')), None)
+        tables.setdefault((venue, zone), []).append({
+            'days': row.get('days'),
+            'start': match.group(1),
+            'end': match.group(2),
+            'playlist': row.get('playlist'),
+            'energy': row.get('energy'),
+            'volume': volume,
+            'notes': row.get('notes'),
+        })
+    return tables
+
+
+def _venue_timezones() -> Dict[str, str]:
+    """Venue name -> timezone from venue_data.md ('Timezone' field), where set"""
+    try:
+        from venue_data_reader import get_all_venues
+        return {
+            v['property_name']: v['timezone']
+            for v in get_all_venues()
+            if v.get('property_name') and v.get('timezone')
+        }
+    except Exception as e:
+        logger.debug(f"Venue timezones unavailable: {e}")
+        return {}
+
+
+# Singleton instance, loaded from music_design.md
+schedule_engine = ScheduleEngine()
+schedule_engine.load_music_design(timezones=_venue_timezones())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Redis Streams message consumer against a local redis-server.
+Compares end-to-end throughput of the old BRPOP list loop with XREADGROUP
+batches, and measures how long a failed message takes to be redelivered
+through XAUTOCLAIM.
+
+Uses its own key prefix and deletes it afterwards.
+
+Usage:
+    redis-server --port 6390 &
+    REDIS_URL=redis://localhost:6390/0 python scripts/benchmark_message_stream.py [messages] [consumers]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+import redis.asyncio as redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.workers.message_stream import MessageStreamConsumer, encode_message  # noqa: E402
+
+PREFIX = "bench:stream"
+HANDLER_SECONDS = 0.002  # Simulated processing time per message
+
+
+async def bench_brpop(client, count: int, consumers: int) -> float:
+    key = f"{PREFIX}:list"
+    payloads = [json.dumps({"conversation_id": f"c{i % 500}", "n": i}) for i in range(count)]
+    for i in range(0, count, 1000):
+        await client.lpush(key, *payloads[i:i + 1000])
+
+    done = 0
+    started = time.perf_counter()
+
+    async def worker():
+        nonlocal done
+        while done < count:
+            item = await client.brpop(key, timeout=1)
+            if item:
+                json.loads(item[1])
+                await asyncio.sleep(HANDLER_SECONDS)
+                done += 1
+
+    await asyncio.gather(*(worker() for _ in range(consumers)))
+    return time.perf_counter() - started
+
+
+async def bench_stream(client, count: int, consumers: int) -> float:
+    stream = f"{PREFIX}:stream"
+    pipe = client.pipeline(transaction=False)
+    for i in range(count):
+        pipe.xadd(stream, encode_message({"conversation_id": f"c{i % 500}", "n": i}))
+    await pipe.execute()
+
+    processed = 0
+
+    async def handler(message):
+        nonlocal processed
+        await asyncio.sleep(HANDLER_SECONDS)
+        processed += 1
+
+    workers = [
+        MessageStreamConsumer(
+            client, handler, stream=stream, group="bench", dlq_stream=f"{PREFIX}:dlq",
+            consumer_name=f"bench-{i}", batch_size=100, concurrency=16,
+        )
+        for i in range(consumers)
+    ]
+    await workers[0].ensure_group()
+
+    started = time.perf_counter()
+
+    async def run(consumer):
+        while processed < count:
+            await consumer.poll_once(block_ms=100)
+
+    await asyncio.gather(*(run(c) for c in workers))
+    return time.perf_counter() - started
+
+
+async def bench_redelivery(client, samples: int = 20, claim_idle_ms: int = 500) -> list:
+    stream = f"{PREFIX}:retry"
+    failed_at = {}
+    latencies = []
+
+    async def handler(message):
+        n = message["n"]
+        if n not in failed_at:
+            failed_at[n] = time.perf_counter()
+            raise RuntimeError("injected failure")
+        latencies.append(time.perf_counter() - failed_at[n])
+
+    consumer = MessageStreamConsumer(
+        client, handler, stream=stream, group="bench", dlq_stream=f"{PREFIX}:dlq",
+        consumer_name="bench-retry", claim_idle_ms=claim_idle_ms,
+    )
+    await consumer.ensure_group()
+    for n in range(samples):
+        await client.xadd(stream, encode_message({"conversation_id": f"c{n}", "n": n}))
+
+    deadline = time.perf_counter() + 30
+    while len(latencies) < samples and time.perf_counter() < deadline:
+        await consumer.poll_once(block_ms=50)
+    return sorted(latencies)
+
+
+async def cleanup(client):
+    keys = [key async for key in client.scan_iter(f"{PREFIX}:*")]
+    if keys:
+        await client.delete(*keys)
+
+
+async def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    consumers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    client = redis.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379/15"), decode_responses=True)
+
+    await cleanup(client)
+    try:
+        brpop_time = await bench_brpop(client, count, consumers)
+        stream_time = await bench_stream(client, count, consumers)
+        latencies = await bench_redelivery(client)
+    finally:
+        await cleanup(client)
+        await client.aclose()
+
+    print(f"Messages:            {count} with {consumers} consumers, {HANDLER_SECONDS * 1000:.0f}ms handler")
+    print(f"BRPOP loop:          {count / brpop_time:,.0f} msg/s")
+    print(f"XREADGROUP batches:  {count / stream_time:,.0f} msg/s")
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"Redelivery latency:  p50 {p50 * 1000:,.0f}ms, p95 {p95 * 1000:,.0f}ms (claim idle 500ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark message persistence against a local PostgreSQL.
+Compares one store_message() transaction per message with the
+write-behind MessageWriteBuffer.
+
+Usage:
+    DATABASE_URL=postgresql://localhost/bma_bench python scripts/benchmark_message_writes.py [count]
+"""
+
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database import db_manager
+from message_writer import MessageWriteBuffer
+
+
+def run_direct(count: int, users: int) -> float:
+    run_id = uuid.uuid4().hex[:8]
+    started = time.perf_counter()
+    for i in range(count):
+        db_manager.store_message(
+            channel="whatsapp",
+            user_phone=f"bench_{run_id}_{i % users}",
+            user_name="Bench",
+            message_id=f"direct_{run_id}_{i}",
+            content=f"benchmark message {i}"
+        )
+    return time.perf_counter() - started
+
+
+def run_write_behind(count: int, users: int) -> float:
+    run_id = uuid.uuid4().hex[:8]
+    writer = MessageWriteBuffer(db_manager=db_manager)
+    started = time.perf_counter()
+    for i in range(count):
+        writer.enqueue(
+            channel="whatsapp",
+            user_phone=f"bench_{run_id}_{i % users}",
+            user_name="Bench",
+            message_id=f"buffered_{run_id}_{i}",
+            content=f"benchmark message {i}"
+        )
+    writer.stop(timeout=120)
+    return time.perf_counter() - started
+
+
+def main():
+    if not os.environ.get("DATABASE_URL"):
+        print("❌ DATABASE_URL not set")
+        return 1
+    if not db_manager.initialize_tables():
+        print("❌ Could not initialize tables")
+        return 1
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    users = 200
+
+    direct = run_direct(count, users)
+    buffered = run_write_behind(count, users)
+
+    print(f"Messages:      {count} from {users} users")
+    print(f"store_message: {direct:.2f}s  ({count / direct:,.0f} msg/s)")
+    print(f"write-behind:  {buffered:.2f}s  ({count / buffered:,.0f} msg/s)")
+    print(f"Speedup:       {direct / buffered:.1f}x")
+    print(f"Pool:          {db_manager.get_pool_stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark monitoring_logs partitioning against a local PostgreSQL.
+Measures insert rate into a plain vs monthly-partitioned table, the cost of
+retention (DELETE vs DETACH + DROP) and checks that zone/time queries prune.
+
+Runs in a throwaway schema; nothing in public is touched.
+
+Usage:
+    DATABASE_URL=postgresql://localhost/bma_bench python scripts/benchmark_monitoring_partitions.py [rows]
+"""
+
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+SCHEMA = "bench_partitions"
+COLUMNS = "id UUID NOT NULL, zone_id UUID NOT NULL, status VARCHAR(20) NOT NULL, created_at TIMESTAMPTZ NOT NULL"
+
+
+def setup(cursor):
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    cursor.execute(f"CREATE TABLE {SCHEMA}.logs_plain ({COLUMNS}, PRIMARY KEY (id))")
+    cursor.execute(f"CREATE INDEX ON {SCHEMA}.logs_plain (zone_id, created_at)")
+    cursor.execute(f"CREATE TABLE {SCHEMA}.logs_part ({COLUMNS}, PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)")
+    cursor.execute(f"CREATE INDEX ON {SCHEMA}.logs_part (zone_id, created_at)")
+
+
+def month_starts(now: datetime, months: int):
+    start = datetime(now.year, now.month, 1)
+    result = []
+    for offset in range(months - 1, -1, -1):
+        index = start.year * 12 + start.month - 1 - offset
+        result.append(datetime(index // 12, index % 12 + 1, 1))
+    return result
+
+
+def create_partitions(cursor, months):
+    for month in months:
+        index = month.year * 12 + month.month
+        end = datetime(index // 12, index % 12 + 1, 1)
+        cursor.execute(
+            f"CREATE TABLE {SCHEMA}.logs_part_{month:%Y_%m} PARTITION OF {SCHEMA}.logs_part "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            (month, end)
+        )
+
+
+def generate_rows(count: int, months, zones):
+    span = (datetime.utcnow() - months[0]).total_seconds()
+    for i in range(count):
+        yield (
+            str(uuid.uuid4()),
+            zones[i % len(zones)],
+            "online" if i % 17 else "offline",
+            months[0] + timedelta(seconds=span * i / count)
+        )
+
+
+def timed_insert(cursor, table: str, rows) -> float:
+    started = time.perf_counter()
+    execute_values(cursor, f"INSERT INTO {SCHEMA}.{table} VALUES %s", rows, page_size=1000)
+    return time.perf_counter() - started
+
+
+def main():
+    url = os.environ.get("DATABASE_URL")
+    if not url:
+        print("❌ DATABASE_URL not set")
+        return 1
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    conn = psycopg2.connect(url.replace("postgres://", "postgresql://", 1))
+    conn.autocommit = True
+    cursor = conn.cursor()
+
+    months = month_starts(datetime.utcnow(), 3)
+    zones = [str(uuid.uuid4()) for _ in range(1000)]
+    rows = list(generate_rows(count, months, zones))
+
+    setup(cursor)
+    create_partitions(cursor, months)
+
+    plain_insert = timed_insert(cursor, "logs_plain", rows)
+    part_insert = timed_insert(cursor, "logs_part", rows)
+
+    oldest = months[0]
+    index = oldest.year * 12 + oldest.month
+    oldest_end = datetime(index // 12, index % 12 + 1, 1)
+
+    started = time.perf_counter()
+    cursor.execute(f"DELETE FROM {SCHEMA}.logs_plain WHERE created_at < %s", (oldest_end,))
+    deleted = cursor.rowcount
+    delete_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    cursor.execute(f"ALTER TABLE {SCHEMA}.logs_part DETACH PARTITION {SCHEMA}.logs_part_{oldest:%Y_%m}")
+    cursor.execute(f"DROP TABLE {SCHEMA}.logs_part_{oldest:%Y_%m}")
+    drop_time = time.perf_counter() - started
+
+    cursor.execute(
+        f"EXPLAIN SELECT * FROM {SCHEMA}.logs_part WHERE zone_id = %s AND created_at >= %s",
+        (zones[0], months[-1])
+    )
+    plan = "\n".join(row[0] for row in cursor.fetchall())
+    scanned = sorted({p for p in plan.split() if p.startswith("logs_part_")})
+
+    print(f"Rows:                {count} over {len(months)} months")
+    print(f"Insert plain:        {count / plain_insert:,.0f} rows/s")
+    print(f"Insert partitioned:  {count / part_insert:,.0f} rows/s")
+    print(f"Retention DELETE:    {delete_time * 1000:,.0f}ms ({deleted} rows)")
+    print(f"Retention DROP:      {drop_time * 1000:,.0f}ms")
+    print(f"Partitions scanned for current-month zone query: {', '.join(scanned)}")
+
+    cursor.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
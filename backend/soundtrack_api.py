@@ -12,6 +12,7 @@ from datetime import datetime, timedelta
 import requests
 from requests.auth import HTTPBasicAuth
 from venue_accounts import VENUE_ACCOUNTS, find_venue_account
+from syb_scheduler import syb_scheduler, INTERACTIVE, SlotTimeoutError
 
 logger = logging.getLogger(__name__)
 
@@ -88,7 +89,12 @@ class SoundtrackAPI:
             logger.debug(f"Sending GraphQL query to {self.graphql_url}")
             logger.debug(f"Query: {query[:200]}...")  # First 200 chars
             
-            response = self.session.post(self.graphql_url, json=payload, timeout=10)
+            # Mutations are control commands - interactive unless the caller set a lane
+            lane = None
+            if query.lstrip().startswith('mutation') and not syb_scheduler.has_lane():
+                lane = INTERACTIVE
+            with syb_scheduler.slot(lane):
+                response = self.session.post(self.graphql_url, json=payload, timeout=10)
             
             logger.debug(f"Response status: {response.status_code}")
             logger.debug(f"Response headers: {dict(response.headers)}")
@@ -107,6 +113,11 @@ class SoundtrackAPI:
             
             return data.get('data', {})
             
+        except SlotTimeoutError as e:
+            error_msg = f"API request not sent: {e}"
+            logger.error(error_msg)
+            return {'error': error_msg}
+            
         except requests.exceptions.Timeout:
             error_msg = "API request timed out after 10 seconds"
             logger.error(error_msg)
@@ -0,0 +1,119 @@
+-- BMA Social - Native Monthly Partitioning for monitoring_logs
+-- Converts monitoring_logs into a RANGE (created_at) partitioned table
+-- Retention becomes DETACH + DROP of whole months instead of DELETE
+-- Ongoing maintenance: app.workers.tasks.monitoring.cleanup_old_logs (daily)
+
+-- ============================================================================
+-- PARTITION MANAGEMENT FUNCTIONS
+-- ============================================================================
+
+-- Create monthly partitions from p_from through p_months_ahead months past now
+CREATE OR REPLACE FUNCTION ensure_monitoring_log_partitions(
+    p_from DATE DEFAULT date_trunc('month', CURRENT_DATE)::DATE,
+    p_months_ahead INTEGER DEFAULT 3
+)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', p_from)::DATE;
+    last_month DATE := (date_trunc('month', CURRENT_DATE) + make_interval(months => p_months_ahead))::DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        partition_name := 'monitoring_logs_' || TO_CHAR(month_start, 'YYYY_MM');
+        IF NOT EXISTS (SELECT 1 FROM pg_class WHERE relname = partition_name) THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF monitoring_logs FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, (month_start + INTERVAL '1 month')::DATE
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::DATE;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detach and drop partitions whose whole month is older than p_retention_days
+CREATE OR REPLACE FUNCTION drop_expired_monitoring_log_partitions(
+    p_retention_days INTEGER DEFAULT 30
+)
+RETURNS INTEGER AS $$
+DECLARE
+    part RECORD;
+    cutoff DATE := (CURRENT_DATE - p_retention_days);
+    dropped INTEGER := 0;
+BEGIN
+    FOR part IN
+        SELECT child.relname AS name
+        FROM pg_inherits
+        JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+        JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+        WHERE parent.relname = 'monitoring_logs'
+        AND child.relname ~ '^monitoring_logs_\d{4}_\d{2}$'
+    LOOP
+        IF (to_date(right(part.name, 7), 'YYYY_MM') + INTERVAL '1 month')::DATE <= cutoff THEN
+            EXECUTE format('ALTER TABLE monitoring_logs DETACH PARTITION %I', part.name);
+            EXECUTE format('DROP TABLE %I', part.name);
+            dropped := dropped + 1;
+        END IF;
+    END LOOP;
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- ONE-TIME CONVERSION OF AN EXISTING UNPARTITIONED TABLE
+-- ============================================================================
+
+BEGIN;
+
+-- Keep the old heap around until the copy is verified
+ALTER TABLE IF EXISTS monitoring_logs RENAME TO monitoring_logs_legacy;
+ALTER INDEX IF EXISTS idx_monitoring_zone_time RENAME TO idx_monitoring_zone_time_legacy;
+ALTER INDEX IF EXISTS idx_monitoring_status RENAME TO idx_monitoring_status_legacy;
+
+CREATE TABLE monitoring_logs (
+    LIKE monitoring_logs_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING COMMENTS
+) PARTITION BY RANGE (created_at);
+
+-- Partition key must be part of the primary key
+ALTER TABLE monitoring_logs ADD PRIMARY KEY (id, created_at);
+ALTER TABLE monitoring_logs
+    ADD CONSTRAINT monitoring_logs_zone_id_fkey FOREIGN KEY (zone_id) REFERENCES zones(id);
+
+-- Partitioned indexes: created once on the parent, inherited by every partition.
+-- (zone_id, created_at) lets "zone X since T" queries prune to the relevant months.
+CREATE INDEX idx_monitoring_zone_time ON monitoring_logs (zone_id, created_at);
+CREATE INDEX idx_monitoring_status ON monitoring_logs (status, created_at);
+
+-- Partitions for the retained window plus three months ahead
+SELECT ensure_monitoring_log_partitions((CURRENT_DATE - 30)::DATE, 3);
+
+-- Copy only rows inside the retention window
+INSERT INTO monitoring_logs
+SELECT * FROM monitoring_logs_legacy
+WHERE created_at >= date_trunc('month', CURRENT_DATE - 30);
+
+COMMIT;
+
+ANALYZE monitoring_logs;
+
+-- After verifying row counts:
+-- DROP TABLE monitoring_logs_legacy;
+
+-- ============================================================================
+-- VERIFICATION
+-- ============================================================================
+
+-- Partitions and their sizes
+-- SELECT child.relname, pg_size_pretty(pg_total_relation_size(child.oid))
+-- FROM pg_inherits
+-- JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+-- JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+-- WHERE parent.relname = 'monitoring_logs' ORDER BY 1;
+
+-- Partition pruning: the plan should only touch the current month's partition
+-- EXPLAIN SELECT * FROM monitoring_logs
+-- WHERE zone_id = '00000000-0000-0000-0000-000000000000'
+-- AND created_at >= date_trunc('month', CURRENT_DATE);
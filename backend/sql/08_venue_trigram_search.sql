@@ -0,0 +1,28 @@
+-- BMA Social - Typo-tolerant venue search with pg_trgm
+-- GIN trigram indexes let "name % 'Hiltn Patya'" find "Hilton Pattaya"
+-- without scanning every venue
+-- Queried by app.core.trigram.trigram_search (DataAggregator database search)
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- ============================================================================
+-- TRIGRAM INDEXES
+-- ============================================================================
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_venue_name_trgm
+    ON venues USING GIN (name gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_venue_brand_trgm
+    ON venues USING GIN (brand gin_trgm_ops);
+
+-- ============================================================================
+-- VERIFICATION
+-- ============================================================================
+
+-- Should show a Bitmap Index Scan on idx_venue_name_trgm
+-- EXPLAIN ANALYZE
+-- SELECT name, similarity(name, 'hiltn patya') AS score
+-- FROM venues
+-- WHERE name % 'hiltn patya'
+-- ORDER BY score DESC
+-- LIMIT 20;
@@ -0,0 +1,140 @@
+"""
+Priority-lane scheduler for the synchronous Soundtrack API client
+Customer music control is dispatched ahead of bulk jobs (design syncs, zone
+sweeps) and has connection slots reserved for it; background jobs share the
+remaining slots round-robin by job type. The dispatch itself is
+app.core.lane_scheduler's, shared with the app's async client; this wraps
+it with a lock and threading events
+"""
+
+import os
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.lane_scheduler import BACKGROUND, DEFAULT_JOB, INTERACTIVE, NORMAL, LaneDispatcher
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["BACKGROUND", "INTERACTIVE", "NORMAL", "SYBScheduler", "SlotTimeoutError", "syb_scheduler"]
+
+# requests.Session keeps 10 pooled connections per host by default
+SYB_MAX_IN_FLIGHT = int(os.environ.get('SYB_MAX_IN_FLIGHT', '8'))
+SYB_INTERACTIVE_RESERVE = int(os.environ.get('SYB_INTERACTIVE_RESERVE', '2'))
+# Seconds a request waits for a slot before giving up
+SYB_SLOT_TIMEOUT = float(os.environ.get('SYB_SLOT_TIMEOUT', '30'))
+
+_current_lane: contextvars.ContextVar[Optional[Tuple[str, str]]] = contextvars.ContextVar(
+    "syb_request_lane", default=None
+)
+
+
+class SlotTimeoutError(TimeoutError):
+    """No in-flight slot came free within the scheduler's slot_timeout"""
+
+
+class SYBScheduler(LaneDispatcher):
+    """Thread-safe in-flight slot scheduler with strict lane priority"""
+
+    def __init__(
+        self,
+        max_in_flight: int = SYB_MAX_IN_FLIGHT,
+        interactive_reserve: int = SYB_INTERACTIVE_RESERVE,
+        window: int = 500,
+        slot_timeout: float = SYB_SLOT_TIMEOUT
+    ):
+        """
+        Args:
+            max_in_flight: Concurrent SYB requests across all lanes
+            interactive_reserve: Slots only interactive requests may use
+            window: Samples kept for queue wait / in-flight percentiles
+            slot_timeout: Seconds to wait for a slot before SlotTimeoutError
+        """
+        super().__init__(max_in_flight, interactive_reserve, window)
+        self.slot_timeout = slot_timeout
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def lane(self, lane: str, job: str = DEFAULT_JOB):
+        """Run every SYB request made inside the block in the given lane"""
+        token = _current_lane.set((lane, job))
+        try:
+            yield
+        finally:
+            _current_lane.reset(token)
+
+    def current_lane(self) -> Tuple[str, str]:
+        return _current_lane.get() or (NORMAL, DEFAULT_JOB)
+
+    def has_lane(self) -> bool:
+        """True inside a lane() block"""
+        return _current_lane.get() is not None
+
+    def _grant(self, waiter: threading.Event):
+        # Caller holds self._lock
+        waiter.set()
+
+    def _abandon(self, lane: str, job: str, waiter: threading.Event):
+        """Stop waiting: leave the queue, or hand back a slot granted meanwhile"""
+        # Caller holds self._lock
+        self._dequeued(lane, job, None)
+        if waiter.is_set():
+            self._release()
+        else:
+            self._queue_for(lane, job).remove(waiter)
+
+    @contextmanager
+    def slot(self, lane: Optional[str] = None, job: Optional[str] = None):
+        """
+        Hold one in-flight slot for the duration of a request.
+
+        Args:
+            lane: Request lane (defaults to the enclosing lane() block)
+            job: Background job type used for fair sharing
+
+        Raises:
+            SlotTimeoutError: No slot within slot_timeout seconds
+        """
+        if lane is None:
+            lane, scoped_job = self.current_lane()
+            job = job or scoped_job
+        job = job or DEFAULT_JOB
+
+        waiter = threading.Event()
+        enqueued_at = time.perf_counter()
+        with self._lock:
+            self._enqueue(lane, job, waiter)
+
+        try:
+            waiter.wait(self.slot_timeout)
+        except BaseException:
+            with self._lock:
+                self._abandon(lane, job, waiter)
+            raise
+
+        with self._lock:
+            if not waiter.is_set():
+                self._abandon(lane, job, waiter)
+                self.timeouts += 1
+                raise SlotTimeoutError(f"No SYB slot for {lane} request within {self.slot_timeout}s")
+            granted_at = time.perf_counter()
+            self._dequeued(lane, job, granted_at - enqueued_at)
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._release(lane, time.perf_counter() - granted_at)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-lane queue wait and in-flight metrics"""
+        with self._lock:
+            return {**super().get_stats(), "timeouts": self.timeouts}
+
+
+# Global instance shared by every SoundtrackAPI caller in this process
+syb_scheduler = SYBScheduler()
@@ -2,145 +2,315 @@
 """
 Sync music designs from Soundtrack API to music_design.md
 Run this periodically (daily/weekly) to keep data current
+
+Venues are fetched by a bounded pool of workers (one combined GraphQL query
+per zone), each finished venue is checkpointed so an interrupted run resumes
+where it stopped, and music_design.md is rewritten once, atomically, at the
+end of the run.
 """
 
+import os
 import json
+import time
 import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 import re
 
 logger = logging.getLogger(__name__)
 
+SYNC_MAX_WORKERS = int(os.environ.get('MUSIC_DESIGN_SYNC_WORKERS', '4'))
+# A checkpoint older than this is from an abandoned run - start over
+CHECKPOINT_MAX_AGE = float(os.environ.get('MUSIC_DESIGN_SYNC_CHECKPOINT_MAX_AGE', '86400'))
+
+# Status, now playing and schedule for a zone in one request
+ZONE_DESIGN_QUERY = """
+query ZoneDesign($zoneId: ID!) {
+    soundZone(id: $zoneId) {
+        id
+        name
+        online
+        nowPlaying {
+            track {
+                name
+            }
+        }
+        playFrom {
+            __typename
+            ... on Playlist {
+                id
+                name
+            }
+            ... on Schedule {
+                id
+                name
+            }
+        }
+    }
+    node(id: $zoneId) {
+        ... on Zone {
+            soundtrackSchedule {
+                scheduleItems {
+                    startTime
+                    endTime
+                    soundtrack {
+                        name
+                    }
+                    daysOfWeek
+                }
+            }
+            playbackSettings {
+                volume
+            }
+        }
+    }
+}
+"""
+
+# Used once the API has rejected the schedule fields
+ZONE_STATUS_QUERY = (
+    ZONE_DESIGN_QUERY[:ZONE_DESIGN_QUERY.index('    node(id: $zoneId)')].replace('ZoneDesign', 'ZoneStatus') + "}\n"
+)
+
+# GraphQL validation messages for fields the schema doesn't have
+SCHEMA_ERROR_MARKERS = ('Cannot query field', 'Unknown field', 'Unknown type')
+
+
+def is_schema_error(error) -> bool:
+    """
+    True when a query was rejected for asking for fields the schema lacks.
+    GraphQL errors come back as a list of {'message': ...}; timeouts, HTTP
+    and connection failures are plain strings and never count.
+    """
+    if not isinstance(error, list):
+        return False
+    messages = [item.get('message', '') if isinstance(item, dict) else str(item) for item in error]
+    return any(marker in message for message in messages for marker in SCHEMA_ERROR_MARKERS)
+
 
 class MusicDesignSync:
     """Sync music schedules from Soundtrack API to MD file"""
     
-    def __init__(self):
+    def __init__(self, api=None, max_workers: int = SYNC_MAX_WORKERS, checkpoint_path: Optional[Path] = None):
+        """
+        Args:
+            api: SoundtrackAPI-compatible client (default: soundtrack_api)
+            max_workers: Venues fetched concurrently
+            checkpoint_path: Where finished venues are kept during a run
+        """
         self.md_file_path = Path(__file__).parent / "music_design.md"
         self.venue_data_path = Path(__file__).parent / "venue_data.md"
+        self.checkpoint_path = checkpoint_path or Path(__file__).parent / ".music_design_sync.json"
+        self.max_workers = max_workers
+        self._api = api
+        self._schedule_supported = True
+        self._checkpoint_lock = threading.Lock()
+        self.timings: Dict[str, Dict] = {}
+    
+    @property
+    def api(self):
+        if self._api is None:
+            from soundtrack_api import soundtrack_api
+            self._api = soundtrack_api
+        return self._api
         
-    def sync_all_syb_venues(self):
-        """Sync all Soundtrack Your Brand venues"""
+    def sync_all_syb_venues(self, venue_names: Optional[List[str]] = None, resume: bool = True) -> Dict:
+        """
+        Sync all Soundtrack Your Brand venues
+        
+        Args:
+            venue_names: Venues to sync (default: every SYB venue in venue_data.md)
+            resume: Reuse venues finished by an interrupted earlier run
+        
+        Returns:
+            Run summary with per-venue timings
+        """
+        started = time.perf_counter()
         try:
-            from soundtrack_api import soundtrack_api
-            from venue_data_reader import get_all_venues
-            
-            venues = get_all_venues()
-            syb_venues = [v for v in venues if v.get('music_platform') == 'Soundtrack Your Brand']
-            
-            logger.info(f"Found {len(syb_venues)} SYB venues to sync")
-            
-            for venue in syb_venues:
-                venue_name = venue.get('property_name')
-                logger.info(f"Syncing {venue_name}...")
-                self.sync_venue(venue_name)
-                
+            if venue_names is None:
+                from venue_data_reader import get_all_venues
+                venue_names = [
+                    v.get('property_name') for v in get_all_venues()
+                    if v.get('music_platform') == 'Soundtrack Your Brand'
+                ]
         except Exception as e:
             logger.error(f"Sync failed: {e}")
+            return {'error': str(e)}
+        
+        done = self._load_checkpoint() if resume else {}
+        done = {name: design for name, design in done.items() if name in venue_names}
+        # Venues checkpointed with failed zones are fetched again (those zones only)
+        pending = [name for name in venue_names if name not in done or done[name].get('failed_zones')]
+        resumed = len(venue_names) - len(pending)
+        failed = []
+        partial = []
+        
+        logger.info(
+            f"Found {len(venue_names)} SYB venues to sync "
+            f"({resumed} already done in checkpoint, {self.max_workers} workers)"
+        )
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="design-sync") as pool:
+            futures = {pool.submit(self._sync_venue_worker, name, done.get(name)): name for name in pending}
+            for future in as_completed(futures):
+                venue_name = futures[future]
+                design = future.result()
+                if design is None:
+                    failed.append(venue_name)
+                    continue
+                if design.get('failed_zones'):
+                    partial.append(venue_name)
+                done[venue_name] = design
+                self._save_checkpoint(done)
+        
+        if done:
+            self._write_designs([done[name] for name in venue_names if name in done])
+        if not failed and not partial:
+            self._clear_checkpoint()
+        
+        total = time.perf_counter() - started
+        logger.info(
+            f"Music design sync: {len(done)} venues in {total:.1f}s, "
+            f"{len(failed)} failed, {len(partial)} with failed zones"
+        )
+        return {
+            'synced': len(done) - resumed,
+            'resumed': resumed,
+            'failed': failed,
+            'partial': partial,
+            'total_seconds': round(total, 3),
+            'venues': dict(self.timings),
+        }
     
     def sync_venue(self, venue_name: str):
         """Sync a specific venue's music design"""
+        venue_design = self._fetch_venue(venue_name)
+        if venue_design:
+            self._write_designs([venue_design])
+        return venue_design
+    
+    def _sync_venue_worker(self, venue_name: str, previous: Optional[Dict] = None) -> Optional[Dict]:
+        from syb_scheduler import syb_scheduler, BACKGROUND
+        
+        # Lanes are per thread - bulk sync only gets SYB capacity live chats aren't using
+        with syb_scheduler.lane(BACKGROUND, job="music_design_sync"):
+            return self._fetch_venue(venue_name, previous)
+    
+    def _fetch_venue(self, venue_name: str, previous: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Fetch a venue's zones and their designs from the API
+        
+        A zone that fails is recorded under failed_zones instead of failing
+        the venue. Given previous (a checkpointed design with failed zones),
+        only those zones are fetched again. None if no zone could be fetched.
+        """
+        started = time.perf_counter()
         try:
-            from soundtrack_api import soundtrack_api
-            
-            # Get zones from API
-            zones = soundtrack_api.find_venue_zones(venue_name)
+            zones = self.api.find_venue_zones(venue_name)
             
             if not zones:
                 logger.warning(f"No zones found for {venue_name}")
-                return
+                return None
             
             venue_design = {
                 'property_name': venue_name,
                 'last_synced': datetime.now().isoformat(),
-                'zones': {}
+                'zones': dict(previous['zones']) if previous else {}
             }
+            retry = set(previous.get('failed_zones', {})) if previous else None
+            failed_zones = {}
             
             for zone in zones:
-                zone_id = zone.get('id')
                 zone_name = zone.get('name')
-                
-                # Get current status
-                status = soundtrack_api.get_zone_status(zone_id)
-                now_playing = soundtrack_api.get_now_playing(zone_id)
-                
-                # Try to get schedule via custom query
-                schedule_data = self._get_zone_schedule(zone_id)
-                
-                venue_design['zones'][zone_name] = {
-                    'zone_id': zone_id,
-                    'online': zone.get('online', False),
-                    'current_playlist': now_playing.get('soundtrack', {}).get('name', 'Unknown'),
-                    'current_track': now_playing.get('track', {}).get('name', 'Unknown'),
-                    'schedule': schedule_data
-                }
-                
-                logger.info(f"  - {zone_name}: {now_playing.get('soundtrack', {}).get('name', 'Unknown')}")
+                if retry is not None and zone_name not in retry:
+                    continue
+                try:
+                    venue_design['zones'][zone_name] = self._fetch_zone(venue_name, zone)
+                except Exception as e:
+                    logger.error(f"Failed to sync {venue_name} / {zone_name}: {e}")
+                    failed_zones[zone_name] = str(e)
             
-            # Update MD file
-            self._update_md_file(venue_design)
+            if not venue_design['zones']:
+                logger.error(f"Failed to sync {venue_name}: no zone could be fetched")
+                return None
+            if failed_zones:
+                venue_design['failed_zones'] = failed_zones
             
+            elapsed = time.perf_counter() - started
+            self.timings[venue_name] = {'seconds': round(elapsed, 3), 'zones': len(zones)}
+            logger.info(f"Synced {venue_name}: {len(zones)} zones in {elapsed:.2f}s")
             return venue_design
             
         except Exception as e:
             logger.error(f"Failed to sync {venue_name}: {e}")
             return None
     
-    def _get_zone_schedule(self, zone_id: str) -> Dict:
-        """Try to get schedule information for a zone"""
-        try:
-            from soundtrack_api import soundtrack_api
-            
-            # This query attempts to get schedule info
-            # Note: Actual query structure depends on SYB API capabilities
-            query = """
-            query GetZoneSchedule($zoneId: ID!) {
-                node(id: $zoneId) {
-                    ... on Zone {
-                        id
-                        name
-                        currentSoundtrack {
-                            id
-                            name
-                        }
-                        soundtrackSchedule {
-                            scheduleItems {
-                                startTime
-                                endTime
-                                soundtrack {
-                                    name
-                                }
-                                daysOfWeek
-                            }
-                        }
-                        playbackSettings {
-                            volume
-                        }
-                    }
-                }
-            }
-            """
-            
-            result = soundtrack_api._make_graphql_request(
-                query,
-                {"zoneId": zone_id}
-            )
-            
-            # Parse and return schedule
-            if result and 'data' in result:
-                return result['data'].get('node', {})
-            
-        except Exception as e:
-            logger.debug(f"Could not get schedule for zone {zone_id}: {e}")
+    def _fetch_zone(self, venue_name: str, zone: Dict) -> Dict:
+        """Status, now playing and schedule for one zone (one request)"""
+        zone_id = zone.get('id')
+        zone_name = zone.get('name')
         
-        return {}
+        query = ZONE_DESIGN_QUERY if self._schedule_supported else ZONE_STATUS_QUERY
+        result = self.api._execute_query(query, {'zoneId': zone_id})
+        if 'error' in result and query is ZONE_DESIGN_QUERY and is_schema_error(result['error']):
+            # The schema has no schedule fields - status only for the rest of the run.
+            # Timeouts and outages fail just this zone.
+            logger.info(f"SYB schedule fields unavailable, syncing status only: {result['error']}")
+            self._schedule_supported = False
+            result = self.api._execute_query(ZONE_STATUS_QUERY, {'zoneId': zone_id})
+        if 'error' in result:
+            raise RuntimeError(f"zone {zone_name}: {result['error']}")
+        
+        sound_zone = result.get('soundZone') or {}
+        schedule_data = result.get('node') or {}
+        if schedule_data:
+            from schedule_engine import schedule_engine
+            schedule_engine.load_syb_zone(venue_name, zone_name, schedule_data)
+        
+        track = (sound_zone.get('nowPlaying') or {}).get('track') or {}
+        return {
+            'zone_id': zone_id,
+            'online': sound_zone.get('online', zone.get('online', False)),
+            'current_playlist': (sound_zone.get('playFrom') or {}).get('name') or 'Unknown',
+            'current_track': track.get('name') or 'Unknown',
+            'schedule': schedule_data
+        }
     
-    def _update_md_file(self, venue_design: Dict):
-        """Update the music_design.md file with new data"""
-        venue_name = venue_design['property_name']
+    # Checkpoint
+    
+    def _load_checkpoint(self) -> Dict[str, Dict]:
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable sync checkpoint: {e}")
+            return {}
         
+        if time.time() - checkpoint.get('updated_at', 0) > CHECKPOINT_MAX_AGE:
+            logger.info("Sync checkpoint is stale, starting over")
+            return {}
+        return checkpoint.get('venues', {})
+    
+    def _save_checkpoint(self, venues: Dict[str, Dict]):
+        with self._checkpoint_lock:
+            _atomic_write(self.checkpoint_path, json.dumps({'updated_at': time.time(), 'venues': venues}))
+    
+    def _clear_checkpoint(self):
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+    
+    # Markdown
+    
+    def _write_designs(self, venue_designs: List[Dict]):
+        """Apply venue sections to music_design.md in a single atomic write"""
         # Read existing file
         if self.md_file_path.exists():
             with open(self.md_file_path, 'r') as f:
@@ -148,23 +318,8 @@ class MusicDesignSync:
         else:
             content = "# Music Design Schedules\n\n"
         
-        # Find and update venue section
-        venue_section_start = content.find(f"## {venue_name}")
-        
-        if venue_section_start == -1:
-            # Add new venue section
-            new_section = self._create_venue_section(venue_design)
-            content += f"\n{new_section}"
-        else:
-            # Update existing section
-            # Find next venue section or end of file
-            next_venue = content.find("\n## ", venue_section_start + 1)
-            if next_venue == -1:
-                next_venue = len(content)
-            
-            # Replace the section
-            new_section = self._create_venue_section(venue_design)
-            content = content[:venue_section_start] + new_section + content[next_venue:]
+        for venue_design in venue_designs:
+            content = self._apply_venue_section(content, venue_design)
         
         # Update the Last Updated date at the top
         content = re.sub(
@@ -173,11 +328,30 @@ class MusicDesignSync:
             content
         )
         
-        # Write back to file
-        with open(self.md_file_path, 'w') as f:
-            f.write(content)
+        _atomic_write(self.md_file_path, content)
+        logger.info(f"Updated music_design.md for {len(venue_designs)} venues")
+    
+    def _update_md_file(self, venue_design: Dict):
+        """Update the music_design.md file with one venue's data"""
+        self._write_designs([venue_design])
+    
+    def _apply_venue_section(self, content: str, venue_design: Dict) -> str:
+        """Replace (or append) a venue's section in the markdown content"""
+        venue_name = venue_design['property_name']
+        new_section = self._create_venue_section(venue_design)
+        
+        # Find and update venue section
+        venue_section_start = content.find(f"## {venue_name}")
+        
+        if venue_section_start == -1:
+            # Add new venue section
+            return content + f"\n{new_section}"
         
-        logger.info(f"Updated music_design.md for {venue_name}")
+        # Find next venue section or end of file
+        next_venue = content.find("\n## ", venue_section_start + 1)
+        if next_venue == -1:
+            next_venue = len(content)
+        return content[:venue_section_start] + new_section + content[next_venue:]
     
     def _create_venue_section(self, venue_design: Dict) -> str:
         """Create markdown section for a venue"""
@@ -210,9 +384,34 @@ class MusicDesignSync:
                 
                 section += "\n"
         
+        for zone_name, error in venue_design.get('failed_zones', {}).items():
+            section += f"### {zone_name}\n"
+            section += f"- **Sync Error**: {error}\n\n"
+        
         return section
 
 
+def _atomic_write(path: Path, content: str):
+    """Write to a temp file beside path, then rename it over path (keeping its mode)"""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates 0600; a new file gets the usual 0644
+        mode = path.stat().st_mode & 0o777 if path.exists() else 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
 def main():
     """Run sync for all venues"""
     logging.basicConfig(
@@ -228,9 +427,14 @@ def main():
     print()
     
     # Sync all SYB venues
-    syncer.sync_all_syb_venues()
+    summary = syncer.sync_all_syb_venues()
+    
+    for venue_name, timing in sorted(summary.get('venues', {}).items(), key=lambda v: -v[1]['seconds']):
+        print(f"  {venue_name}: {timing['zones']} zones, {timing['seconds']:.2f}s")
+    if summary.get('failed'):
+        print(f"\n⚠️  Failed (will resume next run): {', '.join(summary['failed'])}")
     
-    print("\n✅ Sync complete!")
+    print(f"\n✅ Sync complete in {summary.get('total_seconds', 0):.1f}s!")
     print(f"Data saved to: music_design.md")
     
     # You could also sync a specific venue
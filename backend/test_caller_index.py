@@ -0,0 +1,109 @@
+"""
+Tests for the caller identification index
+"""
+
+import pytest
+
+from caller_index import CallerIndex, email_domain, normalize_phone, split_phones
+from venue_data_reader import VenueDataReader
+
+
+VENUES = """# BMA Social Venue Database
+
+### Hilton Pattaya
+- **Business Type**: Hotel
+
+#### Contacts
+- **General Manager**: Rudolf
+  - Email: Rudolf.Troestler@Hilton.com
+  - Phone: +66 90 970 3370
+  - Preferred Contact: WhatsApp
+- **IT Manager**: Nok
+  - Email: nok.it@gmail.com
+  - Phone: 038-253-000 / 081 234 5678
+
+---
+
+### Hilton Bangkok
+- **Business Type**: Hotel
+
+#### Contacts
+- **General Manager**: Jittima
+  - Email: jittima@hilton.com
+  - Phone: —
+
+---
+
+### Centara Grand
+- **Business Type**: Hotel
+
+#### Contacts
+- **IT Manager**: Somchai
+  - Email: somchai@chr.co.th
+  - Phone: 081 234 5678
+
+---
+"""
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('+66 90 970 3370', '+66909703370'),
+    ('whatsapp:+66909703370', '+66909703370'),
+    ('66909703370', '+66909703370'),
+    ('0066 90-970-3370', '+66909703370'),
+    ('090 970 3370', '+66909703370'),
+    ('(038) 253-000', '+6638253000'),
+    ('+1 (415) 555-0100', '+14155550100'),
+    ('—', None),
+    ('12345', None),
+    ('', None),
+])
+def test_normalize_phone(raw, expected):
+    assert normalize_phone(raw) == expected
+
+
+def test_field_helpers():
+    assert split_phones('038-253-000 / 081 234 5678') == ['038-253-000', '081 234 5678']
+    assert split_phones('+66 1; +66 2 or +66 3') == ['+66 1', '+66 2', '+66 3']
+    assert email_domain('Rudolf@Hilton.COM') == 'hilton.com'
+    assert email_domain('—') is None
+
+
+def make_reader(tmp_path, content=VENUES):
+    path = tmp_path / 'venue_data.md'
+    path.write_text(content)
+    return VenueDataReader(file_path=str(path))
+
+
+def test_identifies_known_senders(tmp_path):
+    reader = make_reader(tmp_path)
+
+    rudolf = reader.identify_caller('whatsapp:+66909703370')
+    assert (rudolf['venue'], rudolf['name'], rudolf['title']) == ('Hilton Pattaya', 'Rudolf', 'General Manager')
+    assert reader.identify_caller('+66 38 253 000')['name'] == 'Nok'  # Second number of a contact
+
+    # Shared number (two venues) is not enough to identify a venue
+    assert reader.identify_caller('66812345678') is None
+    assert {c['venue'] for c in reader.caller_index.contacts_for_phone('66812345678')} == {'Hilton Pattaya', 'Centara Grand'}
+    assert reader.identify_caller('+66 99 999 9999') is None
+
+
+def test_email_domains_and_reload(tmp_path):
+    reader = make_reader(tmp_path)
+    index = reader.caller_index
+
+    assert index.venues_for_email('someone@hilton.com') == ['Hilton Pattaya', 'Hilton Bangkok']
+    assert index.venues_for_email('someone@chr.co.th') == ['Centara Grand']
+    assert index.venues_for_email('nok.it@gmail.com') == []  # Free mail identifies nobody
+
+    reader.reload_venue_data(VENUES.replace('+66 90 970 3370', '+66 64 586 7785'))
+    assert reader.identify_caller('+66909703370') is None
+    assert reader.identify_caller('0645867785')['name'] == 'Rudolf'
+    assert index.get_stats()['builds'] == 2
+
+
+def test_index_type_standalone():
+    index = CallerIndex()
+    assert index.rebuild([{'property_name': 'Bar', 'contacts': [{'name': 'A', 'phone': '—', 'email': '—'}]}]) == 0
+    assert index.identify('+66909703370') is None
+    assert index.get_stats() == {'builds': 1, 'phone_hits': 0, 'phone_misses': 1, 'phones': 0, 'domains': 0}
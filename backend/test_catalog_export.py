@@ -0,0 +1,117 @@
+"""
+Tests for the streaming venue catalog export
+"""
+
+import csv
+import gzip
+import io
+import json
+
+import catalog_export
+from app.core.export_auth import export_key_from, export_key_valid
+from catalog_export import (
+    CONTACT_FIELDS, VENUE_FIELDS, encode_rows, gzip_chunks, iter_contact_rows, iter_venue_rows
+)
+from venue_data_reader import VenueDataReader
+
+
+VENUES = """# BMA Social Venue Database
+
+### Hilton Pattaya
+- **Business Type**: Hotel
+- **Zone Count**: 2
+- **Zone Names**: Drift Bar, Edge
+- **Annual Price per Zone**: 12,000
+- **Currency**: THB
+- **Soundtrack Account ID**: —
+
+#### Contacts
+- **General Manager**: Rudolf
+  - Email: rudolf@hilton.com
+  - Phone: —
+  - Preferred Contact: Email
+  - Notes: —
+- **IT Manager**: Nok
+  - Email: —
+  - Phone: +66 1
+  - Preferred Contact: Phone
+  - Notes: Night shift
+
+---
+
+### Centara Grand
+- **Business Type**: Hotel
+- **Zone Count**: 1
+- **Zone Names**: Lobby
+
+#### Issue History
+- No recorded issues yet.
+
+---
+"""
+
+
+def load_venues(tmp_path):
+    path = tmp_path / "venue_data.md"
+    path.write_text(VENUES)
+    return VenueDataReader(file_path=str(path)).get_all_venues()
+
+
+def test_contact_rows_match_brevo_columns(tmp_path):
+    venues = load_venues(tmp_path)
+    text = b''.join(encode_rows(iter_contact_rows(venues), 'csv', CONTACT_FIELDS)).decode()
+
+    reader = csv.DictReader(io.StringIO(text))
+    assert reader.fieldnames == CONTACT_FIELDS
+    rows = list(reader)
+    assert [(r['venue_name'], r['contact_name'], r['contact_role']) for r in rows] == [
+        ('Hilton Pattaya', 'Rudolf', 'General Manager'),
+        ('Hilton Pattaya', 'Nok', 'IT Manager'),
+        ('Centara Grand', 'Manager', 'General Manager'),  # Default contact
+    ]
+    assert rows[0]['annual_price'] == '12,000'
+    assert rows[0]['contact_phone'] == ''  # Placeholders exported empty
+    assert rows[1]['notes'] == 'Night shift'
+
+
+def test_venue_rows_as_ndjson_with_resume(tmp_path):
+    venues = load_venues(tmp_path)
+
+    lines = b''.join(encode_rows(iter_venue_rows(venues), 'ndjson', VENUE_FIELDS)).decode().splitlines()
+    rows = [json.loads(line) for line in lines]
+    assert list(rows[0]) == VENUE_FIELDS
+    assert (rows[0]['venue_name'], rows[0]['contact_count'], rows[0]['account_id']) == ('Hilton Pattaya', '2', '')
+    assert rows[1]['zone_names'] == 'Lobby'
+
+    resumed = b''.join(encode_rows(iter_venue_rows(venues), 'ndjson', VENUE_FIELDS, start=1)).decode()
+    assert resumed.splitlines() == lines[1:]
+
+
+def test_chunked_gzip_stream_round_trips(monkeypatch):
+    monkeypatch.setattr(catalog_export, 'CHUNK_SIZE', 1024)
+    venues = [
+        {'property_name': f'Venue {n}', 'zone_names': 'Lobby, Pool', 'contacts': []}
+        for n in range(500)
+    ]
+
+    chunks = list(encode_rows(iter_contact_rows(venues), 'csv', CONTACT_FIELDS))
+    assert len(chunks) > 10
+    assert all(len(chunk) < 2048 for chunk in chunks)
+
+    body = gzip.decompress(b''.join(gzip_chunks(iter(chunks))))
+    assert body == b''.join(chunks)
+    assert body.decode().count('\r\n') == 501
+
+
+def test_export_requires_the_configured_key():
+    assert export_key_from({'x-api-key': 'k1'}) == 'k1'
+    assert export_key_from({'authorization': 'Bearer k1'}) == 'k1'
+    assert export_key_from({'authorization': 'Basic k1'}) == ''
+    assert export_key_from({}) == ''
+
+    assert export_key_valid('k1', api_key='k1')
+    assert not export_key_valid('k2', api_key='k1')
+    assert not export_key_valid('', api_key='k1')
+    # No key configured: nobody gets the contacts
+    assert not export_key_valid('', api_key='')
+    assert not export_key_valid('anything', api_key='')
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Test DatabaseManager's pool checkout and the store_message upsert
+The psycopg2 pool is replaced by an in-memory fake so no database is needed
+"""
+
+import asyncio
+import threading
+import time
+
+import database
+from database import DatabaseManager, PoolTimeoutError
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.connection = conn
+        self.closed = False
+
+    def execute(self, sql, params=None):
+        if self.connection.ping_fails and sql == "SELECT 1":
+            raise database.psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.connection.executed.append((sql, params))
+
+    def fetchone(self):
+        return self.connection.row
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FakeConnection:
+    def __init__(self, ping_fails=False):
+        self.closed = 0
+        self.autocommit = True
+        self.ping_fails = ping_fails
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.row = None
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakePool:
+    """Hands out idle connections first, like ThreadedConnectionPool"""
+
+    def __init__(self, idle=()):
+        self.closed = False
+        self.idle = list(idle)
+        self.handed_out = []
+        self.returned = []
+
+    def getconn(self):
+        conn = self.idle.pop(0) if self.idle else FakeConnection()
+        self.handed_out.append(conn)
+        return conn
+
+    def putconn(self, conn, close=False):
+        self.returned.append((conn, close))
+        if close:
+            conn.closed = 1
+        else:
+            self.idle.append(conn)
+
+
+def make_manager(monkeypatch, pool=None, slots=2):
+    monkeypatch.setattr(database, "DATABASE_URL", None)
+    manager = DatabaseManager()
+    manager.pool = pool or FakePool()
+    manager._slots = threading.BoundedSemaphore(slots)
+    return manager
+
+
+def test_checkout_times_out_when_pool_exhausted(monkeypatch):
+    manager = make_manager(monkeypatch, slots=1)
+    monkeypatch.setattr(database, "DB_POOL_TIMEOUT", 0.05)
+    held = threading.Event()
+    done = threading.Event()
+
+    def hold():
+        with manager.checkout():
+            held.set()
+            done.wait(2)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait(2)
+    try:
+        started = time.perf_counter()
+        try:
+            with manager.checkout():
+                raise AssertionError("checkout should have timed out")
+        except PoolTimeoutError:
+            pass
+        assert time.perf_counter() - started >= 0.05
+    finally:
+        done.set()
+        holder.join()
+
+    stats = manager.get_pool_stats()
+    assert stats["waits"] == 1 and stats["timeouts"] == 1
+    # The slot held by the other thread came back; nothing leaked
+    with manager.checkout() as conn:
+        assert conn is not None
+    assert manager.stats["in_use"] == 0
+
+
+def test_nested_cursor_reuses_thread_connection(monkeypatch):
+    manager = make_manager(monkeypatch)
+    with manager.get_cursor() as outer:
+        with manager.get_cursor() as inner:
+            assert inner.connection is outer.connection
+        seen = []
+
+        def other_thread():
+            with manager.checkout() as conn:
+                seen.append(conn)
+
+        other = threading.Thread(target=other_thread)
+        other.start()
+        other.join()
+        # Another thread gets its own connection
+        assert seen[0] is not outer.connection
+
+    assert len(manager.pool.handed_out) == 2
+    assert manager.stats["checkouts"] == 2 and manager.stats["in_use"] == 0
+    assert manager.connection is None
+
+
+def test_idle_unhealthy_connection_is_recycled(monkeypatch):
+    stale = FakeConnection(ping_fails=True)
+    manager = make_manager(monkeypatch, pool=FakePool(idle=[stale]))
+    monkeypatch.setattr(database, "DB_HEALTHCHECK_IDLE_SECONDS", 0)
+    manager._last_used[stale] = time.time() - 60
+
+    with manager.checkout() as conn:
+        assert conn is not stale and not conn.closed
+    assert manager.pool.returned[0] == (stale, True)
+    assert manager.stats["health_check_failures"] == 1
+
+
+def test_replacement_connection_is_checked(monkeypatch):
+    stale = FakeConnection(ping_fails=True)
+    also_stale = FakeConnection(ping_fails=True)
+    manager = make_manager(monkeypatch, pool=FakePool(idle=[stale, also_stale]))
+    monkeypatch.setattr(database, "DB_HEALTHCHECK_IDLE_SECONDS", 0)
+    monkeypatch.setattr(database, "DB_POOL_MIN_SIZE", 2)
+    manager._last_used[stale] = time.time() - 60
+
+    with manager.checkout() as conn:
+        # also_stale was never marked idle, but as a replacement it's pinged
+        assert conn not in (stale, also_stale)
+        assert conn.executed == [("SELECT 1", None)]
+    assert [closed for _, closed in manager.pool.returned] == [True, True, False]
+    assert manager.stats["health_check_failures"] == 2
+
+
+def test_no_healthy_connection_releases_slot(monkeypatch):
+    pool = FakePool(idle=[FakeConnection(ping_fails=True), FakeConnection(ping_fails=True)])
+    manager = make_manager(monkeypatch, pool=pool, slots=1)
+    monkeypatch.setattr(database, "DB_HEALTHCHECK_IDLE_SECONDS", 0)
+    monkeypatch.setattr(database, "DB_POOL_MIN_SIZE", 1)
+    manager._last_used[pool.idle[0]] = time.time() - 60
+
+    try:
+        with manager.checkout():
+            raise AssertionError("checkout should have failed")
+    except database.psycopg2.OperationalError:
+        pass
+    assert manager.stats["in_use"] == 0
+    assert manager._slots.acquire(blocking=False)
+
+
+def test_last_used_drops_closed_connections(monkeypatch):
+    manager = make_manager(monkeypatch)
+    try:
+        with manager.checkout():
+            raise database.psycopg2.OperationalError("terminating connection")
+    except database.psycopg2.OperationalError:
+        pass
+    manager.pool.returned.clear()
+    manager.pool.handed_out.clear()
+    # Nothing else holds the closed connection, so its entry is gone
+    assert len(manager._last_used) == 0
+
+
+def test_recently_used_connection_is_not_pinged(monkeypatch):
+    conn = FakeConnection(ping_fails=True)
+    manager = make_manager(monkeypatch, pool=FakePool(idle=[conn]))
+    manager._last_used[conn] = time.time()
+
+    with manager.checkout() as checked_out:
+        assert checked_out is conn
+    assert conn.executed == [] and manager.stats["health_check_failures"] == 0
+
+
+def test_broken_connection_is_closed_on_release(monkeypatch):
+    manager = make_manager(monkeypatch)
+    try:
+        with manager.checkout():
+            raise database.psycopg2.OperationalError("terminating connection")
+    except database.psycopg2.OperationalError:
+        pass
+    [(conn, close)] = manager.pool.returned
+    assert close and manager.stats["in_use"] == 0
+
+
+def test_store_message_single_round_trip(monkeypatch):
+    manager = make_manager(monkeypatch)
+    conn = FakeConnection()
+    conn.row = {"conversation_id": 7, "message_id": 11}
+    manager.pool.idle.append(conn)
+    manager._last_used[conn] = time.time()
+
+    conversation_id = manager.store_message(
+        channel="whatsapp",
+        user_phone="66810000000",
+        user_name="Test",
+        message_id="wamid.1",
+        content="hello",
+        metadata={"source": "test"}
+    )
+
+    assert conversation_id == 7
+    [(sql, params)] = conn.executed
+    assert "WITH existing AS" in sql and "UPDATE conversations" in sql
+    assert "WHERE NOT EXISTS (SELECT 1 FROM existing)" in sql
+    assert "ON CONFLICT (external_id) DO NOTHING" in sql
+    assert params["message_id"] == "wamid.1" and params["direction"] == "inbound"
+    assert params["metadata"].adapted == {"source": "test"}
+    assert conn.commits == 1
+
+
+def test_store_message_duplicate_keeps_conversation(monkeypatch):
+    manager = make_manager(monkeypatch)
+    conn = FakeConnection()
+    conn.row = {"conversation_id": 7, "message_id": None}  # ON CONFLICT skipped the insert
+    manager.pool.idle.append(conn)
+    manager._last_used[conn] = time.time()
+
+    assert manager.store_message("whatsapp", "66810000000", "Test", "wamid.1", "hello") == 7
+    assert len(conn.executed) == 1
+
+
+def test_run_async_does_not_block_event_loop(monkeypatch):
+    manager = make_manager(monkeypatch, slots=1)
+    monkeypatch.setattr(database, "DB_POOL_TIMEOUT", 2)
+    threads = []
+
+    def query(cursor):
+        threads.append(threading.get_ident())
+        cursor.execute("SELECT count(*) FROM venues")
+        time.sleep(0.05)  # A slow query
+        return cursor.fetchone()
+
+    async def scenario():
+        manager._slots.acquire()  # Pool exhausted by someone else
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.create_task(ticker())
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.1, manager._slots.release)
+        await manager.run_async(query)
+        ticking.cancel()
+        return ticks
+
+    # The loop kept running while checkout waited for the slot and the query ran
+    assert asyncio.run(scenario()) >= 10
+    assert threads and threads[0] != threading.get_ident()
+    assert manager.stats["waits"] == 1 and manager.stats["in_use"] == 0
+    assert manager.pool.returned[0][0].commits == 1
+
+
+def test_run_async_without_database(monkeypatch):
+    manager = make_manager(monkeypatch)
+    manager.pool = None
+    assert asyncio.run(manager.run_async(lambda cursor: cursor)) is None
@@ -0,0 +1,157 @@
+"""
+Tests for the BM25 issue index
+Quality and latency are compared with the substring scan it replaced on a
+labeled synthetic sample (the live venue file has no issue history yet).
+"""
+
+import random
+import time
+
+from issue_index import IssueIndex, tokenize
+from venue_data_reader import VenueDataReader
+
+
+# Issue wording per category; {zone} is filled per venue
+ISSUES = {
+    'offline': [
+        'Player went offline in {zone} after the router restarted',
+        'Device lost wifi connection, {zone} offline until IT reset the access point',
+    ],
+    'volume': [
+        'Volume too loud in {zone}, guests complained during breakfast',
+        'Volume dropped to zero in {zone} after the app update',
+    ],
+    'playlist': [
+        'Wrong playlist playing in {zone} during dinner service',
+        'Playlist schedule did not switch to the evening design in {zone}',
+    ],
+    'login': [
+        'Staff could not log in to the Soundtrack app, password reset sent',
+    ],
+    'hardware': [
+        'Speaker crackling in {zone}, amplifier replaced by the installer',
+    ],
+}
+
+ZONES = ['Lobby', 'Pool Bar', 'Restaurant', 'Spa', 'Rooftop']
+
+# (message, relevant category) - worded like chat messages, zone names included
+LABELED = [
+    ('music in the Restaurant stopped, player offline', 'offline'),
+    ('wifi connection dropped in the Lobby', 'offline'),
+    ('Pool Bar volume is too loud', 'volume'),
+    ('volume went to zero after the update', 'volume'),
+    ('wrong playlist playing in the Lobby', 'playlist'),
+    ('the schedule did not switch playlists this evening', 'playlist'),
+    ('staff in the Spa cannot log in to the app', 'login'),
+    ('speakers crackling on the Rooftop', 'hardware'),
+]
+
+
+def make_venues(count, seed=7):
+    rng = random.Random(seed)
+    categories = list(ISSUES)
+    venues = []
+    for n in range(count):
+        history = []
+        for i in range(5):
+            category = rng.choice(categories)
+            text = rng.choice(ISSUES[category]).format(zone=rng.choice(ZONES))
+            history.append({'date': f'2025-{1 + i:02d}-{10 + n % 18:02d}', 'issue': text, 'category': category})
+        venues.append({
+            'property_name': f'Venue {n}',
+            'issue_history': history,
+            'special_notes': ['Music also plays in the Lobby', '—'],
+        })
+    return venues
+
+
+def legacy_scan(venues, description):
+    """find_similar_issue before the index"""
+    similar = []
+    keywords = description.lower().split()
+    for venue in venues:
+        for issue in venue.get('issue_history', []):
+            issue_text = issue.get('issue', '').lower()
+            if any(kw in issue_text for kw in keywords if len(kw) > 3):
+                similar.append({'venue': venue.get('property_name'), 'date': issue.get('date'), 'issue': issue.get('issue')})
+    return similar
+
+
+def precision_at_3(venues, search):
+    categories = {
+        (venue['property_name'], issue['issue']): issue['category']
+        for venue in venues for issue in venue['issue_history']
+    }
+    hits = total = 0
+    for message, relevant in LABELED:
+        for result in search(message)[:3]:
+            total += 1
+            hits += categories.get((result['venue'], result['issue'])) == relevant
+    return hits / max(total, 1)
+
+
+def test_ranks_labeled_sample_better_and_faster_than_scan():
+    venues = make_venues(1000)
+    index = IssueIndex()
+    index.sync(venues)
+
+    def bm25(message):
+        return index.search(message, k=3, kinds=['issue'])
+
+    def timed(search):
+        started = time.perf_counter()
+        for message, _ in LABELED:
+            search(message)
+        return (time.perf_counter() - started) / len(LABELED)
+
+    scan_quality = precision_at_3(venues, lambda m: legacy_scan(venues, m))
+    bm25_quality = precision_at_3(venues, bm25)
+    scan_ms = timed(lambda m: legacy_scan(venues, m)) * 1000
+    bm25_ms = timed(bm25) * 1000
+    print(f"\nprecision@3 scan {scan_quality:.2f} vs bm25 {bm25_quality:.2f}; "
+          f"latency scan {scan_ms:.2f}ms vs bm25 {bm25_ms:.2f}ms (5000 issues)")
+
+    assert bm25_quality >= 0.9
+    assert bm25_quality > scan_quality
+    assert bm25_ms < scan_ms
+
+
+def test_incremental_sync_and_filters():
+    venues = make_venues(20)
+    index = IssueIndex()
+    assert index.sync(venues) == 20
+    assert index.sync(venues) == 0
+
+    venues[3] = {**venues[3], 'issue_history': venues[3]['issue_history'] + [
+        {'date': '2025-09-16', 'issue': 'Bluetooth pairing failed on the spa tablet'}
+    ]}
+    del venues[5]
+    assert index.sync(venues) == 2  # Venue 3 changed, Venue 5 removed
+    assert index.get_stats()['venues'] == 19
+
+    top = index.search('bluetooth pairing', k=1)[0]
+    assert (top['venue'], top['date'], top['kind']) == ('Venue 3', '2025-09-16', 'issue')
+    assert all(r['venue'] != 'Venue 5' for r in index.search('offline wifi', k=100))
+
+    assert {r['venue'] for r in index.search('volume', k=50, venue='venue 7')} <= {'Venue 7'}
+    dated = index.search('playlist offline volume', k=100, since='2025-02-01', until='2025-03-31')
+    assert dated and all('2025-02-01' <= r['date'] <= '2025-03-31' for r in dated)
+
+    notes = index.search('lobby music', kinds=['note'])
+    assert notes and all(r['kind'] == 'note' and r['date'] is None for r in notes)
+    assert index.search('the and of') == []
+    assert tokenize('Disconnected speakers') == tokenize('disconnect speaker')
+
+
+def test_reader_reindexes_on_reload(tmp_path):
+    path = tmp_path / 'venue_data.md'
+    venue = "### Hilton Pattaya\n- **Zone Names**: Edge\n\n#### Issue History\n- No recorded issues yet.\n\n---\n"
+    path.write_text(venue)
+    reader = VenueDataReader(file_path=str(path))
+    assert reader.find_similar_issue('edge zone offline') == []
+
+    reader.reload_venue_data(venue.replace(
+        '- No recorded issues yet.', '- **2025-09-16**: Edge zone offline after power cut'))
+    result = reader.find_similar_issue('edge zone offline')
+    assert [(r['venue'], r['date']) for r in result] == [('Hilton Pattaya', '2025-09-16')]
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Test the write-behind message buffer
+Batch writes are replaced by an in-memory recorder so no database is needed
+"""
+
+import threading
+import time
+
+import psycopg2
+
+from message_writer import MessageWriteBuffer
+
+
+class RecordingWriter(MessageWriteBuffer):
+    """Records batches instead of writing them; can be told to fail"""
+
+    def __init__(self, fail_times: int = 0, poison=(), **kwargs):
+        super().__init__(db_manager=object(), **kwargs)
+        self.batches = []
+        self.fail_times = fail_times
+        self.poison = set(poison)
+        self.attempted = 0
+
+    def _write_batch(self, batch):
+        self.attempted += 1
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("connection reset")
+        if self.poison & {row["message_id"] for row in batch}:
+            # Whole transaction rolls back, like the real upsert
+            raise psycopg2.DataError("invalid byte sequence for encoding \"UTF8\": 0x00")
+        self.batches.append([row["message_id"] for row in batch])
+
+
+def enqueue_many(writer, count, prefix="m"):
+    for i in range(count):
+        writer.enqueue(
+            channel="whatsapp",
+            user_phone=f"6681000{i % 3}",
+            user_name="Test",
+            message_id=f"{prefix}{i}",
+            content=f"hello {i}"
+        )
+
+
+def test_flushes_by_batch_size():
+    writer = RecordingWriter(batch_size=10, flush_interval_ms=60000)
+    enqueue_many(writer, 25)
+    deadline = time.time() + 2
+    while sum(len(b) for b in writer.batches) < 20 and time.time() < deadline:
+        time.sleep(0.01)
+    assert [len(b) for b in writer.batches[:2]] == [10, 10]
+    writer.stop()
+    assert sum(len(b) for b in writer.batches) == 25
+
+
+def test_flushes_by_interval():
+    writer = RecordingWriter(batch_size=1000, flush_interval_ms=50)
+    enqueue_many(writer, 3)
+    time.sleep(0.3)
+    assert writer.batches == [["m0", "m1", "m2"]]
+    writer.stop()
+
+
+def test_failed_flush_requeues_in_order():
+    writer = RecordingWriter(fail_times=1, batch_size=100, flush_interval_ms=60000)
+    enqueue_many(writer, 3)
+    assert writer.flush() is False
+    assert writer.pending_count() == 3
+    enqueue_many(writer, 1, prefix="late")
+    assert writer.flush() is True
+    assert writer.batches == [["m0", "m1", "m2", "late0"]]
+    assert writer.stats["failed_flushes"] == 1
+
+
+def test_stop_drains_pending_rows():
+    writer = RecordingWriter(batch_size=4, flush_interval_ms=60000)
+    enqueue_many(writer, 9)
+    writer.stop()
+    assert writer.pending_count() == 0
+    assert sum(len(b) for b in writer.batches) == 9
+
+
+def test_poison_row_is_isolated_and_dead_lettered():
+    writer = RecordingWriter(poison={"m5"}, batch_size=8, flush_interval_ms=60000)
+    enqueue_many(writer, 8)
+    assert writer.flush() is True
+    assert sorted(sum(writer.batches, [])) == sorted(f"m{i}" for i in range(8) if i != 5)
+    assert [row["message_id"] for row, _ in writer.dead_letters] == ["m5"]
+    assert "rejected by database" in writer.dead_letters[0][1]
+    assert writer.stats["written"] == 7 and writer.stats["dead_lettered"] == 1
+    assert writer.pending_count() == 0
+    writer.stop()
+
+
+def test_retries_are_capped_per_row():
+    writer = RecordingWriter(fail_times=100, batch_size=10, max_attempts=3, flush_interval_ms=60000)
+    enqueue_many(writer, 2)
+    results = [writer.flush() for _ in range(3)]
+    assert results == [False, False, False]
+    assert writer.pending_count() == 0
+    assert [row["message_id"] for row, _ in writer.dead_letters] == ["m0", "m1"]
+    assert writer.flush() is True and writer.attempted == 3
+    writer.stop()
+
+
+def test_backlog_at_limit_never_writes_inline():
+    release = threading.Event()
+
+    class StalledWriter(RecordingWriter):
+        def _write_batch(self, batch):
+            release.wait(5)  # Database hanging
+            super()._write_batch(batch)
+
+    writer = StalledWriter(batch_size=2, max_pending=4, flush_interval_ms=10)
+    caller = threading.current_thread()
+    writes_on_caller = []
+    original = writer._write_rows
+    writer._write_rows = lambda batch: writes_on_caller.append(threading.current_thread() is caller) or original(batch)
+
+    started = time.perf_counter()
+    accepted = [
+        writer.enqueue(channel="whatsapp", user_phone="66810000", user_name="Test", message_id=f"m{i}", content="hi")
+        for i in range(12)
+    ]
+    assert time.perf_counter() - started < 1.0  # Enqueue didn't wait on the database
+    assert not any(writes_on_caller)
+    assert accepted.count(False) == writer.stats["rejected"] > 0
+    assert writer.pending_count() <= 4
+    rejected = {row["message_id"] for row, _ in writer.dead_letters}
+    assert all("backlog full" in reason for _, reason in writer.dead_letters)
+
+    release.set()
+    writer.stop()
+    written = set(sum(writer.batches, []))
+    assert written | rejected == {f"m{i}" for i in range(12)} and not written & rejected
+
+
+def test_concurrent_starts_run_one_flusher(monkeypatch):
+    registered = []
+    monkeypatch.setattr("message_writer.atexit.register", registered.append)
+    writer = RecordingWriter(flush_interval_ms=10)
+    runs = []
+    original_run = writer._run
+    writer._run = lambda: runs.append(1) or original_run()
+    gate = threading.Barrier(8)
+
+    def start():
+        gate.wait()
+        writer.start()
+
+    threads = [threading.Thread(target=start) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    writer.stop()
+    assert len(runs) == 1
+
+    writer.start()
+    writer.stop()
+    # Restarting runs a new flusher but doesn't register another exit hook
+    assert len(runs) == 2
+    assert registered == [writer._stop_at_exit]
+
+if __name__ == "__main__":
+    test_flushes_by_batch_size()
+    test_flushes_by_interval()
+    test_failed_flush_requeues_in_order()
+    test_stop_drains_pending_rows()
+    test_poison_row_is_isolated_and_dead_lettered()
+    test_retries_are_capped_per_row()
+    test_backlog_at_limit_never_writes_inline()
+    print("✅ Message writer tests passed")
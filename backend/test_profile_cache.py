@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test the LINE/WhatsApp profile cache
+Covers TTL expiry, LRU bounds, negative caching and tracker warm-up
+"""
+
+import time
+from profile_cache import ProfileCache
+
+
+class FakeBackend:
+    """Minimal Redis stand-in with get/setex"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+
+def test_hit_and_expiry():
+    cache = ProfileCache(ttl=1)
+    cache.set("line", "U1", display_name="Khun Nok", language="th")
+    assert cache.get("line", "U1")["display_name"] == "Khun Nok"
+    assert cache.get("LINE", "U1")["language"] == "th"
+
+    cache._entries["line:U1"]["expires_at"] = time.time() - 1
+    assert cache.get("line", "U1") is None
+    assert cache.stats["misses"] == 1
+
+
+def test_lru_bound():
+    cache = ProfileCache(max_entries=2)
+    cache.set("line", "U1", display_name="a")
+    cache.set("line", "U2", display_name="b")
+    cache.get("line", "U1")
+    cache.set("line", "U3", display_name="c")
+    assert cache.get("line", "U2") is None
+    assert cache.get("line", "U1") is not None
+    assert cache.stats["evictions"] == 1
+
+
+def test_negative_caching():
+    backend = FakeBackend()
+    cache = ProfileCache(backend=backend)
+    cache.set_negative("line", "U404")
+    profile = cache.get("line", "U404")
+    assert profile["error"] and profile["display_name"] is None
+    assert cache.display_name("line", "U404", default="Line User") == "Line User"
+    # Errors are never shared through the persistent store
+    assert backend.data == {}
+
+
+def test_persistent_backend():
+    backend = FakeBackend()
+    ProfileCache(backend=backend).set("whatsapp", "66812345678", display_name="Somchai")
+
+    fresh = ProfileCache(backend=backend)
+    assert fresh.display_name("whatsapp", "66812345678") == "Somchai"
+    assert fresh.stats["backend_hits"] == 1
+
+
+if __name__ == "__main__":
+    test_hit_and_expiry()
+    test_lru_bound()
+    test_negative_caching()
+    test_persistent_backend()
+    print("✅ Profile cache tests passed")
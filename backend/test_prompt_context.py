@@ -0,0 +1,120 @@
+"""
+Tests for the prebuilt venue prompt blocks
+"""
+
+from prompt_context import PromptContextCache, assemble, build_venue_context, count_tokens, prompt_part
+from venue_data_reader import VenueDataReader
+
+
+VENUES = """# BMA Social Venue Database
+
+### Hilton Pattaya
+- **Business Type**: Hotel
+- **Zone Count**: 4
+- **Zone Names**: Drift Bar, Edge, Horizon, Shore
+- **Music Platform**: Soundtrack Your Brand
+- **Annual Price per Zone**: THB 12,000
+- **Contract Start**: 2024-11-01
+- **Contract End**: 2025-10-31
+- **Soundtrack Account ID**: —
+
+#### Contacts
+- **General Manager**: Rudolf Troestler
+  - Email: rudolf.troestler@hilton.com
+  - Phone: +66 90 970 3370
+- **IT Manager**: —
+  - Email: —
+
+#### Issue History
+- **2025-01-10**: Edge zone offline after router change
+- **2025-03-02**: Volume too low in Horizon
+- **2025-06-21**: Drift Bar player stuck on one playlist
+
+#### Special Notes
+- Drift Bar music also plays in the Lobby
+
+---
+
+### One Bangkok
+- **Business Type**: Retail
+- **Zone Names**: & Co. - One Bangkok
+- **Music Platform**: SYB
+- **Annual Price per Zone**: —
+
+#### Issue History
+- No recorded issues yet.
+
+---
+"""
+
+
+def make_reader(tmp_path, content=VENUES):
+    path = tmp_path / 'venue_data.md'
+    path.write_text(content)
+    return VenueDataReader(file_path=str(path))
+
+
+def test_block_contents_and_placeholders(tmp_path):
+    reader = make_reader(tmp_path)
+    text, tokens = reader.venue_context('hilton pattaya', budget=1000)
+
+    assert text.splitlines()[:3] == ['Venue: Hilton Pattaya', 'Business Type: Hotel', 'Zones: Drift Bar, Edge, Horizon, Shore']
+    assert 'Annual Price per Zone: THB 12,000' in text and 'Contract End: 2025-10-31' in text
+    assert '- Rudolf Troestler (General Manager)' in text
+    assert 'rudolf.troestler@hilton.com' not in text and '+66' not in text  # Names only, no contact details
+    assert 'Account' not in text and '—' not in text
+    # Newest issue first
+    assert text.index('2025-06-21') < text.index('2025-03-02') < text.index('2025-01-10')
+    assert tokens == reader.prompt_contexts.get('Hilton Pattaya').tokens >= count_tokens(text)
+
+    one_bangkok, _ = reader.venue_context('One Bangkok')
+    assert 'Recent Issues' not in one_bangkok and 'Annual Price' not in one_bangkok
+    assert reader.venue_context('Nowhere Hotel') == ('', 0)
+
+
+def test_same_catalog_gives_same_text(tmp_path):
+    reader = make_reader(tmp_path)
+    block = reader.prompt_contexts.get('Hilton Pattaya')
+
+    reader.reload_venue_data(VENUES)
+    assert reader.prompt_contexts.get('Hilton Pattaya') is block  # Unchanged venue keeps its block
+
+    reader.reload_venue_data(VENUES.replace('THB 12,000', 'THB 13,000'))
+    changed = reader.prompt_contexts.get('Hilton Pattaya')
+    assert changed is not block and 'THB 13,000' in changed.text
+    assert reader.prompt_contexts.get_stats()['reused'] == 3
+
+    # venue_manager's dict shape builds the same account facts
+    manager_shape = {'name': 'Hilton Pattaya', 'zones': ['Drift Bar', 'Edge'], 'platform': 'SYB', 'contract_end': None}
+    assert build_venue_context(manager_shape).text == 'Venue: Hilton Pattaya\nZones: Drift Bar, Edge\nTotal Zones: 2\nPlatform: SYB'
+
+
+def test_budget_truncation(tmp_path):
+    block = make_reader(tmp_path).prompt_contexts.get('Hilton Pattaya')
+    account_tokens = sum(block.sections[0][2])
+
+    text, tokens = block.fit(account_tokens)
+    assert text.endswith('Annual Price per Zone: THB 12,000') and tokens == account_tokens
+
+    # Partial contacts section is never a bare header
+    text, tokens = block.fit(account_tokens + 3)
+    assert 'Contacts:' not in text
+
+    text, tokens = block.fit(block.tokens - 1)
+    assert 'Special Notes' in text and '2025-06-21' in text and '2025-01-10' not in text  # Oldest issue dropped first
+    assert tokens <= block.tokens - 1
+    assert block.fit(block.tokens - 1)[0] is text  # Memoized per budget
+
+    # Account facts are kept whatever the budget
+    assert block.fit(5)[0].startswith('Venue: Hilton Pattaya') and 'Contacts' not in block.fit(5)[0]
+
+
+def test_assemble_uses_prebuilt_counts():
+    prefix = prompt_part('You are the support assistant.\n' * 20)
+    cache = PromptContextCache()
+    cache.rebuild([{'name': 'Bar One', 'zones': ['Main']}])
+
+    text, tokens = assemble(prefix, cache.render('bar one'), '', 'Venue match confidence: 95%')
+    assert text.startswith(prefix[0]) and text.endswith('Venue match confidence: 95%')
+    assert tokens == prefix[1] + cache.render('Bar One')[1] + count_tokens('Venue match confidence: 95%') + 4
+    assert cache.get_stats()['hits'] == 2 and cache.get_stats()['venues'] == 1
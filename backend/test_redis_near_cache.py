@@ -0,0 +1,203 @@
+"""
+Tests for the Redis near-cache
+Uses a stand-in connection pool that answers CLIENT ID / SUBSCRIBE /
+CLIENT TRACKING and lets the test push invalidation messages
+"""
+
+import queue
+import time
+
+from redis_near_cache import RedisNearCache
+
+
+class FakeConnection:
+    def __init__(self, pool, client_id):
+        self.pool = pool
+        self.client_id = client_id
+        self.replies = queue.Queue()
+        self.pending = None
+        self.closed = False
+
+    def send_command(self, *args):
+        command = " ".join(str(a) for a in args[:2]).upper()
+        if command == "CLIENT ID":
+            self.replies.put(self.client_id)
+        elif args[0] == "SUBSCRIBE":
+            self.pool.subscriber = self
+            self.replies.put(["subscribe", args[1], 1])
+        elif command == "CLIENT TRACKING":
+            if not self.pool.tracking_supported:
+                self.replies.put(RuntimeError("ERR unknown subcommand 'TRACKING'"))
+            else:
+                self.pool.tracking_args = args
+                self.replies.put("OK")
+
+    def can_read(self, timeout=0):
+        if self.pending is None:
+            try:
+                self.pending = self.replies.get(timeout=timeout)
+            except queue.Empty:
+                return False
+        return True
+
+    def read_response(self):
+        # Blocking reads time out like a pool connection with socket_timeout
+        if self.pending is not None:
+            reply, self.pending = self.pending, None
+        else:
+            try:
+                reply = self.replies.get(timeout=self.pool.socket_timeout)
+            except queue.Empty:
+                raise TimeoutError("Timeout reading from socket")
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def disconnect(self):
+        self.closed = True
+        self.replies.put(ConnectionError("closed"))
+
+
+class FakePool:
+    def __init__(self, tracking_supported=True, socket_timeout=None):
+        self.tracking_supported = tracking_supported
+        self.socket_timeout = socket_timeout
+        self.tracking_args = None
+        self.subscriber = None
+        self._ids = 0
+
+    def get_connection(self, name):
+        self._ids += 1
+        return FakeConnection(self, self._ids)
+
+    def release(self, connection):
+        pass
+
+    def push_invalidation(self, keys):
+        self.subscriber.replies.put(["message", "__redis__:invalidate", keys])
+
+
+class FakeClient:
+    def __init__(self, pool):
+        self.connection_pool = pool
+        self.data = {}
+        self.reads = 0
+
+    def get(self, key):
+        self.reads += 1
+        return self.data.get(key)
+
+
+def wait_for(condition, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_tracking_serves_locally_until_invalidated():
+    pool = FakePool()
+    client = FakeClient(pool)
+    cache = RedisNearCache(client, prefixes=["venue:phone:"])
+    cache.start()
+    try:
+        assert cache.mode == "tracking"
+        # REDIRECT to the subscriber connection, broadcast on our prefix
+        assert pool.tracking_args[3:] == ("REDIRECT", pool.subscriber.client_id, "BCAST", "PREFIX", "venue:phone:")
+
+        client.data["venue:phone:+66"] = '{"name": "Hilton Pattaya"}'
+        for _ in range(5):
+            assert cache.get("venue:phone:+66", client.get) == '{"name": "Hilton Pattaya"}'
+        assert client.reads == 1
+
+        client.data["venue:phone:+66"] = '{"name": "Hilton Pattaya Beach"}'
+        pool.push_invalidation(["venue:phone:+66"])
+        assert wait_for(lambda: cache.stats["invalidations"] == 1)
+        assert cache.get("venue:phone:+66", client.get) == '{"name": "Hilton Pattaya Beach"}'
+        assert client.reads == 2
+    finally:
+        cache.stop()
+
+
+def test_value_invalidated_during_read_is_not_kept():
+    pool = FakePool()
+    client = FakeClient(pool)
+    cache = RedisNearCache(client, prefixes=["zone:"])
+    cache.start()
+    try:
+        def racing_read(key):
+            value = "old-zone-id"
+            cache.invalidate([key])  # Write lands between our GET and store
+            return value
+
+        assert cache.get("zone:hilton:lobby", racing_read) == "old-zone-id"
+        client.data["zone:hilton:lobby"] = "new-zone-id"
+        assert cache.get("zone:hilton:lobby", client.get) == "new-zone-id"
+    finally:
+        cache.stop()
+
+
+def test_own_write_invalidation_lag_is_measured():
+    pool = FakePool()
+    client = FakeClient(pool)
+    cache = RedisNearCache(client, prefixes=["zone:"])
+    cache.start()
+    try:
+        cache.note_write("zone:hilton:lobby")
+        time.sleep(0.01)
+        pool.push_invalidation(["zone:hilton:lobby"])
+        assert wait_for(lambda: len(cache.invalidation_lags) == 1)
+        assert cache.get_stats()["invalidation_lag_ms"]["p50"] >= 10
+    finally:
+        cache.stop()
+
+
+def test_falls_back_to_short_ttl_without_tracking():
+    pool = FakePool(tracking_supported=False)
+    client = FakeClient(pool)
+    cache = RedisNearCache(client, prefixes=["venue:phone:"], fallback_ttl=0.05)
+    cache.start()
+    try:
+        assert cache.mode == "ttl"
+        client.data["venue:phone:+66"] = "a"
+        cache.get("venue:phone:+66", client.get)
+        cache.get("venue:phone:+66", client.get)
+        assert client.reads == 1
+        time.sleep(0.06)
+        cache.get("venue:phone:+66", client.get)
+        assert client.reads == 2
+        assert cache.get_stats()["tracking_failures"] == 1
+    finally:
+        cache.stop()
+
+
+def test_lost_subscriber_flushes_and_drops_to_ttl():
+    pool = FakePool()
+    client = FakeClient(pool)
+    cache = RedisNearCache(client, prefixes=["zone:"], retry_interval=60)
+    cache.start()
+    try:
+        client.data["zone:a:b"] = "z1"
+        cache.get("zone:a:b", client.get)
+        pool.subscriber.replies.put(ConnectionError("Connection reset by peer"))
+        assert wait_for(lambda: cache.mode == "ttl")
+        assert cache.get_stats()["size"] == 0
+    finally:
+        cache.stop()
+
+
+def test_quiet_subscriber_stays_tracking():
+    pool = FakePool(socket_timeout=0.01)
+    client = FakeClient(pool)
+    cache = RedisNearCache(client, prefixes=["zone:"], listen_timeout=0.01)
+    cache.start()
+    try:
+        client.data["zone:a:b"] = "z1"
+        cache.get("zone:a:b", client.get)
+        time.sleep(0.1)  # Many socket timeouts without a message
+        assert cache.mode == "tracking"
+        assert cache.get("zone:a:b", client.get) == "z1" and client.reads == 1
+        pool.push_invalidation(["zone:a:b"])
+        assert wait_for(lambda: cache.stats["invalidations"] == 1)
+    finally:
+        cache.stop()
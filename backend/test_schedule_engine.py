@@ -0,0 +1,152 @@
+"""
+Tests for the schedule engine
+Weekly schedules from SYB schedule items and music_design.md tables,
+compiled to interval indexes and queried per zone and fleet-wide
+"""
+
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from schedule_engine import ScheduleEngine, ZoneSchedule, parse_design_tables, parse_days
+
+# Wednesday 2026-10-14 in UTC
+WED = datetime(2026, 10, 14, tzinfo=timezone.utc)
+
+DESIGN = """
+# Music Design Schedules
+
+## Beat Breeze Venues
+
+### Example: [Venue Name]
+#### Zone: [Zone Name]
+| Time | Playlist | Energy | Volume Level (0-16) | Notes |
+|------|----------|---------|---------------------|--------|
+| 09:00-12:00 | Morning Vibes | Low | 8 | Gentle start |
+
+### Sala Rim Naam
+#### Zone: Terrace
+| Time | Days | Playlist | Energy | Volume Level (0-16) |
+|------|------|----------|--------|---------------------|
+| 11:00-14:00 | Mon-Fri | Chill Lunch Vibes | Low | 9 |
+| 22:00-02:00 | Daily | Late Night Cocktails | Low | 8 |
+
+## Hilton Pattaya
+
+### Drift Bar
+#### Schedule
+| Time | Days | Playlist |
+|------|------|----------|
+| 18:00-22:00 | SATURDAY, SUNDAY | Golden Hour |
+"""
+
+
+def test_design_tables_in_both_formats():
+    tables = parse_design_tables(DESIGN)
+    assert set(tables) == {("Sala Rim Naam", "Terrace"), ("Hilton Pattaya", "Drift Bar")}
+    assert tables[("Sala Rim Naam", "Terrace")][0]["volume"] == "9"
+    assert parse_days("Mon-Fri") == ("mon", "tue", "wed", "thu", "fri")
+    assert parse_days(["SATURDAY", "SUNDAY"]) == ("sat", "sun")
+    assert parse_days("Fri-Mon") == ("mon", "fri", "sat", "sun")
+
+
+def test_slots_crossing_midnight_and_the_end_of_the_week():
+    schedule = ZoneSchedule([{"days": "Sun", "start": "22:00", "end": "02:00", "playlist": "Late"}], tz="UTC")
+    sunday_night = datetime(2026, 10, 18, 23, 30, tzinfo=timezone.utc)
+    monday_morning = datetime(2026, 10, 19, 1, 30, tzinfo=timezone.utc)
+    assert schedule.at(sunday_night)["playlist"] == "Late"
+    assert schedule.at(monday_morning)["playlist"] == "Late"
+    assert schedule.at(monday_morning + timedelta(hours=1)) is None
+
+
+def test_venue_timezone_and_overlaps():
+    engine = ScheduleEngine()
+    engine.set_zone("Hilton Pattaya", "Lobby", [
+        {"start": "09:00", "end": "18:00", "playlist": "Lobby Day", "volume": 7},
+        {"start": "12:00", "end": "14:00", "playlist": "Lunch", "volume": 8},
+    ], tz="Asia/Bangkok")
+
+    # 05:30 UTC = 12:30 in Bangkok: the later-starting slot wins
+    assert engine.intended("hilton pattaya", "lobby", WED + timedelta(hours=5, minutes=30))["playlist"] == "Lunch"
+    assert engine.intended("Hilton Pattaya", "Lobby", WED + timedelta(hours=3))["playlist"] == "Lobby Day"
+    missing = engine.intended("Hilton Pattaya", "Lobby", WED + timedelta(hours=20))
+    assert missing["scheduled"] is False and missing["playlist"] is None
+    assert engine.intended("Hilton Pattaya", "Nowhere") is None
+    assert engine.intended_local("Hilton Pattaya", "Lobby", "12:30", day="wed")["volume"] == 8
+
+
+def test_nested_slot_splits_the_longer_one():
+    schedule = ZoneSchedule([
+        {"start": "09:00", "end": "17:00", "playlist": "A"},
+        {"start": "12:00", "end": "13:00", "playlist": "B"},
+        {"start": "12:30", "end": "12:45", "playlist": "C"},
+    ], tz="UTC")
+
+    def at(hour, minute=0):
+        return (schedule.at(WED + timedelta(hours=hour, minutes=minute)) or {}).get("playlist")
+
+    assert [at(9), at(12), at(12, 30), at(12, 45), at(13), at(16, 59), at(17)] == ["A", "B", "C", "B", "A", "A", None]
+    # Wednesday is A, B, C, B, A
+    wed = 2 * 24 * 60
+    first = schedule.starts.index(wed + 9 * 60)
+    assert schedule.starts[first:first + 5] == [wed + m for m in (540, 720, 750, 765, 780)]
+    assert schedule.ends[first + 4] == wed + 17 * 60
+
+
+def test_zone_without_syb_schedule_is_not_requeried():
+    from music_monitor import MusicMonitor
+
+    monitor = MusicMonitor.__new__(MusicMonitor)  # No design or venue files needed
+    monitor.api_available = True
+    monitor._schedule_misses = {}
+    lookups = []
+    monitor.get_zone_schedule = lambda venue, zone: lookups.append(zone) or {"error": "Zone not found"}
+
+    for _ in range(3):
+        assert monitor.get_intended_music("Nowhere Hotel", "Lobby")["playlist"] == "Unknown"
+    assert lookups == ["Lobby"]
+
+    monitor.SCHEDULE_MISS_TTL = 0  # Expired: SYB is asked again
+    monitor.get_intended_music("Nowhere Hotel", "Lobby")
+    assert lookups == ["Lobby", "Lobby"]
+
+
+def test_syb_schedule_uses_zone_volume():
+    engine = ScheduleEngine()
+    node = {
+        "soundtrackSchedule": {"scheduleItems": [
+            {"startTime": "18:00:00", "endTime": "22:00:00", "daysOfWeek": ["FRIDAY"], "soundtrack": {"name": "Sunset Sessions"}},
+        ]},
+        "playbackSettings": {"volume": 11},
+    }
+    assert engine.load_syb_zone("Hilton Pattaya", "Drift Bar", node, tz="UTC")
+    friday_evening = WED + timedelta(days=2, hours=19)
+    assert engine.intended("Hilton Pattaya", "Drift Bar", friday_evening)["volume"] == 11
+    assert engine.intended("Hilton Pattaya", "Drift Bar", WED)["volume"] == 11  # Unscheduled: zone default
+    assert not engine.load_syb_zone("Hilton Pattaya", "Edge", {"soundtrackSchedule": None})
+
+
+def test_fleet_sweep_matches_per_zone_lookups():
+    rng = random.Random(3)
+    engine = ScheduleEngine()
+    timezones = ["Asia/Bangkok", "Asia/Dubai", "Asia/Tokyo", "Europe/London"]
+    for n in range(2000):
+        slots = []
+        for day in ("mon", "tue", "wed", "thu", "fri", "sat", "sun"):
+            hour = rng.randint(6, 10)
+            for length in (3, 4, 5):
+                end = (hour + length) % 24
+                slots.append({"days": day, "start": f"{hour:02d}:00", "end": f"{end:02d}:00", "playlist": f"p{n}-{day}-{hour}"})
+                hour = end
+        engine.set_zone(f"venue-{n // 10}", f"zone-{n}", slots, tz=timezones[n % 4])
+
+    when = WED + timedelta(hours=13, minutes=17)
+    started = time.perf_counter()
+    fleet = engine.intended_all(when)
+    elapsed = time.perf_counter() - started
+
+    assert len(fleet) == 2000
+    for (venue, zone), result in list(fleet.items())[::97]:
+        assert result == engine.intended(venue, zone, when)
+    assert any(r["scheduled"] for r in fleet.values()) and any(not r["scheduled"] for r in fleet.values())
+    assert elapsed < 1.0
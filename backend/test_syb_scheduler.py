@@ -0,0 +1,129 @@
+"""
+Tests for the SYB priority-lane scheduler
+Simulates a background sweep saturating the slots while a customer command arrives
+"""
+
+import time
+import threading
+
+import pytest
+
+from syb_scheduler import SYBScheduler, SlotTimeoutError, INTERACTIVE, NORMAL, BACKGROUND
+
+
+def run_requests(scheduler, count, lane, job, duration, order=None, tag=None):
+    """Start count threads that each hold a slot for duration seconds"""
+    def worker():
+        with scheduler.slot(lane, job):
+            if order is not None:
+                order.append(tag or job)
+            time.sleep(duration)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for t in threads:
+        t.start()
+    return threads
+
+
+def test_interactive_skips_background_queue():
+    scheduler = SYBScheduler(max_in_flight=4, interactive_reserve=1)
+    threads = run_requests(scheduler, 40, BACKGROUND, "sweep", 0.02)
+    time.sleep(0.01)
+
+    started = time.perf_counter()
+    with scheduler.slot(INTERACTIVE):
+        wait = time.perf_counter() - started
+
+    for t in threads:
+        t.join()
+    # Reserved slot is free - no waiting behind 40 queued sweep requests
+    assert wait < 0.01
+    stats = scheduler.get_stats()
+    assert stats["lanes"][INTERACTIVE]["requests"] == 1
+    assert stats["lanes"][BACKGROUND]["requests"] == 40
+    assert stats["in_flight"] == 0
+
+
+def test_background_never_uses_reserved_slots():
+    scheduler = SYBScheduler(max_in_flight=4, interactive_reserve=2)
+    peak = []
+
+    def worker():
+        with scheduler.slot(BACKGROUND, "sweep"):
+            peak.append(scheduler.get_stats()["in_flight"])
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=worker) for _ in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(peak) <= 2
+
+
+def test_background_jobs_share_fairly():
+    scheduler = SYBScheduler(max_in_flight=2, interactive_reserve=1)
+    order = []
+    # Occupy the only shared slot so both jobs queue up behind it
+    blocker = run_requests(scheduler, 1, NORMAL, None, 0.05)
+    time.sleep(0.01)
+    big = run_requests(scheduler, 20, BACKGROUND, "zone_sweep", 0.001, order)
+    time.sleep(0.01)
+    small = run_requests(scheduler, 3, BACKGROUND, "design_sync", 0.001, order)
+
+    for t in blocker + big + small:
+        t.join()
+    # The small job finishes within the first few turns instead of after the sweep
+    last_small = max(i for i, job in enumerate(order) if job == "design_sync")
+    assert last_small < 8
+    assert scheduler.get_stats()["background_jobs"]["zone_sweep"]["requests"] == 20
+
+
+def test_lane_block_sets_default_lane():
+    scheduler = SYBScheduler(max_in_flight=2, interactive_reserve=1)
+    with scheduler.lane(BACKGROUND, job="music_design_sync"):
+        assert scheduler.has_lane()
+        with scheduler.slot():
+            pass
+    assert not scheduler.has_lane()
+    stats = scheduler.get_stats()
+    assert stats["background_jobs"]["music_design_sync"]["requests"] == 1
+    assert stats["lanes"][BACKGROUND]["queue_wait"]["max_ms"] >= 0
+
+
+def test_reserve_must_leave_capacity():
+    with pytest.raises(ValueError):
+        SYBScheduler(max_in_flight=2, interactive_reserve=2)
+
+
+def test_slot_wait_times_out():
+    scheduler = SYBScheduler(max_in_flight=2, interactive_reserve=1, slot_timeout=0.05)
+    blocker = run_requests(scheduler, 1, NORMAL, None, 0.2)
+    time.sleep(0.01)
+
+    started = time.perf_counter()
+    with pytest.raises(SlotTimeoutError):
+        with scheduler.slot(BACKGROUND, "sweep"):
+            raise AssertionError("slot should not have been granted")
+    assert 0.05 <= time.perf_counter() - started < 0.15
+
+    for t in blocker:
+        t.join()
+    stats = scheduler.get_stats()
+    assert stats["timeouts"] == 1
+    assert stats["lanes"][BACKGROUND]["queued"] == 0
+    assert stats["background_jobs"]["sweep"] == {"requests": 0, "queued": 0}
+    # The timed-out waiter left the queue, so the freed slot goes to the next request
+    with scheduler.slot(BACKGROUND, "sweep"):
+        assert scheduler.get_stats()["in_flight"] == 1
+
+
+def test_failed_request_releases_slot():
+    scheduler = SYBScheduler(max_in_flight=2, interactive_reserve=1, slot_timeout=0.05)
+    with pytest.raises(RuntimeError):
+        with scheduler.slot(NORMAL):
+            raise RuntimeError("connection reset")
+    with scheduler.slot(NORMAL):
+        pass
+    stats = scheduler.get_stats()
+    assert stats["in_flight"] == 0 and stats["lanes"][NORMAL]["requests"] == 2
@@ -0,0 +1,218 @@
+"""
+Tests for the music design sync
+Runs against a stub SYB GraphQL server with per-request latency, and
+benchmarks the concurrent sync against a serial run
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from sync_music_designs import MusicDesignSync
+
+LATENCY = 0.02
+
+
+class StubSYB:
+    """
+    GraphQL stub: every zone query answers after LATENCY seconds
+    failing (venue or zone id prefixes) answer with a GraphQL error, down with
+    an HTTP 503; with no_schedules the schedule fields are rejected as unknown
+    """
+
+    def __init__(self, venues, zones_per_venue=4):
+        self.zones = {
+            venue: [{'id': f"{venue}-z{n}", 'name': f"Zone {n}", 'online': True} for n in range(zones_per_venue)]
+            for venue in venues
+        }
+        self.failing = set()
+        self.down = set()
+        self.no_schedules = False
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                zone_id = body['variables']['zoneId']
+                stub.requests.append(zone_id)
+                time.sleep(LATENCY)
+                if any(zone_id.startswith(prefix) for prefix in stub.down):
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if any(zone_id.startswith(prefix) for prefix in stub.failing):
+                    payload = {'errors': [{'message': 'Internal error'}]}
+                elif stub.no_schedules and 'soundtrackSchedule' in body['query']:
+                    payload = {'errors': [{'message': 'Cannot query field "soundtrackSchedule" on type "SoundZone".'}]}
+                else:
+                    payload = {'data': {
+                        'soundZone': {'id': zone_id, 'name': zone_id, 'online': True,
+                                      'nowPlaying': {'track': {'name': 'Track'}},
+                                      'playFrom': {'__typename': 'Playlist', 'id': 'p1', 'name': 'Sunset Sessions'}},
+                    }}
+                    if 'soundtrackSchedule' in body['query']:
+                        payload['data']['node'] = {'soundtrackSchedule': {'scheduleItems': [
+                            {'startTime': '18:00', 'endTime': '22:00', 'daysOfWeek': ['FRIDAY'], 'soundtrack': {'name': 'Sunset Sessions'}},
+                        ]}, 'playbackSettings': {'volume': 10}}
+                data = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v2"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StubClient:
+    """The slice of SoundtrackAPI the sync uses, over HTTP to the stub"""
+
+    def __init__(self, stub):
+        self.stub = stub
+
+    def find_venue_zones(self, venue_name):
+        return [dict(z) for z in self.stub.zones.get(venue_name, [])]
+
+    def _execute_query(self, query, variables=None):
+        request = urllib.request.Request(
+            self.stub.url,
+            data=json.dumps({'query': query, 'variables': variables or {}}).encode(),
+            headers={'Content-Type': 'application/json'},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                data = json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return {'error': f"HTTP {e.code}"}
+        if 'errors' in data:
+            return {'error': data['errors']}
+        return data.get('data', {})
+
+
+@pytest.fixture
+def stub():
+    server = StubSYB([f"Venue {n}" for n in range(12)])
+    yield server
+    server.close()
+
+
+def make_sync(stub, tmp_path, workers):
+    sync = MusicDesignSync(api=StubClient(stub), max_workers=workers, checkpoint_path=tmp_path / 'checkpoint.json')
+    sync.md_file_path = tmp_path / 'music_design.md'
+    sync.md_file_path.write_text("# Music Design Schedules\n\nLast Updated: 2025-09-04\n")
+    return sync
+
+
+def test_one_request_per_zone_and_one_write(stub, tmp_path):
+    sync = make_sync(stub, tmp_path, workers=4)
+    summary = sync.sync_all_syb_venues(list(stub.zones))
+
+    assert summary['synced'] == 12 and summary['failed'] == []
+    assert len(stub.requests) == 48
+    content = sync.md_file_path.read_text()
+    assert all(f"## Venue {n}\n" in content for n in range(12))
+    assert "| 18:00-22:00 | FRIDAY | Sunset Sessions |" in content
+    assert not (tmp_path / 'checkpoint.json').exists()
+    assert all(timing['zones'] == 4 for timing in summary['venues'].values())
+    # No temp files left behind
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['music_design.md']
+
+
+def test_interrupted_run_resumes(stub, tmp_path):
+    stub.failing = {'Venue 3', 'Venue 7'}
+    interrupted = make_sync(stub, tmp_path, workers=4)
+    first = interrupted.sync_all_syb_venues(list(stub.zones))
+    assert sorted(first['failed']) == ['Venue 3', 'Venue 7']
+    # Outages, not missing schedule fields - the other venues kept their schedules
+    assert interrupted._schedule_supported
+    assert (tmp_path / 'checkpoint.json').exists()
+
+    stub.failing = set()
+    stub.requests.clear()
+    sync = make_sync(stub, tmp_path, workers=4)
+    second = sync.sync_all_syb_venues(list(stub.zones))
+
+    assert second['resumed'] == 10 and second['synced'] == 2
+    assert {zone_id.rsplit('-', 1)[0] for zone_id in stub.requests} == {'Venue 3', 'Venue 7'}
+    assert len(stub.requests) == 8
+    assert all(f"## Venue {n}\n" in sync.md_file_path.read_text() for n in range(12))
+    assert not (tmp_path / 'checkpoint.json').exists()
+
+
+def test_failed_zone_is_checkpointed_and_retried(stub, tmp_path):
+    stub.failing = {'Venue 2-z1'}
+    first = make_sync(stub, tmp_path, workers=4).sync_all_syb_venues(list(stub.zones))
+
+    # The venue's other zones still synced
+    assert first['failed'] == [] and first['partial'] == ['Venue 2']
+    checkpoint = json.loads((tmp_path / 'checkpoint.json').read_text())['venues']
+    assert sorted(checkpoint['Venue 2']['zones']) == ['Zone 0', 'Zone 2', 'Zone 3']
+    assert list(checkpoint['Venue 2']['failed_zones']) == ['Zone 1']
+    assert "### Zone 1\n- **Sync Error**:" in (tmp_path / 'music_design.md').read_text()
+
+    stub.failing = set()
+    stub.requests.clear()
+    second = make_sync(stub, tmp_path, workers=4).sync_all_syb_venues(list(stub.zones))
+
+    assert second['resumed'] == 11 and second['synced'] == 1 and second['partial'] == []
+    assert stub.requests == ['Venue 2-z1']
+    assert "Sync Error" not in (tmp_path / 'music_design.md').read_text()
+    assert not (tmp_path / 'checkpoint.json').exists()
+
+
+def test_outage_keeps_schedules_for_other_zones(stub, tmp_path):
+    stub.down = {'Venue 0-z0'}
+    sync = make_sync(stub, tmp_path, workers=1)
+    summary = sync.sync_all_syb_venues(list(stub.zones), resume=False)
+
+    assert summary['partial'] == ['Venue 0']
+    assert sync._schedule_supported
+    # Only the zone that was down went without its schedule
+    assert sync.md_file_path.read_text().count("| 18:00-22:00 | FRIDAY | Sunset Sessions |") == 47
+
+
+def test_unknown_schedule_fields_fall_back_to_status(stub, tmp_path):
+    stub.no_schedules = True
+    sync = make_sync(stub, tmp_path, workers=1)
+    summary = sync.sync_all_syb_venues(list(stub.zones), resume=False)
+
+    assert summary['failed'] == [] and summary['partial'] == []
+    assert not sync._schedule_supported
+    # The rejected design query is sent once, every zone after it asks for status only
+    assert len(stub.requests) == 49
+    content = sync.md_file_path.read_text()
+    assert all(f"## Venue {n}\n" in content for n in range(12))
+    assert "| 18:00-22:00 |" not in content
+
+
+def test_write_keeps_file_mode(stub, tmp_path):
+    sync = make_sync(stub, tmp_path, workers=4)
+    os.chmod(sync.md_file_path, 0o640)
+    sync.sync_all_syb_venues(list(stub.zones), resume=False)
+    assert sync.md_file_path.stat().st_mode & 0o777 == 0o640
+
+
+def test_benchmark_concurrent_against_serial(stub, tmp_path):
+    serial = make_sync(stub, tmp_path, workers=1).sync_all_syb_venues(list(stub.zones), resume=False)
+    concurrent = make_sync(stub, tmp_path, workers=6).sync_all_syb_venues(list(stub.zones), resume=False)
+
+    # 48 zone requests at 20ms: ~1s serially
+    assert serial['total_seconds'] >= 48 * LATENCY
+    assert concurrent['total_seconds'] < serial['total_seconds'] / 3
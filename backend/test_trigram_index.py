@@ -0,0 +1,102 @@
+"""
+Tests for the trigram venue search
+"""
+
+import random
+import time
+
+from app.core.trigram_index import TrigramIndex, edit_distance, trigrams, venue_index
+from venue_identifier import VenueIdentifier
+
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def make_venues(count, seed=3):
+    """Names shaped like the catalog: brand + city, invented names + venue type + city"""
+    rng = random.Random(seed)
+    syllables = 'ka ri na to san ta ma la vi sa ko ra pa ne lu mi chai wat siam thai pra ban'.split()
+    brands = ['Hilton', 'Marriott', 'Centara', 'Anantara', 'Avani', 'Amari', 'Hyatt', 'Novotel', 'Dusit', 'Kempinski']
+    kinds = ['Hotel', 'Resort', 'Resort & Spa', 'Beach Resort', 'Restaurant', 'Bar', 'Cafe', 'Suites']
+    cities = ['Bangkok', 'Phuket', 'Krabi', 'Chiang Mai', 'Hua Hin', 'Samui', 'Khao Lak', 'Rayong']
+
+    def word():
+        return ''.join(rng.choice(syllables) for _ in range(rng.randint(2, 3))).title()
+
+    venues = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.3:
+            name = f'{rng.choice(brands)} {word()} {rng.choice(cities)}'
+        elif roll < 0.7:
+            name = f'{word()} {rng.choice(kinds)} {rng.choice(cities)}'
+        else:
+            name = f'{word()} {word()}'
+        venues.append({'name': name})
+    return venues
+
+
+def test_edit_distance_matches_reference():
+    rng = random.Random(1)
+    for _ in range(2000):
+        a = ''.join(rng.choice('ab c') for _ in range(rng.randint(0, 10)))
+        b = ''.join(rng.choice('ab c') for _ in range(rng.randint(0, 10)))
+        assert edit_distance(a, b) == levenshtein(a, b)
+    assert edit_distance('hiltn patya', 'hilton pattaya') == 3
+    assert '  h' in trigrams('Hilton') and 'on ' in trigrams('Hilton')
+
+
+def test_misspellings_aliases_and_brands():
+    venues = make_venues(500) + [
+        {'name': 'Hilton Pattaya', 'brand': 'Hilton', 'aliases': ['Pattaya Hilton', 'Hilton Hotel Pattaya']},
+        {'name': 'Centara Grand Mirage Beach Resort Pattaya'},
+    ]
+    index = venue_index(venues)
+
+    top = index.search('Hiltn Patya', k=3)
+    assert top[0]['value']['name'] == 'Hilton Pattaya'
+    assert index.search('pattaya hilten', k=1)[0]['name'] == 'pattaya hilton'  # Alias matched
+    assert index.search('centra grand mirage', k=1)[0]['value']['name'].startswith('Centara Grand Mirage')
+    assert len({id(m['value']) for m in index.search('hilton', k=10)}) == len(index.search('hilton', k=10))
+    assert index.search('zzzz qqqq') == []
+
+
+def test_identifier_suggests_venue_for_typo():
+    venues = make_venues(200) + [{'name': 'Hilton Pattaya', 'location': 'Pattaya'}]
+    identifier = VenueIdentifier()
+
+    venue, message, state = identifier.identify_venue('Hiltn Patya', '+66000', venues)
+    matches = identifier._find_fuzzy_matches('hiltn patya', venues)
+    assert matches[0]['venue']['name'] == 'Hilton Pattaya'
+    assert 'Hilton Pattaya' in message and state != 'venue_not_found'
+
+    # Same list: index reused; new list: rebuilt
+    index = identifier._search_index(venues)
+    assert identifier._search_index(venues) is index
+    assert identifier._search_index(list(venues)) is not index
+
+
+def test_benchmark_top_k_at_10k_venues():
+    venues = make_venues(10_000) + [{'name': 'Hilton Pattaya'}]
+    index = TrigramIndex((venue, [venue['name']]) for venue in venues)
+    queries = ['Hiltn Patya', 'hilton pattaya', 'centra bangkok', 'kempinsky', 'sanmi resort krabi']
+    index.search('warm up')
+
+    timings = []
+    for query in queries * 20:
+        started = time.perf_counter()
+        index.search(query, k=5)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    median = timings[len(timings) // 2] * 1000
+    print(f"\n10k venues: median {median:.3f}ms, p95 {timings[int(len(timings) * 0.95)] * 1000:.3f}ms")
+
+    assert index.search('Hiltn Patya', k=1)[0]['name'] == 'hilton pattaya'
+    assert median < 1.0
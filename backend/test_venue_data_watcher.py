@@ -0,0 +1,112 @@
+"""
+Tests for venue_data.md hot reload
+Drives the watcher's polls by hand against a temporary venue file
+"""
+
+import os
+
+from venue_data_reader import VenueDataReader
+from venue_data_watcher import VenueDataWatcher, venue_sections
+
+
+VENUES = """# Venue Data
+
+### Hilton Pattaya
+- **Zone Names**: Edge, Drift Bar
+- **Timezone**: Asia/Bangkok
+
+### Centara Grand
+- **Zone Names**: Lobby
+"""
+
+
+def write(path, content, mtime):
+    path.write_text(content)
+    os.utime(path, (mtime, mtime))
+
+
+def settle(watcher):
+    """Two polls: the first sees the change, the second reloads it once it held still"""
+    assert watcher.check() is False
+    return watcher.check()
+
+
+def make_watcher(tmp_path):
+    path = tmp_path / "venue_data.md"
+    write(path, VENUES, 1_000_000)
+    watcher = VenueDataWatcher(path=path, interval=60)
+    watcher._loaded = watcher._signature()
+    watcher._sections = venue_sections(VENUES)
+    return path, watcher
+
+
+def test_reload_swaps_catalog_after_change_settles(tmp_path):
+    path, watcher = make_watcher(tmp_path)
+    reader = VenueDataReader(file_path=str(path))
+    watcher.watch(reader)
+    changed = []
+    watcher.on_change(changed.append)
+    before = reader.venues
+
+    assert watcher.check() is False  # Nothing changed
+
+    write(path, VENUES + "\n### Marriott Bangkok\n- **Zone Names**: Pool\n", 1_000_010)
+    assert settle(watcher) is True
+
+    assert before is not reader.venues
+    assert len(before) == 2  # Old catalog left intact for readers still holding it
+    assert [v['property_name'] for v in reader.venues] == ['Hilton Pattaya', 'Centara Grand', 'Marriott Bangkok']
+    assert changed == [{'marriott bangkok'}]
+
+    stats = watcher.get_stats()
+    assert stats['reloads'] == 1
+    assert stats['venues'] == {'VenueDataReader': 3}
+    assert stats['changed_venues'] == 1
+    assert stats['last_reload_ms'] is not None
+
+
+def test_write_in_progress_waits_for_next_poll(tmp_path):
+    path, watcher = make_watcher(tmp_path)
+    reader = VenueDataReader(file_path=str(path))
+    watcher.watch(reader)
+
+    write(path, VENUES.replace("Lobby", "Lobby, Spa"), 1_000_010)
+    assert watcher.check() is False
+    # Still being written when the next poll comes
+    write(path, VENUES.replace("Lobby", "Lobby, Spa, Gym"), 1_000_011)
+    assert watcher.check() is False
+    assert watcher.check() is True
+    assert reader.get_venue_zones("Centara Grand") == ['Lobby', 'Spa', 'Gym']
+
+
+def test_failed_consumer_keeps_previous_catalog(tmp_path):
+    path, watcher = make_watcher(tmp_path)
+
+    class Broken:
+        def __init__(self):
+            self.venues = ['old']
+
+        def reload_venue_data(self, content):
+            raise ValueError("bad parse")
+
+    broken = Broken()
+    reader = VenueDataReader(file_path=str(path))
+    watcher.watch(broken)
+    watcher.watch(reader)
+
+    write(path, VENUES.replace("Edge", "Edge, Roof"), 1_000_010)
+    assert settle(watcher) is True
+
+    assert broken.venues == ['old']
+    assert reader.get_venue_zones("Hilton Pattaya") == ['Edge', 'Roof', 'Drift Bar']
+    assert watcher.get_stats()['errors'] == 1
+
+
+def test_released_loaders_are_dropped(tmp_path):
+    path, watcher = make_watcher(tmp_path)
+    watcher.watch(VenueDataReader(file_path=str(path)))
+
+    write(path, VENUES + "\n", 1_000_010)
+    assert settle(watcher) is True
+    assert watcher.get_stats()['watching'] == 0
+    assert watcher.get_stats()['changed_venues'] == 0  # Whitespace-only edit
@@ -0,0 +1,169 @@
+"""
+Tests for the venue_data.md patch writer
+Runs against temporary copies of the venue file
+"""
+
+import shutil
+import threading
+from pathlib import Path
+
+from venue_data_reader import VenueDataReader
+from venue_data_writer import VenueDataWriter, VenueSectionIndex
+
+
+VENUES = """# BMA Social Venue Database
+
+### Hilton Pattaya
+- **Business Type**: Hotel
+- **Zone Names**: Drift Bar, Edge
+
+#### Contacts
+- **General Manager**: —
+  - Email: —
+  - Phone: —
+  - Preferred Contact: —
+  - Notes: —
+
+#### Issue History
+- No recorded issues yet.
+
+#### Special Notes
+- —
+
+---
+
+### Centara Grand
+- **Business Type**: Hotel
+- **Zone Names**: Lobby
+
+#### Contacts
+- **General Manager**: Somchai
+  - Email: somchai@chr.co.th
+  - Phone: —
+  - Preferred Contact: Email
+  - Notes: —
+
+#### Issue History
+- No recorded issues yet.
+
+#### Special Notes
+- —
+
+---
+"""
+
+
+def make_writer(tmp_path, content=VENUES):
+    path = tmp_path / "venue_data.md"
+    path.write_text(content)
+    return path, VenueDataWriter(path=path)
+
+
+def read_venue(path, name):
+    return VenueDataReader(file_path=str(path)).find_venue_by_name(name)
+
+
+def test_edits_rewrite_only_their_section(tmp_path):
+    path, writer = make_writer(tmp_path)
+    before = path.read_text()
+
+    with writer.batch() as batch:
+        batch.set_contact('Hilton Pattaya', 'General Manager', name='Rudolf', email='rudolf@hilton.com')
+        batch.set_contact('Hilton Pattaya', 'IT Manager', name='Nok', phone='+66 1')
+        batch.append_issue('Hilton Pattaya', '2025-09-16', 'Edge zone offline')
+        batch.set_field('Hilton Pattaya', 'Zone Names', 'Drift Bar, Edge, Shore')
+        batch.set_field('Hilton Pattaya', 'Timezone', 'Asia/Bangkok')
+
+    assert batch.result == {'applied': 5, 'unchanged': 0, 'missing': [], 'written': 1}
+    after = path.read_text()
+    centara = before.index('### Centara Grand')
+    assert after.endswith(before[centara:])  # Untouched section kept byte for byte
+
+    venue = read_venue(path, 'Hilton Pattaya')
+    assert venue['zone_names'] == 'Drift Bar, Edge, Shore'
+    assert venue['timezone'] == 'Asia/Bangkok'
+    assert [(c['title'], c['name'], c['email']) for c in venue['contacts']] == [
+        ('General Manager', 'Rudolf', 'rudolf@hilton.com'),
+        ('IT Manager', 'Nok', '—'),
+    ]
+    assert venue['contacts'][1]['phone'] == '+66 1'
+    assert venue['issue_history'] == [{'date': '2025-09-16', 'issue': 'Edge zone offline'}]
+    assert 'No recorded issues yet' not in after.split('### Centara Grand')[0]
+
+
+def test_index_is_shifted_not_rebuilt_after_own_writes(tmp_path):
+    path, writer = make_writer(tmp_path)
+
+    with writer.batch() as batch:
+        batch.set_contact('Hilton Pattaya', 'General Manager', notes='Decision maker for renewals')
+    with writer.batch() as batch:
+        batch.set_field('Centara Grand', 'Zone Names', 'Lobby, Pool')
+
+    assert writer.get_stats()['index_builds'] == 1
+    assert writer._index.spans == VenueSectionIndex.build(path.read_bytes()).spans
+    assert read_venue(path, 'Centara Grand')['zone_names'] == 'Lobby, Pool'
+
+    # Another script rewrote the file - the next batch indexes it again
+    path.write_text(path.read_text().replace('### Centara Grand', '### New Venue\n\n---\n\n### Centara Grand'))
+    with writer.batch() as batch:
+        batch.set_field('Centara Grand', 'Business Type', 'Resort')
+        batch.set_field('Nowhere', 'Business Type', 'Bar')
+    assert writer.get_stats()['index_builds'] == 2
+    assert batch.result['missing'] == ['Nowhere']
+    assert read_venue(path, 'Centara Grand')['business_type'] == 'Resort'
+
+
+def test_fill_only_and_dry_run(tmp_path):
+    path, writer = make_writer(tmp_path)
+
+    with writer.batch(dry_run=True) as batch:
+        batch.set_contact('Centara Grand', 'General Manager', fill_only=True,
+                          name='Someone Else', email='other@chr.co.th', phone='+66 2')
+    assert batch.result['applied'] == 1
+    assert path.read_text() == VENUES
+
+    with writer.batch() as batch:
+        batch.set_contact('Centara Grand', 'General Manager', fill_only=True,
+                          name='Someone Else', email='other@chr.co.th', phone='+66 2')
+    gm = read_venue(path, 'Centara Grand')['contacts'][0]
+    assert (gm['name'], gm['email'], gm['phone']) == ('Somchai', 'somchai@chr.co.th', '+66 2')
+
+
+def test_concurrent_writers_keep_every_edit(tmp_path):
+    path, _ = make_writer(tmp_path)
+    # Separate writers stand in for separate scripts: each has its own index
+    writers = [VenueDataWriter(path=path) for _ in range(4)]
+
+    def run(n):
+        for i in range(10):
+            with writers[n].batch() as batch:
+                batch.append_issue('Hilton Pattaya', f'2025-09-{n}{i}', f'issue {n}-{i}')
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(read_venue(path, 'Hilton Pattaya')['issue_history']) == 40
+
+
+def test_real_venue_file_single_edit(tmp_path):
+    path = tmp_path / "venue_data.md"
+    shutil.copy(Path(__file__).parent / "venue_data.md", path)
+    before = path.read_bytes()
+    writer = VenueDataWriter(path=path)
+
+    names = writer.venue_names()
+    assert len(names) == before.count(b'\n### ')
+    target = names[len(names) // 2]
+
+    with writer.batch() as batch:
+        batch.append_issue(target, '2025-09-16', 'Zone offline')
+    assert batch.result['written'] == 1
+
+    after = path.read_bytes()
+    _, start, end = writer._index.spans[writer._index.find(target)]
+    assert after[:start] == before[:start]
+    assert after[end:] == before[end - (len(after) - len(before)):]
+    assert b'- **2025-09-16**: Zone offline' in after[start:end]
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test concurrent webhook dispatch
+Replays a 50-event LINE payload and compares wall time against the old
+one-event-at-a-time loop, while checking per-user ordering
+"""
+
+import os
+import time
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from webhook_dispatcher import dispatch_events
+
+# Simulated blocking bot + LINE reply latency per event
+EVENT_LATENCY = 0.02
+
+
+def build_line_payload(users: int = 10, per_user: int = 5):
+    """LINE webhook body with interleaved events from several users"""
+    events = []
+    for seq in range(per_user):
+        for u in range(users):
+            events.append({
+                "type": "message",
+                "replyToken": f"token-{u}-{seq}",
+                "source": {"type": "user", "userId": f"U{u:032d}"},
+                "message": {"type": "text", "id": f"{u}-{seq}", "text": f"message {seq}"}
+            })
+    return {"destination": "Ubot", "events": events}
+
+
+def line_user(event):
+    return event.get("source", {}).get("userId")
+
+
+def make_handler(seen):
+    async def handler(event):
+        # The real handler offloads the bot call and LINE API to threads
+        await asyncio.to_thread(time.sleep, EVENT_LATENCY)
+        seen.setdefault(line_user(event), []).append(int(event["message"]["id"].split("-")[1]))
+    return handler
+
+
+def test_per_user_order_and_wall_time():
+    payload = build_line_payload()
+    events = payload["events"]
+    assert len(events) == 50
+
+    async def sequential():
+        seen = {}
+        handler = make_handler(seen)
+        for event in events:
+            await handler(event)
+        return seen
+
+    started = time.perf_counter()
+    asyncio.run(sequential())
+    sequential_time = time.perf_counter() - started
+
+    seen = {}
+    started = time.perf_counter()
+    results = asyncio.run(dispatch_events(events, line_user, make_handler(seen), max_concurrency=10))
+    concurrent_time = time.perf_counter() - started
+
+    print(f"50 LINE events: sequential {sequential_time*1000:.0f}ms, concurrent {concurrent_time*1000:.0f}ms")
+
+    assert len(results) == 50
+    assert all(r["status"] == "ok" for r in results)
+    assert all(order == list(range(5)) for order in seen.values())
+    assert concurrent_time < sequential_time / 3
+
+
+def test_errors_are_isolated():
+    events = build_line_payload(users=2, per_user=3)["events"]
+    processed = []
+
+    async def handler(event):
+        if event["message"]["id"] == "0-1":
+            raise RuntimeError("bot exploded")
+        processed.append(event["message"]["id"])
+
+    results = asyncio.run(dispatch_events(events, line_user, handler))
+
+    failed = [r for r in results if r["status"] == "error"]
+    assert len(failed) == 1 and failed[0]["error"] == "bot exploded"
+    # The same user's next event still runs, after the failed one
+    assert "0-2" in processed and len(processed) == 5
+    assert all("duration_ms" in r for r in results)
+
+
+def test_events_without_user_run_independently():
+    events = [{"type": "follow", "source": {}}, {"type": "unfollow", "source": {}}]
+    seen = []
+
+    async def handler(event):
+        seen.append(event["type"])
+
+    results = asyncio.run(dispatch_events(events, line_user, handler))
+    assert sorted(seen) == ["follow", "unfollow"]
+    assert results[0]["sender"] != results[1]["sender"]
+
+
+def whatsapp_payload(users, per_user):
+    """WhatsApp webhook body with interleaved text messages from several users"""
+    messages = [
+        {"from": user, "id": f"wamid.{user}.{seq}", "type": "text", "text": {"body": f"message {seq}"}}
+        for seq in range(per_user)
+        for user in users
+    ]
+    return {"entry": [{"changes": [{"field": "messages", "value": {
+        "metadata": {"phone_number_id": "100"},
+        "contacts": [{"wa_id": user, "profile": {"name": f"User {user}"}} for user in users],
+        "messages": messages,
+    }}]}]}
+
+
+def test_two_whatsapp_users_through_the_real_bot(monkeypatch):
+    """main_simple's webhook, dispatcher, bot and conversation tracker; only OpenAI and the send are stubbed"""
+    os.environ.setdefault("OPENAI_API_KEY", "test")
+    os.environ.setdefault("GEMINI_API_KEY", "test")
+    import requests
+    from fastapi.testclient import TestClient
+    import main_simple
+    from conversation_tracker import conversation_tracker
+
+    assert main_simple.music_bot is not None
+    guard = threading.Lock()
+    calls = {"active": 0, "most": 0}
+
+    def analyze(message, venue, context, confidence=0.0, possible_venues=None):
+        with guard:
+            calls["active"] += 1
+            calls["most"] = max(calls["most"], calls["active"])
+        time.sleep(EVENT_LATENCY)
+        with guard:
+            calls["active"] -= 1
+        return {"action": "respond", "response": f"re: {message}", "escalate": False}
+
+    sent = []
+
+    def post(url, headers=None, json=None):
+        sent.append((json["to"], json["text"]["body"]))
+        return SimpleNamespace(status_code=200, text="")
+
+    monkeypatch.setattr(main_simple.music_bot, "_ai_analyze_message", analyze)
+    monkeypatch.setattr(requests, "post", post)
+    monkeypatch.setenv("WHATSAPP_ACCESS_TOKEN", "token")
+
+    users = ["66800000101", "66800000102"]
+    response = TestClient(main_simple.app).post("/webhooks/whatsapp", json=whatsapp_payload(users, per_user=3))
+
+    assert response.json() == {"status": "success", "processed": 6}
+    # Bot calls never overlap; each user's replies go out in order
+    assert calls["most"] == 1
+    for user in users:
+        assert [body for to, body in sent if to == user] == [f"re: message {seq}" for seq in range(3)]
+        history = conversation_tracker.get_conversation_by_phone(user)
+        assert [m["content"] for m in history if m["role"] == "user"] == [f"message {seq}" for seq in range(3)]
+
+
+if __name__ == "__main__":
+    test_per_user_order_and_wall_time()
+    test_errors_are_isolated()
+    test_events_without_user_run_independently()
+    print("✅ Webhook dispatcher tests passed")
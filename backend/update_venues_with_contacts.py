@@ -3,7 +3,7 @@
 Update venue_data.md with contact information from the table
 """
 
-import re
+from venue_data_writer import venue_data_writer
 
 # Contact data from the table
 contacts_data = [
@@ -141,52 +141,19 @@ contacts_data = [
     {"venue": "The Aberdeen Marina Club", "name": "Ricky Hui", "title": "Assistant Director of Food & Beverage", "email": "ricky.hui@aberdeenmarinaclub.com"}
 ]
 
-# Read the current venue_data.md
-with open('/Users/benorbe/Documents/BMAsia Social Hub/backend/venue_data.md', 'r') as f:
-    lines = f.readlines()
+venue_names = venue_data_writer.venue_names()
 
-# Process each contact
-updated = 0
-for contact in contacts_data:
-    venue_name = contact['venue']
+# Queue every update, then write them all in one locked, atomic write
+with venue_data_writer.batch() as batch:
+    for contact in contacts_data:
+        venue_name = contact['venue']
 
-    # Find the venue in the file
-    for i, line in enumerate(lines):
-        if line.startswith('### '):
-            current_venue = line.replace('### ', '').strip()
-
-            # Try to match venue names (case insensitive, partial match)
+        # Try to match venue names (case insensitive, partial match)
+        for current_venue in venue_names:
             if venue_name.lower() in current_venue.lower() or current_venue.lower() in venue_name.lower():
-                # Found matching venue
                 print(f"Updating {current_venue} with contact: {contact['name']}")
-
-                # Find the Contacts section
-                j = i + 1
-                while j < len(lines) and not lines[j].startswith('### '):
-                    if '#### Contacts' in lines[j]:
-                        # Update the General Manager line
-                        k = j + 1
-                        while k < len(lines) and not lines[k].startswith('###') and not lines[k].startswith('####'):
-                            if '- **General Manager**:' in lines[k]:
-                                # Update the contact info
-                                lines[k] = f"- **General Manager**: {contact['name']}\n"
-                                if k + 1 < len(lines) and '- Email:' in lines[k + 1]:
-                                    lines[k + 1] = f"  - Email: {contact['email']}\n"
-                                if k + 2 < len(lines) and '- Phone:' in lines[k + 2]:
-                                    # Keep existing phone or add placeholder
-                                    if '—' in lines[k + 2]:
-                                        lines[k + 2] = "  - Phone: —\n"
-                                updated += 1
-                                break
-                            k += 1
-                        break
-                    j += 1
+                batch.set_contact(current_venue, 'General Manager', name=contact['name'], email=contact['email'])
                 break
 
-print(f"\nUpdated {updated} venues with contact information")
-
-# Write back to file
-with open('/Users/benorbe/Documents/BMAsia Social Hub/backend/venue_data.md', 'w') as f:
-    f.writelines(lines)
-
-print("venue_data.md has been updated!")
\ No newline at end of file
+print(f"\nUpdated {batch.result['applied']} venues with contact information")
+print("venue_data.md has been updated!")
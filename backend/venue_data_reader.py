@@ -6,9 +6,14 @@ Replaces Google Sheets for more reliable data access.
 
 import re
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
+from caller_index import CallerIndex
+from issue_index import IssueIndex
+from prompt_context import PromptContextCache
+from venue_data_watcher import venue_data_watcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,7 +24,12 @@ class VenueDataReader:
         """Initialize with path to markdown file"""
         self.file_path = Path(__file__).parent / file_path
         self.venues = []
+        self.issue_index = IssueIndex()
+        self.caller_index = CallerIndex()
+        self.prompt_contexts = PromptContextCache()
         self.load_data()
+        if self.file_path == venue_data_watcher.path:
+            venue_data_watcher.watch(self)
     
     def load_data(self):
         """Load and parse venue data from markdown file"""
@@ -32,13 +42,22 @@ class VenueDataReader:
                 content = f.read()
             
             # Parse venues from markdown
-            self.venues = self.parse_markdown(content)
+            self.reload_venue_data(content)
             logger.info(f"Loaded {len(self.venues)} venues from {self.file_path}")
             
         except Exception as e:
             logger.error(f"Error loading venue data: {e}")
             self.venues = []
     
+    def reload_venue_data(self, content: str) -> int:
+        """Parse content into a new list and swap it in (readers see the old or new list, never a partial one)"""
+        venues = self.parse_markdown(content)
+        self.issue_index.sync(venues)  # Re-indexes only venues whose issues or notes changed
+        self.caller_index.rebuild(venues)
+        self.prompt_contexts.rebuild(venues)
+        self.venues = venues
+        return len(venues)
+    
     def parse_markdown(self, content: str) -> List[Dict]:
         """Parse venue data from markdown content"""
         venues = []
@@ -228,24 +247,22 @@ class VenueDataReader:
             return venue.get('special_notes', [])
         return []
     
-    def find_similar_issue(self, issue_description: str) -> List[Dict]:
-        """Find similar issues from history across all venues"""
-        similar = []
-        issue_lower = issue_description.lower()
-        keywords = issue_lower.split()
-        
-        for venue in self.venues:
-            for issue in venue.get('issue_history', []):
-                issue_text = issue.get('issue', '').lower()
-                # Check if any keyword matches
-                if any(kw in issue_text for kw in keywords if len(kw) > 3):
-                    similar.append({
-                        'venue': venue.get('property_name'),
-                        'date': issue.get('date'),
-                        'issue': issue.get('issue')
-                    })
-        
-        return similar
+    def identify_caller(self, phone: str) -> Optional[Dict]:
+        """Catalog contact (venue, name, title, email) for a sender's phone number, if known"""
+        return self.caller_index.identify(phone)
+
+    def venue_context(self, venue_name: Optional[str], budget: Optional[int] = None) -> Tuple[str, int]:
+        """Prebuilt prompt block (text, tokens) for a venue, within budget; ('', 0) if unknown"""
+        return self.prompt_contexts.render(venue_name, budget)
+    
+    def find_similar_issue(self, issue_description: str, k: int = 5, venue: Optional[str] = None,
+                           since: Optional[str] = None, until: Optional[str] = None,
+                           kinds: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Find similar issues from history across all venues, best match first
+        (BM25 over issue histories and special notes, see issue_index)
+        """
+        return self.issue_index.search(issue_description, k=k, venue=venue, since=since, until=until, kinds=kinds)
 
 
 # Singleton instance
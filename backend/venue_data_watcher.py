@@ -0,0 +1,216 @@
+"""
+Hot reload of venue_data.md for running workers
+A background thread polls the file's mtime and size; once a change has
+settled (same mtime/size on two polls, so half-written saves from
+update_venues_with_contacts.py or an editor aren't picked up) the file is
+read once and handed to every loader that watches it.
+
+Loaders (VenueDataReader, VenueManager, CustomerManager) parse the new
+content into fresh structures and swap them in with a single assignment,
+so requests in flight keep the catalog they started with and never see a
+half-parsed one. Caches derived from venue data (zone IDs, FAQ answers)
+register change hooks and are told which venues changed.
+
+On by default; VENUE_DATA_WATCH=0 turns it off
+"""
+
+import os
+import re
+import time
+import zlib
+import logging
+import threading
+import weakref
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+VENUE_DATA_WATCH = os.environ.get('VENUE_DATA_WATCH', '1').lower() in ('1', 'true', 'yes')
+VENUE_DATA_WATCH_INTERVAL = float(os.environ.get('VENUE_DATA_WATCH_INTERVAL', '2'))
+
+VENUE_DATA_PATH = Path(__file__).parent / "venue_data.md"
+
+
+def venue_sections(content: str) -> Dict[str, int]:
+    """Lowercase venue name -> checksum of its ### section"""
+    sections = {}
+    for section in re.split(r'^### ', content, flags=re.MULTILINE)[1:]:
+        name = section.split('\n', 1)[0].strip().lower()
+        if name:
+            sections[name] = zlib.crc32(section.strip().encode())
+    return sections
+
+
+class VenueDataWatcher:
+    """Reloads venue_data.md into watching loaders when the file changes"""
+
+    def __init__(self, path: Path = VENUE_DATA_PATH, interval: float = VENUE_DATA_WATCH_INTERVAL):
+        """
+        Args:
+            path: File to watch
+            interval: Seconds between mtime polls
+        """
+        self.path = Path(path)
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        self._consumers: List[Tuple[str, weakref.ref]] = []
+        self._hooks: List[Callable[[Set[str]], Any]] = []
+        self._loaded: Optional[Tuple[int, int]] = None  # (mtime_ns, size) last reloaded or seen at start
+        self._pending: Optional[Tuple[int, int]] = None  # changed signature waiting to settle
+        self._sections: Optional[Dict[str, int]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+        self.stats = {
+            'reloads': 0,
+            'errors': 0,
+            'last_reload_ms': None,
+            'last_reload_at': None,
+            'last_mtime': None,
+            'venues': {},
+            'changed_venues': 0,
+        }
+
+    def watch(self, consumer, name: Optional[str] = None):
+        """
+        Reload consumer when the file changes. consumer.reload_venue_data(content)
+        parses and swaps in the new data and returns its venue count. Only a
+        weak reference is kept, so short-lived loaders aren't held alive.
+        """
+        name = name or type(consumer).__name__
+        with self._lock:
+            self._consumers.append((name, weakref.ref(consumer)))
+        if VENUE_DATA_WATCH:
+            self.start()
+
+    def on_change(self, hook: Callable[[Set[str]], Any]):
+        """Call hook(changed venue names, lowercase) after each reload"""
+        with self._lock:
+            self._hooks.append(hook)
+
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def check(self) -> bool:
+        """One poll: reload if the file changed and has settled. Returns True if reloaded"""
+        signature = self._signature()
+        if signature is None or signature == self._loaded:
+            self._pending = None
+            return False
+        if signature != self._pending:
+            # Changed since the last poll - wait for the writer to finish
+            self._pending = signature
+            return False
+        return self.reload()
+
+    def reload(self) -> bool:
+        """Read the file and reload every watching loader"""
+        started = time.perf_counter()
+        signature = self._signature()
+        try:
+            content = self.path.read_text()
+        except OSError as e:
+            self.stats['errors'] += 1
+            logger.error(f"Venue data reload failed to read {self.path}: {e}")
+            return False
+        if self._signature() != signature:
+            self._pending = None  # Written while we read - try again next poll
+            return False
+
+        with self._lock:
+            consumers = [(name, ref()) for name, ref in self._consumers]
+            self._consumers = [(name, ref) for name, ref in self._consumers if ref() is not None]
+            hooks = list(self._hooks)
+
+        counts: Dict[str, int] = {}
+        for name, consumer in consumers:
+            if consumer is None:
+                continue
+            try:
+                counts[name] = consumer.reload_venue_data(content)
+            except Exception as e:
+                # That loader keeps its previous catalog
+                self.stats['errors'] += 1
+                logger.error(f"Venue data reload failed for {name}: {e}")
+
+        sections = venue_sections(content)
+        if self._sections is None:
+            changed = set(sections)
+        else:
+            changed = {
+                venue for venue in set(sections) | set(self._sections)
+                if sections.get(venue) != self._sections.get(venue)
+            }
+        self._sections = sections
+
+        for hook in hooks:
+            try:
+                hook(changed)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.warning(f"Venue data change hook {getattr(hook, '__qualname__', hook)} failed: {e}")
+
+        self._loaded = signature
+        self._pending = None
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stats['reloads'] += 1
+        self.stats['last_reload_ms'] = round(elapsed, 2)
+        self.stats['last_reload_at'] = time.time()
+        self.stats['last_mtime'] = signature[0] / 1e9 if signature else None
+        self.stats['venues'] = counts
+        self.stats['changed_venues'] = len(changed)
+        logger.info(
+            f"Reloaded {self.path.name} in {elapsed:.1f}ms: "
+            + ", ".join(f"{name}={count}" for name, count in counts.items())
+            + f" ({len(changed)} venues changed)"
+        )
+        return True
+
+    def start(self):
+        """Start polling (no-op if already running)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            # Loaders read the file as they were created - changes count from here
+            self._loaded = self._signature()
+            if self._sections is None and self._loaded is not None:
+                try:
+                    self._sections = venue_sections(self.path.read_text())
+                except OSError:
+                    pass
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="venue-data-watcher", daemon=True)
+            self._thread.start()
+        logger.info(f"Watching {self.path} for changes every {self.interval}s")
+
+    def stop(self):
+        self._stopping.set()
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Venue data watcher poll failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            watching = sum(1 for _, ref in self._consumers if ref() is not None)
+        return {
+            **self.stats,
+            'venues': dict(self.stats['venues']),
+            'path': str(self.path),
+            'running': self._thread is not None and self._thread.is_alive(),
+            'watching': watching,
+        }
+
+
+# Process-wide watcher for backend/venue_data.md
+venue_data_watcher = VenueDataWatcher()
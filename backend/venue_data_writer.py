@@ -0,0 +1,377 @@
+"""
+Incremental, atomic edits to venue_data.md
+Scripts that update venue data (contact imports, contact extraction) used to
+read the whole file, rewrite it line by line and write it back in place -
+slow, visible half-written to readers, and lost updates when two ran at once.
+
+VenueDataWriter applies structured edits instead:
+
+- The file is indexed once into byte offsets of its ### venue sections. The
+  index is kept with the file's mtime/size and shifted after each of our own
+  writes, so an edit only decodes and rewrites the sections it touches.
+- Edits are batched: every edit in a batch lands in one write.
+- Writes go to a temp file in the same directory and are renamed over
+  venue_data.md, so readers (and the hot-reload watcher) see the old file or
+  the new one, never a partial one.
+- A lock file serialises writers across processes; each batch re-reads the
+  file under the lock so edits from another script aren't overwritten.
+"""
+
+import os
+import re
+import time
+import fcntl
+import logging
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+VENUE_DATA_PATH = Path(__file__).parent / "venue_data.md"
+
+# Values the template uses for "not known yet"
+EMPTY_VALUES = ('', '—', '-')
+
+# Contact detail lines, in template order
+CONTACT_DETAILS = (
+    ('email', 'Email'),
+    ('phone', 'Phone'),
+    ('preferred_contact', 'Preferred Contact'),
+    ('notes', 'Notes'),
+)
+
+NO_ISSUES = '- No recorded issues yet.'
+
+FIELD_LINE = re.compile(r'- \*\*(.+?)\*\*:')
+
+
+def _field(line: str) -> Optional[str]:
+    match = FIELD_LINE.match(line)
+    return match.group(1) if match else None
+
+
+def _is_empty(value: Optional[str]) -> bool:
+    return value is None or value.strip() in EMPTY_VALUES
+
+
+class VenueSectionIndex:
+    """Byte offsets of the ### venue sections in venue_data.md"""
+
+    def __init__(self, signature: Optional[Tuple[int, int]], spans: List[Tuple[str, int, int]]):
+        """
+        Args:
+            signature: (mtime_ns, size) of the file the offsets belong to
+            spans: (name, start, end) of each section in file order
+        """
+        self.signature = signature
+        self.spans = spans
+        self.positions: Dict[str, int] = {}
+        for position, (name, _, _) in enumerate(spans):
+            # Duplicate headings: edits go to the first one, like lookups do
+            self.positions.setdefault(name.lower(), position)
+
+    @classmethod
+    def build(cls, data: bytes, signature: Optional[Tuple[int, int]] = None) -> 'VenueSectionIndex':
+        """Find section boundaries (heading lines only - nothing is parsed)"""
+        starts = [match.start() + 1 for match in re.finditer(rb'\n### ', data)]
+        if data.startswith(b'### '):
+            starts.insert(0, 0)
+        spans = []
+        for i, start in enumerate(starts):
+            end = starts[i + 1] if i + 1 < len(starts) else len(data)
+            line_end = data.find(b'\n', start)
+            heading = data[start + 4:line_end if 0 <= line_end < end else end]
+            spans.append((heading.decode('utf-8').strip(), start, end))
+        return cls(signature, spans)
+
+    def find(self, venue_name: str) -> Optional[int]:
+        return self.positions.get(venue_name.strip().lower())
+
+    def names(self) -> List[str]:
+        return [name for name, _, _ in self.spans]
+
+
+class VenueSection:
+    """One venue's markdown, as lines, with the edit operations"""
+
+    def __init__(self, text: str):
+        self.lines = text.splitlines(keepends=True)
+
+    def text(self) -> str:
+        return ''.join(self.lines)
+
+    def _subsection(self, title: Optional[str]) -> Tuple[int, int]:
+        """
+        Line range of a #### subsection's body (title None = the fields
+        above the first ####). The range stops at the next heading or at the
+        --- separator. Returns (-1, -1) if the subsection is missing.
+        """
+        if title is None:
+            start = 1
+        else:
+            start = next(
+                (i + 1 for i, line in enumerate(self.lines) if line.startswith('#### ') and line[5:].strip() == title),
+                -1,
+            )
+            if start < 0:
+                return -1, -1
+        end = start
+        while end < len(self.lines) and not self.lines[end].startswith(('#### ', '---')):
+            end += 1
+        return start, end
+
+    def _last_content(self, start: int, end: int) -> int:
+        """Index after the last non-blank line in [start, end)"""
+        while end > start and not self.lines[end - 1].strip():
+            end -= 1
+        return end
+
+    def set_field(self, field: str, value: str) -> bool:
+        """Set a '- **Field**: value' line in the venue's main block"""
+        start, end = self._subsection(None)
+        line = f"- **{field}**: {value}\n"
+        for i in range(start, end):
+            if _field(self.lines[i]) == field:
+                if self.lines[i] == line:
+                    return False
+                self.lines[i] = line
+                return True
+        self.lines.insert(self._last_content(start, end), line)
+        return True
+
+    def set_contact(self, role: str, fill_only: bool = False, **details: Optional[str]) -> bool:
+        """
+        Update the contact with this role (adding it if missing).
+
+        Args:
+            role: Contact heading, e.g. 'General Manager'
+            fill_only: Only fill values that are still empty ('—')
+            details: name, email, phone, preferred_contact, notes - None
+                leaves the current value
+        """
+        start, end = self._subsection('Contacts')
+        if start < 0:
+            return False
+        name = details.get('name')
+
+        head = next((i for i in range(start, end) if _field(self.lines[i]) == role), None)
+        if head is None:
+            block = [f"- **{role}**: {name or '—'}\n"]
+            block += [f"  - {label}: {details.get(key) or '—'}\n" for key, label in CONTACT_DETAILS]
+            at = self._last_content(start, end)
+            if at > start:
+                block.insert(0, "\n")  # Blank line between contacts, as in the template
+            self.lines[at:at] = block
+            return True
+
+        changed = False
+        current = self.lines[head].split(':', 1)[1].strip()
+        if name is not None and not (fill_only and not _is_empty(current)) and current != name:
+            self.lines[head] = f"- **{role}**: {name}\n"
+            changed = True
+
+        # The contact's detail lines run until the next contact or blank line
+        detail_end = head + 1
+        while detail_end < end and self.lines[detail_end].startswith('  - '):
+            detail_end += 1
+        for key, label in CONTACT_DETAILS:
+            value = details.get(key)
+            if value is None:
+                continue
+            line = f"  - {label}: {value}\n"
+            for i in range(head + 1, detail_end):
+                if self.lines[i].strip().startswith(f"- {label}:"):
+                    existing = self.lines[i].split(':', 1)[1].strip()
+                    if existing != value and not (fill_only and not _is_empty(existing)):
+                        self.lines[i] = line
+                        changed = True
+                    break
+            else:
+                self.lines.insert(detail_end, line)
+                detail_end += 1
+                end += 1
+                changed = True
+        return changed
+
+    def append_issue(self, date: str, description: str) -> bool:
+        """Add '- **date**: description' to the venue's issue history"""
+        start, end = self._subsection('Issue History')
+        if start < 0:
+            return False
+        for i in range(start, end):
+            if self.lines[i].strip() == NO_ISSUES:
+                del self.lines[i]
+                end -= 1
+                break
+        self.lines.insert(self._last_content(start, end), f"- **{date}**: {description}\n")
+        return True
+
+
+class VenueDataWriter:
+    """Batched, locked, atomic structured edits to venue_data.md"""
+
+    def __init__(self, path: Path = VENUE_DATA_PATH):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self._index: Optional[VenueSectionIndex] = None
+        self.stats = {
+            'batches': 0,
+            'edits': 0,
+            'sections_written': 0,
+            'index_builds': 0,
+            'missing_venues': 0,
+            'last_write_ms': None,
+        }
+
+    def _signature(self) -> Tuple[int, int]:
+        stat = self.path.stat()
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _current_index(self, data: bytes, signature: Tuple[int, int]) -> VenueSectionIndex:
+        # Someone else wrote the file since our last write - find the sections again
+        if self._index is None or self._index.signature != signature:
+            self._index = VenueSectionIndex.build(data, signature)
+            self.stats['index_builds'] += 1
+        return self._index
+
+    def venue_names(self) -> List[str]:
+        """Section headings in file order (for callers matching names loosely)"""
+        data = self.path.read_bytes()
+        return self._current_index(data, self._signature()).names()
+
+    @contextmanager
+    def _locked(self):
+        with open(self.lock_path, 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @contextmanager
+    def batch(self, dry_run: bool = False):
+        """
+        Collect edits and write them together on exit (nothing is written
+        if the block raises).
+
+            with venue_data_writer.batch() as batch:
+                batch.set_contact('Hilton Pattaya', 'General Manager', email='gm@hilton.com')
+                batch.append_issue('Hilton Pattaya', '2025-09-16', 'Edge zone offline')
+            print(batch.result)
+        """
+        batch = VenueDataBatch(self)
+        yield batch
+        batch.result = self.apply(batch.edits, dry_run=dry_run)
+
+    def apply(self, edits: List[Tuple[str, str, tuple, dict]], dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Apply edits as (venue, operation, args, kwargs) in one write.
+
+        Returns:
+            applied (edits that changed something), unchanged, missing
+            (venues not in the file) and written (sections rewritten)
+        """
+        result = {'applied': 0, 'unchanged': 0, 'missing': [], 'written': 0}
+        if not edits:
+            return result
+
+        started = time.perf_counter()
+        with self._locked():
+            data = self.path.read_bytes()
+            index = self._current_index(data, self._signature())
+
+            sections: Dict[int, VenueSection] = {}
+            changed = set()
+            for venue, operation, args, kwargs in edits:
+                position = index.find(venue)
+                if position is None:
+                    result['missing'].append(venue)
+                    continue
+                if position not in sections:
+                    _, start, end = index.spans[position]
+                    sections[position] = VenueSection(data[start:end].decode('utf-8'))
+                if getattr(sections[position], operation)(*args, **kwargs):
+                    result['applied'] += 1
+                    changed.add(position)
+                else:
+                    result['unchanged'] += 1
+
+            result['written'] = len(changed)
+            self.stats['batches'] += 1
+            self.stats['edits'] += result['applied']
+            self.stats['missing_venues'] += len(result['missing'])
+            if result['missing']:
+                logger.warning(f"Venue data edits skipped for unknown venues: {', '.join(sorted(set(result['missing'])))}")
+            if not changed or dry_run:
+                return result
+
+            # Splice rewritten sections between untouched byte ranges
+            chunks = []
+            spans = []
+            cursor = 0
+            shift = 0
+            for position, (name, start, end) in enumerate(index.spans):
+                if position not in changed:
+                    spans.append((name, start + shift, end + shift))
+                    continue
+                chunks.append(data[cursor:start])
+                body = sections[position].text().encode('utf-8')
+                chunks.append(body)
+                spans.append((name, start + shift, start + shift + len(body)))
+                shift += len(body) - (end - start)
+                cursor = end
+            chunks.append(data[cursor:])
+
+            self._write(chunks)
+            self._index = VenueSectionIndex(self._signature(), spans)
+
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stats['sections_written'] += len(changed)
+        self.stats['last_write_ms'] = round(elapsed, 2)
+        logger.info(f"Wrote {result['applied']} venue data edits to {len(changed)} venues in {elapsed:.1f}ms")
+        return result
+
+    def _write(self, chunks: List[bytes]):
+        """Write through a temp file in the same directory and rename it into place"""
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.path.parent), prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.writelines(chunks)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, self.path.stat().st_mode & 0o777)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'indexed_sections': len(self._index.spans) if self._index else 0,
+        }
+
+
+class VenueDataBatch:
+    """Edits collected by VenueDataWriter.batch()"""
+
+    def __init__(self, writer: VenueDataWriter):
+        self.writer = writer
+        self.edits: List[Tuple[str, str, tuple, dict]] = []
+        self.result: Optional[Dict[str, Any]] = None
+
+    def set_field(self, venue: str, field: str, value: str):
+        self.edits.append((venue, 'set_field', (field, value), {}))
+
+    def set_contact(self, venue: str, role: str, fill_only: bool = False, **details: Optional[str]):
+        self.edits.append((venue, 'set_contact', (role,), {'fill_only': fill_only, **details}))
+
+    def append_issue(self, venue: str, date: str, description: str):
+        self.edits.append((venue, 'append_issue', (date, description), {}))
+
+
+# Shared writer for backend/venue_data.md
+venue_data_writer = VenueDataWriter()
@@ -7,9 +7,11 @@ import os
 import logging
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-import difflib
 import re
 
+from app.core.trigram_index import venue_index
+from venue_data_watcher import venue_data_watcher
+
 logger = logging.getLogger(__name__)
 
 class VenueIdentifier:
@@ -84,42 +86,17 @@ class VenueIdentifier:
         return None
     
     def _find_fuzzy_matches(self, user_input: str, venues_list: List[Dict]) -> List[Dict]:
-        """Find fuzzy matches with confidence scores"""
-        matches = []
-        
-        for venue in venues_list:
-            venue_name = venue.get('name', '').lower()
-            
-            # Calculate similarity score
-            score = 0.0
-            
-            # Check if input is contained in venue name
-            if user_input in venue_name:
-                score = len(user_input) / len(venue_name)
-            # Check if venue name is contained in input
-            elif venue_name in user_input:
-                score = len(venue_name) / len(user_input)
-            else:
-                # Use difflib for fuzzy matching
-                score = difflib.SequenceMatcher(None, user_input, venue_name).ratio()
-            
-            # Check individual words
-            input_words = set(user_input.split())
-            venue_words = set(venue_name.split())
-            word_overlap = len(input_words & venue_words) / max(len(input_words), len(venue_words))
-            
-            # Combine scores
-            final_score = max(score, word_overlap)
-            
-            if final_score > 0.5:  # Threshold for considering a match
-                matches.append({
-                    'venue': venue,
-                    'score': final_score
-                })
-        
-        # Sort by score
-        matches.sort(key=lambda x: x['score'], reverse=True)
-        return matches
+        """Find fuzzy matches with confidence scores (trigram candidates re-ranked by edit distance)"""
+        matches = self._search_index(venues_list).search(user_input, k=5, min_score=0.4)
+        return [{'venue': match['value'], 'score': match['score']} for match in matches]
+    
+    def _search_index(self, venues_list: List[Dict]):
+        """Trigram index of venues_list, rebuilt when the list changes (or venue data reloads)"""
+        cached = self.venue_cache.get('search_index')
+        if not cached or cached[0] is not venues_list or cached[1] != len(venues_list):
+            cached = (venues_list, len(venues_list), venue_index(venues_list))
+            self.venue_cache['search_index'] = cached
+        return cached[2]
     
     def handle_venue_selection(self, user_input: str, user_phone: str) -> Tuple[Optional[Dict], str]:
         """Handle venue selection from multiple options"""
@@ -240,4 +217,5 @@ Duration: {(datetime.utcnow() - context.get('started_at', datetime.utcnow())).se
 
 # Global instances
 venue_identifier = VenueIdentifier()
-conversation_context = ConversationContext()
\ No newline at end of file
+conversation_context = ConversationContext()
+venue_data_watcher.on_change(lambda changed: changed and venue_identifier.venue_cache.clear())
\ No newline at end of file
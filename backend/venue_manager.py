@@ -7,6 +7,8 @@ import logging
 import re
 from typing import Dict, Optional, List
 
+from venue_data_watcher import venue_data_watcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,52 +18,15 @@ class VenueManager:
     def __init__(self):
         self.venues = {}
         self.load_venue_data()
+        venue_data_watcher.watch(self)
         
     def load_venue_data(self):
         """Load venue data from venue_data.md"""
         try:
             with open('venue_data.md', 'r') as f:
                 content = f.read()
-                
-            # Parse venues from markdown
-            # Split on ### followed by any non-whitespace character
-            venue_sections = re.split(r'\n### (?=.)', content)
             
-            for venue_section in venue_sections[1:]:  # Skip header
-                lines = venue_section.strip().split('\n')
-                if not lines:
-                    continue
-                    
-                venue_name = lines[0].strip()
-                venue_info = {
-                    'name': venue_name,
-                    'zones': [],
-                    'contract_end': None,
-                    'annual_price': None,
-                    'platform': None,
-                    'hardware_type': None,
-                    'account_id': None,
-                    'contacts': []
-                }
-                
-                for line in lines[1:]:
-                    if '**Zone Names**:' in line:
-                        zones_text = line.split(':', 1)[1].strip()
-                        venue_info['zones'] = [z.strip() for z in zones_text.split(',')]
-                    elif '**Contract End**:' in line:
-                        venue_info['contract_end'] = line.split(':', 1)[1].strip()
-                    elif '**Annual Price per Zone**:' in line:
-                        venue_info['annual_price'] = line.split(':', 1)[1].strip()
-                    elif '**Music Platform**:' in line:
-                        venue_info['platform'] = line.split(':', 1)[1].strip()
-                    elif '**Hardware Type**:' in line:
-                        venue_info['hardware_type'] = line.split(':', 1)[1].strip()
-                    elif '**Soundtrack Account ID**:' in line:
-                        venue_info['account_id'] = line.split(':', 1)[1].strip()
-                
-                # Store with lowercase key for easy lookup
-                self.venues[venue_name.lower()] = venue_info
-                
+            self.reload_venue_data(content)
             logger.info(f"Loaded {len(self.venues)} venues from venue_data.md")
             
         except FileNotFoundError:
@@ -69,6 +34,52 @@ class VenueManager:
         except Exception as e:
             logger.error(f"Error loading venue data: {e}")
     
+    def reload_venue_data(self, content: str) -> int:
+        """Parse content into a new venue map and swap it in"""
+        venues = {}
+        
+        # Parse venues from markdown
+        # Split on ### followed by any non-whitespace character
+        venue_sections = re.split(r'\n### (?=.)', content)
+        
+        for venue_section in venue_sections[1:]:  # Skip header
+            lines = venue_section.strip().split('\n')
+            if not lines:
+                continue
+                
+            venue_name = lines[0].strip()
+            venue_info = {
+                'name': venue_name,
+                'zones': [],
+                'contract_end': None,
+                'annual_price': None,
+                'platform': None,
+                'hardware_type': None,
+                'account_id': None,
+                'contacts': []
+            }
+            
+            for line in lines[1:]:
+                if '**Zone Names**:' in line:
+                    zones_text = line.split(':', 1)[1].strip()
+                    venue_info['zones'] = [z.strip() for z in zones_text.split(',')]
+                elif '**Contract End**:' in line:
+                    venue_info['contract_end'] = line.split(':', 1)[1].strip()
+                elif '**Annual Price per Zone**:' in line:
+                    venue_info['annual_price'] = line.split(':', 1)[1].strip()
+                elif '**Music Platform**:' in line:
+                    venue_info['platform'] = line.split(':', 1)[1].strip()
+                elif '**Hardware Type**:' in line:
+                    venue_info['hardware_type'] = line.split(':', 1)[1].strip()
+                elif '**Soundtrack Account ID**:' in line:
+                    venue_info['account_id'] = line.split(':', 1)[1].strip()
+            
+            # Store with lowercase key for easy lookup
+            venues[venue_name.lower()] = venue_info
+        
+        self.venues = venues
+        return len(venues)
+    
     def find_venue(self, message: str) -> Optional[Dict]:
         """Find venue mentioned in message - returns None for low confidence matches"""
         venue, confidence = self.find_venue_with_confidence(message)
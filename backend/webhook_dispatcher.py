@@ -0,0 +1,107 @@
+"""
+Concurrent dispatch of multi-event webhook payloads
+Fans a WhatsApp/LINE batch out across senders with bounded concurrency while
+keeping each sender's events in their original order
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# How many senders from one delivery may be processed at the same time
+WEBHOOK_MAX_CONCURRENCY = int(os.environ.get('WEBHOOK_MAX_CONCURRENCY', '8'))
+
+# The bot, its venue caches and the Google Chat client are not thread-safe,
+# so work touching them runs one call at a time; platform sends still overlap
+bot_lock = threading.Lock()
+
+
+def _call_locked(func: Callable[..., Any], *args, **kwargs) -> Any:
+    with bot_lock:
+        return func(*args, **kwargs)
+
+
+async def run_serialized(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking bot / Google Chat call in a worker thread, one at a time"""
+    return await asyncio.to_thread(_call_locked, func, *args, **kwargs)
+
+
+def group_by_sender(events: List[Any], key_fn: Callable[[Any], Optional[str]]) -> "OrderedDict[str, List[tuple]]":
+    """
+    Group events by sender, preserving arrival order inside each group.
+
+    Events without a sender key get a group of their own so they never
+    block (or are blocked by) anything else.
+
+    Returns:
+        OrderedDict of sender key -> list of (original index, event)
+    """
+    groups: "OrderedDict[str, List[tuple]]" = OrderedDict()
+    for index, event in enumerate(events):
+        key = key_fn(event) or f"_anonymous_{index}"
+        groups.setdefault(key, []).append((index, event))
+    return groups
+
+
+async def dispatch_events(
+    events: List[Any],
+    key_fn: Callable[[Any], Optional[str]],
+    handler: Callable[[Any], Awaitable[Any]],
+    max_concurrency: int = None,
+    source: str = "webhook"
+) -> List[Dict[str, Any]]:
+    """
+    Process a batch of webhook events concurrently across senders.
+
+    Events sharing a sender key run strictly one after another; different
+    senders run in parallel, at most ``max_concurrency`` at a time. A failing
+    event is recorded and does not stop later events from the same sender.
+
+    Args:
+        events: Events in delivery order
+        key_fn: Returns the sender key (user ID / phone) for an event
+        handler: Coroutine function processing a single event
+        max_concurrency: Concurrent sender limit (defaults to WEBHOOK_MAX_CONCURRENCY)
+        source: Label used in logs
+
+    Returns:
+        One result per event, in delivery order, with sender, status,
+        duration_ms and error
+    """
+    if not events:
+        return []
+
+    semaphore = asyncio.Semaphore(max_concurrency or WEBHOOK_MAX_CONCURRENCY)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(events)
+    groups = group_by_sender(events, key_fn)
+
+    async def run_sender(sender: str, items: List[tuple]):
+        async with semaphore:
+            for index, event in items:
+                started = time.perf_counter()
+                result = {"index": index, "sender": sender, "status": "ok", "error": None}
+                try:
+                    await handler(event)
+                except Exception as e:
+                    logger.error(f"{source} event {index} from {sender} failed: {e}", exc_info=True)
+                    result["status"] = "error"
+                    result["error"] = str(e)
+                result["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                results[index] = result
+
+    batch_started = time.perf_counter()
+    await asyncio.gather(*(run_sender(sender, items) for sender, items in groups.items()))
+    wall_ms = (time.perf_counter() - batch_started) * 1000
+
+    failed = sum(1 for r in results if r["status"] == "error")
+    logger.info(
+        f"{source} batch: {len(events)} events from {len(groups)} senders "
+        f"in {wall_ms:.0f}ms ({failed} failed)"
+    )
+    return results
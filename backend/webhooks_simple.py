@@ -49,12 +49,14 @@ except ImportError as e:
 # Import database manager
 try:
     from database import db_manager
+    from message_writer import message_writer
     DB_ENABLED = True
     logger.info("✅ Database module loaded successfully")
 except ImportError as e:
     logger.warning(f"⚠️ Database module not available: {e}")
     DB_ENABLED = False
     db_manager = None
+    message_writer = None
 
 
 # WhatsApp Webhooks
@@ -158,11 +160,10 @@ async def whatsapp_webhook(
                     content = message.get("text", {}).get("body", "")
                     logger.info(f"WhatsApp message: {message_id} from {from_number} ({contact_name}): {content}")
                     
-                    # Store message in database if enabled
-                    conversation_id = None
-                    if DB_ENABLED and db_manager:
+                    # Queue message for batched persistence if enabled
+                    if DB_ENABLED and message_writer:
                         try:
-                            conversation_id = db_manager.store_message(
+                            message_writer.enqueue(
                                 channel="whatsapp",
                                 user_phone=from_number,
                                 user_name=contact_name,
@@ -171,9 +172,8 @@ async def whatsapp_webhook(
                                 direction="inbound",
                                 message_type=message_type
                             )
-                            logger.info(f"Message stored in conversation {conversation_id}")
                         except Exception as e:
-                            logger.error(f"Failed to store message: {e}")
+                            logger.error(f"Failed to queue message: {e}")
                     
                     # Generate and send response if bot is enabled
                     if BOT_ENABLED and process_whatsapp_message and sender:
@@ -191,10 +191,10 @@ async def whatsapp_webhook(
                                 if success:
                                     logger.info(f"Response sent to {from_number}")
                                     
-                                    # Store outbound message in database
-                                    if DB_ENABLED and db_manager and conversation_id:
+                                    # Queue outbound message for persistence
+                                    if DB_ENABLED and message_writer:
                                         try:
-                                            db_manager.store_message(
+                                            message_writer.enqueue(
                                                 channel="whatsapp",
                                                 user_phone=from_number,
                                                 user_name=contact_name,
@@ -204,9 +204,8 @@ async def whatsapp_webhook(
                                                 message_type="text",
                                                 ai_response=True
                                             )
-                                            logger.info("Response stored in database")
                                         except Exception as e:
-                                            logger.error(f"Failed to store response: {e}")
+                                            logger.error(f"Failed to queue response: {e}")
                                 else:
                                     logger.error(f"Failed to send response to {from_number}")
                             else:
@@ -7,6 +7,7 @@ without hardcoding zone IDs
 import json
 import logging
 import os
+import re
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
@@ -18,6 +19,9 @@ try:
 except ImportError:
     REDIS_AVAILABLE = False
 
+from redis_near_cache import REDIS_NEAR_CACHE, RedisNearCache
+from venue_data_watcher import venue_data_watcher
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -30,6 +34,7 @@ class ZoneDiscoveryService:
     
     def __init__(self):
         self.redis_client = None
+        self.near_cache = None
         self.cache_ttl = 3600  # 1 hour cache
         self._init_redis()
         
@@ -49,6 +54,10 @@ class ZoneDiscoveryService:
             self.redis_client = redis.from_url(redis_url, decode_responses=True)
             self.redis_client.ping()
             logger.info("✅ Redis connected for zone caching")
+            if REDIS_NEAR_CACHE:
+                # Zone IDs almost never change - serve repeat lookups from memory
+                self.near_cache = RedisNearCache(self.redis_client, prefixes=["zone:"], name="zone_discovery")
+                self.near_cache.start()
         except Exception as e:
             logger.warning(f"⚠️ Redis not available for caching: {e}")
             self.redis_client = None
@@ -66,7 +75,10 @@ class ZoneDiscoveryService:
         # 1. Check cache first
         if self.redis_client:
             try:
-                cached = self.redis_client.get(cache_key)
+                if self.near_cache:
+                    cached = self.near_cache.get(cache_key, self.redis_client.get)
+                else:
+                    cached = self.redis_client.get(cache_key)
                 if cached:
                     logger.info(f"✅ Zone found in cache: {cached[:20]}...")
                     return cached
@@ -198,11 +210,34 @@ class ZoneDiscoveryService:
         """Cache zone ID for future use"""
         if self.redis_client:
             try:
+                if self.near_cache:
+                    self.near_cache.note_write(key)
                 self.redis_client.setex(key, self.cache_ttl, zone_id)
                 logger.info(f"Cached zone ID for {key}")
             except Exception as e:
                 logger.warning(f"Failed to cache zone: {e}")
     
+    def forget_venues(self, venue_names) -> int:
+        """Drop cached zone IDs for venues (lowercase names) whose venue data changed"""
+        if not self.redis_client or not venue_names:
+            return 0
+        
+        removed = 0
+        try:
+            for venue_name in venue_names:
+                # Escape glob characters in the venue name
+                pattern = re.sub(r'([\\*?\[\]])', r'\\\1', venue_name.lower())
+                keys = list(self.redis_client.scan_iter(match=f"zone:{pattern}:*", count=500))
+                if keys:
+                    if self.near_cache:
+                        self.near_cache.invalidate(keys)
+                    removed += self.redis_client.delete(*keys)
+            if removed:
+                logger.info(f"Dropped {removed} cached zone IDs for {len(venue_names)} changed venues")
+        except Exception as e:
+            logger.warning(f"Failed to drop cached zone IDs: {e}")
+        return removed
+    
     def discover_and_cache_all_zones(self) -> Dict[str, Dict[str, str]]:
         """
         Discover and cache all accessible zones
@@ -244,6 +279,7 @@ class ZoneDiscoveryService:
 
 # Global instance
 zone_discovery = ZoneDiscoveryService()
+venue_data_watcher.on_change(zone_discovery.forget_venues)
 
 def get_zone_id(venue_name: str, zone_name: str) -> Optional[str]:
     """